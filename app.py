@@ -8,14 +8,18 @@ import sys
 import logging
 from datetime import datetime
 import pandas as pd
-import requests
 import time
 
 # 添加src目录到路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
+import dash
 from dash import Dash, html, dcc, callback, Output, Input
-import plotly.graph_objs as go
+
+from src.storage.snapshot_store import SnapshotStore, SNAPSHOT_PATH_ENV
+from src.data_sources.transport import get_session, base_url
+from src.data_sources.deadline import fetch_sections
+from src.utils.formatter import format_currency, format_percentage, format_currency_array, format_percentage_array
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +30,9 @@ app = Dash(__name__,
            title="TokenData - 主流代币监控",
            meta_tags=[{"name": "viewport", "content": "width=device-width, initial-scale=1"}])
 
+# WSGI入口（供gunicorn/waitress使用）
+server = app.server
+
 # 全局数据存储
 global_data = {
     'market_data': pd.DataFrame(),
@@ -37,8 +44,9 @@ class SimpleDataAggregator:
     """简化的数据聚合器，适合Cloudflare部署"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.base_url = "https://api.coingecko.com/api/v3"
+        # 共享连接池（keep-alive、超时、重试由传输层统一配置）
+        self.session = get_session('coingecko')
+        self.base_url = base_url('coingecko')
     
     def get_market_data(self, limit=50):
         """获取市场数据"""
@@ -105,57 +113,43 @@ class SimpleDataAggregator:
             logger.error(f"获取全球摘要失败: {e}")
             return {}
 
-def format_currency(value, decimals=2):
-    """格式化货币数值"""
-    try:
-        if value is None or value == 0:
-            return "$0"
-        
-        abs_value = abs(value)
-        
-        if abs_value >= 1_000_000_000:
-            formatted = value / 1_000_000_000
-            return f"${formatted:.{decimals}f}B"
-        elif abs_value >= 1_000_000:
-            formatted = value / 1_000_000
-            return f"${formatted:.{decimals}f}M"
-        elif abs_value >= 1_000:
-            formatted = value / 1_000
-            return f"${formatted:.{decimals}f}K"
-        else:
-            return f"${value:.{decimals}f}"
-            
-    except Exception:
-        return f"${value}"
-
-def format_percentage(value, decimals=2):
-    """格式化百分比"""
-    try:
-        if value is None:
-            return "N/A"
-        return f"{value:+.{decimals}f}%"
-    except Exception:
-        return f"{value}%"
-
 # 数据聚合器
 aggregator = SimpleDataAggregator()
 
+# 共享快照存储（生产模式下由独立刷新进程写入，worker只读取）
+snapshot_store = SnapshotStore() if os.getenv(SNAPSHOT_PATH_ENV) else None
+
+# 每次刷新的总时间预算（秒）
+refresh_budget = float(os.getenv('TOKENDATA_REFRESH_BUDGET', '30'))
+
+# 上一次获取的快照（预算内未获取到的部分从这里沿用）
+last_snapshot = {}
+
+def fetch_snapshot():
+    """获取一次完整的数据快照（预算内未获取到的部分沿用上一次的数据）"""
+    snapshot = fetch_sections({
+        # 获取市场数据
+        'market_data': lambda: aggregator.get_market_data(50),
+        # 获取全球摘要
+        'global_summary': aggregator.get_global_summary
+    }, refresh_budget, previous=last_snapshot)
+    last_snapshot.update(snapshot)
+    snapshot['last_update'] = datetime.now()
+    
+    return snapshot
+
 def update_data():
     """更新数据"""
     try:
-        logger.info("开始更新数据...")
+        if snapshot_store is not None:
+            # 生产模式：读取刷新进程写入的共享快照
+            snapshot = snapshot_store.load()
+            if snapshot:
+                global_data.update(snapshot)
+            return
         
-        # 获取市场数据
-        df = aggregator.get_market_data(50)
-        if not df.empty:
-            global_data['market_data'] = df
-        
-        # 获取全球摘要
-        summary = aggregator.get_global_summary()
-        if summary:
-            global_data['global_summary'] = summary
-        
-        global_data['last_update'] = datetime.now()
+        logger.info("开始更新数据...")
+        global_data.update(fetch_snapshot())
         logger.info("数据更新完成")
         
     except Exception as e:
@@ -216,29 +210,14 @@ app.layout = html.Div([
     )
 ], style={'maxWidth': '1200px', 'margin': '0 auto', 'padding': '20px', 'fontFamily': 'Arial, sans-serif'})
 
-# 回调函数：更新最后更新时间
-@callback(
-    Output('last-update', 'children'),
-    [Input('refresh-btn', 'n_clicks'),
-     Input('interval-component', 'n_intervals')]
-)
-def update_last_update(n_clicks, n_intervals):
-    if n_clicks > 0 or n_intervals > 0:
-        update_data()
+def render_last_update():
+    """渲染最后更新时间"""
     if global_data['last_update']:
         return global_data['last_update'].strftime('%Y-%m-%d %H:%M:%S')
     return "未更新"
 
-# 回调函数：更新市场概况
-@callback(
-    Output('market-summary', 'children'),
-    [Input('refresh-btn', 'n_clicks'),
-     Input('interval-component', 'n_intervals')]
-)
-def update_market_summary(n_clicks, n_intervals):
-    if n_clicks > 0 or n_intervals > 0:
-        update_data()
-    
+def render_market_summary():
+    """渲染市场概况"""
     summary = global_data['global_summary']
     if not summary:
         return html.Div("无法获取市场数据", style={'textAlign': 'center', 'color': '#e74c3c'})
@@ -292,17 +271,8 @@ def update_market_summary(n_clicks, n_intervals):
     
     return market_summary + [data_info]
 
-# 回调函数：更新代币表格
-@callback(
-    Output('token-table', 'children'),
-    [Input('limit-dropdown', 'value'),
-     Input('refresh-btn', 'n_clicks'),
-     Input('interval-component', 'n_intervals')]
-)
-def update_token_table(limit, n_clicks, n_intervals):
-    if n_clicks > 0 or n_intervals > 0:
-        update_data()
-    
+def render_token_table(limit):
+    """渲染代币表格"""
     df = global_data['market_data']
     if df.empty:
         return html.Div("无法获取代币数据", style={'textAlign': 'center', 'color': '#e74c3c'})
@@ -310,41 +280,48 @@ def update_token_table(limit, n_clicks, n_intervals):
     # 限制显示数量
     df_display = df.head(limit)
     
+    # 整列格式化
+    def column(name):
+        return df_display[name] if name in df_display else pd.Series(0, index=df_display.index)
+    
+    changes = [column('change_1h'), column('change_24h'), column('change_7d')]
+    change_texts = [format_percentage_array(change, 2).tolist() for change in changes]
+    
+    # 计算交易量
+    volume_24h = column('volume_24h').to_numpy(dtype=float, na_value=float('nan'))
+    volume_1h = volume_24h / 24  # 估算1小时交易量
+    volume_7d = volume_24h * 7   # 估算7天交易量
+    
+    prices = format_currency_array(df_display['current_price'], 2).tolist()
+    volume_texts = [format_currency_array(volume, 2).tolist() for volume in (volume_1h, volume_24h, volume_7d)]
+    market_caps = format_currency_array(df_display['market_cap'], 2).tolist()
+    
+    # 变化颜色
+    def get_change_color(change):
+        if pd.isna(change):
+            return '#95a5a6'
+        return '#27ae60' if change > 0 else '#e74c3c' if change < 0 else '#95a5a6'
+    
     # 创建表格行
     rows = []
-    for _, row in df_display.iterrows():
-        change_1h = row.get('change_1h', 0)
-        change_24h = row.get('change_24h', 0)
-        change_7d = row.get('change_7d', 0)
-        
-        # 变化颜色
-        def get_change_color(change):
-            if change is None:
-                return '#95a5a6'
-            return '#27ae60' if change > 0 else '#e74c3c' if change < 0 else '#95a5a6'
-        
-        # 计算交易量
-        volume_24h = row.get('volume_24h', 0)
-        volume_1h = volume_24h / 24  # 估算1小时交易量
-        volume_7d = volume_24h * 7   # 估算7天交易量
-        
+    for i, (rank, name, symbol) in enumerate(zip(df_display['rank'], df_display['name'], df_display['symbol'])):
         rows.append(html.Tr([
-            html.Td(f"#{row['rank']}", style={'textAlign': 'center', 'fontWeight': 'bold'}),
+            html.Td(f"#{rank}", style={'textAlign': 'center', 'fontWeight': 'bold'}),
             html.Td([
-                html.Div(row['name'], style={'fontWeight': 'bold'}),
-                html.Div(row['symbol'].upper(), style={'fontSize': '12px', 'color': '#7f8c8d'})
+                html.Div(name, style={'fontWeight': 'bold'}),
+                html.Div(symbol.upper(), style={'fontSize': '12px', 'color': '#7f8c8d'})
             ]),
-            html.Td(format_currency(row['current_price'], 2), style={'textAlign': 'right', 'fontWeight': 'bold'}),
-            html.Td(format_percentage(change_1h, 2), 
-                   style={'textAlign': 'right', 'color': get_change_color(change_1h), 'fontWeight': 'bold'}),
-            html.Td(format_percentage(change_24h, 2), 
-                   style={'textAlign': 'right', 'color': get_change_color(change_24h)}),
-            html.Td(format_percentage(change_7d, 2), 
-                   style={'textAlign': 'right', 'color': get_change_color(change_7d)}),
-            html.Td(format_currency(volume_1h, 2), style={'textAlign': 'right', 'fontSize': '12px'}),
-            html.Td(format_currency(volume_24h, 2), style={'textAlign': 'right'}),
-            html.Td(format_currency(volume_7d, 2), style={'textAlign': 'right', 'fontSize': '12px'}),
-            html.Td(format_currency(row['market_cap'], 2), style={'textAlign': 'right'})
+            html.Td(prices[i], style={'textAlign': 'right', 'fontWeight': 'bold'}),
+            html.Td(change_texts[0][i], 
+                   style={'textAlign': 'right', 'color': get_change_color(changes[0].iat[i]), 'fontWeight': 'bold'}),
+            html.Td(change_texts[1][i], 
+                   style={'textAlign': 'right', 'color': get_change_color(changes[1].iat[i])}),
+            html.Td(change_texts[2][i], 
+                   style={'textAlign': 'right', 'color': get_change_color(changes[2].iat[i])}),
+            html.Td(volume_texts[0][i], style={'textAlign': 'right', 'fontSize': '12px'}),
+            html.Td(volume_texts[1][i], style={'textAlign': 'right'}),
+            html.Td(volume_texts[2][i], style={'textAlign': 'right', 'fontSize': '12px'}),
+            html.Td(market_caps[i], style={'textAlign': 'right'})
         ]))
     
     return html.Table([
@@ -363,5 +340,27 @@ def update_token_table(limit, n_clicks, n_intervals):
         html.Tbody(rows)
     ], style={'width': '100%', 'borderCollapse': 'collapse', 'backgroundColor': 'white', 'borderRadius': '8px', 'overflow': 'hidden'})
 
+# 回调函数：统一刷新入口
+# 每次触发最多刷新一次数据，再把结果分发到所有面板
+@callback(
+    [Output('last-update', 'children'),
+     Output('market-summary', 'children'),
+     Output('token-table', 'children')],
+    [Input('refresh-btn', 'n_clicks'),
+     Input('interval-component', 'n_intervals'),
+     Input('limit-dropdown', 'value')]
+)
+def refresh_dashboard(n_clicks, n_intervals, limit):
+    triggered = {item['prop_id'].split('.')[0] for item in dash.callback_context.triggered}
+    
+    if snapshot_store is not None or (triggered & {'refresh-btn', 'interval-component'} and (n_clicks or n_intervals)):
+        update_data()
+    
+    # 只切换显示数量时，其他面板保持不变
+    if triggered == {'limit-dropdown'}:
+        return dash.no_update, dash.no_update, render_token_table(limit)
+    
+    return render_last_update(), render_market_summary(), render_token_table(limit)
+
 if __name__ == '__main__':
     app.run_server(debug=True, host='0.0.0.0', port=8050)
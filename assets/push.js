@@ -0,0 +1,137 @@
+/*
+ * TokenData 增量推送客户端
+ * 订阅服务端SSE推送的行级差异（只包含当前显示的前N行），按 data-coin / data-field 原地更新已有单元格的文本和颜色。
+ * 表格节点归Dash（React）管理，脚本不增删或移动行：行有增删或顺序变化时点击隐藏的 push-sync 按钮，
+ * 由Dash回调按服务端当前数据重新渲染表格
+ */
+(function () {
+    var source = null;
+    var sourceUrl = null;
+    // 连接被拒绝（如服务端连接数已满）后，在此时间之前不再重连，期间由Dash定时刷新
+    var retryAt = 0;
+    var RETRY_DELAY_MS = 60000;
+
+    function setField(row, field, value) {
+        if (field.slice(-6) === '_color') {
+            var colored = row.querySelector('[data-field="' + field.slice(0, -6) + '"]');
+            if (colored) {
+                colored.style.color = value;
+            }
+            return;
+        }
+        var cell = row.querySelector('[data-field="' + field + '"]');
+        if (cell) {
+            cell.textContent = value;
+        }
+    }
+
+    function findRow(tbody, coinId) {
+        return tbody.querySelector('tr[data-coin="' + coinId + '"]');
+    }
+
+    function sameOrder(tbody, order) {
+        if (!order) {
+            return true;
+        }
+        if (tbody.rows.length !== order.length) {
+            return false;
+        }
+        for (var i = 0; i < order.length; i++) {
+            if (tbody.rows[i].getAttribute('data-coin') !== order[i]) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    function requestRender() {
+        var button = document.getElementById('push-sync');
+        if (button) {
+            button.click();
+        }
+    }
+
+    function applyDiff(diff) {
+        var table = document.querySelector('table[data-push]');
+        var tbody = table && table.tBodies[0];
+        if (!tbody) {
+            return;
+        }
+
+        if (diff.last_update) {
+            var lastUpdate = document.getElementById('last-update');
+            if (lastUpdate) {
+                lastUpdate.textContent = diff.last_update;
+            }
+        }
+
+        // 行的增删和顺序由服务端重新渲染，渲染结果已包含本次所有变化
+        if ((diff.added || []).length || (diff.removed || []).length || !sameOrder(tbody, diff.order)) {
+            requestRender();
+            return;
+        }
+
+        var changed = diff.changed || {};
+        Object.keys(changed).forEach(function (coinId) {
+            var row = findRow(tbody, coinId);
+            if (!row) {
+                return;
+            }
+            var fields = changed[coinId];
+            Object.keys(fields).forEach(function (field) {
+                setField(row, field, fields[field]);
+            });
+        });
+    }
+
+    function streamUrl(table) {
+        var url = table.getAttribute('data-push');
+        var limit = table.getAttribute('data-limit');
+        if (limit) {
+            url += (url.indexOf('?') < 0 ? '?' : '&') + 'limit=' + encodeURIComponent(limit);
+        }
+        return url;
+    }
+
+    function disconnect() {
+        if (source) {
+            source.close();
+        }
+        source = null;
+        sourceUrl = null;
+    }
+
+    function connect() {
+        var table = document.querySelector('table[data-push]');
+        if (!table || !window.EventSource) {
+            return;
+        }
+        var url = streamUrl(table);
+        // 显示数量变化时（Dash重新渲染表格）按新的范围重新订阅
+        if (source && url === sourceUrl && source.readyState !== EventSource.CLOSED) {
+            return;
+        }
+        if (source && source.readyState === EventSource.CLOSED && url === sourceUrl) {
+            // 服务端拒绝或断开且浏览器不再自动重连，稍后再试
+            disconnect();
+            retryAt = Date.now() + RETRY_DELAY_MS;
+        }
+        if (Date.now() < retryAt) {
+            return;
+        }
+
+        disconnect();
+        source = new EventSource(url);
+        sourceUrl = url;
+        source.addEventListener('diff', function (event) {
+            try {
+                applyDiff(JSON.parse(event.data));
+            } catch (e) {
+                console.warn('应用推送更新失败', e);
+            }
+        });
+    }
+
+    // 表格由Dash回调异步渲染，定期检查表格和订阅状态
+    setInterval(connect, 1000);
+})();
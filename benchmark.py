@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+离线性能基准
+启动本地CoinGecko/Binance模拟服务，在独立进程中测量Web应用的端到端刷新耗时、
+回调吞吐量、内存占用和ccxt行情耗时（默认50/500/5000个代币）
+
+用法:
+    python benchmark.py                                  # 默认规模
+    python benchmark.py --sizes 50 500 --latency 0.05    # 每个上游请求延迟50ms
+    python benchmark.py --rate-limit-every 10            # 每10个请求注入一次429
+    python benchmark.py --output bench.json              # 保存结果
+    python benchmark.py --baseline bench.json            # 与基线比较，退化超过阈值时返回1
+    python benchmark.py --record fixtures/               # 从真实CoinGecko录制响应
+    python benchmark.py --fixtures fixtures/             # 回放录制的响应
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# 添加src目录到Python路径
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.benchmark.mock_api import MarketFixtures, MockMarketServer, record_fixtures
+from src.benchmark.suite import DEFAULT_THRESHOLD, compare_results, format_results
+
+DEFAULT_SIZES = [50, 500, 5000]
+
+
+def run_case(size: int, server: MockMarketServer, rounds: int, duration: float) -> dict:
+    """在独立进程中运行单个规模的基准（每个进程只加载一次Dash应用）"""
+    env = {**os.environ, **server.env()}
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--case', str(size),
+         '--mock-url', server.url, '--rounds', str(rounds), '--duration', str(duration)],
+        capture_output=True, text=True, env=env, timeout=1800,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+    if output.returncode != 0 or not lines:
+        raise RuntimeError(f"{size} 个代币的基准失败:\n{output.stderr[-2000:]}")
+    return json.loads(lines[-1])
+
+
+def run_case_in_process(size: int, mock_url: str, rounds: int, duration: float) -> dict:
+    """子进程入口：测量并输出一行JSON"""
+    import logging
+    logging.disable(logging.WARNING)
+
+    from src.benchmark.suite import run_web_case, run_ccxt_case
+
+    metrics = run_web_case(size, mock_url, rounds, duration)
+    metrics.update(run_ccxt_case(rounds))
+    return metrics
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='TokenData 离线性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='代币宇宙大小')
+    parser.add_argument('--rounds', type=int, default=5, help='每项计时的轮数')
+    parser.add_argument('--duration', type=float, default=1.0, help='吞吐量测量时长(秒)')
+    parser.add_argument('--latency', type=float, default=0.02, help='模拟上游的单请求延迟(秒)')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='每N个上游请求返回一次429（0为关闭）')
+    parser.add_argument('--retry-after', type=int, default=1, help='429响应的Retry-After(整数秒)')
+    parser.add_argument('--fixtures', type=str, default=None, help='录制响应目录（默认按种子生成数据）')
+    parser.add_argument('--record', type=str, default=None, help='从真实CoinGecko录制响应到目录后退出')
+    parser.add_argument('--output', type=str, default=None, help='结果保存路径(JSON)')
+    parser.add_argument('--baseline', type=str, default=None, help='基线结果路径，退化超过阈值时返回1')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='允许的相对退化')
+    parser.add_argument('--case', type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--mock-url', type=str, default=None, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.case is not None:
+        print(json.dumps(run_case_in_process(args.case, args.mock_url, args.rounds, args.duration)))
+        return 0
+
+    if args.record:
+        saved = record_fixtures(args.record)
+        print(f"✅ 已录制 {len(saved)} 个响应到 {args.record}")
+        return 0 if saved else 1
+
+    recorded = MarketFixtures.load_recorded(args.fixtures) if args.fixtures else None
+
+    print("🚀 TokenData 离线性能基准")
+    print(f"⚙️ 规模: {args.sizes}，上游延迟: {args.latency * 1000:.0f}ms，"
+          f"429注入: {'每%d个请求' % args.rate_limit_every if args.rate_limit_every else '关闭'}")
+    print("=" * 50)
+
+    results = {}
+    for size in args.sizes:
+        print(f"⏱️ {size} 个代币...")
+        fixtures = MarketFixtures(size, recorded=recorded)
+        with MockMarketServer(fixtures, args.latency, args.rate_limit_every, args.retry_after) as server:
+            metrics = run_case(size, server, args.rounds, args.duration)
+            stats = server.stats()
+        metrics.update({
+            'upstream_requests': stats['requests'],
+            'rate_limited': stats['rate_limited'],
+            'upstream_mb': stats['bytes_sent'] / 1024 / 1024
+        })
+        results[f"{size}"] = metrics
+
+    print()
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n❌ 发现 {len(regressions)} 项退化（阈值 {args.threshold:.0%}）:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print(f"\n✅ 与基线相比没有超过 {args.threshold:.0%} 的退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
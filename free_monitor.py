@@ -5,15 +5,22 @@ TokenData 免费监控程序
 """
 import sys
 import os
-import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import argparse
 
 # 添加src目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.data_sources.free_data_aggregator import FreeDataAggregator
+# 导入耗时统计需在其他模块导入前启用
+from src.utils.import_profile import ImportProfiler
+import_profiler = ImportProfiler.from_argv()
+
+# numpy/pandas（约0.4秒）及依赖它们的模块在用到的方法内导入，
+# 导入本模块、--help 和参数错误时不加载
+from src.utils.scheduler import IntervalScheduler, OVERLAP_POLICIES, OVERLAP_SKIP, format_cycle_report
+from src.utils.metrics import metrics
+from src.utils.profiling import CycleProfiler, DEFAULT_PROFILE_DIR, PROFILE_DIR_ENV
 
 # 配置日志
 logging.basicConfig(
@@ -26,97 +33,84 @@ class FreeMarketMonitor:
     """免费市场监控器"""
     
     def __init__(self):
+        from src.data_sources.free_data_aggregator import FreeDataAggregator
+        
         self.aggregator = FreeDataAggregator()
     
     def print_hourly_market_data(self, limit: int = 20):
         """打印小时级市场数据"""
-        print("\n" + "="*100)
-        print("📊 小时级市场数据监控")
-        print("="*100)
-        print(f"⏰ 更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("-" * 100)
+        import numpy as np
+        from src.utils.terminal_table import (TerminalTable, banner, icon_cells, join_cells, number_cells, numeric,
+                                              text_cells, write_block)
         
         # 获取市场数据
         df = self.aggregator.get_hourly_market_data(limit)
         
         if df.empty:
             print("❌ 无法获取市场数据")
-            return
+            return False
         
-        # 显示表头
-        print(f"{'排名':<4} {'代币':<15} {'价格':<12} {'1h变化':<8} {'24h变化':<8} {'7d变化':<8} {'成交量':<15} {'市值':<15}")
-        print("-" * 100)
+        df = df.head(limit)
+        change_1h = numeric(df['change_1h'])
+        change_24h = numeric(df['change_24h'])
         
-        # 显示数据
-        for _, row in df.head(limit).iterrows():
-            # 格式化价格变化
-            change_1h = row.get('change_1h', 0)
-            change_24h = row.get('change_24h', 0)
-            change_7d = row.get('change_7d', 0)
-            
-            # 选择变化指标（优先显示1小时变化）
-            display_change = change_1h if change_1h is not None else change_24h
-            
-            # 颜色指示器
-            if display_change is not None:
-                if display_change > 0:
-                    change_icon = "🟢"
-                elif display_change < 0:
-                    change_icon = "🔴"
-                else:
-                    change_icon = "⚪"
-            else:
-                change_icon = "⚪"
-                display_change = 0
-            
-            print(f"{row['rank']:<4} {row['name']:<15} ${row['price']:<11,.2f} "
-                  f"{change_icon} {display_change:<6.2f}% "
-                  f"{change_24h:<6.2f}% {change_7d:<6.2f}% "
-                  f"${row['volume_24h']:<14,.0f} ${row['market_cap']:<14,.0f}")
+        # 选择变化指标（优先显示1小时变化）
+        display_change = np.where(np.isnan(change_1h), change_24h, change_1h)
+        
+        table = TerminalTable(100)
+        table.add_column('排名', text_cells(df['rank']), 4)
+        table.add_column('代币', text_cells(df['name']), 15)
+        table.add_column('价格', number_cells(df['price'], prefix='$'), 12)
+        table.add_column('1h变化', join_cells(icon_cells(display_change), number_cells(display_change, '.2f', suffix='%')), 10)
+        table.add_column('24h变化', number_cells(change_24h, '.2f', suffix='%'), 8)
+        table.add_column('7d变化', number_cells(df['change_7d'], '.2f', suffix='%'), 8)
+        table.add_column('成交量', number_cells(df['volume_24h'], ',.0f', prefix='$'), 15)
+        table.add_column('市值', number_cells(df['market_cap'], ',.0f', prefix='$'), 15)
+        
+        write_block(banner("📊 小时级市场数据监控", 100, f"⏰ 更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    + [table.render()])
     
     def print_exchange_distribution(self):
         """打印交易所分布"""
-        print("\n" + "="*80)
-        print("🏢 主要交易所交易量分布")
-        print("="*80)
+        import pandas as pd
+        from src.utils.terminal_table import TerminalTable, banner, number_cells, text_cells, write_block
         
         distribution = self.aggregator.get_exchange_volume_distribution()
         
         if not distribution:
-            print("❌ 无法获取交易所数据")
+            write_block(banner("🏢 主要交易所交易量分布") + ["❌ 无法获取交易所数据"])
             return
         
-        print(f"{'交易所':<15} {'信任度':<8} {'24h成交量(BTC)':<15} {'成立年份':<8} {'国家':<10}")
-        print("-" * 80)
+        exchanges = pd.DataFrame(list(distribution.values())[:10])
         
-        for exchange_id, data in list(distribution.items())[:10]:
-            volume_btc = data.get('trade_volume_24h_btc', 0)
-            trust_score = data.get('trust_score', 'N/A')
-            year = data.get('year_established', 'N/A')
-            country = data.get('country', 'N/A')
-            
-            print(f"{data['name']:<15} {trust_score:<8} {volume_btc:<15,.0f} {year:<8} {country:<10}")
+        table = TerminalTable(80)
+        table.add_column('交易所', text_cells(exchanges['name']), 15)
+        table.add_column('信任度', number_cells(exchanges['trust_score'], '.0f'), 8)
+        table.add_column('24h成交量(BTC)', number_cells(exchanges['trade_volume_24h_btc'], ',.0f'), 15)
+        table.add_column('成立年份', number_cells(exchanges['year_established'], '.0f'), 8)
+        table.add_column('国家', text_cells(exchanges['country']), 10)
+        write_block(banner("🏢 主要交易所交易量分布") + [table.render()])
     
     def print_trending_coins(self):
         """打印趋势代币"""
-        print("\n" + "="*60)
-        print("🔥 趋势代币 (可能反映资金流向)")
-        print("="*60)
+        import numpy as np
+        import pandas as pd
+        from src.utils.terminal_table import TerminalTable, banner, number_cells, text_cells, write_block
         
         trending = self.aggregator.get_trending_coins()
         
         if not trending:
-            print("❌ 无法获取趋势代币数据")
+            write_block(banner("🔥 趋势代币 (可能反映资金流向)", 60) + ["❌ 无法获取趋势代币数据"])
             return
         
-        print(f"{'排名':<4} {'代币':<15} {'符号':<8} {'市值排名':<8} {'热度':<8}")
-        print("-" * 60)
-        
-        for i, coin in enumerate(trending[:10], 1):
-            rank = coin.get('market_cap_rank', 'N/A')
-            score = coin.get('score', 0)
-            
-            print(f"{i:<4} {coin['name']:<15} {coin['symbol'].upper():<8} #{rank:<7} {score:<8.2f}")
+        coins = pd.DataFrame(trending[:10])
+        table = TerminalTable(60)
+        table.add_column('排名', np.arange(1, len(coins) + 1).astype(str), 4)
+        table.add_column('代币', text_cells(coins['name']), 15)
+        table.add_column('符号', text_cells(coins['symbol'], upper=True), 8)
+        table.add_column('市值排名', number_cells(coins['market_cap_rank'], '.0f', prefix='#'), 8)
+        table.add_column('热度', number_cells(coins['score'], '.2f'), 8)
+        write_block(banner("🔥 趋势代币 (可能反映资金流向)", 60) + [table.render()])
     
     def print_global_summary(self):
         """打印全球市场概况"""
@@ -140,72 +134,52 @@ class FreeMarketMonitor:
     
     def print_hourly_changes(self, limit: int = 10):
         """打印小时级价格变化"""
-        print("\n" + "="*80)
-        print("⏰ 小时级价格变化监控")
-        print("="*80)
+        from src.utils.terminal_table import TerminalTable, banner, icon_cells, join_cells, number_cells, text_cells, write_block
         
         changes_df = self.aggregator.get_hourly_price_changes()
         
         if changes_df.empty:
-            print("❌ 无法获取小时价格变化数据")
+            write_block(banner("⏰ 小时级价格变化监控") + ["❌ 无法获取小时价格变化数据"])
             return
         
         # 按变化幅度排序
-        changes_df = changes_df.sort_values('hour_change_percent', ascending=False)
-        
-        print(f"{'代币':<15} {'当前价格':<12} {'1小时前':<12} {'变化':<8} {'变化%':<8}")
-        print("-" * 80)
+        changes_df = changes_df.sort_values('hour_change_percent', ascending=False).head(limit)
+        change_percent = changes_df['hour_change_percent']
         
-        for _, row in changes_df.head(limit).iterrows():
-            change = row['current_price'] - row['hour_ago_price']
-            change_percent = row['hour_change_percent']
-            
-            if change_percent > 0:
-                change_icon = "🟢"
-            elif change_percent < 0:
-                change_icon = "🔴"
-            else:
-                change_icon = "⚪"
-            
-            print(f"{row['coin_id']:<15} ${row['current_price']:<11,.2f} "
-                  f"${row['hour_ago_price']:<11,.2f} {change_icon} {change_percent:<6.2f}%")
+        table = TerminalTable(80)
+        table.add_column('代币', text_cells(changes_df['coin_id']), 15)
+        table.add_column('当前价格', number_cells(changes_df['current_price'], prefix='$'), 12)
+        table.add_column('1小时前', number_cells(changes_df['hour_ago_price'], prefix='$'), 12)
+        table.add_column('变化%', join_cells(icon_cells(change_percent), number_cells(change_percent, '.2f', suffix='%')), 10)
+        write_block(banner("⏰ 小时级价格变化监控") + [table.render()])
     
     def print_volume_analysis(self, limit: int = 10):
         """打印交易量分析"""
-        print("\n" + "="*80)
-        print("📊 交易量分析")
-        print("="*80)
+        import numpy as np
+        from src.utils.terminal_table import TerminalTable, banner, icon_cells, join_cells, number_cells, text_cells, write_block
         
         volume_df = self.aggregator.get_volume_analysis()
         
         if volume_df.empty:
-            print("❌ 无法获取交易量分析数据")
+            write_block(banner("📊 交易量分析") + ["❌ 无法获取交易量分析数据"])
             return
         
         # 按当前交易量排序
-        volume_df = volume_df.sort_values('current_volume', ascending=False)
+        volume_df = volume_df.sort_values('current_volume', ascending=False).head(limit)
+        change = volume_df['volume_change_24h']
+        trend_icons = np.where(volume_df['volume_trend'].to_numpy() == 'increasing', '📈', '📉')
         
-        print(f"{'代币':<15} {'当前成交量':<15} {'7日平均':<15} {'变化%':<8} {'趋势':<8}")
-        print("-" * 80)
-        
-        for _, row in volume_df.head(limit).iterrows():
-            change = row['volume_change_24h']
-            trend = row['volume_trend']
-            
-            if change > 0:
-                change_icon = "🟢"
-            elif change < 0:
-                change_icon = "🔴"
-            else:
-                change_icon = "⚪"
-            
-            trend_icon = "📈" if trend == "increasing" else "📉"
-            
-            print(f"{row['coin_id']:<15} ${row['current_volume']:<14,.0f} "
-                  f"${row['avg_volume_7d']:<14,.0f} {change_icon} {change:<6.2f}% {trend_icon}")
+        table = TerminalTable(80)
+        table.add_column('代币', text_cells(volume_df['coin_id']), 15)
+        table.add_column('当前成交量', number_cells(volume_df['current_volume'], ',.0f', prefix='$'), 15)
+        table.add_column('7日平均', number_cells(volume_df['avg_volume_7d'], ',.0f', prefix='$'), 15)
+        table.add_column('变化%', join_cells(icon_cells(change), number_cells(change, '.2f', suffix='%')), 10)
+        table.add_column('趋势', trend_icons, 8)
+        write_block(banner("📊 交易量分析") + [table.render()])
     
-    def run_full_monitor(self, limit: int = 20):
-        """运行完整监控"""
+    @metrics.timed('full_monitor')
+    def run_full_monitor(self, limit: int = 20) -> bool:
+        """运行完整监控，返回本轮是否成功获取市场数据"""
         print("🚀 TokenData 免费市场监控器")
         print("="*100)
         
@@ -213,8 +187,8 @@ class FreeMarketMonitor:
             # 全球市场概况
             self.print_global_summary()
             
-            # 小时级市场数据
-            self.print_hourly_market_data(limit)
+            # 小时级市场数据（获取不到市场数据时本轮视为失败）
+            ok = self.print_hourly_market_data(limit) is not False
             
             # 小时级价格变化
             self.print_hourly_changes(10)
@@ -229,30 +203,44 @@ class FreeMarketMonitor:
             self.print_exchange_distribution()
             
             print("\n" + "="*100)
-            print("✅ 监控完成！")
+            print("✅ 监控完成！" if ok else "⚠️ 监控完成（市场数据获取失败）")
             print("="*100)
+            return ok
             
         except Exception as e:
             logger.error(f"监控过程中出现错误: {e}")
             print(f"❌ 监控失败: {e}")
+            return False
     
-    def run_continuous_monitor(self, interval: int = 3600, limit: int = 20):
-        """运行持续监控"""
-        print(f"🔄 启动持续监控 (间隔: {interval}秒)")
+    def run_continuous_monitor(self, interval: int = 3600, limit: int = 20, overlap: str = OVERLAP_SKIP):
+        """
+        运行持续监控
         
-        while True:
-            try:
-                self.run_full_monitor(limit)
-                print(f"\n⏰ 下次更新: {datetime.now() + timedelta(seconds=interval)}")
-                time.sleep(interval)
-                
-            except KeyboardInterrupt:
-                print("\n🛑 监控已停止")
-                break
-            except Exception as e:
-                logger.error(f"持续监控错误: {e}")
-                print(f"❌ 监控错误: {e}")
-                time.sleep(60)  # 错误后等待1分钟再重试
+        按墙钟对齐的节拍运行（如间隔3600秒时落在整点），失败后按指数退避重试
+        
+        Args:
+            interval: 监控间隔（秒）
+            limit: 显示代币数量
+            overlap: 单轮超过间隔时的策略（skip跳过错过的节拍，queue结束后立即补跑）
+        """
+        from src.data_sources.deadline import Deadline
+        
+        print(f"🔄 启动持续监控 (间隔: {interval}秒, 重叠策略: {overlap})")
+        
+        def job():
+            # 每轮监控不超过监控间隔，上游挂起时放弃未完成的请求
+            with Deadline(interval):
+                return self.run_full_monitor(limit)
+        
+        scheduler = IntervalScheduler(job, interval, overlap=overlap,
+                                      on_cycle=lambda report: print("\n" + format_cycle_report(report)))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            summary = scheduler.latency_summary()
+            if summary:
+                print(f"\n📈 共 {summary['cycles']} 轮，耗时 p50 {summary['p50']:.1f}s / p95 {summary['p95']:.1f}s / 最大 {summary['max']:.1f}s")
+            print("\n🛑 监控已停止")
 
 def main():
     """主函数"""
@@ -266,21 +254,31 @@ def main():
     parser.add_argument('--continuous', action='store_true', help='持续监控模式')
     parser.add_argument('--interval', type=int, default=3600, help='监控间隔(秒)')
     parser.add_argument('--limit', type=int, default=20, help='显示代币数量')
+    parser.add_argument('--overlap', choices=OVERLAP_POLICIES, default=OVERLAP_SKIP, help='持续监控时单轮超过间隔的处理策略')
+    parser.add_argument('--import-profile', action='store_true', help='打印模块导入耗时统计')
+    parser.add_argument('--stats', action='store_true', help='结束时打印上游请求和各阶段耗时统计')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_DIR, default=None, metavar='DIR',
+                        help=f'剖析每个刷新周期并写入目录（默认 {DEFAULT_PROFILE_DIR}，也可设置 {PROFILE_DIR_ENV}）')
     
     args = parser.parse_args()
     
     monitor = FreeMarketMonitor()
     
+    # 剖析每个刷新周期
+    profiler = CycleProfiler.from_config(args.profile)
+    if profiler is not None:
+        monitor.run_full_monitor = profiler.wrap(monitor.run_full_monitor, 'full_monitor')
+    
     try:
         if args.continuous:
-            monitor.run_continuous_monitor(args.interval, args.limit)
+            monitor.run_continuous_monitor(args.interval, args.limit, args.overlap)
         elif args.market:
             monitor.print_hourly_market_data(args.limit)
         elif args.trending:
             monitor.print_trending_coins()
         elif args.exchanges:
             monitor.print_exchange_distribution()
-        elif args.global:
+        elif getattr(args, 'global'):
             monitor.print_global_summary()
         elif args.hourly:
             monitor.print_hourly_changes(args.limit)
@@ -293,6 +291,12 @@ def main():
     except Exception as e:
         logger.error(f"执行过程中出现错误: {e}")
         print(f"❌ 执行失败: {e}")
+    
+    if args.stats:
+        print("\n" + metrics.format_stats())
 
 if __name__ == "__main__":
     main()
+    
+    if import_profiler is not None:
+        print(import_profiler.report())
@@ -7,15 +7,26 @@ import os
 import sys
 import logging
 import argparse
+import contextlib
 from datetime import datetime
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
 
 # 添加src目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.analysis.market_analyzer import MarketAnalyzer
-from src.data_sources.coingecko import CoinGeckoAPI
-from src.data_sources.binance import BinanceAPI
+# 导入耗时统计需在其他模块导入前启用
+from src.utils.import_profile import ImportProfiler
+import_profiler = ImportProfiler.from_argv()
+
+from dotenv import load_dotenv
+
+# numpy/pandas（约0.4秒）及依赖它们的模块在用到的函数内导入，
+# 导入本模块、--help 和参数错误时不加载
+from src.utils.metrics import metrics
+from src.utils.profiling import CycleProfiler, DEFAULT_PROFILE_DIR, PROFILE_DIR_ENV
+
+if TYPE_CHECKING:
+    from src.analysis.market_analyzer import MarketAnalyzer
 
 # 加载环境变量
 load_dotenv()
@@ -42,8 +53,10 @@ def setup_environment():
         'glassnode_api_key': glassnode_api_key
     }
 
-def print_market_data(analyzer: MarketAnalyzer, limit: int = 20):
+def print_market_data(analyzer: 'MarketAnalyzer', limit: int = 20):
     """打印市场数据"""
+    from src.utils.terminal_table import TerminalTable, icon_cells, join_cells, number_cells, text_cells, write_block
+    
     print("\n" + "="*80)
     print("📊 加密货币市场数据")
     print("="*80)
@@ -56,18 +69,19 @@ def print_market_data(analyzer: MarketAnalyzer, limit: int = 20):
         return
     
     # 显示主要代币数据
-    print(f"\n🏆 市值排名前{limit}的代币:")
-    print("-" * 80)
+    top = df.head(10)
+    change_24h = top['change_24h']
     
-    for _, row in df.head(10).iterrows():
-        change_24h = row['change_24h']
-        change_color = "🟢" if change_24h > 0 else "🔴" if change_24h < 0 else "⚪"
-        
-        print(f"{row['rank']:2d}. {row['name']:<15} ({row['symbol']:<5}) "
-              f"${row['price']:>10,.2f} {change_color} {change_24h:>6.2f}% "
-              f"成交量: ${row['volume_24h']:>12,.0f}")
+    table = TerminalTable(80)
+    table.add_column('排名', text_cells(top['rank']), 4)
+    table.add_column('代币', text_cells(top['name']), 15)
+    table.add_column('符号', text_cells(top['symbol']), 6)
+    table.add_column('价格', number_cells(top['price'], prefix='$'), 12, '>')
+    table.add_column('24h变化', join_cells(icon_cells(change_24h), number_cells(change_24h, '.2f', suffix='%')), 11, '>')
+    table.add_column('成交量', number_cells(top['volume_24h'], ',.0f', prefix='$'), 18, '>')
+    write_block([f"\n🏆 市值排名前{limit}的代币:", table.render()])
 
-def print_market_summary(analyzer: MarketAnalyzer):
+def print_market_summary(analyzer: 'MarketAnalyzer'):
     """打印市场概况"""
     print("\n" + "="*80)
     print("🌍 市场概况")
@@ -88,7 +102,7 @@ def print_market_summary(analyzer: MarketAnalyzer):
         for i, coin in enumerate(summary['trending'][:5], 1):
             print(f"  {i}. {coin['name']} ({coin['symbol']}) - 排名 #{coin['market_cap_rank']}")
 
-def print_token_analysis(analyzer: MarketAnalyzer, coin_id: str):
+def print_token_analysis(analyzer: 'MarketAnalyzer', coin_id: str):
     """打印单个代币分析"""
     print(f"\n" + "="*80)
     print(f"🔍 {coin_id.upper()} 详细分析")
@@ -128,8 +142,11 @@ def print_token_analysis(analyzer: MarketAnalyzer, coin_id: str):
         print(f"  MVRV比率: {sentiment.get('mvrv_ratio', 0):.2f}")
         print(f"  恐惧贪婪指数: {sentiment.get('fear_greed_index', 0):.2f}")
 
-def print_volume_analysis(analyzer: MarketAnalyzer):
+def print_volume_analysis(analyzer: 'MarketAnalyzer'):
     """打印交易量分析"""
+    import numpy as np
+    from src.utils.terminal_table import TerminalTable, icon_cells, join_cells, number_cells, text_cells, write_block
+    
     print("\n" + "="*80)
     print("📊 交易量分析")
     print("="*80)
@@ -140,25 +157,21 @@ def print_volume_analysis(analyzer: MarketAnalyzer):
         print("❌ 无法获取交易量数据")
         return
     
-    print(f"\n主要代币交易量统计:")
-    print("-" * 80)
+    change_24h = volume_df['volume_change_24h']
+    trend_icons = np.where(volume_df['volume_trend'].to_numpy() == 'increasing', '📈', '📉')
     
-    for _, row in volume_df.iterrows():
-        symbol = row['symbol']
-        current_vol = row['current_volume']
-        avg_vol = row['avg_volume']
-        change_24h = row['volume_change_24h']
-        trend = row['volume_trend']
-        
-        trend_icon = "📈" if trend == "increasing" else "📉"
-        change_icon = "🟢" if change_24h > 0 else "🔴" if change_24h < 0 else "⚪"
-        
-        print(f"{symbol:<10} 当前: {current_vol:>12,.0f} "
-              f"平均: {avg_vol:>12,.0f} "
-              f"{change_icon} {change_24h:>6.2f}% {trend_icon}")
+    table = TerminalTable(80)
+    table.add_column('代币', text_cells(volume_df['symbol']), 10)
+    table.add_column('当前成交量', number_cells(volume_df['current_volume'], ',.0f'), 16, '>')
+    table.add_column('平均成交量', number_cells(volume_df['avg_volume'], ',.0f'), 16, '>')
+    table.add_column('变化%', join_cells(icon_cells(change_24h), number_cells(change_24h, '.2f', suffix='%')), 11, '>')
+    table.add_column('趋势', trend_icons, 4)
+    write_block(["\n主要代币交易量统计:", table.render()])
 
 def demo_mode():
     """演示模式"""
+    from src.analysis.market_analyzer import MarketAnalyzer
+    
     print("🚀 TokenData 演示模式")
     print("正在初始化数据源...")
     
@@ -195,6 +208,8 @@ def demo_mode():
     except Exception as e:
         logger.error(f"演示过程中出现错误: {e}")
         print(f"❌ 演示失败: {e}")
+    finally:
+        analyzer.close()
 
 def main():
     """主函数"""
@@ -205,14 +220,27 @@ def main():
     parser.add_argument('--token', type=str, help='分析特定代币 (例如: bitcoin)')
     parser.add_argument('--volume', action='store_true', help='显示交易量分析')
     parser.add_argument('--limit', type=int, default=20, help='显示代币数量限制')
+    parser.add_argument('--import-profile', action='store_true', help='打印模块导入耗时统计')
+    parser.add_argument('--stats', action='store_true', help='结束时打印上游请求和各阶段耗时统计')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_DIR, default=None, metavar='DIR',
+                        help=f'剖析本次运行并写入目录（默认 {DEFAULT_PROFILE_DIR}，也可设置 {PROFILE_DIR_ENV}）')
     
     args = parser.parse_args()
     
+    # 启用剖析时，整个命令作为一个周期剖析
+    profiler = CycleProfiler.from_config(args.profile)
+    profile = profiler.profile if profiler is not None else lambda label: contextlib.nullcontext()
+    
     # 如果没有参数，运行演示模式
     if not any([args.demo, args.market, args.summary, args.token, args.volume]):
-        demo_mode()
+        with profile('demo'):
+            demo_mode()
+        if args.stats:
+            print("\n" + metrics.format_stats())
         return
     
+    from src.analysis.market_analyzer import MarketAnalyzer
+    
     # 设置环境
     env = setup_environment()
     
@@ -225,20 +253,29 @@ def main():
     )
     
     try:
-        if args.demo:
-            demo_mode()
-        elif args.market:
-            print_market_data(analyzer, args.limit)
-        elif args.summary:
-            print_market_summary(analyzer)
-        elif args.token:
-            print_token_analysis(analyzer, args.token)
-        elif args.volume:
-            print_volume_analysis(analyzer)
+        with profile('main'):
+            if args.demo:
+                demo_mode()
+            elif args.market:
+                print_market_data(analyzer, args.limit)
+            elif args.summary:
+                print_market_summary(analyzer)
+            elif args.token:
+                print_token_analysis(analyzer, args.token)
+            elif args.volume:
+                print_volume_analysis(analyzer)
             
     except Exception as e:
         logger.error(f"执行过程中出现错误: {e}")
         print(f"❌ 执行失败: {e}")
+    finally:
+        analyzer.close()
+    
+    if args.stats:
+        print("\n" + metrics.format_stats())
 
 if __name__ == "__main__":
     main()
+    
+    if import_profiler is not None:
+        print(import_profiler.report())
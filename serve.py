@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+TokenData 生产模式启动脚本
+一个刷新进程写入共享快照，多个Web worker只读取快照
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+import subprocess
+import multiprocessing
+
+# 添加src目录到Python路径
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.storage.snapshot_store import SNAPSHOT_PATH_ENV, default_snapshot_path
+from src.storage.refresher import run_refresher
+from src.web.push import MAX_CONNECTIONS_ENV
+
+def start_refresher(app_module: str, path: str, interval: int) -> multiprocessing.Process:
+    """启动唯一的快照刷新进程"""
+    process = multiprocessing.Process(
+        target=run_refresher,
+        args=(app_module, path, interval),
+        name='tokendata-refresher',
+        daemon=True
+    )
+    process.start()
+    return process
+
+def wait_for_snapshot(path: str, timeout: int) -> bool:
+    """等待首个快照写入"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if os.path.exists(path):
+            return True
+        time.sleep(0.5)
+    return False
+
+def push_connection_limit(args, threads: int) -> int:
+    """
+    每个进程的SSE连接上限
+
+    每个推送连接在gthread/waitress中一直占用一个线程，默认最多占用一半线程，
+    其余线程保留给页面和回调请求
+
+    Args:
+        args: 命令行参数
+        threads: 每个进程的服务线程数
+
+    Returns:
+        连接上限（0为不限制）
+    """
+    if args.push_connections is not None:
+        return max(args.push_connections, 0)
+    return max(threads // 2, 1)
+
+def serve_gunicorn(args):
+    """使用gunicorn启动多进程worker"""
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("❌ 缺少依赖: gunicorn")
+        print("请运行: pip install gunicorn")
+        return
+
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--bind', f'{args.host}:{args.port}',
+        f'{args.app}:server'
+    ]
+    env = dict(os.environ)
+    env.setdefault(MAX_CONNECTIONS_ENV, str(push_connection_limit(args, args.threads)))
+    subprocess.run(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+def serve_waitress(args):
+    """使用waitress启动多线程服务（适用于Windows）"""
+    try:
+        from waitress import serve
+    except ImportError:
+        print("❌ 缺少依赖: waitress")
+        print("请运行: pip install waitress")
+        return
+
+    threads = args.workers * args.threads
+    os.environ.setdefault(MAX_CONNECTIONS_ENV, str(push_connection_limit(args, threads)))
+    module = importlib.import_module(args.app)
+    serve(module.server, host=args.host, port=args.port, threads=threads)
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='TokenData 生产模式Web服务')
+    parser.add_argument('--app', choices=['web_app', 'app'], default='web_app', help='Web应用模块')
+    parser.add_argument('--server', choices=['gunicorn', 'waitress'],
+                        default='waitress' if os.name == 'nt' else 'gunicorn', help='WSGI服务器')
+    parser.add_argument('--workers', type=int, default=4, help='worker进程数')
+    parser.add_argument('--threads', type=int, default=4, help='每个worker的线程数')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='监听地址')
+    parser.add_argument('--port', type=int, default=8050, help='监听端口')
+    parser.add_argument('--interval', type=int, default=300, help='快照刷新间隔(秒)')
+    parser.add_argument('--snapshot-path', type=str, default=None, help='共享快照文件路径')
+    parser.add_argument('--push-connections', type=int, default=None,
+                        help='每个进程的SSE推送连接上限（默认为线程数的一半，0为不限制）')
+    parser.add_argument('--wait', type=int, default=30, help='等待首个快照的最长时间(秒)')
+
+    args = parser.parse_args()
+
+    # worker通过该环境变量进入只读快照模式
+    path = args.snapshot_path or default_snapshot_path()
+    os.environ[SNAPSHOT_PATH_ENV] = path
+
+    print("🚀 启动TokenData生产模式...")
+    print(f"📦 共享快照: {path}")
+    print(f"👷 {args.server}: {args.workers} workers x {args.threads} threads")
+    print(f"📱 访问地址: http://{args.host}:{args.port}")
+    print("=" * 50)
+
+    refresher = start_refresher(args.app, path, args.interval)
+    if not wait_for_snapshot(path, args.wait):
+        print("⚠️ 首个快照尚未就绪，worker将在快照写入后显示数据")
+
+    try:
+        if args.server == 'gunicorn':
+            serve_gunicorn(args)
+        else:
+            serve_waitress(args)
+    except KeyboardInterrupt:
+        print("\n🛑 服务已停止")
+    finally:
+        refresher.terminate()
+
+if __name__ == "__main__":
+    main()
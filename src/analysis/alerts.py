@@ -0,0 +1,300 @@
+"""
+告警规则引擎
+规则编译为向量化判断，每个新快照对全部代币只计算一遍；
+同一规则同一代币在冷却时间内只告警一次，告警发送到可插拔的输出（终端、日志、文件、Webhook）
+"""
+import re
+import json
+import time
+import logging
+import operator
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+
+from .rolling import RollingAnalytics
+from ..utils.formatter import format_currency_array, format_number_array, format_percentage_array
+from ..utils.terminal_table import write_block
+
+logger = logging.getLogger(__name__)
+
+# 默认冷却时间（秒）
+DEFAULT_COOLDOWN = 3600
+
+# 比较运算符
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le
+}
+
+# 符号翻转（与上一个快照相比由正变负或由负变正）
+FLIPS = 'flips'
+
+# 规则文本："<字段> <运算符> <阈值>" 或 "<字段> flips"
+RULE_PATTERN = re.compile(r'^\s*(?P<field>[a-z0-9_]+)\s*(?:(?P<op>>=|<=|>|<)\s*(?P<threshold>[-+]?[0-9.]+(?:e[-+]?\d+)?)|(?P<flips>flips))\s*$')
+
+# 资金流向估算（与 FlowAnalyzer.analyze_volume_flow 一致）：周期 -> 交易量系数
+FLOW_VOLUME_FACTORS = {'1h': 1 / 24, '24h': 1, '7d': 7}
+MAX_FLOW_RATIO = 0.3
+
+
+class AlertRule:
+    """告警规则"""
+
+    def __init__(self, field: str, op: str, threshold: Optional[float] = None,
+                 cooldown: float = DEFAULT_COOLDOWN, name: Optional[str] = None):
+        """
+        Args:
+            field: 字段名（市场数据列或引擎计算的派生字段）
+            op: 比较运算符（> >= < <=）或 flips
+            threshold: 阈值（flips 不需要）
+            cooldown: 同一代币再次告警的最短间隔（秒）
+            name: 规则名称（默认为规则文本）
+        """
+        if op not in OPERATORS and op != FLIPS:
+            raise ValueError(f"不支持的运算符: {op}")
+        if op != FLIPS and threshold is None:
+            raise ValueError(f"规则缺少阈值: {field} {op}")
+        self.field = field
+        self.op = op
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.name = name or (f"{field} {FLIPS}" if op == FLIPS else f"{field} {op} {threshold:g}")
+
+    @classmethod
+    def parse(cls, text: str, cooldown: float = DEFAULT_COOLDOWN) -> 'AlertRule':
+        """
+        解析规则文本，如 "change_1h > 5"、"volume_zscore > 3"、"flow_24h flips"
+
+        Args:
+            text: 规则文本
+            cooldown: 冷却时间（秒）
+
+        Returns:
+            AlertRule
+        """
+        match = RULE_PATTERN.match(text.lower())
+        if not match:
+            raise ValueError(f"无法解析告警规则: {text}")
+        if match.group('flips'):
+            return cls(match.group('field'), FLIPS, cooldown=cooldown)
+        return cls(match.group('field'), match.group('op'), float(match.group('threshold')), cooldown)
+
+    def compile(self) -> Callable[[Dict[str, np.ndarray], Dict[str, np.ndarray]], np.ndarray]:
+        """
+        编译为向量化判断
+
+        Returns:
+            predicate(当前字段, 上一快照字段) -> 每个代币是否触发的布尔数组（缺失值不触发）
+        """
+        field = self.field
+        if self.op == FLIPS:
+            def predicate(current, previous):
+                return np.sign(current[field]) * np.sign(previous[field]) < 0
+        else:
+            compare, threshold = OPERATORS[self.op], self.threshold
+
+            def predicate(current, previous):
+                with np.errstate(invalid='ignore'):
+                    return compare(current[field], threshold)
+        return predicate
+
+    def __repr__(self) -> str:
+        return f"AlertRule({self.name!r}, cooldown={self.cooldown:g})"
+
+
+class StdoutSink:
+    """输出到终端（一批告警一次写出）"""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def send(self, alerts: List[Dict]) -> None:
+        write_block([f"🔔 {alert['message']}" for alert in alerts], self.stream)
+
+
+class LogSink:
+    """写入日志（实时看板模式下显示在状态行）"""
+
+    def send(self, alerts: List[Dict]) -> None:
+        for alert in alerts:
+            logger.warning(f"🔔 {alert['message']}")
+
+
+class FileSink:
+    """追加写入JSON Lines文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, alerts: List[Dict]) -> None:
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(alert, ensure_ascii=False) + '\n' for alert in alerts))
+
+
+class WebhookSink:
+    """以JSON POST到Webhook地址（一批告警一个请求）"""
+
+    def __init__(self, url: str, timeout: float = 5, session: Optional[requests.Session] = None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def send(self, alerts: List[Dict]) -> None:
+        response = self.session.post(self.url, json={'alerts': alerts}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+class AlertEngine:
+    """告警引擎：每个快照评估全部规则，冷却去重后发送"""
+
+    def __init__(self, rules: Iterable[AlertRule], sinks: Iterable = (), analytics: Optional[RollingAnalytics] = None,
+                 zscore_window: str = '24h'):
+        """
+        Args:
+            rules: 告警规则
+            sinks: 告警输出（实现 send(alerts) 的对象）
+            analytics: 滚动分析（提供 volume_zscore、volatility_* 派生字段）
+            zscore_window: volume_zscore 使用的滚动窗口
+        """
+        self.rules = list(rules)
+        self.sinks = list(sinks)
+        self.analytics = analytics
+        self.zscore_window = zscore_window
+        self._predicates = [rule.compile() for rule in self.rules]
+        # 上一快照各字段的值（供 flips 规则比较），按coin_id索引
+        self._previous: Optional[pd.DataFrame] = None
+        # 每条规则各代币上次告警的时间
+        self._last_fired: Dict[str, pd.Series] = {rule.name: pd.Series(dtype=float) for rule in self.rules}
+
+    def fields(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        计算规则可用的全部字段（整列计算）
+
+        Args:
+            df: 市场数据DataFrame
+
+        Returns:
+            以coin_id为索引的数值字段DataFrame
+        """
+        index = pd.Index(df['coin_id'].astype(str), name='coin_id')
+        fields = {}
+        for column in ('price', 'change_1h', 'change_24h', 'change_7d', 'volume_24h', 'market_cap'):
+            if column in df:
+                fields[column] = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+        # 资金流向估算：交易量 x 涨跌幅（上限30%），符号与涨跌一致
+        volume = fields.get('volume_24h', np.full(len(df), np.nan))
+        for period, factor in FLOW_VOLUME_FACTORS.items():
+            change = fields.get(f'change_{period}')
+            if change is not None:
+                fields[f'flow_{period}'] = np.sign(change) * volume * factor * np.minimum(np.abs(change) / 100, MAX_FLOW_RATIO)
+
+        frame = pd.DataFrame(fields, index=index)
+        if self.analytics is not None:
+            coin_ids = index.tolist()
+            volume_stats = self.analytics.volume_stats(coin_ids)
+            frame['volume_zscore'] = volume_stats[f'volume_zscore_{self.zscore_window}'].to_numpy()
+            for column, values in self.analytics.volatility(coin_ids).items():
+                frame[column] = values.to_numpy()
+        return frame[~frame.index.duplicated(keep='last')]
+
+    def evaluate(self, df: pd.DataFrame, now: Optional[float] = None) -> List[Dict]:
+        """
+        评估一个快照并发送告警
+
+        Args:
+            df: 市场数据DataFrame
+            now: 当前时间（秒，默认 time.time()）
+
+        Returns:
+            本次发送的告警列表
+        """
+        if df is None or df.empty or not self.rules:
+            return []
+        now = time.time() if now is None else now
+
+        try:
+            frame = self.fields(df)
+            current = {column: frame[column].to_numpy() for column in frame}
+            previous_frame = self._previous.reindex(frame.index) if self._previous is not None else None
+            nan = np.full(len(frame), np.nan)
+            previous = {column: previous_frame[column].to_numpy() if previous_frame is not None and column in previous_frame else nan
+                        for column in frame}
+            self._previous = frame
+
+            alerts = []
+            for rule, predicate in zip(self.rules, self._predicates):
+                if rule.field not in current:
+                    logger.warning(f"告警规则字段不存在: {rule.name}")
+                    continue
+                fired = predicate(current, previous)
+
+                # 冷却时间内已告警的代币不再告警
+                last_fired = self._last_fired[rule.name]
+                since = now - last_fired.reindex(frame.index).to_numpy(dtype=float, na_value=np.nan)
+                fired &= ~(since < rule.cooldown)
+                if not fired.any():
+                    continue
+
+                coin_ids = frame.index[fired]
+                self._last_fired[rule.name] = pd.concat([last_fired.drop(coin_ids, errors='ignore'),
+                                                         pd.Series(now, index=coin_ids)])
+                alerts.extend(self._build(rule, df, coin_ids, current[rule.field][fired], previous[rule.field][fired], now))
+
+            if alerts:
+                self._send(alerts)
+            return alerts
+
+        except Exception as e:
+            logger.error(f"评估告警规则失败: {e}")
+            return []
+
+    def _build(self, rule: AlertRule, df: pd.DataFrame, coin_ids: pd.Index, values: np.ndarray,
+               previous: np.ndarray, now: float) -> List[Dict]:
+        """生成告警记录（只处理触发的代币）"""
+        if 'symbol' in df:
+            symbols = pd.Series(df['symbol'].astype(str).str.upper().to_numpy(), index=df['coin_id'].astype(str))
+            symbols = symbols[~symbols.index.duplicated(keep='last')].reindex(coin_ids).fillna('')
+        else:
+            symbols = pd.Series('', index=coin_ids)
+
+        labels = np.where(symbols.to_numpy() == '', coin_ids.to_numpy(), symbols.to_numpy())
+        formatted = _format_values(rule.field, values)
+        if rule.op == FLIPS:
+            details = [f"{rule.field} {before} → {after}"
+                       for before, after in zip(_format_values(rule.field, previous), formatted)]
+        else:
+            details = [f"{rule.field} = {value}（{rule.op} {rule.threshold:g}）" for value in formatted]
+
+        return [{
+            'rule': rule.name,
+            'coin_id': coin_id,
+            'symbol': symbol,
+            'field': rule.field,
+            'value': value,
+            'threshold': rule.threshold,
+            'time': now,
+            'message': f"[{rule.name}] {label} {detail}"
+        } for coin_id, symbol, value, label, detail in zip(coin_ids, symbols.tolist(), values.tolist(), labels, details)]
+
+    def _send(self, alerts: List[Dict]) -> None:
+        # 单个输出失败不影响其他输出
+        for sink in self.sinks:
+            try:
+                sink.send(alerts)
+            except Exception as e:
+                logger.error(f"发送告警到{type(sink).__name__}失败: {e}")
+
+
+def _format_values(field: str, values: np.ndarray) -> List[str]:
+    """按字段类型整列格式化告警中的数值"""
+    if field.startswith(('change_', 'volatility_')):
+        return format_percentage_array(values).tolist()
+    if field.startswith(('flow_', 'volume_24h', 'market_cap', 'price')):
+        return format_currency_array(values).tolist()
+    return format_number_array(values).tolist()
@@ -0,0 +1,294 @@
+"""
+跨资产相关性分析
+按对数收益率增量维护多个窗口的协方差矩阵（成对的滑动窗口Welford），
+每个新观测只做一次秩一更新，不需要重新获取和重新计算全部历史；
+支持查询与某个代币相关性最高的代币和全市场相关性最高的代币对
+"""
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 默认窗口：名称 -> 观测数（按5分钟刷新一次计）
+DEFAULT_CORRELATION_WINDOWS = {
+    '24h': 288,
+    '7d': 2016
+}
+
+# 默认最多跟踪的代币数（矩阵大小为其平方）
+DEFAULT_MAX_SYMBOLS = 500
+
+# 计算相关系数所需的最少成对观测数
+DEFAULT_MIN_PERIODS = 12
+
+
+class CorrelationEngine:
+    """增量相关性引擎（线程安全）"""
+
+    def __init__(self, windows: Optional[Dict[str, int]] = None, max_symbols: int = DEFAULT_MAX_SYMBOLS,
+                 min_periods: int = DEFAULT_MIN_PERIODS):
+        """
+        Args:
+            windows: 窗口名称 -> 观测数，默认 DEFAULT_CORRELATION_WINDOWS
+            max_symbols: 最多跟踪的代币数（超出后新出现的代币被忽略）
+            min_periods: 计算相关系数所需的最少成对观测数
+        """
+        self.windows = dict(windows or DEFAULT_CORRELATION_WINDOWS)
+        self.depth = max(self.windows.values())
+        self.max_symbols = max_symbols
+        self.min_periods = min_periods
+
+        self.index: Dict[str, int] = {}
+        self.coin_ids: List[str] = []
+        self.steps = 0
+        self.ring = np.full((self.depth, 0), np.nan)
+        # 每个窗口的成对状态：观测数、该对中第i个代币的均值和离差平方和、协离差和
+        self.count = np.zeros((len(self.windows), 0, 0))
+        self.mean = np.zeros((len(self.windows), 0, 0))
+        self.m2 = np.zeros((len(self.windows), 0, 0))
+        self.comoment = np.zeros((len(self.windows), 0, 0))
+
+        # 暂存的本轮观测（分页获取的快照合并为同一时间步）
+        self.pending: Dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.coin_ids)
+
+    def _columns(self, coin_ids: Iterable[str]) -> np.ndarray:
+        # 新代币分配新列，超出容量时返回-1
+        columns = []
+        for coin_id in coin_ids:
+            column = self.index.get(coin_id)
+            if column is None and len(self.coin_ids) < self.max_symbols:
+                column = self.index[coin_id] = len(self.coin_ids)
+                self.coin_ids.append(coin_id)
+            columns.append(-1 if column is None else column)
+
+        size = len(self.coin_ids)
+        current = self.ring.shape[1]
+        if size > current:
+            # 按倍数扩容，摊还O(1)
+            extra = min(max(size, current * 2), self.max_symbols) - current
+            self.ring = np.concatenate([self.ring, np.full((self.depth, extra), np.nan)], axis=1)
+            pad = ((0, 0), (0, extra), (0, extra))
+            self.count = np.pad(self.count, pad)
+            self.mean = np.pad(self.mean, pad)
+            self.m2 = np.pad(self.m2, pad)
+            self.comoment = np.pad(self.comoment, pad)
+        return np.array(columns, dtype=np.int64)
+
+    def push(self, coin_ids: Iterable[str], returns) -> None:
+        """
+        加入一组代币的收益率观测；同一代币再次出现时先提交上一时间步，
+        因此分页获取的各页会合并为同一时间步
+
+        Args:
+            coin_ids: 代币ID列表
+            returns: 对应的（对数）收益率，NaN表示缺失
+        """
+        returns = np.asarray(returns, dtype=float)
+        with self._lock:
+            columns = self._columns([str(coin_id) for coin_id in coin_ids])
+            keep = (columns >= 0) & np.isfinite(returns)
+            columns, returns = columns[keep], returns[keep]
+            if any(column in self.pending for column in columns.tolist()):
+                self._commit()
+            self.pending.update(zip(columns.tolist(), returns.tolist()))
+
+    def flush(self) -> bool:
+        """
+        提交暂存的观测
+
+        Returns:
+            是否有观测被提交
+        """
+        with self._lock:
+            return self._commit()
+
+    def add_returns(self, returns: pd.DataFrame) -> None:
+        """
+        按时间顺序加入收益率表（每行一个时间步，每列一个代币）
+
+        Args:
+            returns: 收益率DataFrame
+        """
+        coin_ids = [str(column) for column in returns.columns]
+        for row in returns.to_numpy(dtype=float, na_value=np.nan):
+            self.push(coin_ids, row)
+            self.flush()
+
+    def _commit(self) -> bool:
+        if not self.pending:
+            return False
+        values = np.full(self.ring.shape[1], np.nan)
+        values[list(self.pending)] = list(self.pending.values())
+        self.pending = {}
+
+        for k, window in enumerate(self.windows.values()):
+            if self.steps >= window:
+                self._remove(k, self.ring[(self.steps - window) % self.depth])
+            self._add(k, values)
+
+        self.ring[self.steps % self.depth] = values
+        self.steps += 1
+        return True
+
+    @staticmethod
+    def _block(columns: np.ndarray):
+        # 观测连续（通常是全部代币都有观测）时用切片视图，避免花式索引复制
+        if columns[-1] - columns[0] + 1 == len(columns):
+            return slice(columns[0], columns[-1] + 1), slice(columns[0], columns[-1] + 1)
+        return np.ix_(columns, columns)
+
+    def _add(self, k: int, values: np.ndarray) -> None:
+        # 只更新本步都有观测的代币对（子矩阵），成本与本步观测数的平方成正比
+        columns = np.flatnonzero(np.isfinite(values))
+        if not len(columns):
+            return
+        block = self._block(columns)
+        x = values[columns]
+
+        count = self.count[k][block] + 1
+        mean = self.mean[k][block]
+        delta = x[:, None] - mean
+        mean = mean + delta / count
+        self.m2[k][block] += delta * (x[:, None] - mean)
+        self.comoment[k][block] += delta * (x[None, :] - mean.T)
+        self.mean[k][block] = mean
+        self.count[k][block] = count
+
+    def _remove(self, k: int, values: np.ndarray) -> None:
+        # Welford的逆运算：从窗口中移出最旧的时间步
+        columns = np.flatnonzero(np.isfinite(values))
+        if not len(columns):
+            return
+        block = self._block(columns)
+        x = values[columns]
+
+        count = self.count[k][block] - 1
+        mean = self.mean[k][block]
+        empty = count <= 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            previous = np.where(empty, 0.0, mean - (x[:, None] - mean) / count)
+        residual = x[:, None] - previous
+        m2 = self.m2[k][block] - residual * (x[:, None] - mean)
+        comoment = self.comoment[k][block] - residual * (x[None, :] - mean.T)
+        self.m2[k][block] = np.where(empty, 0.0, np.maximum(m2, 0.0))
+        self.comoment[k][block] = np.where(empty, 0.0, comoment)
+        self.mean[k][block] = previous
+        self.count[k][block] = np.maximum(count, 0)
+
+    def _window(self, window: Optional[str]) -> int:
+        if window is None:
+            return len(self.windows) - 1
+        if window not in self.windows:
+            raise KeyError(f"未知的窗口: {window}")
+        return list(self.windows).index(window)
+
+    def _correlation(self, k: int, columns: np.ndarray) -> np.ndarray:
+        # 成对相关系数，观测不足或方差为0时为NaN
+        block = np.ix_(columns, columns)
+        m2 = self.m2[k][block]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment[k][block] / np.sqrt(m2 * m2.T)
+        corr[(self.count[k][block] < self.min_periods) | ~np.isfinite(corr)] = np.nan
+        return np.clip(corr, -1.0, 1.0)
+
+    def matrix(self, window: Optional[str] = None, coin_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        相关系数矩阵
+
+        Args:
+            window: 窗口名称（默认最长的窗口）
+            coin_ids: 代币ID列表（默认全部已跟踪的代币，未跟踪的被忽略）
+
+        Returns:
+            相关系数矩阵DataFrame
+        """
+        with self._lock:
+            k = self._window(window)
+            if coin_ids is None:
+                coin_ids = list(self.coin_ids)
+            else:
+                coin_ids = [str(coin_id) for coin_id in coin_ids if str(coin_id) in self.index]
+            columns = np.array([self.index[coin_id] for coin_id in coin_ids], dtype=np.int64)
+            corr = self._correlation(k, columns)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(corr, index=coin_ids, columns=coin_ids)
+
+    def top_correlated(self, coin_id: str, k: int = 10, window: Optional[str] = None,
+                       negative: bool = False) -> pd.DataFrame:
+        """
+        与指定代币相关性最高（或最负）的k个代币
+
+        Args:
+            coin_id: 代币ID
+            k: 返回数量
+            window: 窗口名称（默认最长的窗口）
+            negative: 是否返回负相关最强的代币
+
+        Returns:
+            DataFrame（coin_id、correlation、observations），按相关系数排序
+        """
+        with self._lock:
+            w = self._window(window)
+            if coin_id not in self.index:
+                return pd.DataFrame(columns=['coin_id', 'correlation', 'observations'])
+            row = self.index[coin_id]
+            size = len(self.coin_ids)
+            m2 = self.m2[w]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr = self.comoment[w][row, :size] / np.sqrt(m2[row, :size] * m2[:size, row])
+            counts = self.count[w][row, :size].copy()
+
+        corr[(counts < self.min_periods) | ~np.isfinite(corr)] = np.nan
+        corr[row] = np.nan
+        return self._top(corr, k, negative, {
+            'coin_id': np.array(self.coin_ids[:size], dtype=object),
+            'observations': counts.astype(int)
+        })
+
+    def top_pairs(self, k: int = 10, window: Optional[str] = None, negative: bool = False) -> pd.DataFrame:
+        """
+        全部已跟踪代币中相关性最高（或最负）的k个代币对
+
+        Args:
+            k: 返回数量
+            window: 窗口名称（默认最长的窗口）
+            negative: 是否返回负相关最强的代币对
+
+        Returns:
+            DataFrame（coin_a、coin_b、correlation、observations），按相关系数排序
+        """
+        with self._lock:
+            w = self._window(window)
+            columns = np.arange(len(self.coin_ids))
+            corr = self._correlation(w, columns)
+            upper_a, upper_b = np.triu_indices(len(columns), 1)
+            counts = self.count[w][upper_a, upper_b]
+            coin_ids = np.array(self.coin_ids, dtype=object)
+
+        return self._top(corr[upper_a, upper_b], k, negative, {
+            'coin_a': coin_ids[upper_a],
+            'coin_b': coin_ids[upper_b],
+            'observations': counts.astype(int)
+        })
+
+    @staticmethod
+    def _top(corr: np.ndarray, k: int, negative: bool, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        # argpartition 选出前k个再排序，不对全部代币对排序
+        scores = -corr if negative else corr
+        valid = np.flatnonzero(np.isfinite(scores))
+        if len(valid) > k:
+            valid = valid[np.argpartition(-scores[valid], k - 1)[:k]]
+        order = valid[np.argsort(-scores[valid], kind='stable')]
+
+        result = {name: values[order] for name, values in columns.items()}
+        result['correlation'] = corr[order]
+        names = [name for name in columns if name != 'observations'] + ['correlation', 'observations']
+        return pd.DataFrame(result, columns=names).reset_index(drop=True)
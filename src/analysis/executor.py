@@ -0,0 +1,279 @@
+"""
+多进程分析执行器
+把按代币分批的数值计算分发到进程池：输入和输出数组都放在共享内存中，
+子进程只接收共享内存名称和行范围，数组本身不经过pickle；
+进程池按需创建，未使用时不会启动子进程
+"""
+import os
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 每批代币数
+DEFAULT_CHUNK_SIZE = 256
+
+# 少于该代币数时直接在当前进程计算（分发开销大于计算本身）
+DEFAULT_MIN_PARALLEL = 512
+
+# 分析内核：(等长列, 变长序列) -> 输出列，变长序列为 (拼接后的值, 各代币的起止偏移)
+Kernel = Callable[[Dict[str, np.ndarray], Dict[str, Tuple[np.ndarray, np.ndarray]]], Dict[str, np.ndarray]]
+
+
+class SharedArrays:
+    """放在一块共享内存中的一组命名数组"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Dict[str, Tuple[int, int, str]], owner: bool):
+        self.shm = shm
+        self.layout = layout
+        self.owner = owner
+        self.arrays = {
+            name: np.ndarray((length,), dtype=dtype, buffer=shm.buf, offset=offset)
+            for name, (offset, length, dtype) in layout.items()
+        }
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray]) -> 'SharedArrays':
+        """
+        创建共享内存并复制数组
+
+        Args:
+            arrays: 名称 -> 一维数组
+
+        Returns:
+            SharedArrays（调用方负责 close() 和 unlink()）
+        """
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.asarray(array)
+            layout[name] = (offset, len(array), array.dtype.str)
+            # 按8字节对齐
+            offset += (array.nbytes + 7) // 8 * 8
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        shared = cls(shm, layout, owner=True)
+        for name, array in arrays.items():
+            shared.arrays[name][:] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec: Tuple[str, Dict[str, Tuple[int, int, str]]]) -> 'SharedArrays':
+        """
+        按描述连接已有的共享内存
+
+        Args:
+            spec: spec 属性返回的 (共享内存名称, 布局)
+        """
+        name, layout = spec
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    @property
+    def spec(self) -> Tuple[str, Dict[str, Tuple[int, int, str]]]:
+        """可传给子进程的描述（只有名称和布局）"""
+        return self.shm.name, self.layout
+
+    def close(self) -> None:
+        """释放本进程的映射（创建方同时删除共享内存）"""
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def pack_series(series: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把每个代币长度不同的序列拼接为一个数组
+
+    Args:
+        series: 每个代币的一维序列
+
+    Returns:
+        (拼接后的float64数组, 长度为代币数+1的偏移数组)
+    """
+    lengths = np.array([len(values) for values in series], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    values = np.concatenate([np.asarray(values, dtype=float) for values in series]) if len(series) else np.empty(0)
+    return values, offsets
+
+
+def _slice_batch(arrays: Dict[str, np.ndarray], rows: Iterable[str], series: Iterable[str], start: int, stop: int):
+    # 取出 [start, stop) 行的视图，变长序列的偏移改为从0开始
+    batch_rows = {name: arrays[name][start:stop] for name in rows}
+    batch_series = {}
+    for name in series:
+        offsets = arrays[f'{name}.offsets'][start:stop + 1]
+        batch_series[name] = (arrays[name][offsets[0]:offsets[-1]], offsets - offsets[0])
+    return batch_rows, batch_series
+
+
+def _run_batch(kernel: Kernel, input_spec, output_spec, rows, series, start: int, stop: int) -> int:
+    """子进程入口：连接共享内存，计算一批代币并把结果写回共享内存"""
+    inputs = SharedArrays.attach(input_spec)
+    outputs = SharedArrays.attach(output_spec)
+    try:
+        batch_rows, batch_series = _slice_batch(inputs.arrays, rows, series, start, stop)
+        for name, values in kernel(batch_rows, batch_series).items():
+            # 内核可能返回调用方未请求的输出，只写回请求的列
+            if name in outputs.arrays:
+                outputs.arrays[name][start:stop] = values
+        return stop - start
+    finally:
+        inputs.close()
+        outputs.close()
+
+
+class AnalysisExecutor:
+    """基于进程池和共享内存的分析执行器"""
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 min_parallel: int = DEFAULT_MIN_PARALLEL, mp_context=None):
+        """
+        Args:
+            workers: 子进程数（默认CPU核数，0表示始终在当前进程计算）
+            chunk_size: 每批代币数
+            min_parallel: 少于该代币数时在当前进程计算
+            mp_context: multiprocessing上下文（默认平台默认方式）
+        """
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = chunk_size
+        self.min_parallel = min_parallel
+        self.mp_context = mp_context
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context)
+                logger.info(f"分析进程池已启动，{self.workers} 个子进程")
+            return self._pool
+
+    def map(self, kernel: Kernel, outputs: Sequence[str], rows: Optional[Dict[str, np.ndarray]] = None,
+            series: Optional[Dict[str, Sequence]] = None) -> Dict[str, np.ndarray]:
+        """
+        按代币分批执行分析内核
+
+        Args:
+            kernel: 模块级函数（子进程按引用导入），输入为一批代币的视图，返回各输出列
+            outputs: 输出列名（float64，每个代币一个值）
+            rows: 每个代币一个值的输入列
+            series: 每个代币一个变长序列的输入（如价格历史）
+
+        Returns:
+            输出列名 -> 数组
+        """
+        rows = {name: np.asarray(values) for name, values in (rows or {}).items()}
+        packed = {}
+        for name, values in (series or {}).items():
+            packed[name], packed[f'{name}.offsets'] = pack_series(values)
+
+        sizes = {len(values) for values in rows.values()}
+        sizes |= {len(packed[f'{name}.offsets']) - 1 for name in series or {}}
+        if len(sizes) > 1:
+            raise ValueError(f"输入的代币数不一致: {sorted(sizes)}")
+        size = sizes.pop() if sizes else 0
+
+        if self.workers <= 0 or size < max(self.min_parallel, 1):
+            return self._run_inline(kernel, outputs, rows, packed, list(series or {}), size)
+        return self._run_parallel(kernel, outputs, rows, packed, list(series or {}), size)
+
+    def _run_inline(self, kernel: Kernel, outputs, rows, packed, series, size) -> Dict[str, np.ndarray]:
+        batch_rows, batch_series = _slice_batch({**rows, **packed}, rows, series, 0, size)
+        results = kernel(batch_rows, batch_series) if size else {}
+        return {name: np.asarray(results.get(name, np.empty(0)), dtype=float) for name in outputs}
+
+    def _run_parallel(self, kernel: Kernel, outputs, rows, packed, series, size) -> Dict[str, np.ndarray]:
+        inputs = SharedArrays.create({**rows, **packed})
+        results = SharedArrays.create({name: np.full(size, np.nan) for name in outputs})
+        try:
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_run_batch, kernel, inputs.spec, results.spec, list(rows), series,
+                            start, min(start + self.chunk_size, size))
+                for start in range(0, size, self.chunk_size)
+            ]
+            done = sum(future.result() for future in futures)
+            logger.debug(f"分析进程池完成 {done} 个代币，{len(futures)} 批")
+            return {name: results.arrays[name].copy() for name in outputs}
+        finally:
+            inputs.close()
+            results.close()
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+def history_stats(rows: Dict[str, np.ndarray], series: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    按代币计算历史序列统计（整批向量化，变长序列按偏移分段）
+
+    Args:
+        rows: 未使用
+        series: 'prices' 和 'volumes' 两个变长序列（按时间顺序）
+
+    Returns:
+        current_volume、avg_volume、volume_change（相对上一个点，百分比）、
+        volatility（对数收益率标准差，百分比）、return（区间涨跌幅，百分比）、max_drawdown（最大回撤，百分比）
+    """
+    volumes, volume_offsets = series['volumes']
+    prices, price_offsets = series['prices']
+    result = {}
+
+    starts, ends = volume_offsets[:-1], volume_offsets[1:]
+    lengths = ends - starts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        last = np.where(lengths > 0, volumes[np.maximum(ends - 1, 0)] if len(volumes) else np.nan, np.nan)
+        previous = np.where(lengths > 1, volumes[np.maximum(ends - 2, 0)] if len(volumes) else np.nan, np.nan)
+        result['current_volume'] = last
+        result['avg_volume'] = _segment_sum(volumes, volume_offsets) / lengths
+        result['volume_change'] = np.where(previous > 0, (last - previous) / previous * 100, np.nan)
+
+    starts, ends = price_offsets[:-1], price_offsets[1:]
+    lengths = ends - starts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(prices)
+        # 每段第一个点没有收益率
+        returns = np.diff(log_prices, prepend=np.nan)
+        returns[starts[lengths > 0]] = np.nan
+        valid = np.isfinite(returns)
+        count = _segment_sum(valid.astype(float), price_offsets)
+        total = _segment_sum(np.where(valid, returns, 0.0), price_offsets)
+        squares = _segment_sum(np.where(valid, returns ** 2, 0.0), price_offsets)
+        variance = (squares - total ** 2 / count) / (count - 1)
+        result['volatility'] = np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)) * 100, np.nan)
+        result['return'] = np.where(count > 0, np.expm1(total) * 100, np.nan)
+
+        # 分段累计最大值：每段加上递增的偏移量，使最大值在段首重置
+        segment = np.repeat(np.arange(len(lengths)), lengths)
+        shifted = np.where(np.isfinite(log_prices), log_prices, -np.inf) + segment * 1e3
+        peaks = np.maximum.accumulate(shifted) if len(shifted) else shifted
+        drawdown = np.where(np.isfinite(log_prices), np.expm1(shifted - peaks), 0.0)
+        result['max_drawdown'] = np.where(lengths > 0, -_segment_min(drawdown, price_offsets) * 100, np.nan)
+
+    return result
+
+
+def _segment_sum(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # 分段求和（空段为0）
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+
+def _segment_min(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # 分段最小值（空段为0）
+    starts, ends = offsets[:-1], offsets[1:]
+    result = np.zeros(len(starts))
+    nonempty = ends > starts
+    if nonempty.any():
+        result[nonempty] = np.minimum.reduceat(values, starts[nonempty])
+    return result
@@ -7,6 +7,8 @@ import numpy as np
 from typing import Dict, List, Tuple
 import logging
 
+from ..utils.metrics import metrics
+
 logger = logging.getLogger(__name__)
 
 class FlowAnalyzer:
@@ -32,7 +34,7 @@ class FlowAnalyzer:
         Args:
             price_change: 价格变化百分比
             volume_24h: 24小时交易量
-            price_volatility: 价格波动性
+            price_volatility: 同一时间段的价格波动率（百分比，来自滚动分析；缺失时按固定阈值计算置信度）
             
         Returns:
             (流向金额, 颜色, 置信度)
@@ -57,8 +59,11 @@ class FlowAnalyzer:
                 flow_amount = 0.0
                 color = "#95a5a6"  # 灰色表示平衡
             
-            # 计算置信度（基于价格变化幅度）
-            confidence = min(abs(price_change) / 10.0, 1.0)
+            # 计算置信度：有波动率时按变化幅度相对正常波动的倍数（2倍标准差为满置信度），否则基于价格变化幅度
+            if price_volatility is not None and np.isfinite(price_volatility) and price_volatility > 0:
+                confidence = min(abs(price_change) / (2.0 * price_volatility), 1.0)
+            else:
+                confidence = min(abs(price_change) / 10.0, 1.0)
             
             return flow_amount, color, confidence
                 
@@ -169,6 +174,7 @@ class FlowAnalyzer:
             logger.error(f"分析ETF流向失败: {e}")
             return {}
     
+    @metrics.timed('flow_analysis')
     def get_comprehensive_flow(self, token_data: Dict) -> Dict:
         """
         获取综合资金流向分析
@@ -186,10 +192,22 @@ class FlowAnalyzer:
             price_change_7d = token_data.get('change_7d', 0)
             volume_24h = token_data.get('volume_24h', 0)
             
+            # 缺失值（None/NaN/NA）按无变化处理
+            price_change_1h = 0.0 if pd.isna(price_change_1h) else float(price_change_1h)
+            price_change_24h = 0.0 if pd.isna(price_change_24h) else float(price_change_24h)
+            price_change_7d = 0.0 if pd.isna(price_change_7d) else float(price_change_7d)
+            volume_24h = 0.0 if pd.isna(volume_24h) else float(volume_24h)
+            
+            # 滚动分析提供的各时间段波动率（可选）
+            volatility = {}
+            for period in ('1h', '24h', '7d'):
+                value = token_data.get(f'volatility_{period}')
+                volatility[period] = None if value is None or pd.isna(value) else float(value)
+            
             # 分析各时间段流向
-            flow_1h, color_1h, conf_1h = self.analyze_volume_flow(price_change_1h, volume_24h / 24)
-            flow_24h, color_24h, conf_24h = self.analyze_volume_flow(price_change_24h, volume_24h)
-            flow_7d, color_7d, conf_7d = self.analyze_volume_flow(price_change_7d, volume_24h * 7)
+            flow_1h, color_1h, conf_1h = self.analyze_volume_flow(price_change_1h, volume_24h / 24, volatility['1h'])
+            flow_24h, color_24h, conf_24h = self.analyze_volume_flow(price_change_24h, volume_24h, volatility['24h'])
+            flow_7d, color_7d, conf_7d = self.analyze_volume_flow(price_change_7d, volume_24h * 7, volatility['7d'])
             
             return {
                 '1h': {
@@ -11,6 +11,9 @@ from datetime import datetime, timedelta
 from ..data_sources.coingecko import CoinGeckoAPI
 from ..data_sources.binance import BinanceAPI
 from ..data_sources.glassnode import GlassnodeAPI
+from ..data_sources.market_schema import apply_market_schema
+from ..utils.metrics import metrics
+from .correlation import CorrelationEngine
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +26,14 @@ class MarketAnalyzer:
                  binance_secret_key: Optional[str] = None,
                  glassnode_api_key: Optional[str] = None):
         
-        # 初始化数据源
-        self.coingecko = CoinGeckoAPI(coingecko_api_key)
-        self.binance = BinanceAPI(binance_api_key, binance_secret_key)
-        self.glassnode = GlassnodeAPI(glassnode_api_key) if glassnode_api_key else None
+        # 数据源在首次访问时创建，未使用的数据源不产生初始化开销
+        self.coingecko_api_key = coingecko_api_key
+        self.binance_api_key = binance_api_key
+        self.binance_secret_key = binance_secret_key
+        self.glassnode_api_key = glassnode_api_key
+        self._coingecko = None
+        self._binance = None
+        self._glassnode = None
         
         # 主流代币列表
         self.major_tokens = {
@@ -42,6 +49,43 @@ class MarketAnalyzer:
             'polygon': 'MATIC'
         }
     
+    @property
+    def coingecko(self) -> CoinGeckoAPI:
+        """CoinGecko数据源"""
+        if self._coingecko is None:
+            self._coingecko = CoinGeckoAPI(self.coingecko_api_key)
+        return self._coingecko
+    
+    @property
+    def binance(self) -> BinanceAPI:
+        """Binance数据源"""
+        if self._binance is None:
+            self._binance = BinanceAPI(self.binance_api_key, self.binance_secret_key)
+        return self._binance
+    
+    @property
+    def glassnode(self) -> Optional[GlassnodeAPI]:
+        """Glassnode数据源（未配置API密钥时为None）"""
+        if self._glassnode is None and self.glassnode_api_key:
+            self._glassnode = GlassnodeAPI(self.glassnode_api_key)
+        return self._glassnode
+    
+    def close(self):
+        """释放已创建的数据源，之后再次访问会重新创建"""
+        if self._binance is not None:
+            self._binance.close()
+        self._coingecko = None
+        self._binance = None
+        self._glassnode = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    @metrics.timed('comprehensive_market_data')
     def get_comprehensive_market_data(self, limit: int = 50) -> pd.DataFrame:
         """
         获取综合市场数据
@@ -93,7 +137,8 @@ class MarketAnalyzer:
             df['volume_market_cap_ratio'] = df['volume_24h'] / df['market_cap']
             df['price_ath_ratio'] = df['price'] / df['ath']
             
-            return df
+            # 裁剪为紧凑表结构
+            return apply_market_schema(df)
             
         except Exception as e:
             logger.error(f"获取综合市场数据失败: {e}")
@@ -258,7 +303,7 @@ class MarketAnalyzer:
     
     def get_price_correlation(self, symbols: List[str] = None, days: int = 30) -> pd.DataFrame:
         """
-        计算价格相关性
+        计算收益率相关性（日对数收益率）
         
         Args:
             symbols: 交易对列表
@@ -281,13 +326,14 @@ class MarketAnalyzer:
             if not price_data:
                 return pd.DataFrame()
             
-            # 创建价格DataFrame
-            df = pd.DataFrame(price_data)
+            # 价格序列非平稳，相关性按对数收益率计算
+            prices = pd.DataFrame(price_data).astype(float)
+            returns = np.log(prices).diff().iloc[1:]
             
-            # 计算相关性
-            correlation_matrix = df.corr()
+            engine = CorrelationEngine({'period': max(len(returns), 1)}, max_symbols=len(price_data), min_periods=2)
+            engine.add_returns(returns)
             
-            return correlation_matrix
+            return engine.matrix(coin_ids=list(price_data))
             
         except Exception as e:
             logger.error(f"计算价格相关性失败: {e}")
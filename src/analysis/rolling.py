@@ -0,0 +1,419 @@
+"""
+滚动窗口分析
+由每次获取的市场快照增量更新，按代币维护多个窗口的滚动和、均值、方差以及EWMA，
+每次更新对每个代币是O(1)（滑动窗口Welford：移出最旧的观测、加入最新的观测），
+波动率和成交量趋势直接从维护的状态得出，不再重新请求历史数据
+
+窗口按时间划分：每个代币每个时间步（默认5分钟）最多计入一个观测，刷新更频繁时
+（如实时看板每5秒）同一时间步内的后续快照不计入，窗口仍覆盖其标称时长。
+内存：每个观测在环形缓冲区中占4字节（float32），收益率和成交量各一份，
+默认7d窗口（2016个时间步）每个代币约16KB，1万个代币约160MB，只在写入快照的进程中分配
+"""
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .correlation import CorrelationEngine
+
+logger = logging.getLogger(__name__)
+
+# 默认窗口：名称 -> (观测数, 对应的小时数)；时间步 = 小时数 / 观测数，即5分钟
+DEFAULT_WINDOWS = {
+    '1h': (12, 1),
+    '24h': (288, 24),
+    '7d': (2016, 168)
+}
+
+# 默认EWMA跨度（观测数）
+DEFAULT_EWMA_SPANS = (12, 288)
+
+# 计算波动率所需的最少收益率观测数
+MIN_VOLATILITY_OBSERVATIONS = 3
+
+
+class RollingStats:
+    """多个代币、多个窗口的滚动统计（每列一个代币，各代币独立推进）"""
+
+    def __init__(self, windows: Dict[str, int], ewma_spans: Iterable[int] = DEFAULT_EWMA_SPANS,
+                 capacity: int = 64, dtype=np.float32):
+        """
+        Args:
+            windows: 窗口名称 -> 观测数
+            ewma_spans: EWMA跨度（观测数），alpha = 2 / (span + 1)
+            capacity: 初始代币容量（不足时自动扩容）
+            dtype: 环形缓冲区的数据类型（观测按该精度计入统计，移出时与加入时一致）
+        """
+        self.windows = dict(windows)
+        self.depth = max(self.windows.values())
+        self.ewma_spans = tuple(ewma_spans)
+        self.alphas = np.array([2.0 / (span + 1) for span in self.ewma_spans])
+
+        self.size = 0
+        self.ring = np.full((self.depth, 0), np.nan, dtype=dtype)
+        self.pushes = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros((len(self.windows), 0))
+        self.mean = np.zeros((len(self.windows), 0))
+        self.m2 = np.zeros((len(self.windows), 0))
+        self.ewma = np.full((len(self.ewma_spans), 0), np.nan)
+        self.ewm_var = np.zeros((len(self.ewma_spans), 0))
+        self._reserve(capacity)
+
+    def _reserve(self, capacity: int, exact: bool = False) -> None:
+        # 按倍数扩容，摊还O(1)；已知代币总数时按实际数量分配
+        current = self.ring.shape[1]
+        if capacity <= current:
+            return
+        if not exact:
+            capacity = max(capacity, current * 2)
+        extra = capacity - current
+
+        def grow(array, fill):
+            return np.concatenate([array, np.full(array.shape[:-1] + (extra,), fill, dtype=array.dtype)], axis=-1)
+
+        self.ring = grow(self.ring, np.nan)
+        self.pushes = grow(self.pushes, 0)
+        self.count = grow(self.count, 0.0)
+        self.mean = grow(self.mean, 0.0)
+        self.m2 = grow(self.m2, 0.0)
+        self.ewma = grow(self.ewma, np.nan)
+        self.ewm_var = grow(self.ewm_var, 0.0)
+
+    def resize(self, size: int) -> None:
+        """
+        扩展代币数量
+
+        Args:
+            size: 代币总数
+        """
+        self._reserve(size)
+        self.size = max(self.size, size)
+
+    def reserve(self, capacity: int) -> None:
+        """
+        按预计的代币总数一次分配（避免倍数扩容多分配的容量）
+
+        Args:
+            capacity: 代币容量
+        """
+        self._reserve(capacity, exact=True)
+
+    @property
+    def nbytes(self) -> int:
+        """状态数组占用的字节数"""
+        return sum(array.nbytes for array in (self.ring, self.pushes, self.count, self.mean, self.m2,
+                                              self.ewma, self.ewm_var))
+
+    def push(self, columns: np.ndarray, values: np.ndarray) -> None:
+        """
+        为一组代币各加入一个观测（NaN表示缺失，只占位不参与统计）
+
+        Args:
+            columns: 代币列号
+            values: 观测值
+        """
+        columns = np.asarray(columns, dtype=np.int64)
+        # 按缓冲区精度计入，移出时减去的值与加入时完全一致
+        values = np.asarray(values, dtype=self.ring.dtype).astype(float)
+        if not len(columns):
+            return
+
+        pushes = self.pushes[columns]
+        incoming = np.isfinite(values)
+
+        for k, window in enumerate(self.windows.values()):
+            # 窗口已满时移出 window 个观测之前的值
+            full = pushes >= window
+            outgoing = np.full(len(columns), np.nan)
+            outgoing[full] = self.ring[(pushes[full] - window) % self.depth, columns[full]]
+            self._remove(k, columns, outgoing, np.isfinite(outgoing))
+            self._add(k, columns, values, incoming)
+
+        for k, alpha in enumerate(self.alphas):
+            previous = self.ewma[k, columns]
+            first = incoming & np.isnan(previous)
+            update = incoming & ~np.isnan(previous)
+            self.ewma[k, columns[first]] = values[first]
+            delta = values[update] - previous[update]
+            self.ewma[k, columns[update]] = previous[update] + alpha * delta
+            self.ewm_var[k, columns[update]] = (1 - alpha) * (self.ewm_var[k, columns[update]] + alpha * delta ** 2)
+
+        self.ring[pushes % self.depth, columns] = values
+        self.pushes[columns] = pushes + 1
+
+    def _add(self, k: int, columns: np.ndarray, values: np.ndarray, mask: np.ndarray) -> None:
+        columns, values = columns[mask], values[mask]
+        count = self.count[k, columns] + 1
+        delta = values - self.mean[k, columns]
+        mean = self.mean[k, columns] + delta / count
+        self.m2[k, columns] += delta * (values - mean)
+        self.mean[k, columns] = mean
+        self.count[k, columns] = count
+
+    def _remove(self, k: int, columns: np.ndarray, values: np.ndarray, mask: np.ndarray) -> None:
+        columns, values = columns[mask], values[mask]
+        count = self.count[k, columns] - 1
+        empty = count <= 0
+        delta = values - self.mean[k, columns]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(empty, 0.0, self.mean[k, columns] - delta / count)
+        m2 = np.where(empty, 0.0, self.m2[k, columns] - delta * (values - mean))
+        self.m2[k, columns] = np.maximum(m2, 0.0)
+        self.mean[k, columns] = mean
+        self.count[k, columns] = np.maximum(count, 0)
+
+    def _window(self, name: str) -> int:
+        if name not in self.windows:
+            raise KeyError(f"未知的窗口: {name}")
+        return list(self.windows).index(name)
+
+    def full(self, name: str) -> np.ndarray:
+        """窗口是否已填满（加入的观测数达到窗口长度）"""
+        return self.pushes[:self.size] >= self.windows[name]
+
+    def counts(self, name: str) -> np.ndarray:
+        """窗口内的有效观测数"""
+        return self.count[self._window(name), :self.size].copy()
+
+    def sums(self, name: str) -> np.ndarray:
+        """窗口滚动和"""
+        k = self._window(name)
+        return self.mean[k, :self.size] * self.count[k, :self.size]
+
+    def means(self, name: str) -> np.ndarray:
+        """窗口均值（无观测时为NaN）"""
+        k = self._window(name)
+        return np.where(self.count[k, :self.size] > 0, self.mean[k, :self.size], np.nan)
+
+    def variances(self, name: str) -> np.ndarray:
+        """窗口样本方差（观测少于2个时为NaN）"""
+        k = self._window(name)
+        count = self.count[k, :self.size]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(count > 1, self.m2[k, :self.size] / (count - 1), np.nan)
+
+    def ewmas(self, span: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        指数加权均值和方差
+
+        Args:
+            span: EWMA跨度（须在构造时配置）
+
+        Returns:
+            (均值, 方差)
+        """
+        k = self.ewma_spans.index(span)
+        return self.ewma[k, :self.size].copy(), self.ewm_var[k, :self.size].copy()
+
+    def latest(self) -> np.ndarray:
+        """每个代币最近一次的观测"""
+        return self.lag(0)
+
+    def lag(self, steps: int) -> np.ndarray:
+        """
+        steps 个观测之前的值（历史不足时取最早的观测）
+
+        Args:
+            steps: 回溯的观测数（0为最新）
+
+        Returns:
+            观测值，没有观测的代币为NaN
+        """
+        pushes = self.pushes[:self.size]
+        available = np.minimum(pushes, self.depth)
+        steps = np.minimum(steps, np.maximum(available - 1, 0))
+        values = self.ring[(pushes - 1 - steps) % self.depth, np.arange(self.size)].astype(float)
+        return np.where(pushes > 0, values, np.nan)
+
+
+class RollingAnalytics:
+    """按快照增量更新的滚动分析引擎（线程安全）"""
+
+    def __init__(self, windows: Optional[Dict[str, Tuple[int, float]]] = None,
+                 ewma_spans: Iterable[int] = DEFAULT_EWMA_SPANS,
+                 correlation: Optional[CorrelationEngine] = None):
+        """
+        Args:
+            windows: 窗口名称 -> (观测数, 对应的小时数)，默认 DEFAULT_WINDOWS
+            ewma_spans: EWMA跨度（观测数）
+            correlation: 相关性引擎（可选，由同一份收益率增量更新）
+        """
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        sizes = {name: size for name, (size, _) in self.windows.items()}
+        # 时间步（秒）：每个代币每个时间步最多计入一个观测，窗口按时间覆盖
+        self.step = min(hours * 3600 / size for size, hours in self.windows.values())
+        self.index: Dict[str, int] = {}
+        self.coin_ids = []
+        # 收益率按时间间隔标准化（除以间隔小时数的平方根），不规则的刷新间隔不影响波动率
+        self.returns = RollingStats(sizes, ewma_spans)
+        self.volumes = RollingStats(sizes, ewma_spans)
+        self.correlation = correlation
+        self.last_price = np.zeros(0)
+        self.last_seen = np.zeros(0)
+        self.updates = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.coin_ids)
+
+    def reserve(self, size: int) -> None:
+        """
+        按预计的代币总数分配状态（如全量分页获取前按代币总数分配一次）
+
+        Args:
+            size: 代币总数
+        """
+        with self._lock:
+            self.returns.reserve(size)
+            self.volumes.reserve(size)
+
+    @property
+    def nbytes(self) -> int:
+        """滚动状态占用的字节数"""
+        return self.returns.nbytes + self.volumes.nbytes
+
+    def _columns(self, coin_ids) -> np.ndarray:
+        # 新代币分配新列
+        columns = np.empty(len(coin_ids), dtype=np.int64)
+        for i, coin_id in enumerate(coin_ids):
+            column = self.index.get(coin_id)
+            if column is None:
+                column = self.index[coin_id] = len(self.coin_ids)
+                self.coin_ids.append(coin_id)
+            columns[i] = column
+
+        size = len(self.coin_ids)
+        if size > len(self.last_price):
+            extra = size - len(self.last_price)
+            self.last_price = np.concatenate([self.last_price, np.full(extra, np.nan)])
+            self.last_seen = np.concatenate([self.last_seen, np.full(extra, -np.inf)])
+            self.returns.resize(size)
+            self.volumes.resize(size)
+        return columns
+
+    def update(self, df: pd.DataFrame) -> int:
+        """
+        加入一次市场快照；同一代币的数据时间（last_updated）与上次计入的观测在同一时间步内时忽略，
+        同一快照重复加入（如多个worker读取同一共享快照）或刷新快于时间步时不会重复计数
+
+        Args:
+            df: 市场数据DataFrame（coin_id、price、volume_24h、last_updated/timestamp）
+
+        Returns:
+            本次更新的代币数
+        """
+        if df is None or df.empty or 'coin_id' not in df:
+            return 0
+        try:
+            df = df.drop_duplicates('coin_id', keep='last')
+            seen = self._observed_at(df)
+            prices = pd.to_numeric(df['price'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            volumes = (pd.to_numeric(df['volume_24h'], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+                       if 'volume_24h' in df else np.full(len(df), np.nan))
+
+            with self._lock:
+                columns = self._columns(df['coin_id'].astype(str).tolist())
+                fresh = np.floor(seen / self.step) > np.floor(self.last_seen[columns] / self.step)
+                columns, seen, prices, volumes = columns[fresh], seen[fresh], prices[fresh], volumes[fresh]
+
+                # 对数收益率，按距上次观测的小时数标准化
+                hours = (seen - self.last_seen[columns]) / 3600
+                previous = self.last_price[columns]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    returns = np.log(prices / previous) / np.sqrt(hours)
+                returns[~np.isfinite(returns)] = np.nan
+
+                self.returns.push(columns, returns)
+                self.volumes.push(columns, volumes)
+                if self.correlation is not None:
+                    self.correlation.push([self.coin_ids[column] for column in columns], returns)
+                self.last_price[columns] = np.where(np.isfinite(prices), prices, previous)
+                self.last_seen[columns] = seen
+                self.updates += 1
+            return len(columns)
+
+        except Exception as e:
+            logger.error(f"更新滚动分析失败: {e}")
+            return 0
+
+    @staticmethod
+    def _observed_at(df: pd.DataFrame) -> np.ndarray:
+        # 优先使用数据源的更新时间，缺失时使用获取时间
+        seen = np.full(len(df), np.nan)
+        for column in ('last_updated', 'timestamp'):
+            if column not in df:
+                continue
+            times = pd.to_datetime(df[column], errors='coerce', utc=True)
+            epoch = (times - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy(dtype=float, na_value=np.nan)
+            seen = np.where(np.isnan(seen), epoch, seen)
+        return np.where(np.isnan(seen), pd.Timestamp.now(tz='UTC').timestamp(), seen)
+
+    def _select(self, coin_ids: Optional[Iterable[str]]) -> Tuple[list, np.ndarray]:
+        if coin_ids is None:
+            return list(self.coin_ids), np.arange(len(self.coin_ids))
+        coin_ids = [str(coin_id) for coin_id in coin_ids]
+        return coin_ids, np.array([self.index.get(coin_id, -1) for coin_id in coin_ids], dtype=np.int64)
+
+    @staticmethod
+    def _take(values: np.ndarray, columns: np.ndarray) -> np.ndarray:
+        # 未知代币（列号-1）为NaN
+        result = np.full(len(columns), np.nan)
+        known = columns >= 0
+        result[known] = values[columns[known]]
+        return result
+
+    def volatility(self, coin_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        各窗口的已实现波动率（对数收益率标准差，换算到窗口对应的时长，百分比）
+
+        Args:
+            coin_ids: 代币ID列表（默认全部）
+
+        Returns:
+            以coin_id为索引，列为 volatility_<窗口名> 的DataFrame；观测不足时为NaN
+        """
+        with self._lock:
+            coin_ids, columns = self._select(coin_ids)
+            result = {}
+            for name, (_, hours) in self.windows.items():
+                variance = self.returns.variances(name)
+                variance[self.returns.counts(name) < MIN_VOLATILITY_OBSERVATIONS] = np.nan
+                result[f'volatility_{name}'] = self._take(np.sqrt(variance * hours) * 100, columns)
+        return pd.DataFrame(result, index=pd.Index(coin_ids, name='coin_id'))
+
+    def volume_stats(self, coin_ids: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        成交量滚动统计
+
+        Args:
+            coin_ids: 代币ID列表（默认全部）
+
+        Returns:
+            以coin_id为索引的DataFrame：observations、current_volume、各窗口均值 avg_volume_<窗口名>、
+            volume_change_<窗口名>（相对一个窗口之前的变化百分比，历史不足时相对最早的观测）、
+            volume_zscore_<窗口名>（当前成交量相对窗口均值的标准分）、
+            covered_<窗口名>（窗口已覆盖完整时长，未覆盖时上述窗口统计只基于部分历史）、各跨度的 volume_ewma_<跨度>
+        """
+        with self._lock:
+            coin_ids, columns = self._select(coin_ids)
+            current = self.volumes.latest()
+            result = {
+                'observations': self._take(self.volumes.pushes[:self.volumes.size].astype(float), columns),
+                'current_volume': self._take(current, columns)
+            }
+            for name, (size, _) in self.windows.items():
+                result[f'avg_volume_{name}'] = self._take(self.volumes.means(name), columns)
+                previous = self.volumes.lag(size)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    change = np.where(previous > 0, (current - previous) / previous * 100, np.nan)
+                result[f'volume_change_{name}'] = self._take(change, columns)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    zscore = (current - self.volumes.means(name)) / np.sqrt(self.volumes.variances(name))
+                zscore[(self.volumes.counts(name) < MIN_VOLATILITY_OBSERVATIONS) | ~np.isfinite(zscore)] = np.nan
+                result[f'volume_zscore_{name}'] = self._take(zscore, columns)
+                result[f'covered_{name}'] = self._take(self.volumes.full(name).astype(float), columns) == 1
+            for span in self.volumes.ewma_spans:
+                result[f'volume_ewma_{span}'] = self._take(self.volumes.ewmas(span)[0], columns)
+        return pd.DataFrame(result, index=pd.Index(coin_ids, name='coin_id'))
@@ -0,0 +1,532 @@
+"""
+CoinGecko / Binance 本地模拟服务
+按录制的响应（或按种子生成的数据）回放 /coins/markets、/market_chart、/global、
+/search/trending 以及ccxt使用的Binance现货接口，可注入固定延迟和429限流，
+数据源通过环境变量 COINGECKO_BASE_URL / BINANCE_BASE_URL 指向这里即可离线运行
+"""
+import os
+import re
+import gzip
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 录制文件名
+RECORDED_FILES = {
+    'markets': 'coins_markets.json',
+    'global': 'global.json',
+    'market_chart': 'market_chart.json'
+}
+
+# 推进模拟数据版本的控制接口
+ADVANCE_PATH = '/__mock__/advance'
+
+# 小于此大小的响应不压缩
+GZIP_MIN_SIZE = 1024
+
+
+def record_fixtures(directory: str, session=None) -> List[str]:
+    """
+    从真实CoinGecko录制一组响应（之后可离线回放）
+
+    Args:
+        directory: 保存目录
+        session: HTTP会话（默认使用共享连接池）
+
+    Returns:
+        保存的文件路径列表
+    """
+    from ..data_sources.transport import get_session, base_url
+
+    session = session or get_session('coingecko')
+    api = base_url('coingecko')
+    requests_to_record = {
+        'markets': (f"{api}/coins/markets", {
+            'vs_currency': 'usd', 'order': 'market_cap_desc', 'per_page': 250, 'page': 1,
+            'sparkline': False, 'price_change_percentage': '1h,24h,7d'
+        }),
+        'global': (f"{api}/global", None),
+        'market_chart': (f"{api}/coins/bitcoin/market_chart", {'vs_currency': 'usd', 'days': 7})
+    }
+
+    os.makedirs(directory, exist_ok=True)
+    saved = []
+    for name, (url, params) in requests_to_record.items():
+        try:
+            response = session.get(url, params=params)
+            response.raise_for_status()
+            path = os.path.join(directory, RECORDED_FILES[name])
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(response.json(), f, ensure_ascii=False)
+            saved.append(path)
+        except Exception as e:
+            logger.error(f"录制 {name} 失败: {e}")
+    return saved
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+class MarketFixtures:
+    """
+    模拟的代币宇宙
+    价格按几何随机游走变化，每次 advance() 进入下一个版本，
+    同一版本内的响应编码一次后缓存
+    """
+
+    def __init__(self, size: int = 50, seed: int = 42, recorded: Optional[Dict] = None):
+        """
+        Args:
+            size: 代币数量
+            seed: 随机种子（相同种子生成相同数据）
+            recorded: 录制的响应（load_recorded 的返回值），代币不足size时按模板复制扩展
+        """
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.recorded = recorded or {}
+        self.version = 0
+        self._cache: Dict = {}
+        self._lock = threading.Lock()
+
+        templates = self.recorded.get('markets') or []
+        self.coins = [self._make_coin(i, templates) for i in range(size)]
+
+        ranks = np.arange(1, size + 1, dtype=float)
+        if templates:
+            self.price = np.array([coin.get('current_price') or 1.0 for coin in self.coins], dtype=float)
+            self.supply = np.array([(coin.get('market_cap') or 1e6) / max(coin.get('current_price') or 1.0, 1e-12)
+                                    for coin in self.coins], dtype=float)
+        else:
+            self.price = np.round(np.exp(self.rng.normal(0, 3, size)) * 10, 6)
+            self.supply = 1e12 / ranks ** 1.5 / self.price
+        self.volume_ratio = self.rng.uniform(0.01, 0.3, size)
+        self.changes = {
+            '1h': self.rng.normal(0, 1, size),
+            '24h': self.rng.normal(0, 4, size),
+            '7d': self.rng.normal(0, 10, size)
+        }
+        self.updated_at = time.time()
+
+    @classmethod
+    def load_recorded(cls, directory: str) -> Dict:
+        """
+        读取 record_fixtures 保存的响应
+
+        Args:
+            directory: 录制目录
+
+        Returns:
+            {名称: 响应}，缺失的文件跳过
+        """
+        recorded = {}
+        for name, filename in RECORDED_FILES.items():
+            path = os.path.join(directory, filename)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    recorded[name] = json.load(f)
+        return recorded
+
+    def _make_coin(self, index: int, templates: List[Dict]) -> Dict:
+        """第index个代币的静态字段"""
+        if templates:
+            template = templates[index % len(templates)]
+            copy = index // len(templates)
+            coin = dict(template)
+            if copy:
+                coin['id'] = f"{template['id']}-{copy}"
+                coin['symbol'] = f"{template['symbol']}{copy}"
+                coin['name'] = f"{template['name']} {copy}"
+            return coin
+        return {'id': f'coin-{index}', 'symbol': f'c{index}', 'name': f'Coin {index}'}
+
+    def advance(self, steps: int = 1) -> None:
+        """推进价格（模拟下一次刷新时上游数据已变化）"""
+        with self._lock:
+            for _ in range(steps):
+                returns = self.rng.normal(0, 0.002, self.size)
+                self.price = self.price * np.exp(returns)
+                self.changes['1h'] = self.changes['1h'] * 0.9 + returns * 100
+                self.changes['24h'] = self.changes['24h'] * 0.99 + returns * 100
+                self.changes['7d'] = self.changes['7d'] + returns * 100
+            self.updated_at = time.time()
+            self.version += steps
+            self._cache.clear()
+
+    def cached(self, key, build) -> bytes:
+        """同一版本内按key缓存编码后的响应"""
+        with self._lock:
+            body = self._cache.get(key)
+        if body is None:
+            body = json.dumps(build(), separators=(',', ':')).encode('utf-8')
+            with self._lock:
+                self._cache[key] = body
+        return body
+
+    def index_of(self, coin_id: str) -> Optional[int]:
+        """代币ID对应的下标"""
+        if not hasattr(self, '_index'):
+            self._index = {coin['id']: i for i, coin in enumerate(self.coins)}
+        return self._index.get(coin_id)
+
+    # CoinGecko
+
+    def markets(self, page: int = 1, per_page: int = 100, ids: Optional[List[str]] = None) -> List[Dict]:
+        """/coins/markets"""
+        if ids:
+            indexes = [i for i in (self.index_of(coin_id) for coin_id in ids) if i is not None][:per_page]
+        else:
+            start = (page - 1) * per_page
+            indexes = range(start, min(start + per_page, self.size))
+
+        last_updated = _iso(self.updated_at)
+        rows = []
+        for i in indexes:
+            price = float(self.price[i])
+            market_cap = price * float(self.supply[i])
+            rows.append({
+                **self.coins[i],
+                'current_price': price,
+                'market_cap': market_cap,
+                'market_cap_rank': i + 1,
+                'total_volume': market_cap * float(self.volume_ratio[i]),
+                'high_24h': price * 1.02,
+                'low_24h': price * 0.98,
+                'price_change_percentage_24h': float(self.changes['24h'][i]),
+                'circulating_supply': float(self.supply[i]),
+                'total_supply': float(self.supply[i]) * 1.2,
+                'max_supply': None,
+                'ath': price * 2.5,
+                'ath_change_percentage': -60.0,
+                'last_updated': last_updated,
+                'price_change_percentage_1h_in_currency': float(self.changes['1h'][i]),
+                'price_change_percentage_24h_in_currency': float(self.changes['24h'][i]),
+                'price_change_percentage_7d_in_currency': float(self.changes['7d'][i])
+            })
+        return rows
+
+    def global_data(self) -> Dict:
+        """/global"""
+        if 'global' in self.recorded:
+            return self.recorded['global']
+
+        market_caps = self.price * self.supply
+        total = float(market_caps.sum())
+        dominance = {self.coins[i]['symbol']: float(market_caps[i] / total * 100) for i in range(min(self.size, 10))}
+        dominance.setdefault('btc', dominance.get('c0', 50.0))
+        dominance.setdefault('eth', dominance.get('c1', 15.0))
+        return {'data': {
+            'active_cryptocurrencies': self.size,
+            'active_exchanges': 100,
+            'total_market_cap': {'usd': total},
+            'total_volume': {'usd': float((market_caps * self.volume_ratio).sum())},
+            'market_cap_percentage': dominance,
+            'market_cap_change_percentage_24h_usd': float(np.average(self.changes['24h'], weights=market_caps)),
+            'updated_at': int(self.updated_at)
+        }}
+
+    def trending(self) -> Dict:
+        """/search/trending"""
+        top = np.argsort(-self.changes['24h'])[:7]
+        btc_price = float(self.price[0])
+        return {'coins': [{'item': {
+            'id': self.coins[i]['id'],
+            'name': self.coins[i]['name'],
+            'symbol': self.coins[i]['symbol'],
+            'market_cap_rank': int(i + 1),
+            'price_btc': float(self.price[i]) / btc_price,
+            'score': score
+        }} for score, i in enumerate(top)]}
+
+    def market_chart(self, coin_id: str, days: float = 1) -> Optional[Dict]:
+        """/coins/{id}/market_chart（小时粒度，最后一个点为当前价格）"""
+        index = self.index_of(coin_id)
+        if index is None:
+            return None
+
+        points = max(int(days * 24), 2)
+        # 每个代币的走势固定，只随版本整体平移到当前价格
+        rng = np.random.default_rng(index)
+        path = np.exp(np.cumsum(rng.normal(0, 0.01, points)))
+        prices = path / path[-1] * self.price[index]
+        now_ms = int(self.updated_at * 1000)
+        timestamps = now_ms - np.arange(points - 1, -1, -1) * 3600 * 1000
+        volumes = prices * self.supply[index] * self.volume_ratio[index]
+        return {
+            'prices': [[int(t), float(p)] for t, p in zip(timestamps, prices)],
+            'market_caps': [[int(t), float(p * self.supply[index])] for t, p in zip(timestamps, prices)],
+            'total_volumes': [[int(t), float(v)] for t, v in zip(timestamps, volumes)]
+        }
+
+    # Binance（ccxt现货接口）
+
+    def binance_symbols(self) -> List[tuple]:
+        """(下标, 交易对) 列表，按 <SYMBOL>USDT 命名，重复的symbol只保留排名靠前的"""
+        if not hasattr(self, '_symbols'):
+            seen = set()
+            self._symbols = []
+            for i, coin in enumerate(self.coins):
+                base = re.sub(r'[^A-Z0-9]', '', coin['symbol'].upper())
+                if base and base != 'USDT' and base not in seen:
+                    seen.add(base)
+                    self._symbols.append((i, base))
+        return self._symbols
+
+    def exchange_info(self) -> Dict:
+        """/api/v3/exchangeInfo"""
+        return {
+            'timezone': 'UTC',
+            'serverTime': int(time.time() * 1000),
+            'rateLimits': [],
+            'symbols': [{
+                'symbol': f'{base}USDT',
+                'status': 'TRADING',
+                'baseAsset': base,
+                'baseAssetPrecision': 8,
+                'quoteAsset': 'USDT',
+                'quotePrecision': 8,
+                'quoteAssetPrecision': 8,
+                'orderTypes': ['LIMIT', 'MARKET'],
+                'isSpotTradingAllowed': True,
+                'isMarginTradingAllowed': False,
+                'permissions': ['SPOT'],
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'minPrice': '0.00000001', 'maxPrice': '1000000.00000000', 'tickSize': '0.00000001'},
+                    {'filterType': 'LOT_SIZE', 'minQty': '0.00000100', 'maxQty': '9000000.00000000', 'stepSize': '0.00000100'}
+                ]
+            } for _, base in self.binance_symbols()]
+        }
+
+    def ticker_24hr(self, symbol: Optional[str] = None):
+        """/api/v3/ticker/24hr（不指定symbol时返回全部）"""
+        now_ms = int(self.updated_at * 1000)
+        tickers = []
+        for i, base in self.binance_symbols():
+            if symbol and symbol != f'{base}USDT':
+                continue
+            price = float(self.price[i])
+            change = float(self.changes['24h'][i])
+            open_price = price / (1 + change / 100)
+            volume = float(self.supply[i] * self.volume_ratio[i])
+            tickers.append({
+                'symbol': f'{base}USDT',
+                'priceChange': f'{price - open_price:.8f}',
+                'priceChangePercent': f'{change:.3f}',
+                'weightedAvgPrice': f'{(price + open_price) / 2:.8f}',
+                'prevClosePrice': f'{open_price:.8f}',
+                'lastPrice': f'{price:.8f}',
+                'bidPrice': f'{price * 0.9999:.8f}',
+                'askPrice': f'{price * 1.0001:.8f}',
+                'openPrice': f'{open_price:.8f}',
+                'highPrice': f'{max(price, open_price) * 1.01:.8f}',
+                'lowPrice': f'{min(price, open_price) * 0.99:.8f}',
+                'volume': f'{volume:.8f}',
+                'quoteVolume': f'{volume * price:.8f}',
+                'openTime': now_ms - 86400000,
+                'closeTime': now_ms,
+                'count': 1000 + i
+            })
+        if symbol:
+            return tickers[0] if tickers else None
+        return tickers
+
+    def klines(self, symbol: str, limit: int = 100) -> Optional[List]:
+        """/api/v3/klines（日线）"""
+        index = next((i for i, base in self.binance_symbols() if f'{base}USDT' == symbol), None)
+        if index is None:
+            return None
+
+        chart = self.market_chart(self.coins[index]['id'], days=limit)
+        closes = [price for _, price in chart['prices'][23::24]][-limit:]
+        now_ms = int(self.updated_at * 1000) // 86400000 * 86400000
+        rows = []
+        for n, close in enumerate(closes):
+            open_time = now_ms - (len(closes) - 1 - n) * 86400000
+            volume = float(self.supply[index] * self.volume_ratio[index])
+            rows.append([open_time, f'{close * 0.995:.8f}', f'{close * 1.01:.8f}', f'{close * 0.99:.8f}',
+                         f'{close:.8f}', f'{volume:.8f}', open_time + 86399999, f'{volume * close:.8f}',
+                         1000, '0', '0', '0'])
+        return rows
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """模拟API请求处理"""
+
+    server_version = 'TokenDataMock/1.0'
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写入，关闭Nagle避免keep-alive连接上的40ms延迟确认
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        mock = self.server.mock
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+        if path == ADVANCE_PATH:
+            # 控制接口：推进到下一个数据版本（不计入请求统计）
+            mock.fixtures.advance(int(query.get('steps', 1)))
+            self._send(200, json.dumps({'version': mock.fixtures.version}).encode('utf-8'), record=False)
+            return
+
+        status = mock.before_request(path)
+        if status == 429:
+            self._send(429, b'{"status":{"error_code":429,"error_message":"rate limited"}}',
+                       {'Retry-After': str(mock.retry_after)})
+            return
+
+        body = self.route(mock.fixtures, path, query)
+        if body is None:
+            self._send(404, b'{"error":"not found"}')
+        else:
+            self._send(200, body)
+
+    def route(self, fixtures: MarketFixtures, path: str, query: Dict) -> Optional[bytes]:
+        """按路径生成响应体"""
+        version = fixtures.version
+        if path == '/api/v3/coins/markets':
+            ids = query.get('ids')
+            key = ('markets', version, int(query.get('page', 1)), int(query.get('per_page', 100)), ids)
+            return fixtures.cached(key, lambda: fixtures.markets(
+                int(query.get('page', 1)), int(query.get('per_page', 100)), ids.split(',') if ids else None))
+        if path == '/api/v3/global':
+            return fixtures.cached(('global', version), fixtures.global_data)
+        if path == '/api/v3/search/trending':
+            return fixtures.cached(('trending', version), fixtures.trending)
+
+        match = re.fullmatch(r'/api/v3/coins/([^/]+)/market_chart', path)
+        if match:
+            chart = fixtures.market_chart(match.group(1), float(query.get('days', 1)))
+            return None if chart is None else json.dumps(chart, separators=(',', ':')).encode('utf-8')
+
+        if path == '/api/v3/exchangeInfo':
+            return fixtures.cached(('exchangeInfo', version), fixtures.exchange_info)
+        if path == '/api/v3/ticker/24hr':
+            symbol = query.get('symbol')
+            if symbol and fixtures.ticker_24hr(symbol) is None:
+                return None
+            return fixtures.cached(('ticker', version, symbol), lambda: fixtures.ticker_24hr(symbol))
+        if path == '/api/v3/klines':
+            rows = fixtures.klines(query.get('symbol', ''), int(query.get('limit', 100)))
+            return None if rows is None else json.dumps(rows).encode('utf-8')
+        if path.endswith('/exchangeInfo'):
+            # 合约等其他市场：没有交易对
+            return b'{"symbols":[]}'
+        return None
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict] = None, record: bool = True):
+        if len(body) >= GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=1)
+            headers = {**(headers or {}), 'Content-Encoding': 'gzip'}
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        if record:
+            self.server.mock.record(self.path, status, len(body))
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class MockMarketServer:
+    """本地模拟行情服务（后台线程运行）"""
+
+    def __init__(self, fixtures: MarketFixtures, latency: float = 0.0, rate_limit_every: int = 0,
+                 retry_after: int = 1, host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            fixtures: 模拟数据
+            latency: 每个请求的固定延迟（秒）
+            rate_limit_every: 每N个请求返回一次429（0为不限流）
+            retry_after: 429响应的Retry-After（整数秒）
+            host: 监听地址
+            port: 端口（0表示随机端口）
+        """
+        self.fixtures = fixtures
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+
+        self.requests = 0
+        self.rate_limited = 0
+        self.bytes_sent = 0
+        self.paths: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), MockRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """服务根地址（Binance基础地址）"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def coingecko_url(self) -> str:
+        """CoinGecko基础地址"""
+        return f"{self.url}/api/v3"
+
+    def env(self) -> Dict[str, str]:
+        """把数据源指向本服务的环境变量"""
+        return {'COINGECKO_BASE_URL': self.coingecko_url, 'BINANCE_BASE_URL': self.url}
+
+    def before_request(self, path: str) -> Optional[int]:
+        """请求计数、注入延迟，需要限流时返回429"""
+        with self._lock:
+            self.requests += 1
+            count = self.requests
+        if self.latency:
+            time.sleep(self.latency)
+        if self.rate_limit_every and count % self.rate_limit_every == 0:
+            with self._lock:
+                self.rate_limited += 1
+            return 429
+        return None
+
+    def record(self, path: str, status: int, size: int) -> None:
+        """记录响应统计"""
+        endpoint = re.sub(r'/coins/[^/]+/market_chart', '/coins/{id}/market_chart', path.split('?', 1)[0])
+        with self._lock:
+            self.bytes_sent += size
+            self.paths[endpoint] = self.paths.get(endpoint, 0) + 1
+
+    def stats(self) -> Dict:
+        """请求统计"""
+        with self._lock:
+            return {'requests': self.requests, 'rate_limited': self.rate_limited,
+                    'bytes_sent': self.bytes_sent, 'paths': dict(self.paths)}
+
+    def start(self) -> 'MockMarketServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='tokendata-mock-api', daemon=True)
+        self._thread.start()
+        logger.info(f"模拟行情服务已启动: {self.url}")
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,302 @@
+"""
+离线性能基准
+对模拟服务测量Web应用的端到端刷新耗时、回调吞吐量、内存占用和ccxt行情耗时，
+结果可与基线比较，热点路径退化时报告
+"""
+import os
+import sys
+import time
+import logging
+import tracemalloc
+import urllib.request
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .mock_api import ADVANCE_PATH
+
+logger = logging.getLogger(__name__)
+
+# 指标方向：以这些后缀结尾的指标越大越好，其余（耗时、内存）越小越好
+HIGHER_IS_BETTER = ('_per_sec',)
+
+# 默认的退化阈值（相对基线）
+DEFAULT_THRESHOLD = 0.2
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    分位数（最近秩）
+
+    Args:
+        values: 样本
+        q: 分位（0-1）
+
+    Returns:
+        分位数，样本为空时返回0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def timed(func: Callable, rounds: int, before: Optional[Callable] = None) -> List[float]:
+    """
+    多轮计时
+
+    Args:
+        func: 被测函数
+        rounds: 轮数
+        before: 每轮计时前调用（不计入耗时）
+
+    Returns:
+        每轮耗时（毫秒）
+    """
+    samples = []
+    for _ in range(rounds):
+        if before:
+            before()
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def throughput(func: Callable, duration: float = 1.0, min_calls: int = 3) -> float:
+    """
+    在给定时间内重复调用，返回每秒调用次数
+
+    Args:
+        func: 被测函数
+        duration: 测量时长（秒）
+        min_calls: 最少调用次数
+
+    Returns:
+        每秒调用次数
+    """
+    calls = 0
+    started = time.perf_counter()
+    while calls < min_calls or time.perf_counter() - started < duration:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - started)
+
+
+def max_rss_mb() -> Optional[float]:
+    """进程峰值常驻内存（MB），不支持时返回None"""
+    if resource is None:
+        return None
+    # Linux单位为KB，macOS为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def advance_mock(base_url: str) -> None:
+    """让模拟服务推进到下一个数据版本"""
+    with urllib.request.urlopen(f"{base_url}{ADVANCE_PATH}", timeout=10) as response:
+        response.read()
+
+
+class DashCallbackClient:
+    """通过Flask测试客户端调用Dash回调（与浏览器发出的请求相同）"""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.server.test_client()
+        # 首次请求时Dash才完成回调注册
+        self.client.get('/')
+
+    def callback_id(self, output: str) -> str:
+        """包含指定输出的回调ID"""
+        return next(key for key in self.app.callback_map if output in key)
+
+    def call(self, output: str, values: Dict, changed: str) -> Dict:
+        """
+        调用回调
+
+        Args:
+            output: 回调输出（如 'last-update.children'）
+            values: 输入/状态值，键为 '组件ID.属性'
+            changed: 触发回调的属性
+
+        Returns:
+            回调响应
+        """
+        callback_id = self.callback_id(output)
+        spec = self.app.callback_map[callback_id]
+
+        def prop(dep):
+            key = f"{dep['id']}.{dep['property']}"
+            return {'id': dep['id'], 'property': dep['property'], 'value': values.get(key)}
+
+        payload = {
+            'output': callback_id,
+            'outputs': [{'id': dep.rsplit('.', 1)[0], 'property': dep.rsplit('.', 1)[1]}
+                        for dep in callback_id.strip('.').split('...')],
+            'inputs': [prop(dep) for dep in spec['inputs']],
+            'state': [prop(dep) for dep in spec['state']],
+            'changedPropIds': [changed]
+        }
+        response = self.client.post('/_dash-update-component', json=payload)
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"回调失败 {output}: HTTP {response.status_code}")
+        return response.json if response.status_code == 200 else {}
+
+
+def run_web_case(size: int, mock_url: str, rounds: int = 5, duration: float = 1.0) -> Dict:
+    """
+    Web应用基准（需在数据源已指向模拟服务的独立进程中运行）
+
+    Args:
+        size: 代币宇宙大小
+        mock_url: 模拟服务地址
+        rounds: 刷新轮数
+        duration: 吞吐量测量时长（秒）
+
+    Returns:
+        指标
+    """
+    os.environ['TOKENDATA_UNIVERSE_SIZE'] = str(size)
+    os.environ['TOKENDATA_PUSH_INTERVAL'] = '0'
+
+    started = time.perf_counter()
+    import web_app
+    import_ms = (time.perf_counter() - started) * 1000
+
+    client = DashCallbackClient(web_app.app)
+
+    def advance():
+        advance_mock(mock_url)
+
+    # 首轮包含连接建立等一次性开销，不计入
+    web_app.update_data()
+    refresh = timed(web_app.update_data, rounds, before=advance)
+    rows = len(web_app.global_data['market_data'])
+
+    dashboard = {'refresh-btn.n_clicks': 0, 'interval-component.n_intervals': 1, 'limit-dropdown.value': 50}
+    callback_refresh = timed(lambda: client.call('last-update.children', dashboard, 'interval-component.n_intervals'),
+                             rounds, before=advance)
+
+    # 只切换显示数量：不拉取数据，只渲染表格
+    render_per_sec = throughput(lambda: client.call('last-update.children', dashboard, 'limit-dropdown.value'), duration)
+
+    datatable = {'token-datatable.page_current': 0, 'token-datatable.page_size': 50,
+                 'token-datatable.sort_by': [{'column_id': 'change_24h', 'direction': 'desc'}],
+                 'token-datatable.filter_query': '', 'snapshot-version.data': None}
+    datatable_per_sec = throughput(lambda: client.call('token-datatable.data', datatable, 'token-datatable.sort_by'), duration)
+
+    # 单独一轮测量内存（tracemalloc会拖慢计时）
+    advance()
+    tracemalloc.start()
+    web_app.update_data()
+    client.call('last-update.children', dashboard, 'refresh-btn.n_clicks')
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'size': size,
+        'rows': rows,
+        'import_ms': import_ms,
+        'refresh_p50_ms': percentile(refresh, 0.5),
+        'refresh_max_ms': max(refresh),
+        'callback_refresh_p50_ms': percentile(callback_refresh, 0.5),
+        'render_callbacks_per_sec': render_per_sec,
+        'datatable_callbacks_per_sec': datatable_per_sec,
+        'refresh_peak_mb': peak / 1024 / 1024,
+        'max_rss_mb': max_rss_mb()
+    }
+
+
+def run_ccxt_case(rounds: int = 5, symbols: int = 5) -> Dict:
+    """
+    ccxt行情基准：加载交易对后获取若干ticker和日线
+
+    Args:
+        rounds: 轮数
+        symbols: 每轮获取的交易对数
+
+    Returns:
+        指标
+    """
+    from ..data_sources.binance import BinanceAPI
+
+    api = BinanceAPI()
+    started = time.perf_counter()
+    markets = api.exchange.load_markets()
+    load_ms = (time.perf_counter() - started) * 1000
+    selected = list(markets)[:symbols]
+
+    def fetch():
+        for symbol in selected:
+            api.get_ticker(symbol)
+        api.get_ohlcv(selected[0], '1d', 30)
+
+    samples = timed(fetch, rounds)
+    all_tickers = timed(api.get_tickers, max(rounds // 2, 1))
+    api.close()
+    return {
+        'markets': len(markets),
+        'ccxt_load_markets_ms': load_ms,
+        'ccxt_tickers_p50_ms': percentile(samples, 0.5),
+        'ccxt_all_tickers_p50_ms': percentile(all_tickers, 0.5)
+    }
+
+
+def compare_results(current: Dict[str, Dict], baseline: Dict[str, Dict],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    与基线比较
+
+    Args:
+        current: 本次结果 {用例: 指标}
+        baseline: 基线结果
+        threshold: 允许的相对退化
+
+    Returns:
+        退化说明列表（为空表示没有退化）
+    """
+    regressions = []
+    for case, metrics in current.items():
+        base = baseline.get(case, {})
+        for name, value in metrics.items():
+            old = base.get(name)
+            if not name.endswith(('_ms', '_mb', '_per_sec')) or not old or value is None:
+                continue
+            if name.endswith(HIGHER_IS_BETTER):
+                change = (old - value) / old
+            else:
+                change = (value - old) / old
+            if change > threshold:
+                regressions.append(f"{case} {name}: {old:.1f} -> {value:.1f} ({change:+.0%})")
+    return regressions
+
+
+def format_results(results: Dict[str, Dict]) -> str:
+    """
+    格式化结果表（每个用例一列）
+
+    Args:
+        results: {用例: 指标}
+
+    Returns:
+        文本表格
+    """
+    cases = list(results)
+    names = []
+    for metrics in results.values():
+        names.extend(name for name in metrics if name not in names)
+
+    width = max(len(name) for name in names) + 2
+    lines = [' ' * width + ''.join(f"{case:>14}" for case in cases)]
+    for name in names:
+        cells = []
+        for case in cases:
+            value = results[case].get(name)
+            cells.append(f"{'-':>14}" if value is None else
+                         f"{value:>14,.0f}" if isinstance(value, int) else f"{value:>14,.2f}")
+        lines.append(f"{name:<{width}}" + ''.join(cells))
+    return '\n'.join(lines)
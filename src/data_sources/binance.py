@@ -2,27 +2,54 @@
 Binance API 数据源
 提供实时交易数据和资金流向信息
 """
-import ccxt
 import pandas as pd
 from typing import List, Dict, Optional
+import re
 import time
 import logging
 from datetime import datetime, timedelta
 
+from .transport import get_session, base_url, DEFAULT_BASE_URLS
+
 logger = logging.getLogger(__name__)
 
 class BinanceAPI:
     """Binance API 客户端"""
     
     def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None):
-        self.exchange = ccxt.binance({
-            'apiKey': api_key,
-            'secret': secret_key,
-            'enableRateLimit': True,
-            'options': {
-                'defaultType': 'spot'
-            }
-        })
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self._exchange = None
+    
+    @property
+    def exchange(self):
+        """ccxt交易所对象（首次使用时才导入ccxt并创建）"""
+        if self._exchange is None:
+            import ccxt
+            
+            self._exchange = ccxt.binance({
+                'apiKey': self.api_key,
+                'secret': self.secret_key,
+                'enableRateLimit': True,
+                # 使用共享连接池，不单独创建HTTP会话
+                'session': get_session('binance'),
+                'options': {
+                    'defaultType': 'spot'
+                }
+            })
+            
+            # 设置了 BINANCE_BASE_URL 时，所有接口（现货/合约）都改发到该地址
+            override = base_url('binance')
+            if override != DEFAULT_BASE_URLS['binance']:
+                self._exchange.urls['api'] = {
+                    key: re.sub(r'^https://[a-z0-9]+\.binance\.com', override, url) if isinstance(url, str) else url
+                    for key, url in self._exchange.urls['api'].items()
+                }
+        return self._exchange
+    
+    def close(self):
+        """释放交易所对象（共享连接池由注册表统一关闭）"""
+        self._exchange = None
     
     def get_ticker(self, symbol: str = 'BTC/USDT') -> Optional[Dict]:
         """
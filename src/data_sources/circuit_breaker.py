@@ -0,0 +1,187 @@
+"""
+数据源熔断器
+每个上游数据源一个熔断器：连续失败达到阈值后熔断（open），期间请求直接失败不再访问上游；
+冷却时间到后只放行一个探测请求（half-open），成功则恢复（closed），失败则加倍冷却时间。
+冷却时间带随机抖动，避免多个进程在同一时刻一起恢复请求
+"""
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Hashable, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """数据源处于熔断状态，请求未发出"""
+
+
+class CircuitBreaker:
+    """单个数据源的熔断器"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 max_recovery_timeout: float = 600.0, jitter: float = 0.25):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.jitter = jitter
+
+        self.failures = 0
+        self._state = CLOSED
+        self._open_until = 0.0
+        self._current_timeout = recovery_timeout
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态（冷却结束的open状态视为half-open）"""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() >= self._open_until:
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> float:
+        """距离允许探测请求的秒数"""
+        return max(self._open_until - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        """
+        是否允许发出请求
+
+        Returns:
+            closed时总是允许；冷却结束后只允许一个探测请求
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN:
+                if time.monotonic() < self._open_until:
+                    return False
+                self._state = HALF_OPEN
+
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """记录成功请求"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"数据源 {self.name} 已恢复")
+            self._state = CLOSED
+            self.failures = 0
+            self._current_timeout = self.recovery_timeout
+            self._probe_in_flight = False
+
+    def record_failure(self, retry_after: Optional[float] = None) -> None:
+        """
+        记录失败请求
+
+        Args:
+            retry_after: 上游要求的等待秒数（如429的Retry-After），作为冷却时间下限
+        """
+        with self._lock:
+            self.failures += 1
+
+            if self._state == HALF_OPEN:
+                # 探测失败，冷却时间加倍
+                self._current_timeout = min(self._current_timeout * 2, self.max_recovery_timeout)
+            elif self._state == CLOSED and self.failures < self.failure_threshold:
+                return
+            elif self._state == OPEN:
+                return
+
+            cooldown = max(self._current_timeout, retry_after or 0.0)
+            cooldown *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._state = OPEN
+            self._open_until = time.monotonic() + cooldown
+            self._probe_in_flight = False
+            logger.warning(f"数据源 {self.name} 连续失败 {self.failures} 次，熔断 {cooldown:.0f} 秒")
+
+    def release(self) -> None:
+        """请求结束但不计入成功或失败（如本地截止时间到期），释放探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self) -> None:
+        """恢复到初始的closed状态"""
+        with self._lock:
+            self._state = CLOSED
+            self.failures = 0
+            self._open_until = 0.0
+            self._current_timeout = self.recovery_timeout
+            self._probe_in_flight = False
+
+
+_breakers: Dict[Tuple[str, Optional[str]], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, url: Optional[str] = None) -> CircuitBreaker:
+    """
+    获取（必要时创建）数据源的熔断器，数据源名称和API地址都相同时共享
+
+    Args:
+        name: 数据源名称
+        url: 数据源API地址（指向模拟服务等其他地址时不共享官方地址的熔断状态）
+
+    Returns:
+        熔断器
+    """
+    key = (name, url)
+    with _breakers_lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(name)
+        return _breakers[key]
+
+
+def reset_breakers() -> None:
+    """将所有数据源熔断器恢复到closed状态（已创建的Session继续使用同一个熔断器）"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    for breaker in breakers:
+        breaker.reset()
+
+
+class LastGoodCache:
+    """最近一次成功结果的缓存，上游失败时作为降级数据返回"""
+
+    def __init__(self):
+        self._values: Dict[Hashable, Tuple[object, datetime]] = {}
+        self._lock = threading.Lock()
+
+    def remember(self, key: Hashable, value) -> None:
+        """
+        记录成功结果
+
+        Args:
+            key: 请求标识
+            value: 结果
+        """
+        with self._lock:
+            self._values[key] = (value, datetime.now())
+
+    def get(self, key: Hashable) -> Optional[Tuple[object, datetime]]:
+        """
+        获取最近一次成功结果
+
+        Args:
+            key: 请求标识
+
+        Returns:
+            (结果, 获取时间)，没有时返回None
+        """
+        with self._lock:
+            return self._values.get(key)
@@ -8,21 +8,18 @@ from typing import List, Dict, Optional
 import time
 import logging
 
+from .transport import get_session, base_url
+
 logger = logging.getLogger(__name__)
 
 class CoinGeckoAPI:
     """CoinGecko API 客户端"""
     
     def __init__(self, api_key: Optional[str] = None):
-        self.base_url = "https://api.coingecko.com/api/v3"
+        self.base_url = base_url('coingecko')
         self.api_key = api_key
-        self.session = requests.Session()
-        
-        # 设置请求头
-        if api_key:
-            self.session.headers.update({
-                'X-CG-API-KEY': api_key
-            })
+        # 共享连接池（相同API密钥的客户端复用同一个Session）
+        self.session = get_session('coingecko', {'X-CG-API-KEY': api_key} if api_key else None)
     
     def get_top_coins(self, limit: int = 100, currency: str = 'usd') -> List[Dict]:
         """
@@ -0,0 +1,179 @@
+"""
+刷新周期时间预算
+一次刷新周期共享一个截止时间，周期内的每个HTTP请求都以剩余预算作为超时，
+超出预算的部分直接放弃并标记为过期，而不是阻塞整个周期
+"""
+import time
+import logging
+import contextvars
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import pandas as pd
+import requests
+
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 剩余预算低于此值时不再发起新请求（秒）
+MIN_REQUEST_SECONDS = 0.05
+
+_current_deadline = contextvars.ContextVar('tokendata_deadline', default=None)
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """刷新周期的时间预算已用完"""
+
+
+class Deadline:
+    """截止时间，作为上下文管理器使用时对当前上下文中的所有请求生效"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        self._token = None
+
+    def remaining(self) -> float:
+        """剩余秒数"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """预算是否已用完"""
+        return self.remaining() < MIN_REQUEST_SECONDS
+
+    def timeout(self, timeout: Optional[Timeout] = None) -> Timeout:
+        """
+        用剩余预算约束请求超时
+
+        Args:
+            timeout: 原超时（秒，或 (连接, 读取)）
+
+        Returns:
+            不超过剩余预算的超时
+
+        Raises:
+            DeadlineExceeded: 预算已用完
+        """
+        remaining = self.remaining()
+        if remaining < MIN_REQUEST_SECONDS:
+            raise DeadlineExceeded(f"刷新预算 {self.budget}s 已用完")
+
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(min(value, remaining) if value is not None else remaining for value in timeout)
+        return min(timeout, remaining)
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        在预算内等待
+
+        Args:
+            seconds: 等待秒数
+
+        Returns:
+            是否完成等待（剩余预算不足时不等待并返回False）
+        """
+        if self.remaining() - seconds < MIN_REQUEST_SECONDS:
+            return False
+        time.sleep(seconds)
+        return True
+
+    def __enter__(self) -> 'Deadline':
+        # 嵌套时不能超过外层的截止时间
+        outer = _current_deadline.get()
+        if outer is not None:
+            self.expires_at = min(self.expires_at, outer.expires_at)
+        self._token = _current_deadline.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current_deadline.reset(self._token)
+        return False
+
+
+def current_deadline() -> Optional[Deadline]:
+    """当前上下文的截止时间，未设置时返回None"""
+    return _current_deadline.get()
+
+
+def deadline_sleep(seconds: float) -> bool:
+    """
+    在当前截止时间内等待（未设置截止时间时直接等待）
+
+    Args:
+        seconds: 等待秒数
+
+    Returns:
+        是否完成等待
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        time.sleep(seconds)
+        return True
+    return deadline.sleep(seconds)
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    return not value
+
+
+def fetch_sections(fetchers: Dict[str, Callable[[], object]], budget: float,
+                   previous: Optional[Dict] = None) -> Dict:
+    """
+    在同一时间预算内依次获取快照的各个部分
+
+    预算用完或获取失败的部分沿用上一次的结果，并在 stale 中标记
+
+    Args:
+        fetchers: 部分名称 -> 获取函数
+        budget: 总时间预算（秒）
+        previous: 上一次的快照
+
+    Returns:
+        快照字典，附加 stale（部分名称 -> 是否过期）和 fetched_at（部分名称 -> 数据获取时间）
+    """
+    previous = previous or {}
+    previous_fetched_at = previous.get('fetched_at') or {}
+    snapshot = {}
+    stale = {}
+    fetched_at = {}
+
+    with Deadline(budget) as deadline:
+        for name, fetch in fetchers.items():
+            value = None
+            if not deadline.expired:
+                try:
+                    with metrics.stage(f'fetch_{name}'):
+                        value = fetch()
+                except Exception as e:
+                    logger.error(f"获取{name}失败: {e}")
+
+            if _is_empty(value) and not _is_empty(previous.get(name)):
+                logger.warning(f"{name} 未在预算内更新，沿用上一次的数据")
+                snapshot[name] = previous[name]
+                stale[name] = True
+                fetched_at[name] = previous_fetched_at.get(name)
+            elif isinstance(value, pd.DataFrame) and value.attrs.get('stale'):
+                # 数据源降级返回的最近一次成功数据
+                snapshot[name] = value
+                stale[name] = True
+                fetched_at[name] = value.attrs.get('fetched_at')
+            else:
+                # 未获取到且没有旧数据时不设置该部分，调用方保留默认值
+                if value is not None:
+                    snapshot[name] = value
+                stale[name] = _is_empty(value)
+                fetched_at[name] = None if stale[name] else datetime.now()
+
+    snapshot['stale'] = stale
+    snapshot['fetched_at'] = fetched_at
+    return snapshot
@@ -2,25 +2,40 @@
 免费数据聚合器
 整合多个免费数据源，提供小时级别的监控
 """
+import os
 import requests
 import pandas as pd
-import time
 import logging
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-import asyncio
-import aiohttp
+from collections import deque
+
+from .market_schema import apply_market_schema
+from .transport import get_session, base_url, parse_retry_after
+from .deadline import DeadlineExceeded, deadline_sleep
+from .circuit_breaker import CircuitOpenError, LastGoodCache
+from ..analysis.rolling import RollingAnalytics
+from ..analysis.correlation import CorrelationEngine
+from ..analysis.executor import AnalysisExecutor, history_stats
 
 logger = logging.getLogger(__name__)
 
+# 分析进程池子进程数（0为在当前进程计算）
+ANALYSIS_WORKERS_ENV = 'TOKENDATA_ANALYSIS_WORKERS'
+
 class FreeDataAggregator:
     """免费数据聚合器"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    def __init__(self, executor: Optional[AnalysisExecutor] = None):
+        """
+        Args:
+            executor: 按代币分批计算的分析执行器（默认按 TOKENDATA_ANALYSIS_WORKERS 设置子进程数，未设置时在当前进程计算）
+        """
+        # 共享连接池（keep-alive、超时、重试由传输层统一配置）
+        self.session = get_session('coingecko', {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.base_url = base_url('coingecko')
         
         # 主流代币列表（市值前50）
         self.major_tokens = [
@@ -41,29 +56,51 @@ class FreeDataAggregator:
             'binance', 'coinbase', 'kraken', 'kucoin', 'okx',
             'bybit', 'gate-io', 'huobi', 'bitfinex', 'bitstamp'
         ]
+        
+        # 本地快照历史（每次成功获取市场数据后记录，用于推算历史价格）
+        self.snapshot_history = deque(maxlen=48)
+        
+        # 最近一次成功的市场数据（上游失败或熔断时降级返回）
+        self.last_good = LastGoodCache()
+        
+        # 滚动窗口分析（每次获取的快照增量更新，提供波动率、成交量趋势和跨资产相关性）
+        self.analytics = RollingAnalytics(correlation=CorrelationEngine())
+        
+        # 历史序列分析（设置子进程数后大批量代币分发到进程池，进程池在首次使用时才启动）
+        self.executor = executor or AnalysisExecutor(workers=int(os.getenv(ANALYSIS_WORKERS_ENV, '0')))
     
-    def get_hourly_market_data(self, limit: int = 50) -> pd.DataFrame:
+    def get_hourly_market_data(self, limit: int = 50, coin_ids: List[str] = None, page: int = 1,
+                               record: bool = True) -> pd.DataFrame:
         """
         获取小时级别的市场数据
         
         Args:
-            limit: 获取的代币数量
+            limit: 获取的代币数量（每页数量，CoinGecko上限250）
+            coin_ids: 指定代币ID列表（为空时按市值排名获取）
+            page: 页码
+            record: 是否记录为一次快照（分页获取时由调用方合并各页后记录一次）
             
         Returns:
             市场数据DataFrame
         """
+        cache_key = (limit, tuple(coin_ids) if coin_ids else None, page)
+        
         try:
             # 使用CoinGecko免费API
-            url = "https://api.coingecko.com/api/v3/coins/markets"
+            url = f"{self.base_url}/coins/markets"
             params = {
                 'vs_currency': 'usd',
                 'order': 'market_cap_desc',
                 'per_page': limit,
-                'page': 1,
+                'page': page,
                 'sparkline': False,
                 'price_change_percentage': '1h,24h,7d'
             }
             
+            if coin_ids:
+                params['ids'] = ','.join(coin_ids)
+                params['per_page'] = max(limit, len(coin_ids))
+            
             # 添加重试机制
             max_retries = 3
             for attempt in range(max_retries):
@@ -71,21 +108,24 @@ class FreeDataAggregator:
                     response = self.session.get(url, params=params)
                     
                     if response.status_code == 429:
-                        # API限制，等待后重试
-                        wait_time = (attempt + 1) * 10  # 递增等待时间
-                        logger.warning(f"API限制，等待 {wait_time} 秒后重试...")
-                        time.sleep(wait_time)
+                        # API限制，按Retry-After等待后重试，未提供时递增等待（剩余预算不足时直接放弃）
+                        wait_time = parse_retry_after(response) or (attempt + 1) * 10
+                        if attempt == max_retries - 1 or not deadline_sleep(wait_time):
+                            response.raise_for_status()
+                        logger.warning(f"API限制，已等待 {wait_time} 秒后重试...")
                         continue
                     
                     response.raise_for_status()
                     break
                     
                 except requests.exceptions.RequestException as e:
-                    if attempt == max_retries - 1:
+                    # 预算用完或数据源熔断时不再等待重试
+                    if attempt == max_retries - 1 or isinstance(e, (DeadlineExceeded, CircuitOpenError)):
                         raise e
                     wait_time = (attempt + 1) * 5
-                    logger.warning(f"请求失败，等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
+                    if not deadline_sleep(wait_time):
+                        raise e
+                    logger.warning(f"请求失败，已等待 {wait_time} 秒后重试...")
             
             data = response.json()
             if not data:
@@ -122,11 +162,100 @@ class FreeDataAggregator:
             df['volume_market_cap_ratio'] = df['volume_24h'] / df['market_cap']
             df['price_ath_ratio'] = df['price'] / df['ath']
             
+            # 裁剪为紧凑表结构
+            df = apply_market_schema(df)
+            
+            if record:
+                self._record_snapshot(df)
+            self.last_good.remember(cache_key, df)
+            
             return df
             
         except Exception as e:
             logger.error(f"获取小时级市场数据失败: {e}")
+            return self._last_good_frame(cache_key)
+    
+    def _last_good_frame(self, cache_key) -> pd.DataFrame:
+        """
+        上游失败时返回最近一次成功的数据
+        
+        Args:
+            cache_key: 请求标识
+            
+        Returns:
+            带 attrs['stale']、attrs['fetched_at'] 标记的DataFrame，没有缓存时返回空DataFrame
+        """
+        cached = self.last_good.get(cache_key)
+        if cached is None:
+            return pd.DataFrame()
+        
+        df, fetched_at = cached
+        age = (datetime.now() - fetched_at).total_seconds()
+        logger.warning(f"使用 {age:.0f} 秒前的市场数据")
+        
+        df = df.copy()
+        df.attrs.update(stale=True, fetched_at=fetched_at)
+        return df
+    
+    def _record_snapshot(self, df: pd.DataFrame) -> None:
+        """
+        记录一次快照：加入快照历史并更新滚动分析
+
+        Args:
+            df: 一次完整获取的市场数据
+        """
+        self.snapshot_history.append(df[['coin_id', 'price', 'timestamp']].copy())
+        self.analytics.update(df)
+    
+    def get_market_universe(self, size: int = 1000, per_page: int = 250) -> pd.DataFrame:
+        """
+        分页获取市值排名前N的全部代币数据
+        
+        Args:
+            size: 代币总数
+            per_page: 每页数量（CoinGecko上限250）
+            
+        Returns:
+            市场数据DataFrame
+        """
+        if size <= per_page:
+            return self.get_hourly_market_data(limit=size)
+        
+        # 按代币总数一次分配滚动状态
+        self.analytics.reserve(size)
+        
+        frames = []
+        pages = (size + per_page - 1) // per_page
+        for page in range(1, pages + 1):
+            # 各页合并后记录为一次快照，避免每页占用一条快照历史
+            df = self.get_hourly_market_data(limit=per_page, page=page, record=False)
+            if df.empty:
+                break
+            frames.append(df)
+            if len(df) < per_page:
+                break
+            
+            # 添加延时避免API限制；预算用完时返回已获取的部分
+            if not deadline_sleep(0.1):
+                logger.warning(f"刷新预算用完，只获取了 {len(frames)}/{pages} 页")
+                break
+        
+        if not frames:
             return pd.DataFrame()
+        
+        # 各页的category类别不同，合并后重新应用表结构
+        df = apply_market_schema(pd.concat(frames, ignore_index=True).head(size))
+        
+        # 本次实际获取的各页记录为一次快照（降级返回的旧页不计入）
+        fresh = [frame for frame in frames if not frame.attrs.get('stale')]
+        if fresh:
+            self._record_snapshot(pd.concat(fresh, ignore_index=True))
+        
+        # 任一页是降级数据时，整体标记为降级，获取时间取最早的一页
+        stale_pages = [frame.attrs['fetched_at'] for frame in frames if frame.attrs.get('stale')]
+        if stale_pages:
+            df.attrs.update(stale=True, fetched_at=min(stale_pages))
+        return df
     
     def get_exchange_volume_distribution(self) -> Dict:
         """
@@ -136,7 +265,7 @@ class FreeDataAggregator:
             交易所交易量分布数据
         """
         try:
-            url = "https://api.coingecko.com/api/v3/exchanges"
+            url = f"{self.base_url}/exchanges"
             params = {
                 'per_page': 20,
                 'page': 1
@@ -175,7 +304,7 @@ class FreeDataAggregator:
             交易所数据
         """
         try:
-            url = f"https://api.coingecko.com/api/v3/coins/{coin_id}"
+            url = f"{self.base_url}/coins/{coin_id}"
             params = {
                 'localization': False,
                 'tickers': True,
@@ -221,7 +350,7 @@ class FreeDataAggregator:
             趋势代币列表
         """
         try:
-            url = "https://api.coingecko.com/api/v3/search/trending"
+            url = f"{self.base_url}/search/trending"
             response = self.session.get(url)
             response.raise_for_status()
             
@@ -253,7 +382,7 @@ class FreeDataAggregator:
             全球市场数据
         """
         try:
-            url = "https://api.coingecko.com/api/v3/global"
+            url = f"{self.base_url}/global"
             response = self.session.get(url)
             response.raise_for_status()
             
@@ -282,6 +411,9 @@ class FreeDataAggregator:
         """
         获取小时级价格变化
         
+        一次批量请求 /coins/markets 获取所有代币的1h/24h/7d变化，
+        只有快照中缺失的代币才回退到逐个请求 market_chart
+        
         Args:
             coin_ids: 代币ID列表
             
@@ -294,40 +426,49 @@ class FreeDataAggregator:
             
             price_changes = []
             
-            for coin_id in coin_ids:
-                try:
-                    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
-                    params = {
-                        'vs_currency': 'usd',
-                        'days': 1,
-                        'interval': 'hourly'
-                    }
-                    
-                    response = self.session.get(url, params=params)
-                    response.raise_for_status()
-                    
-                    data = response.json()
+            # 批量获取市场快照
+            snapshot = self.get_hourly_market_data(limit=len(coin_ids), coin_ids=coin_ids)
+            
+            if not snapshot.empty:
+                snapshot = snapshot[snapshot['coin_id'].isin(coin_ids)]
+                
+                for _, row in snapshot.iterrows():
+                    current_price = row['price']
+                    hour_change = row.get('change_1h')
                     
-                    if 'prices' in data and len(data['prices']) >= 2:
-                        # 计算小时变化
-                        current_price = data['prices'][-1][1]
-                        hour_ago_price = data['prices'][-2][1]
+                    if pd.notna(hour_change) and pd.notna(current_price):
+                        hour_ago_price = current_price / (1 + hour_change / 100)
+                    else:
+                        # 接口未返回1h变化时，使用本地快照历史推算
+                        hour_ago_price = self._get_history_price(row['coin_id'], hours=1)
+                        if hour_ago_price is None or pd.isna(current_price):
+                            continue
                         hour_change = ((current_price - hour_ago_price) / hour_ago_price) * 100
-                        
-                        price_changes.append({
-                            'coin_id': coin_id,
-                            'current_price': current_price,
-                            'hour_ago_price': hour_ago_price,
-                            'hour_change_percent': hour_change,
-                            'timestamp': datetime.fromtimestamp(data['prices'][-1][0] / 1000)
-                        })
-                    
-                    # 添加延时避免API限制
-                    time.sleep(0.1)
                     
-                except Exception as e:
-                    logger.error(f"获取{coin_id}小时价格变化失败: {e}")
+                    price_changes.append({
+                        'coin_id': row['coin_id'],
+                        'current_price': current_price,
+                        'hour_ago_price': hour_ago_price,
+                        'hour_change_percent': hour_change,
+                        'change_24h': row.get('change_24h'),
+                        'change_7d': row.get('change_7d'),
+                        'timestamp': row['last_updated'].to_pydatetime() if pd.notna(row['last_updated']) else row['timestamp']
+                    })
+            
+            # 快照中缺失的代币回退到逐个请求
+            found = {item['coin_id'] for item in price_changes}
+            for coin_id in coin_ids:
+                if coin_id in found:
                     continue
+                
+                change = self._get_chart_price_change(coin_id)
+                if change:
+                    price_changes.append(change)
+                
+                # 添加延时避免API限制；预算用完时返回已获取的部分
+                if not deadline_sleep(0.1):
+                    logger.warning("刷新预算用完，部分代币未获取小时变化")
+                    break
             
             return pd.DataFrame(price_changes)
             
@@ -335,6 +476,83 @@ class FreeDataAggregator:
             logger.error(f"获取小时价格变化失败: {e}")
             return pd.DataFrame()
     
+    def _get_history_price(self, coin_id: str, hours: float = 1, tolerance_minutes: int = 15) -> Optional[float]:
+        """
+        从本地快照历史中查找指定时间前的价格
+        
+        Args:
+            coin_id: 代币ID
+            hours: 回溯小时数
+            tolerance_minutes: 允许的时间误差（分钟）
+            
+        Returns:
+            历史价格，找不到时返回None
+        """
+        target = datetime.now() - timedelta(hours=hours)
+        tolerance = timedelta(minutes=tolerance_minutes)
+        
+        best_price = None
+        best_delta = None
+        for snapshot in self.snapshot_history:
+            delta = abs(snapshot['timestamp'].iloc[0] - target) if not snapshot.empty else None
+            if delta is None or delta > tolerance:
+                continue
+            
+            prices = snapshot.loc[snapshot['coin_id'] == coin_id, 'price']
+            if prices.empty or pd.isna(prices.iloc[0]):
+                continue
+            
+            if best_delta is None or delta < best_delta:
+                best_price = float(prices.iloc[0])
+                best_delta = delta
+        
+        return best_price
+    
+    def _get_chart_price_change(self, coin_id: str) -> Optional[Dict]:
+        """
+        通过 market_chart 获取单个代币的小时价格变化
+        
+        Args:
+            coin_id: 代币ID
+            
+        Returns:
+            价格变化数据，失败时返回None
+        """
+        try:
+            url = f"{self.base_url}/coins/{coin_id}/market_chart"
+            params = {
+                'vs_currency': 'usd',
+                'days': 1,
+                'interval': 'hourly'
+            }
+            
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            
+            data = response.json()
+            
+            if 'prices' in data and len(data['prices']) >= 2:
+                # 计算小时变化
+                current_price = data['prices'][-1][1]
+                hour_ago_price = data['prices'][-2][1]
+                hour_change = ((current_price - hour_ago_price) / hour_ago_price) * 100
+                
+                return {
+                    'coin_id': coin_id,
+                    'current_price': current_price,
+                    'hour_ago_price': hour_ago_price,
+                    'hour_change_percent': hour_change,
+                    'change_24h': None,
+                    'change_7d': None,
+                    'timestamp': datetime.fromtimestamp(data['prices'][-1][0] / 1000)
+                }
+            
+            return None
+            
+        except Exception as e:
+            logger.error(f"获取{coin_id}小时价格变化失败: {e}")
+            return None
+    
     def get_volume_analysis(self, coin_ids: List[str] = None) -> pd.DataFrame:
         """
         获取交易量分析
@@ -349,11 +567,25 @@ class FreeDataAggregator:
             if not coin_ids:
                 coin_ids = self.major_tokens[:20]
             
-            volume_data = []
-            
+            # 滚动状态已覆盖完整的7d和24h窗口的代币直接使用，不再逐个请求7天K线；
+            # 历史不足一个窗口时（如刚启动）窗口统计只代表部分时长，仍请求K线
+            stats = self.analytics.volume_stats(coin_ids)
+            stats = stats[stats['covered_7d'] & stats['covered_24h'] & stats['current_volume'].notna()]
+            volume_data = [{
+                'coin_id': coin_id,
+                'current_volume': row['current_volume'],
+                'avg_volume_7d': row['avg_volume_7d'],
+                'volume_change_24h': row['volume_change_24h'],
+                'volume_trend': 'increasing' if row['current_volume'] > row['avg_volume_7d'] else 'decreasing'
+            } for coin_id, row in stats.iterrows()]
+            
+            # 其余代币请求7天K线，全部获取后整批计算
+            history_ids, prices, volumes = [], [], []
             for coin_id in coin_ids:
+                if coin_id in stats.index:
+                    continue
                 try:
-                    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
+                    url = f"{self.base_url}/coins/{coin_id}/market_chart"
                     params = {
                         'vs_currency': 'usd',
                         'days': 7,
@@ -366,25 +598,32 @@ class FreeDataAggregator:
                     data = response.json()
                     
                     if 'total_volumes' in data and len(data['total_volumes']) >= 2:
-                        volumes = [v[1] for v in data['total_volumes']]
-                        current_volume = volumes[-1]
-                        avg_volume = sum(volumes) / len(volumes)
-                        volume_change = ((current_volume - volumes[-2]) / volumes[-2]) * 100 if len(volumes) > 1 else 0
-                        
-                        volume_data.append({
-                            'coin_id': coin_id,
-                            'current_volume': current_volume,
-                            'avg_volume_7d': avg_volume,
-                            'volume_change_24h': volume_change,
-                            'volume_trend': 'increasing' if current_volume > avg_volume else 'decreasing'
-                        })
+                        history_ids.append(coin_id)
+                        volumes.append([v[1] for v in data['total_volumes']])
+                        prices.append([p[1] for p in data.get('prices', [])])
                     
-                    time.sleep(0.1)
+                    if not deadline_sleep(0.1):
+                        logger.warning("刷新预算用完，部分代币未获取交易量分析")
+                        break
                     
                 except Exception as e:
                     logger.error(f"获取{coin_id}交易量分析失败: {e}")
                     continue
             
+            if history_ids:
+                history = self.executor.map(history_stats, ['current_volume', 'avg_volume', 'volume_change'],
+                                            series={'prices': prices, 'volumes': volumes})
+                for i, coin_id in enumerate(history_ids):
+                    current_volume = history['current_volume'][i]
+                    avg_volume = history['avg_volume'][i]
+                    volume_data.append({
+                        'coin_id': coin_id,
+                        'current_volume': current_volume,
+                        'avg_volume_7d': avg_volume,
+                        'volume_change_24h': history['volume_change'][i],
+                        'volume_trend': 'increasing' if current_volume > avg_volume else 'decreasing'
+                    })
+            
             return pd.DataFrame(volume_data)
             
         except Exception as e:
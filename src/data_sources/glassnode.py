@@ -10,20 +10,18 @@ import time
 import logging
 from datetime import datetime, timedelta
 
+from .transport import get_session, base_url
+
 logger = logging.getLogger(__name__)
 
 class GlassnodeAPI:
     """Glassnode API 客户端"""
     
     def __init__(self, api_key: str):
-        self.base_url = "https://api.glassnode.com/v1"
+        self.base_url = base_url('glassnode')
         self.api_key = api_key
-        self.session = requests.Session()
-        
-        # 设置请求头
-        self.session.headers.update({
-            'X-API-KEY': api_key
-        })
+        # 共享连接池（相同API密钥的客户端复用同一个Session）
+        self.session = get_session('glassnode', {'X-API-KEY': api_key})
     
     def get_exchange_flows(self, asset: str = 'BTC', exchange: str = None, since: int = None, until: int = None) -> pd.DataFrame:
         """
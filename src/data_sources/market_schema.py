@@ -0,0 +1,115 @@
+"""
+市场数据表结构定义
+声明市场快照保留的列及其紧凑数据类型
+"""
+import hashlib
+import logging
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 市场快照列定义（列名 -> 数据类型）
+# - 代币符号/名称重复度高，使用category
+# - 价格、市值、成交量数值跨度大，保留float64以免丢失精度
+# - 供应量和比率类指标使用float32
+# - 涨跌幅可能缺失，使用可空的Float32
+# - 排名可能缺失，使用可空的Int32
+MARKET_SCHEMA = {
+    'coin_id': 'string',
+    'symbol': 'category',
+    'name': 'category',
+    'rank': 'Int32',
+    'price': 'float64',
+    'market_cap': 'float64',
+    'volume_24h': 'float64',
+    'change_1h': 'Float32',
+    'change_24h': 'Float32',
+    'change_7d': 'Float32',
+    'change_30d': 'Float32',
+    'circulating_supply': 'float32',
+    'total_supply': 'float32',
+    'max_supply': 'float32',
+    'ath': 'float64',
+    'ath_change_percent': 'float32',
+    'volume_market_cap_ratio': 'float32',
+    'price_ath_ratio': 'float32',
+    'last_updated': 'datetime64[ns, UTC]',
+    'timestamp': 'datetime64[ns]'
+}
+
+NUMERIC_DTYPES = {'Int32', 'float64', 'float32', 'Float32'}
+
+
+def apply_market_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    按声明的表结构裁剪列并转换数据类型
+
+    Args:
+        df: 重命名后的市场数据DataFrame
+
+    Returns:
+        只包含表结构列的紧凑DataFrame
+    """
+    if df.empty:
+        return df
+
+    columns = [column for column in MARKET_SCHEMA if column in df.columns]
+    compact = pd.DataFrame(index=df.index)
+
+    for column in columns:
+        dtype = MARKET_SCHEMA[column]
+        series = df[column]
+
+        try:
+            if dtype in NUMERIC_DTYPES:
+                series = pd.to_numeric(series, errors='coerce')
+            elif dtype.startswith('datetime64'):
+                series = pd.to_datetime(series, errors='coerce', utc='UTC' in dtype)
+                if 'UTC' not in dtype and series.dt.tz is not None:
+                    series = series.dt.tz_localize(None)
+
+            compact[column] = series.astype(dtype)
+
+        except Exception as e:
+            logger.warning(f"列 {column} 转换为 {dtype} 失败，保留原类型: {e}")
+            compact[column] = series
+
+    return compact.reset_index(drop=True)
+
+
+def memory_usage(df: pd.DataFrame) -> int:
+    """
+    计算DataFrame的内存占用（字节）
+
+    Args:
+        df: DataFrame
+
+    Returns:
+        深度统计的内存占用
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def market_data_etag(df: pd.DataFrame) -> Optional[str]:
+    """
+    计算市场数据的内容哈希，数据不变时哈希不变
+
+    Args:
+        df: 市场数据DataFrame
+
+    Returns:
+        哈希字符串，数据为空时返回None
+    """
+    if df is None or df.empty:
+        return None
+
+    try:
+        # 抓取时间每次都不同，不参与哈希
+        content = df.drop(columns=['timestamp'], errors='ignore')
+        hashed = pd.util.hash_pandas_object(content, index=False).values
+        return hashlib.sha1(hashed.tobytes()).hexdigest()[:16]
+    except Exception as e:
+        logger.warning(f"计算数据哈希失败: {e}")
+        return None
@@ -0,0 +1,309 @@
+"""
+共享HTTP传输层
+按数据源名称和请求头复用 requests.Session，短生命周期的客户端不再各自建立连接池。
+每个Session挂载按主机划分的连接池（keep-alive）、urllib3重试策略、
+默认连接/读取超时、压缩请求头和数据源熔断器，并记录每个请求的运行指标
+"""
+import os
+import time
+import atexit
+import logging
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .deadline import current_deadline
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker, reset_breakers
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 每个Session缓存的主机连接池数量
+DEFAULT_POOL_CONNECTIONS = 8
+
+# 每个主机的最大连接数（并发请求超过此数时排队等待空闲连接）
+DEFAULT_POOL_MAXSIZE = 16
+
+# 默认超时（连接, 读取）秒
+DEFAULT_TIMEOUT = (5, 20)
+
+# 各数据源的API地址（可用环境变量 <数据源>_BASE_URL 覆盖，如指向本地模拟服务）
+DEFAULT_BASE_URLS = {
+    'coingecko': 'https://api.coingecko.com/api/v3',
+    'glassnode': 'https://api.glassnode.com/v1',
+    'binance': 'https://api.binance.com'
+}
+
+# 各数据源的单主机连接数
+SOURCE_POOL_SIZES = {
+    'coingecko': 16,
+    'glassnode': 4,
+    'binance': 8
+}
+
+
+def base_url(name: str) -> str:
+    """
+    数据源API地址
+
+    Args:
+        name: 数据源名称
+
+    Returns:
+        环境变量 <NAME>_BASE_URL 设置时返回该地址，否则返回官方地址（不含末尾斜杠）
+    """
+    return (os.getenv(f'{name.upper()}_BASE_URL') or DEFAULT_BASE_URLS[name]).rstrip('/')
+
+
+def _source_url(name: str) -> Optional[str]:
+    """已知数据源的API地址，未知数据源返回None"""
+    return base_url(name) if name in DEFAULT_BASE_URLS else None
+
+
+def _accept_encoding() -> str:
+    """urllib3可以解码的压缩格式（安装brotli后支持br）"""
+    try:
+        import brotli  # noqa: F401
+        return 'gzip, deflate, br'
+    except ImportError:
+        return 'gzip, deflate'
+
+
+DEFAULT_HEADERS = {
+    'Accept': 'application/json',
+    'Accept-Encoding': _accept_encoding(),
+    'Connection': 'keep-alive'
+}
+
+
+def default_retry() -> Retry:
+    """
+    默认重试策略：连接错误和5xx重试，遵循Retry-After，只重试幂等请求。
+    429由调用方处理（限流需要更长的退避）
+
+    Returns:
+        urllib3 Retry
+    """
+    return Retry(
+        total=2,
+        connect=2,
+        read=1,
+        status=2,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+
+
+def parse_retry_after(response) -> Optional[float]:
+    """
+    解析Retry-After响应头
+
+    Args:
+        response: HTTP响应
+
+    Returns:
+        等待秒数，未设置或无法解析时返回None
+    """
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _response_size(response, stream: bool) -> int:
+    """响应字节数（优先取压缩后的Content-Length）"""
+    try:
+        return int(response.headers['Content-Length'])
+    except (KeyError, TypeError, ValueError):
+        pass
+    if stream:
+        return 0
+    return len(getattr(response, 'content', None) or b'')
+
+
+def _retry_count(response) -> int:
+    """urllib3在传输层重试的次数"""
+    retries = getattr(getattr(response, 'raw', None), 'retries', None)
+    return len(retries.history) if retries is not None else 0
+
+
+class TimeoutSession(requests.Session):
+    """
+    未显式传入timeout的请求使用默认超时，避免上游挂起时永久阻塞；
+    处于刷新周期截止时间内时，超时不超过剩余预算；
+    配置熔断器时，数据源熔断期间请求直接失败；被截止时间截短的超时到期属于本地预算不足，不计入熔断失败；
+    每个请求的耗时、状态码、字节数和重试次数记入运行指标
+    """
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 breaker: Optional[CircuitBreaker] = None, name: Optional[str] = None):
+        super().__init__()
+        self.timeout = timeout
+        self.breaker = breaker
+        self.name = name or (breaker.name if breaker is not None else 'http')
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.get('timeout')
+        if timeout is None:
+            timeout = self.timeout
+
+        requested = timeout
+        deadline = current_deadline()
+        if deadline is not None:
+            timeout = deadline.timeout(timeout)
+        truncated = timeout != requested
+
+        kwargs['timeout'] = timeout
+        if self.breaker is not None and not self.breaker.allow_request():
+            metrics.observe_request(self.name, url, 'circuit_open', 0.0)
+            raise CircuitOpenError(f"数据源 {self.breaker.name} 熔断中，{self.breaker.retry_after():.0f} 秒后重试")
+
+        started = time.perf_counter()
+        try:
+            response = super().request(method, url, **kwargs)
+        except Exception as e:
+            metrics.observe_request(self.name, url, type(e).__name__, time.perf_counter() - started)
+            if self.breaker is not None:
+                if truncated and isinstance(e, requests.exceptions.Timeout):
+                    self.breaker.release()
+                else:
+                    self.breaker.record_failure()
+            raise
+
+        metrics.observe_request(self.name, url, response.status_code, time.perf_counter() - started,
+                                _response_size(response, kwargs.get('stream', False)), _retry_count(response))
+
+        if self.breaker is not None:
+            if response.status_code == 429 or response.status_code >= 500:
+                self.breaker.record_failure(parse_retry_after(response))
+            else:
+                self.breaker.record_success()
+        return response
+
+
+def create_session(headers: Optional[Dict[str, str]] = None,
+                   pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                   timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                   retries: Optional[Retry] = None,
+                   breaker: Optional[CircuitBreaker] = None,
+                   name: Optional[str] = None) -> TimeoutSession:
+    """
+    创建配置好连接池、重试和超时的Session
+
+    Args:
+        headers: 附加请求头
+        pool_maxsize: 每个主机的最大连接数
+        timeout: 默认超时（连接, 读取）
+        retries: 重试策略，默认使用 default_retry()
+        breaker: 熔断器
+        name: 数据源名称（运行指标的标签，默认取熔断器名称）
+
+    Returns:
+        TimeoutSession
+    """
+    session = TimeoutSession(timeout, breaker, name)
+    session.headers.update(DEFAULT_HEADERS)
+    if headers:
+        session.headers.update(headers)
+
+    adapter = HTTPAdapter(
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=pool_maxsize,
+        max_retries=retries if retries is not None else default_retry(),
+        pool_block=False
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class SessionRegistry:
+    """连接池注册表，相同数据源、API地址和请求头的客户端共享同一个Session"""
+
+    def __init__(self):
+        self._sessions: Dict[Tuple, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, headers: Optional[Dict[str, str]]) -> Tuple:
+        return (name, _source_url(name), tuple(sorted((headers or {}).items())))
+
+    def get(self, name: str, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+        """
+        获取（必要时创建）共享Session
+
+        Args:
+            name: 数据源名称
+            headers: 附加请求头（如API密钥），不同请求头使用不同Session
+
+        Returns:
+            requests.Session
+        """
+        key = self._key(name, headers)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                # 同一数据源（同一API地址）的所有Session共享一个熔断器
+                session = create_session(headers, SOURCE_POOL_SIZES.get(name, DEFAULT_POOL_MAXSIZE),
+                                         breaker=get_breaker(name, key[1]), name=name)
+                self._sessions[key] = session
+            return session
+
+    def close(self, name: str) -> None:
+        """
+        关闭指定数据源的所有Session
+
+        Args:
+            name: 数据源名称
+        """
+        with self._lock:
+            keys = [key for key in self._sessions if key[0] == name]
+            sessions = [self._sessions.pop(key) for key in keys]
+
+        for session in sessions:
+            session.close()
+
+    def close_all(self) -> None:
+        """关闭所有Session"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+
+        for session in sessions:
+            try:
+                session.close()
+            except Exception as e:
+                logger.warning(f"关闭连接失败: {e}")
+
+    def reset(self) -> None:
+        """关闭所有Session并将数据源熔断器恢复到closed状态（用于测试隔离）"""
+        self.close_all()
+        reset_breakers()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# 进程级默认注册表
+registry = SessionRegistry()
+atexit.register(registry.close_all)
+
+
+def get_session(name: str, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    从默认注册表获取共享Session
+
+    Args:
+        name: 数据源名称
+        headers: 附加请求头
+
+    Returns:
+        requests.Session
+    """
+    return registry.get(name, headers)
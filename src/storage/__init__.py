@@ -0,0 +1 @@
+# 快照存储模块
@@ -0,0 +1,77 @@
+"""
+快照刷新进程
+定时获取数据并写入共享快照存储，所有读取方共享同一份数据
+"""
+import time
+import logging
+import importlib
+from typing import Callable, Dict
+
+from .snapshot_store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotRefresher:
+    """快照刷新器"""
+
+    def __init__(self, store: SnapshotStore, fetch: Callable[[], Dict], interval: int = 300):
+        self.store = store
+        self.fetch = fetch
+        self.interval = interval
+
+    def refresh_once(self) -> bool:
+        """
+        获取一次数据并写入存储
+
+        Returns:
+            是否写入成功
+        """
+        try:
+            snapshot = self.fetch()
+            if not snapshot:
+                logger.warning("获取的快照为空，跳过写入")
+                return False
+
+            self.store.save(snapshot)
+            return True
+
+        except Exception as e:
+            logger.error(f"刷新快照失败: {e}")
+            return False
+
+    def run_forever(self) -> None:
+        """持续刷新（需先获取刷新进程锁）"""
+        if not self.store.acquire_refresher_lock():
+            logger.info(f"已有刷新进程在运行 ({self.store.lock_path})，退出")
+            return
+
+        logger.info(f"快照刷新进程启动，间隔 {self.interval} 秒，写入 {self.store.path}")
+
+        try:
+            while True:
+                started = time.monotonic()
+                self.refresh_once()
+                elapsed = time.monotonic() - started
+                time.sleep(max(self.interval - elapsed, 0))
+
+        except KeyboardInterrupt:
+            logger.info("快照刷新进程已停止")
+        finally:
+            self.store.release_refresher_lock()
+
+
+def run_refresher(app_module: str, path: str, interval: int = 300) -> None:
+    """
+    刷新进程入口
+
+    Args:
+        app_module: 提供 fetch_snapshot() 的应用模块名（如 web_app）
+        path: 快照文件路径
+        interval: 刷新间隔（秒）
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    module = importlib.import_module(app_module)
+    refresher = SnapshotRefresher(SnapshotStore(path), module.fetch_snapshot, interval)
+    refresher.run_forever()
@@ -0,0 +1,201 @@
+"""
+本地快照服务
+通过本地HTTP端口或Unix套接字提供共享快照存储中的最新快照（JSON），
+仪表盘、告警等进程读取这里，而不是各自请求上游数据源
+"""
+import os
+import json
+import socket
+import logging
+import threading
+import socketserver
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from .snapshot_store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+# 默认本地HTTP端口
+DEFAULT_PORT = 8765
+
+
+def _json_default(value):
+    """JSON序列化时间和numpy类型（pd.Timestamp 是 datetime 的子类）"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def encode_snapshot_json(snapshot: Dict) -> bytes:
+    """
+    把快照编码为JSON
+
+    Args:
+        snapshot: 快照数据（market_data为DataFrame，其余为可JSON化的数据）
+
+    Returns:
+        UTF-8编码的JSON
+    """
+    # pandas按需导入，命令行入口导入本模块（DEFAULT_PORT）时不加载
+    import pandas as pd
+
+    meta = {key: value for key, value in snapshot.items() if key != 'market_data'}
+    df = snapshot.get('market_data')
+    records = df.to_json(orient='records', date_format='iso') if isinstance(df, pd.DataFrame) and not df.empty else '[]'
+
+    meta_json = json.dumps(meta, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+    # 行数据由pandas直接序列化，拼接进外层对象
+    return (meta_json[:-1] + (',' if len(meta_json) > 2 else '') + '"market_data":' + records + '}').encode('utf-8')
+
+
+class SnapshotRequestHandler(BaseHTTPRequestHandler):
+    """快照请求处理：/snapshot 返回最新快照，/healthz 返回快照状态"""
+
+    server_version = 'TokenDataSnapshot/1.0'
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/snapshot':
+            self._send_snapshot()
+        elif path == '/healthz':
+            self._send_health()
+        else:
+            self._send(404, b'{"error":"not found"}')
+
+    def _send_snapshot(self):
+        etag, body = self.server.snapshot_source.current()
+        if body is None:
+            self._send(503, b'{"error":"snapshot not ready"}')
+            return
+
+        headers = {'ETag': f'"{etag}"'} if etag else {}
+        if etag and self.headers.get('If-None-Match', '').strip('"') == etag:
+            self._send(304, b'', headers)
+            return
+        self._send(200, body, headers)
+
+    def _send_health(self):
+        snapshot = self.server.snapshot_source.store.load()
+        if not snapshot:
+            self._send(503, b'{"status":"starting"}')
+            return
+
+        last_update = snapshot.get('last_update')
+        health = {
+            'status': 'ok',
+            'last_update': last_update,
+            'age_seconds': (datetime.now() - last_update).total_seconds() if last_update else None,
+            'rows': len(snapshot.get('market_data', [])),
+            'stale': snapshot.get('stale', {})
+        }
+        self._send(200, json.dumps(health, ensure_ascii=False, default=_json_default).encode('utf-8'))
+
+    def _send(self, status: int, body: bytes, headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def address_string(self):
+        # Unix套接字没有客户端地址
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class SnapshotSource:
+    """按快照哈希缓存JSON编码结果"""
+
+    def __init__(self, store: SnapshotStore):
+        self.store = store
+        self._key = None
+        self._body = None
+        self._lock = threading.Lock()
+
+    def current(self) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        当前快照的 (ETag, JSON)
+
+        Returns:
+            快照不存在时返回 (None, None)
+        """
+        snapshot = self.store.load()
+        if not snapshot:
+            return None, None
+
+        last_update = snapshot.get('last_update')
+        key = f"{snapshot.get('etag') or ''}-{last_update.timestamp() if last_update else 0:.0f}"
+        with self._lock:
+            if key != self._key:
+                self._body = encode_snapshot_json(snapshot)
+                self._key = key
+            return self._key, self._body
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """基于Unix套接字的HTTP服务"""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        # 清理上次异常退出留下的套接字文件
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+        os.chmod(self.server_address, 0o660)
+
+
+class SnapshotServer:
+    """本地快照服务（后台线程运行）"""
+
+    def __init__(self, store: SnapshotStore, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None):
+        """
+        Args:
+            store: 共享快照存储
+            host: HTTP监听地址
+            port: HTTP端口（socket_path为空时使用，0表示随机端口）
+            socket_path: Unix套接字路径（设置后不监听TCP端口）
+        """
+        if socket_path and not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("当前系统不支持Unix套接字")
+
+        if socket_path:
+            self.httpd = UnixHTTPServer(socket_path, SnapshotRequestHandler)
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), SnapshotRequestHandler)
+            self.httpd.daemon_threads = True
+        self.httpd.snapshot_source = SnapshotSource(store)
+        self.socket_path = socket_path
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        """服务地址（用于日志）"""
+        if self.socket_path:
+            return f"unix:{self.socket_path}"
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'SnapshotServer':
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='tokendata-snapshot-server', daemon=True)
+        self._thread.start()
+        logger.info(f"快照服务已启动: {self.address}/snapshot")
+        return self
+
+    def stop(self) -> None:
+        """停止服务"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
@@ -0,0 +1,129 @@
+"""
+共享快照存储
+将市场快照写入本地文件，供多个进程（Web worker、监控程序）共享读取
+"""
+import os
+import mmap
+import pickle
+import tempfile
+import logging
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 快照文件路径环境变量
+SNAPSHOT_PATH_ENV = 'TOKENDATA_SNAPSHOT_PATH'
+
+
+def default_snapshot_path() -> str:
+    """获取默认快照文件路径"""
+    return os.getenv(SNAPSHOT_PATH_ENV) or os.path.join(tempfile.gettempdir(), 'tokendata_snapshot.pkl')
+
+
+class SnapshotStore:
+    """基于文件的共享快照存储"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_snapshot_path()
+        self.lock_path = f"{self.path}.lock"
+        self._lock_fd = None
+
+        # 读取缓存（文件未变化时直接返回）
+        self._cached_key = None
+        self._cached_snapshot = None
+
+    def save(self, snapshot: Dict) -> None:
+        """
+        原子写入快照
+
+        先写临时文件再替换，读取方不会看到写了一半的文件
+
+        Args:
+            snapshot: 快照数据
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self) -> Optional[Dict]:
+        """
+        读取最新快照
+
+        文件未变化时返回缓存的对象，变化时通过内存映射读取
+
+        Returns:
+            快照数据，文件不存在或读取失败时返回None
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if key == self._cached_key:
+            return self._cached_snapshot
+
+        try:
+            with open(self.path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    snapshot = pickle.loads(mm)
+
+            self._cached_key = key
+            self._cached_snapshot = snapshot
+            return snapshot
+
+        except Exception as e:
+            logger.error(f"读取快照失败 {self.path}: {e}")
+            return self._cached_snapshot
+
+    def acquire_refresher_lock(self) -> bool:
+        """
+        获取刷新进程锁，保证同一快照文件只有一个刷新进程
+
+        Returns:
+            是否获取成功
+        """
+        if self._lock_fd is not None:
+            return True
+
+        fd = os.open(self.lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+
+        if fcntl is None:
+            logger.warning("当前平台不支持文件锁，无法保证刷新进程唯一")
+            self._lock_fd = fd
+            return True
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._lock_fd = fd
+        return True
+
+    def release_refresher_lock(self) -> None:
+        """释放刷新进程锁"""
+        if self._lock_fd is None:
+            return
+
+        if fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        os.close(self._lock_fd)
+        self._lock_fd = None
@@ -1,47 +1,146 @@
 """
 数值格式化工具
 将大数字转换为易读的格式（B/M/K）
+数组版本（*_array）一次格式化整列，标量版本是对应数组版本的单元素包装
 """
+import numbers
+import itertools
 from typing import Union
 
-def format_number(value: Union[int, float], decimals: int = 2) -> str:
+import numpy as np
+import pandas as pd
+
+# 单位阈值（从大到小）和后缀
+UNIT_THRESHOLDS = (1_000_000_000, 1_000_000, 1_000)
+UNIT_SUFFIXES = ('B', 'M', 'K')
+
+def _is_missing(value) -> bool:
+    """判断数值是否缺失（None、NaN或pd.NA）"""
+    try:
+        return value is None or bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+def _as_float_array(values) -> np.ndarray:
     """
-    格式化数字为易读格式
+    转换为一维浮点数组，缺失值和无法解析的值为NaN
     
     Args:
-        value: 要格式化的数值
-        decimals: 小数位数
+        values: Series、数组、列表或标量
         
     Returns:
-        格式化后的字符串
+        float64数组
     """
+    if isinstance(values, (pd.Series, pd.Index)):
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            return values.to_numpy(dtype=float, na_value=np.nan)
+        values = values.to_numpy(dtype=object)
     try:
-        if value is None or value == 0:
-            return "0"
+        return np.atleast_1d(np.asarray(values, dtype=float))
+    except (TypeError, ValueError):
+        series = pd.Series(np.atleast_1d(np.asarray(values, dtype=object)), dtype=object)
+        return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+def _printf(template: str, *columns) -> np.ndarray:
+    """
+    按 % 模板逐元素格式化多列（整列一次性拼成一个格式串，比逐元素调用快数倍）
+    
+    Args:
+        template: 单元素的 % 格式模板（不含换行）
+        columns: 与模板占位符一一对应的等长数组
+        
+    Returns:
+        字符串数组
+    """
+    count = len(columns[0])
+    if count == 0:
+        return np.array([], dtype=str)
+    arguments = tuple(itertools.chain.from_iterable(zip(*(column.tolist() for column in columns))))
+    return np.array(((template + '\n') * count % arguments).split('\n')[:-1])
+
+def format_number_array(values, decimals: int = 2, prefix: str = '') -> np.ndarray:
+    """
+    批量格式化数字为易读格式
+    
+    Args:
+        values: 数值Series或数组
+        decimals: 小数位数
+        prefix: 前缀（如货币符号）
         
-        abs_value = abs(value)
+    Returns:
+        格式化后的字符串数组（缺失值和0为 "0"）
+    """
+    array = _as_float_array(values)
+    magnitude = np.abs(array)
+    
+    # 按阈值选择单位：十亿级别 (B)、百万级别 (M)、千级别 (K)
+    conditions = [magnitude >= threshold for threshold in UNIT_THRESHOLDS]
+    divisor = np.select(conditions, UNIT_THRESHOLDS, 1)
+    suffix = np.select(conditions, UNIT_SUFFIXES, '')
+    
+    formatted = _printf(f'{prefix}%.{decimals}f%s', array / divisor, suffix)
+    return np.where(np.isnan(array) | (array == 0), f'{prefix}0', formatted)
+
+def format_currency_array(values, decimals: int = 2) -> np.ndarray:
+    """
+    批量格式化货币数值
+    
+    Args:
+        values: 数值Series或数组
+        decimals: 小数位数
         
-        # 十亿级别 (B)
-        if abs_value >= 1_000_000_000:
-            formatted = value / 1_000_000_000
-            return f"{formatted:.{decimals}f}B"
+    Returns:
+        格式化后的货币字符串数组（缺失值和0为 "$0"）
+    """
+    return format_number_array(values, decimals, prefix='$')
+
+def format_percentage_array(values, decimals: int = 2) -> np.ndarray:
+    """
+    批量格式化百分比
+    
+    Args:
+        values: 数值Series或数组
+        decimals: 小数位数
         
-        # 百万级别 (M)
-        elif abs_value >= 1_000_000:
-            formatted = value / 1_000_000
-            return f"{formatted:.{decimals}f}M"
+    Returns:
+        格式化后的百分比字符串数组（缺失值为 "N/A"）
+    """
+    array = _as_float_array(values)
+    return np.where(np.isnan(array), 'N/A', _printf(f'%+.{decimals}f%%', array))
+
+def format_flow_value_array(values, decimals: int = 2) -> np.ndarray:
+    """
+    批量格式化资金流向值
+    
+    Args:
+        values: 流向值Series或数组（正值表示流入，负值表示流出）
+        decimals: 小数位数
         
-        # 千级别 (K)
-        elif abs_value >= 1_000:
-            formatted = value / 1_000
-            return f"{formatted:.{decimals}f}K"
+    Returns:
+        格式化后的流向字符串数组（缺失值为 "N/A"，接近0的值为 "0.00"）
+    """
+    array = _as_float_array(values)
+    formatted = np.where(np.abs(array) < 0.01, '0.00', _printf(f'%+.{decimals}f', array))
+    return np.where(np.isnan(array), 'N/A', formatted)
+
+def _format_scalar(array_formatter, value, decimals: int, fallback: str) -> str:
+    """标量格式化：非数值原样返回（fallback为格式模板）"""
+    if not _is_missing(value) and not isinstance(value, (numbers.Number, np.number)):
+        return fallback.format(value)
+    return str(array_formatter([value], decimals)[0])
+
+def format_number(value: Union[int, float], decimals: int = 2) -> str:
+    """
+    格式化数字为易读格式
+    
+    Args:
+        value: 要格式化的数值
+        decimals: 小数位数
         
-        # 小于1000的数字
-        else:
-            return f"{value:.{decimals}f}"
-            
-    except Exception:
-        return str(value)
+    Returns:
+        格式化后的字符串
+    """
+    return _format_scalar(format_number_array, value, decimals, '{}')
 
 def format_currency(value: Union[int, float], decimals: int = 2) -> str:
     """
@@ -54,15 +153,7 @@ def format_currency(value: Union[int, float], decimals: int = 2) -> str:
     Returns:
         格式化后的货币字符串
     """
-    try:
-        if value is None or value == 0:
-            return "$0"
-        
-        formatted = format_number(value, decimals)
-        return f"${formatted}"
-        
-    except Exception:
-        return f"${value}"
+    return _format_scalar(format_currency_array, value, decimals, '${}')
 
 def format_percentage(value: Union[int, float], decimals: int = 2) -> str:
     """
@@ -75,14 +166,7 @@ def format_percentage(value: Union[int, float], decimals: int = 2) -> str:
     Returns:
         格式化后的百分比字符串
     """
-    try:
-        if value is None:
-            return "N/A"
-        
-        return f"{value:+.{decimals}f}%"
-        
-    except Exception:
-        return f"{value}%"
+    return _format_scalar(format_percentage_array, value, decimals, '{}%')
 
 def format_flow_value(value: Union[int, float], decimals: int = 2) -> str:
     """
@@ -95,14 +179,4 @@ def format_flow_value(value: Union[int, float], decimals: int = 2) -> str:
     Returns:
         格式化后的流向字符串
     """
-    try:
-        if value is None:
-            return "N/A"
-        
-        if abs(value) < 0.01:  # 接近0的值显示为平衡
-            return "0.00"
-        
-        return f"{value:+.{decimals}f}"
-        
-    except Exception:
-        return f"{value}"
+    return _format_scalar(format_flow_value_array, value, decimals, '{}')
@@ -0,0 +1,104 @@
+"""
+导入耗时统计
+包装 builtins.__import__，记录每个模块首次导入的累计耗时和自身耗时，
+供命令行入口的 --import-profile 参数使用
+"""
+import sys
+import time
+import builtins
+from typing import Dict, List, Optional
+
+IMPORT_PROFILE_FLAG = '--import-profile'
+
+
+class ImportProfiler:
+    """模块导入耗时统计器"""
+
+    def __init__(self):
+        self.cumulative: Dict[str, float] = {}
+        self.self_time: Dict[str, float] = {}
+        self.total = 0.0
+        self.started = time.perf_counter()
+        self._stack: List[float] = []
+        self._original_import = None
+
+    @classmethod
+    def from_argv(cls, argv: Optional[List[str]] = None) -> Optional['ImportProfiler']:
+        """
+        命令行带 --import-profile 时创建并安装统计器
+
+        需要在入口脚本导入重量级模块之前调用
+
+        Args:
+            argv: 命令行参数，默认为 sys.argv
+
+        Returns:
+            已安装的统计器，未启用时返回None
+        """
+        if IMPORT_PROFILE_FLAG not in (argv if argv is not None else sys.argv):
+            return None
+
+        profiler = cls()
+        profiler.install()
+        return profiler
+
+    def install(self) -> None:
+        """替换内置导入函数"""
+        if self._original_import is None:
+            self._original_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        """恢复内置导入函数"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level:
+            package = (globals or {}).get('__package__') or ''
+            base = package.rsplit('.', level - 1)[0] if level > 1 else package
+            module_name = f"{base}.{name}" if name else base
+        else:
+            module_name = name
+
+        # 已导入的模块直接返回，不计时
+        if module_name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            self.cumulative[module_name] = self.cumulative.get(module_name, 0.0) + elapsed
+            self.self_time[module_name] = self.self_time.get(module_name, 0.0) + elapsed - children
+            if self._stack:
+                self._stack[-1] += elapsed
+            else:
+                self.total += elapsed
+
+    def report(self, top: int = 15) -> str:
+        """
+        生成导入耗时报告
+
+        Args:
+            top: 显示的模块数量
+
+        Returns:
+            报告文本
+        """
+        lines = [
+            "\n" + "=" * 68,
+            "⏱️  导入耗时统计",
+            "=" * 68,
+            f"进程启动至今: {time.perf_counter() - self.started:.3f}s  导入总耗时: {self.total:.3f}s",
+            f"{'模块':<44} {'累计(ms)':>10} {'自身(ms)':>10}",
+            "-" * 68
+        ]
+        ranked = sorted(self.cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+        for name, elapsed in ranked:
+            lines.append(f"{name[:44]:<44} {elapsed * 1000:>10.1f} {self.self_time.get(name, 0.0) * 1000:>10.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,488 @@
+"""
+实时终端看板
+原地刷新的行情表：通过ANSI光标定位只重绘与上一帧不同的单元格，
+每行显示距该代币数据上次变化的时间，按键切换排序和翻页（使用已缓存的数据，不重新请求）
+"""
+import os
+import sys
+import time
+import select
+import shutil
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .formatter import format_currency_array, format_percentage_array
+from .scheduler import IntervalScheduler, OVERLAP_SKIP
+from .terminal_table import display_width, number_cells, numeric, text_cells
+
+logger = logging.getLogger(__name__)
+
+# 排序按键：按键 -> (排序列, 名称, 默认降序)；再按一次同一按键反转方向
+SORT_KEYS = {
+    'r': ('rank', '排名', False),
+    'n': ('name', '名称', False),
+    'p': ('price', '价格', True),
+    'h': ('change_1h', '1h', True),
+    'd': ('change_24h', '24h', True),
+    'w': ('change_7d', '7d', True),
+    'v': ('volume_24h', '成交量', True),
+    'm': ('market_cap', '市值', True),
+    'a': ('updated_at', '更新', True)
+}
+
+# 显示列：(列名, 标题, 宽度, 对齐)
+COLUMNS = [
+    ('rank', '排名', 5, '>'),
+    ('name', '代币', 18, '<'),
+    ('symbol', '符号', 8, '<'),
+    ('price', '价格', 16, '>'),
+    ('change_1h', '1h', 9, '>'),
+    ('change_24h', '24h', 9, '>'),
+    ('change_7d', '7d', 9, '>'),
+    ('volume_24h', '成交量', 11, '>'),
+    ('market_cap', '市值', 11, '>'),
+    ('age', '更新', 8, '>')
+]
+
+# 按涨跌着色的列
+CHANGE_COLUMNS = ('change_1h', 'change_24h', 'change_7d')
+
+# 排序用的数值列
+NUMERIC_COLUMNS = ('rank', 'price', 'change_1h', 'change_24h', 'change_7d', 'volume_24h', 'market_cap')
+
+# ANSI控制序列
+CSI = '\x1b['
+GREEN = '32'
+RED = '31'
+BOLD = '1'
+REVERSE = '7'
+
+# 表格上方的标题行数（标题、表头、分隔线）和下方的状态行数
+HEADER_LINES = 3
+FOOTER_LINES = 1
+
+Cell = Tuple[str, str]
+
+
+def format_age(seconds: float) -> str:
+    """
+    格式化距上次变化的时间
+
+    Args:
+        seconds: 秒数
+
+    Returns:
+        如 "8s"、"3m05s"、"2h10m"
+    """
+    seconds = max(int(seconds), 0)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def price_cells(values) -> np.ndarray:
+    """价格列（小于1美元的价格显示6位小数）"""
+    array = numeric(values)
+    with np.errstate(invalid='ignore'):
+        small = np.abs(array) < 1
+    return np.where(small, number_cells(array, '.6f', prefix='$'), number_cells(array, ',.2f', prefix='$'))
+
+
+class LiveBoard:
+    """看板数据：缓存每个代币的显示值，记录每行上次变化的时间，按当前排序分页输出"""
+
+    def __init__(self, sort_key: str = 'r'):
+        """
+        Args:
+            sort_key: 初始排序按键（见 SORT_KEYS）
+        """
+        self.cells: Optional[pd.DataFrame] = None
+        self.values: Optional[pd.DataFrame] = None
+        self.updated_at: Optional[pd.Series] = None
+        self.fetched_at: Optional[float] = None
+        self.sort_column, _, self.descending = SORT_KEYS[sort_key]
+        self._lock = threading.Lock()
+
+    def update(self, df: pd.DataFrame, now: Optional[float] = None) -> int:
+        """
+        合并一次新数据
+
+        Args:
+            df: 市场数据DataFrame
+            now: 当前时间戳（测试时可指定）
+
+        Returns:
+            显示值发生变化的行数（含新出现的代币）
+        """
+        now = time.time() if now is None else now
+        df = df.drop_duplicates('coin_id').set_index('coin_id')
+
+        values = pd.DataFrame({column: numeric(df[column]) if column in df else np.nan
+                               for column in NUMERIC_COLUMNS}, index=df.index)
+        values['name'] = text_cells(df['name'])
+
+        cells = pd.DataFrame({
+            'rank': text_cells(df['rank']),
+            'name': values['name'].to_numpy(),
+            'symbol': text_cells(df['symbol'], upper=True),
+            'price': price_cells(values['price']),
+            'change_1h': format_percentage_array(values['change_1h']),
+            'change_24h': format_percentage_array(values['change_24h']),
+            'change_7d': format_percentage_array(values['change_7d']),
+            'volume_24h': format_currency_array(values['volume_24h']),
+            'market_cap': format_currency_array(values['market_cap'])
+        }, index=df.index)
+
+        with self._lock:
+            if self.cells is None:
+                changed = np.ones(len(cells), dtype=bool)
+                previous_updates = np.full(len(cells), np.nan)
+            else:
+                # 按代币对齐比较显示值，新出现的代币视为变化
+                changed = (self.cells.reindex(cells.index) != cells).any(axis=1).to_numpy()
+                previous_updates = self.updated_at.reindex(cells.index).to_numpy(dtype=float)
+
+            updated_at = np.where(changed | np.isnan(previous_updates), now, previous_updates)
+            values['updated_at'] = updated_at
+
+            self.cells = cells
+            self.values = values
+            self.updated_at = pd.Series(updated_at, index=cells.index)
+            self.fetched_at = now
+        return int(changed.sum())
+
+    def set_sort(self, key: str) -> bool:
+        """
+        按键切换排序
+
+        Args:
+            key: 排序按键，与当前排序相同时反转方向
+
+        Returns:
+            按键是否为排序按键
+        """
+        if key not in SORT_KEYS:
+            return False
+        column, _, descending = SORT_KEYS[key]
+        with self._lock:
+            if column == self.sort_column:
+                self.descending = not self.descending
+            else:
+                self.sort_column, self.descending = column, descending
+        return True
+
+    def __len__(self) -> int:
+        return 0 if self.cells is None else len(self.cells)
+
+    def rows(self, now: Optional[float] = None, offset: int = 0, count: Optional[int] = None) -> List[List[Cell]]:
+        """
+        按当前排序输出一页行
+
+        Args:
+            now: 当前时间戳（用于计算更新时间）
+            offset: 起始行
+            count: 行数（默认全部）
+
+        Returns:
+            行列表，每行为 (文本, ANSI样式) 单元格列表
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.cells is None:
+                return []
+            order = self.values.sort_values(self.sort_column, ascending=not self.descending,
+                                            na_position='last', kind='stable').index
+            page = order[offset:None if count is None else offset + count]
+            cells = self.cells.loc[page]
+            values = self.values.loc[page]
+
+        styles = {}
+        for column in CHANGE_COLUMNS:
+            change = values[column].to_numpy()
+            with np.errstate(invalid='ignore'):
+                styles[column] = np.select([change > 0, change < 0], [GREEN, RED], '')
+        ages = [format_age(now - updated) for updated in values['updated_at'].tolist()]
+
+        rows = []
+        for i in range(len(page)):
+            row = []
+            for column, _, _, _ in COLUMNS:
+                if column == 'age':
+                    row.append((ages[i], ''))
+                else:
+                    row.append((cells[column].iat[i], styles[column][i] if column in styles else ''))
+            rows.append(row)
+        return rows
+
+    def header(self) -> List[Cell]:
+        """表头单元格（排序列标出方向）"""
+        arrow = '▼' if self.descending else '▲'
+        sort_column = 'age' if self.sort_column == 'updated_at' else self.sort_column
+        return [(f"{title}{arrow}" if column == sort_column else title, BOLD if column == sort_column else '')
+                for column, title, _, _ in COLUMNS]
+
+
+class AnsiScreen:
+    """按单元格差分重绘的终端画面"""
+
+    def __init__(self, stream=None, widths: Optional[List[int]] = None, aligns: Optional[List[str]] = None):
+        """
+        Args:
+            stream: 输出流，默认为 sys.stdout
+            widths: 列宽（显示宽度）
+            aligns: 列对齐（'<' / '>'）
+        """
+        self.stream = stream or sys.stdout
+        self.widths = widths or [width for _, _, width, _ in COLUMNS]
+        self.aligns = aligns or [align for _, _, _, align in COLUMNS]
+        self.offsets = [sum(self.widths[:i]) + i for i in range(len(self.widths))]
+        self.total_width = self.offsets[-1] + self.widths[-1]
+        self.previous: Dict[int, List[Cell]] = {}
+
+    def enter(self) -> None:
+        """切换到备用屏幕并隐藏光标"""
+        self.stream.write(f"{CSI}?1049h{CSI}?25l{CSI}2J")
+        self.stream.flush()
+        self.previous = {}
+
+    def exit(self) -> None:
+        """恢复光标和原屏幕"""
+        self.stream.write(f"{CSI}0m{CSI}?25h{CSI}?1049l")
+        self.stream.flush()
+
+    def _pad(self, text: str, width: int, align: str) -> str:
+        # 按显示宽度补齐（中文和emoji占两列），超出时截断
+        while display_width(text) > width:
+            text = text[:-1]
+        padding = ' ' * (width - display_width(text))
+        return padding + text if align == '>' else text + padding
+
+    def draw(self, lines: Dict[int, List[Cell]]) -> int:
+        """
+        绘制一帧：只输出与上一帧不同的单元格
+
+        Args:
+            lines: 屏幕行号(从0开始) -> 单元格列表；单个单元格的行占满整行宽度
+
+        Returns:
+            重绘的单元格数
+        """
+        output = []
+        redrawn = 0
+        for number, cells in sorted(lines.items()):
+            previous = self.previous.get(number, [])
+            if len(previous) != len(cells):
+                # 行结构变化（如提示行变为表格行）时先清除整行
+                output.append(f"{CSI}{number + 1};1H{CSI}2K")
+                previous = []
+            for index, cell in enumerate(cells):
+                if index < len(previous) and previous[index] == cell:
+                    continue
+                text, style = cell
+                if len(cells) == 1:
+                    width, align, offset = self.total_width, '<', 0
+                else:
+                    width, align, offset = self.widths[index], self.aligns[index], self.offsets[index]
+                padded = self._pad(text, width, align)
+                output.append(f"{CSI}{number + 1};{offset + 1}H")
+                output.append(f"{CSI}{style}m{padded}{CSI}0m" if style else padded)
+                redrawn += 1
+
+        # 上一帧有、这一帧没有的行整行清除
+        for number in sorted(set(self.previous) - set(lines)):
+            output.append(f"{CSI}{number + 1};1H{CSI}2K")
+
+        self.previous = {number: list(cells) for number, cells in lines.items()}
+        if output:
+            self.stream.write(''.join(output))
+            self.stream.flush()
+        return redrawn
+
+
+class KeyReader:
+    """终端按键读取（cbreak模式，非终端输入时只等待）"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._saved = None
+
+    def __enter__(self):
+        if self.stream.isatty():
+            try:
+                import termios
+                import tty
+                self._saved = termios.tcgetattr(self.stream.fileno())
+                tty.setcbreak(self.stream.fileno())
+            except (ImportError, OSError) as e:
+                logger.warning(f"无法切换终端输入模式: {e}")
+        return self
+
+    def __exit__(self, *exc):
+        if self._saved is not None:
+            import termios
+            termios.tcsetattr(self.stream.fileno(), termios.TCSADRAIN, self._saved)
+            self._saved = None
+
+    def read(self, timeout: float) -> str:
+        """
+        等待按键
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            按下的字符（超时为空字符串）
+        """
+        if self._saved is None:
+            time.sleep(timeout)
+            return ''
+        ready, _, _ = select.select([self.stream], [], [], timeout)
+        if not ready:
+            return ''
+        return os.read(self.stream.fileno(), 32).decode(errors='ignore')
+
+
+class StatusHandler(logging.Handler):
+    """看板运行期间接管日志，最近一条警告/错误显示在状态行"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.last_message = ''
+
+    def emit(self, record):
+        self.last_message = f"{datetime.fromtimestamp(record.created):%H:%M:%S} {record.getMessage()}"
+
+
+class LiveDashboard:
+    """实时终端看板：后台线程按节拍拉取数据，前台每秒重绘变化的单元格并响应按键"""
+
+    def __init__(self, fetch: Callable[[], pd.DataFrame], interval: float = 5, title: str = "📊 实时行情",
+                 redraw_interval: float = 1.0, overlap: str = OVERLAP_SKIP, sort_key: str = 'r',
+                 screen: Optional[AnsiScreen] = None, keys: Optional[KeyReader] = None):
+        """
+        Args:
+            fetch: 获取市场数据的函数
+            interval: 数据刷新间隔（秒）
+            title: 标题
+            redraw_interval: 画面重绘间隔（秒），更新时间列按此频率变化
+            overlap: 单轮超过间隔时的策略
+            sort_key: 初始排序按键
+            screen: 终端画面（测试时可替换输出流）
+            keys: 按键读取器
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.title = title
+        self.redraw_interval = redraw_interval
+        self.board = LiveBoard(sort_key)
+        self.screen = screen or AnsiScreen()
+        self.keys = keys or KeyReader()
+        self.scheduler = IntervalScheduler(self._refresh, interval, overlap=overlap,
+                                           backoff_base=min(interval, 30.0), on_cycle=self._on_cycle)
+        self.offset = 0
+        self.last_cycle: Optional[Dict] = None
+        self.status = StatusHandler()
+
+    def _refresh(self) -> bool:
+        df = self.fetch()
+        if df is None or df.empty:
+            return False
+        self.board.update(df)
+        return True
+
+    def _on_cycle(self, report: Dict) -> None:
+        self.last_cycle = report
+
+    def page_size(self) -> int:
+        """一页可显示的行数（按终端高度）"""
+        return max(shutil.get_terminal_size().lines - HEADER_LINES - FOOTER_LINES, 1)
+
+    def handle_key(self, key: str) -> bool:
+        """
+        处理按键
+
+        Args:
+            key: 按键字符
+
+        Returns:
+            是否继续运行（q 退出）
+        """
+        if key == 'q':
+            return False
+        if self.board.set_sort(key):
+            self.offset = 0
+        elif key in ('j', ' '):
+            self.offset = min(self.offset + self.page_size(), max(len(self.board) - 1, 0))
+        elif key == 'k':
+            self.offset = max(self.offset - self.page_size(), 0)
+        return True
+
+    def frame(self, now: Optional[float] = None, page_size: Optional[int] = None) -> Dict[int, List[Cell]]:
+        """
+        生成一帧画面
+
+        Args:
+            now: 当前时间戳
+            page_size: 表格行数（默认按终端高度）
+
+        Returns:
+            屏幕行号 -> 单元格列表
+        """
+        now = time.time() if now is None else now
+        page_size = page_size or self.page_size()
+        sort_name = next(name for column, name, _ in SORT_KEYS.values() if column == self.board.sort_column)
+
+        lines = {
+            0: [(f"{self.title}  排序: {sort_name}{'↓' if self.board.descending else '↑'}  "
+                 "r/n/p/h/d/w/v/m/a排序 j/k翻页 q退出", BOLD)],
+            1: self.board.header(),
+            2: [('-' * self.screen.total_width, '')]
+        }
+        rows = self.board.rows(now, self.offset, page_size)
+        for i, row in enumerate(rows):
+            lines[HEADER_LINES + i] = row
+
+        if self.board.fetched_at is None:
+            status = "⏳ 正在获取数据..."
+        else:
+            status = (f"第 {self.offset + 1}-{self.offset + len(rows)}/{len(self.board)} 行  "
+                      f"数据时间 {datetime.fromtimestamp(self.board.fetched_at):%H:%M:%S}")
+        if self.last_cycle is not None:
+            status += f"  本轮耗时 {self.last_cycle['duration']:.1f}s"
+            if not self.last_cycle['ok']:
+                status += f"  ❌ 连续失败{self.last_cycle['failures']}次"
+        if self.status.last_message:
+            status += f"  ⚠️ {self.status.last_message}"
+        lines[HEADER_LINES + page_size] = [(status, REVERSE)]
+        return lines
+
+    def run(self) -> None:
+        """运行看板直到按 q 或 Ctrl+C"""
+        fetcher = threading.Thread(target=self.scheduler.run_forever, name='tokendata-live-fetch', daemon=True)
+
+        # 运行期间日志不直接输出到终端，避免破坏画面
+        root = logging.getLogger()
+        saved_handlers = root.handlers[:]
+        root.handlers = [self.status]
+
+        self.screen.enter()
+        try:
+            fetcher.start()
+            with self.keys:
+                while True:
+                    self.screen.draw(self.frame())
+                    key = self.keys.read(self.redraw_interval)
+                    if key and not all(self.handle_key(char) for char in key):
+                        break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.screen.exit()
+            root.handlers = saved_handlers
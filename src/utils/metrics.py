@@ -0,0 +1,273 @@
+"""
+运行指标
+按数据源和接口记录上游请求的次数、延迟分布、字节数、状态码和重试次数，
+并记录分析阶段（资金流向计算、表格渲染等）的耗时；
+可输出Prometheus文本格式（Web应用 /metrics）或终端统计表（命令行 --stats）
+"""
+import re
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# 延迟分布的桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# 阶段耗时的桶上限（秒），单次资金流向计算在微秒级
+STAGE_BUCKETS = (0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# 指标名前缀
+PREFIX = 'tokendata'
+
+# 接口路径中的代币ID等变量替换为占位符，避免标签数量无限增长
+ENDPOINT_PATTERNS = [
+    (re.compile(r'/coins/(?!markets$|list$|categories$)[^/]+'), '/coins/{id}'),
+    (re.compile(r'/\d+(?=/|$)'), '/{n}')
+]
+
+
+def endpoint_label(url: str) -> str:
+    """
+    请求URL对应的接口标签
+
+    Args:
+        url: 请求URL
+
+    Returns:
+        不含主机和查询参数、变量替换为占位符的路径
+    """
+    path = urlsplit(url).path or '/'
+    for pattern, replacement in ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+class Histogram:
+    """累计分布直方图（Prometheus语义：每个桶统计小于等于上限的样本数）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """记录一个样本"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(桶上限, 累计数) 列表，最后一个为 +Inf"""
+        result = []
+        total = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            result.append((bound if bound == '+Inf' else f'{bound:g}', total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数（取所在桶的上限，超出最大桶时取最大值）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            if total >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+class EndpointStats:
+    """单个上游接口的统计"""
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statuses: Dict[str, int] = {}
+        self.bytes = 0
+        self.retries = 0
+
+
+class MetricsRegistry:
+    """进程内指标注册表（线程安全）"""
+
+    def __init__(self):
+        self._endpoints: Dict[Tuple[str, str], EndpointStats] = {}
+        self._stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe_request(self, source: str, url: str, status, latency: float,
+                        size: int = 0, retries: int = 0) -> None:
+        """
+        记录一次上游请求
+
+        Args:
+            source: 数据源名称
+            url: 请求URL
+            status: HTTP状态码，请求异常时为异常类名
+            latency: 耗时（秒）
+            size: 响应字节数
+            retries: 传输层重试次数
+        """
+        key = (source, endpoint_label(url))
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = EndpointStats()
+            stats.latency.observe(latency)
+            stats.statuses[str(status)] = stats.statuses.get(str(status), 0) + 1
+            stats.bytes += size
+            stats.retries += retries
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        """
+        记录一次阶段耗时
+
+        Args:
+            name: 阶段名称
+            seconds: 耗时（秒）
+        """
+        with self._lock:
+            histogram = self._stages.get(name)
+            if histogram is None:
+                histogram = self._stages[name] = Histogram(STAGE_BUCKETS)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """计时上下文：with metrics.stage('table_render'): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - started)
+
+    def timed(self, name: str) -> Callable:
+        """
+        计时装饰器
+
+        Args:
+            name: 阶段名称
+
+        Returns:
+            装饰器
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe_stage(name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        """清空所有指标"""
+        with self._lock:
+            self._endpoints.clear()
+            self._stages.clear()
+            self.started_at = time.time()
+
+    def render_prometheus(self) -> str:
+        """
+        Prometheus文本格式
+
+        Returns:
+            指标文本（text/plain; version=0.0.4）
+        """
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            stages = sorted(self._stages.items())
+            lines = []
+
+            def header(name, kind, text):
+                lines.append(f'# HELP {PREFIX}_{name} {text}')
+                lines.append(f'# TYPE {PREFIX}_{name} {kind}')
+
+            header('upstream_requests_total', 'counter', 'Upstream HTTP requests by source, endpoint and status.')
+            for (source, endpoint), stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'{PREFIX}_upstream_requests_total{{source="{source}",endpoint="{endpoint}",status="{status}"}} {count}')
+
+            header('upstream_request_duration_seconds', 'histogram', 'Upstream HTTP request latency.')
+            for (source, endpoint), stats in endpoints:
+                labels = f'source="{source}",endpoint="{endpoint}"'
+                lines.extend(self._histogram_lines('upstream_request_duration_seconds', labels, stats.latency))
+
+            header('upstream_response_bytes_total', 'counter', 'Upstream response bytes received.')
+            for (source, endpoint), stats in endpoints:
+                lines.append(f'{PREFIX}_upstream_response_bytes_total{{source="{source}",endpoint="{endpoint}"}} {stats.bytes}')
+
+            header('upstream_retries_total', 'counter', 'Transport-level retries of upstream requests.')
+            for (source, endpoint), stats in endpoints:
+                lines.append(f'{PREFIX}_upstream_retries_total{{source="{source}",endpoint="{endpoint}"}} {stats.retries}')
+
+            header('stage_duration_seconds', 'histogram', 'Duration of refresh and analysis stages.')
+            for name, histogram in stages:
+                lines.extend(self._histogram_lines('stage_duration_seconds', f'stage="{name}"', histogram))
+
+            header('uptime_seconds', 'gauge', 'Seconds since metrics were last reset.')
+            lines.append(f'{PREFIX}_uptime_seconds {time.time() - self.started_at:.3f}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram_lines(name: str, labels: str, histogram: Histogram) -> List[str]:
+        lines = [f'{PREFIX}_{name}_bucket{{{labels},le="{bound}"}} {count}' for bound, count in histogram.cumulative()]
+        lines.append(f'{PREFIX}_{name}_sum{{{labels}}} {histogram.sum:.6f}')
+        lines.append(f'{PREFIX}_{name}_count{{{labels}}} {histogram.count}')
+        return lines
+
+    def format_stats(self) -> str:
+        """
+        终端统计表
+
+        Returns:
+            上游接口和阶段耗时的文本表格
+        """
+        with self._lock:
+            endpoints = sorted(self._endpoints.items(), key=lambda item: -item[1].latency.sum)
+            stages = sorted(self._stages.items(), key=lambda item: -item[1].sum)
+
+            lines = ["📡 上游请求统计"]
+            if endpoints:
+                lines.append(f"{'数据源':<10} {'接口':<34} {'次数':>6} {'p50':>8} {'p95':>8} {'最大':>8} "
+                             f"{'总耗时':>8} {'KB':>9} {'重试':>5}  状态码")
+                for (source, endpoint), stats in endpoints:
+                    latency = stats.latency
+                    statuses = ' '.join(f"{status}×{count}" for status, count in sorted(stats.statuses.items()))
+                    lines.append(f"{source:<10} {endpoint[:34]:<34} {latency.count:>6} "
+                                 f"{_ms(latency.quantile(0.5)):>8} {_ms(latency.quantile(0.95)):>8} {_ms(latency.max):>8} "
+                                 f"{latency.sum:>7.2f}s {stats.bytes / 1024:>9.1f} {stats.retries:>5}  {statuses}")
+            else:
+                lines.append("   （无）")
+
+            lines.append("⏱️ 阶段耗时")
+            if stages:
+                lines.append(f"{'阶段':<34} {'次数':>8} {'p50':>8} {'p95':>8} {'最大':>8} {'总耗时':>9}")
+                for name, histogram in stages:
+                    lines.append(f"{name[:34]:<34} {histogram.count:>8} {_ms(histogram.quantile(0.5)):>8} "
+                                 f"{_ms(histogram.quantile(0.95)):>8} {_ms(histogram.max):>8} {histogram.sum:>8.2f}s")
+            else:
+                lines.append("   （无）")
+        return '\n'.join(lines)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+# 进程级默认注册表
+metrics = MetricsRegistry()
@@ -0,0 +1,229 @@
+"""
+刷新周期性能剖析
+按需（--profile 参数或 TOKENDATA_PROFILE_DIR 环境变量）对每个刷新周期运行cProfile、
+调用栈采样和tracemalloc，每个周期写出：
+    <标签>-<时间>-<序号>.prof       cProfile统计（pstats / snakeviz 可读取）
+    <标签>-<时间>-<序号>.collapsed  折叠调用栈（flamegraph.pl / speedscope 可直接生成火焰图）
+    <标签>-<时间>-<序号>.txt        累计耗时最高的函数和分配内存最多的代码行
+"""
+import os
+import sys
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FLAG = '--profile'
+
+# 剖析输出目录环境变量（设置即启用）
+PROFILE_DIR_ENV = 'TOKENDATA_PROFILE_DIR'
+
+# --profile 未指定目录时的默认目录
+DEFAULT_PROFILE_DIR = 'profiles'
+
+# 调用栈采样间隔（秒）
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+def profile_dir_from_argv(argv: Optional[List[str]] = None) -> Optional[str]:
+    """
+    从命令行参数中读取 --profile [DIR] / --profile=DIR（供没有argparse的入口使用）
+
+    Args:
+        argv: 命令行参数，默认为 sys.argv
+
+    Returns:
+        输出目录，未指定时返回None
+    """
+    argv = argv if argv is not None else sys.argv
+    for i, arg in enumerate(argv):
+        if arg.startswith(f'{PROFILE_FLAG}='):
+            return arg.split('=', 1)[1] or DEFAULT_PROFILE_DIR
+        if arg == PROFILE_FLAG:
+            following = argv[i + 1] if i + 1 < len(argv) else None
+            return following if following and not following.startswith('-') else DEFAULT_PROFILE_DIR
+    return None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """后台线程定时采样目标线程的调用栈，按折叠栈格式计数"""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        """
+        Args:
+            thread_id: 被采样的线程ID
+            interval: 采样间隔（秒）
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """开始采样"""
+        self._thread = threading.Thread(target=self._run, name='tokendata-stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止采样"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def write_collapsed(self, path: str) -> None:
+        """
+        写出折叠栈（每行：根;...;叶 样本数）
+
+        Args:
+            path: 输出文件路径
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class CycleProfiler:
+    """刷新周期剖析器"""
+
+    def __init__(self, directory: str = DEFAULT_PROFILE_DIR, sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 top: int = 30, memory: bool = True):
+        """
+        Args:
+            directory: 输出目录
+            sample_interval: 调用栈采样间隔（秒）
+            top: 报告中列出的函数/代码行数量
+            memory: 是否用tracemalloc记录内存分配
+        """
+        self.directory = directory
+        self.sample_interval = sample_interval
+        self.top = top
+        self.memory = memory
+        self.cycles = 0
+        # cProfile和tracemalloc都是进程级的，同一时刻只剖析一个周期
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, directory: Optional[str] = None) -> Optional['CycleProfiler']:
+        """
+        按命令行参数或环境变量创建剖析器
+
+        Args:
+            directory: --profile 指定的目录（优先于环境变量）
+
+        Returns:
+            剖析器，未启用时返回None
+        """
+        directory = directory or os.getenv(PROFILE_DIR_ENV)
+        if not directory:
+            return None
+        logger.info(f"性能剖析已启用，输出目录: {os.path.abspath(directory)}")
+        return cls(directory)
+
+    @contextmanager
+    def profile(self, label: str):
+        """
+        剖析一个周期：with profiler.profile('update_data'): ...
+
+        已有周期在剖析时（如多线程同时刷新）直接运行，不重复剖析
+
+        Args:
+            label: 输出文件名前缀
+        """
+        if not self._lock.acquire(blocking=False):
+            yield
+            return
+
+        try:
+            self.cycles += 1
+            base = os.path.join(self.directory, f"{label}-{datetime.now():%Y%m%d-%H%M%S}-{self.cycles:04d}")
+
+            tracing = self.memory and not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            profiler = cProfile.Profile()
+
+            sampler.start()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                elapsed = time.perf_counter() - started
+                sampler.stop()
+                memory_snapshot = tracemalloc.take_snapshot().filter_traces(
+                    (tracemalloc.Filter(False, tracemalloc.__file__),)) if tracing else None
+                peak = tracemalloc.get_traced_memory()[1] if tracing else None
+                if tracing:
+                    tracemalloc.stop()
+
+                try:
+                    self._write(base, label, elapsed, profiler, sampler, memory_snapshot, peak)
+                except Exception as e:
+                    logger.error(f"写入性能剖析失败: {e}")
+        finally:
+            self._lock.release()
+
+    def wrap(self, func: Callable, label: Optional[str] = None) -> Callable:
+        """
+        包装函数，每次调用剖析一个周期
+
+        Args:
+            func: 被包装的函数
+            label: 输出文件名前缀（默认为函数名）
+
+        Returns:
+            包装后的函数
+        """
+        label = label or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.profile(label):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def _write(self, base: str, label: str, elapsed: float, profiler: cProfile.Profile,
+               sampler: StackSampler, memory_snapshot, peak: Optional[int]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(f"{base}.prof")
+        sampler.write_collapsed(f"{base}.collapsed")
+
+        with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+            f.write(f"{label} 第{self.cycles}个周期 耗时 {elapsed:.3f}s（{datetime.now():%Y-%m-%d %H:%M:%S}）\n\n")
+            f.write(f"== 累计耗时最高的 {self.top} 个函数 ==\n")
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(self.top)
+
+            if memory_snapshot is not None:
+                f.write(f"\n== 分配内存最多的 {self.top} 行（峰值 {peak / 1024 / 1024:.1f} MB）==\n")
+                for stat in memory_snapshot.statistics('lineno')[:self.top]:
+                    f.write(f"{stat}\n")
+
+        logger.info(f"性能剖析已写入 {base}.(prof|collapsed|txt)，耗时 {elapsed:.2f}s")
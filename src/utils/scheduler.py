@@ -0,0 +1,187 @@
+"""
+持续监控调度器
+按墙钟对齐的固定节拍触发任务（如整点），周期不随单次耗时漂移；
+单次运行超过间隔时按策略跳过或补跑错过的节拍，失败时使用带抖动的指数退避重试，
+并报告每轮的延迟和耗时
+"""
+import math
+import time
+import random
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 重叠策略：跳过错过的节拍 / 结束后立即补跑一次
+OVERLAP_SKIP = 'skip'
+OVERLAP_QUEUE = 'queue'
+OVERLAP_POLICIES = (OVERLAP_SKIP, OVERLAP_QUEUE)
+
+
+class IntervalScheduler:
+    """墙钟对齐的间隔调度器"""
+
+    def __init__(self, job: Callable[[], Optional[bool]], interval: float,
+                 overlap: str = OVERLAP_SKIP, align: bool = True,
+                 backoff_base: float = 30.0, backoff_max: Optional[float] = None, jitter: float = 0.2,
+                 on_cycle: Optional[Callable[[Dict], None]] = None,
+                 clock: Callable[[], float] = time.time, sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            job: 任务函数，返回False或抛出异常视为失败
+            interval: 间隔（秒）
+            overlap: 重叠策略（skip/queue）
+            align: 是否对齐到墙钟整数倍（如 interval=3600 时落在整点）
+            backoff_base: 失败后首次重试等待（秒）
+            backoff_max: 重试等待上限（默认等于间隔）
+            jitter: 退避时间的随机抖动比例
+            on_cycle: 每轮结束后的回调，参数为本轮统计
+            clock: 墙钟函数（测试时可替换）
+            sleep: 等待函数（测试时可替换）
+        """
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"未知的重叠策略: {overlap}")
+
+        self.job = job
+        self.interval = interval
+        self.overlap = overlap
+        self.align = align
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max if backoff_max is not None else interval
+        self.jitter = jitter
+        self.on_cycle = on_cycle
+        self.clock = clock
+        self.sleep = sleep
+
+        self.cycles = 0
+        self.failures = 0
+        self.durations = deque(maxlen=100)
+        self._origin = None
+
+    def next_tick(self, after: float) -> float:
+        """
+        after之后的下一个节拍时间
+
+        Args:
+            after: 时间戳
+
+        Returns:
+            节拍时间戳
+        """
+        origin = 0.0 if self.align else self._origin
+        return origin + (math.floor((after - origin) / self.interval) + 1) * self.interval
+
+    def backoff_delay(self) -> float:
+        """当前连续失败次数对应的退避时间（带抖动）"""
+        delay = min(self.backoff_base * (2 ** max(self.failures - 1, 0)), self.backoff_max)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _wait_until(self, target: float) -> None:
+        # 分段等待，系统时间调整后仍能按墙钟触发
+        while True:
+            remaining = target - self.clock()
+            if remaining <= 0:
+                return
+            self.sleep(min(remaining, 60.0))
+
+    def run_cycle(self, scheduled_at: float) -> Dict:
+        """
+        运行一轮任务并计算下一次运行时间
+
+        Args:
+            scheduled_at: 本轮计划时间
+
+        Returns:
+            本轮统计（计划时间、延迟、耗时、是否成功、错过的节拍数、下次运行时间）
+        """
+        started_at = self.clock()
+        try:
+            ok = self.job() is not False
+        except Exception as e:
+            logger.error(f"调度任务失败: {e}")
+            ok = False
+        finished_at = self.clock()
+
+        self.cycles += 1
+        duration = finished_at - started_at
+        self.durations.append(duration)
+
+        next_tick = self.next_tick(finished_at)
+        # 本轮结束前已经过去的节拍（本轮计划时间之后）
+        missed = max(int((next_tick - self.next_tick(scheduled_at)) // self.interval), 0)
+
+        if ok:
+            self.failures = 0
+            if missed and self.overlap == OVERLAP_QUEUE:
+                next_run = finished_at
+            else:
+                next_run = next_tick
+        else:
+            self.failures += 1
+            next_run = min(finished_at + self.backoff_delay(), next_tick)
+
+        report = {
+            'cycle': self.cycles,
+            'scheduled_at': datetime.fromtimestamp(scheduled_at),
+            'lag': started_at - scheduled_at,
+            'duration': duration,
+            'ok': ok,
+            'failures': self.failures,
+            'missed': missed,
+            'next_run': datetime.fromtimestamp(next_run),
+            'next_run_ts': next_run
+        }
+        if missed:
+            logger.warning(f"本轮耗时 {duration:.1f}s 超过间隔，错过 {missed} 个节拍（策略: {self.overlap}）")
+        if self.on_cycle:
+            self.on_cycle(report)
+        return report
+
+    def run_forever(self, run_immediately: bool = True, max_cycles: Optional[int] = None) -> None:
+        """
+        持续调度（Ctrl+C退出）
+
+        Args:
+            run_immediately: 启动时立即运行一次，之后再对齐节拍
+            max_cycles: 最多运行轮数（测试用）
+        """
+        now = self.clock()
+        self._origin = now
+        scheduled_at = now if run_immediately else self.next_tick(now)
+
+        while max_cycles is None or self.cycles < max_cycles:
+            self._wait_until(scheduled_at)
+            report = self.run_cycle(scheduled_at)
+            scheduled_at = report['next_run_ts']
+
+    def latency_summary(self) -> Dict:
+        """最近各轮耗时统计（秒）"""
+        if not self.durations:
+            return {}
+        ordered = sorted(self.durations)
+        return {
+            'cycles': self.cycles,
+            'p50': ordered[len(ordered) // 2],
+            'p95': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)],
+            'max': ordered[-1]
+        }
+
+
+def format_cycle_report(report: Dict) -> str:
+    """
+    格式化单轮统计
+
+    Args:
+        report: run_cycle 返回的统计
+
+    Returns:
+        单行文本
+    """
+    status = "✅" if report['ok'] else f"❌ 连续失败{report['failures']}次"
+    text = (f"⏱️ 第{report['cycle']}轮 {status} 耗时 {report['duration']:.1f}s "
+            f"(计划 {report['scheduled_at']:%H:%M:%S}，延迟 {report['lag']:.2f}s)")
+    if report['missed']:
+        text += f"，错过 {report['missed']} 个节拍"
+    return text + f"\n⏰ 下次更新: {report['next_run']:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,197 @@
+"""
+终端表格渲染
+命令行监控按列（而不是逐行 iterrows）格式化表格：每列数值一次性转换和对齐，
+缺失值（None/NaN）统一显示为占位符，整张表拼成一个字符串后一次写出，
+连续监控上千行时终端刷新平滑
+"""
+import sys
+import unicodedata
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 缺失值占位符
+MISSING = 'N/A'
+
+# 涨跌指示
+UP_ICON = '🟢'
+DOWN_ICON = '🔴'
+FLAT_ICON = '⚪'
+
+
+def numeric(values) -> np.ndarray:
+    """
+    转换为浮点数组，None和无法解析的值为NaN
+
+    Args:
+        values: Series、数组或列表
+
+    Returns:
+        float64数组
+    """
+    return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+
+
+def number_cells(values, spec: str = ',.2f', prefix: str = '', suffix: str = '',
+                 missing: str = MISSING) -> np.ndarray:
+    """
+    按格式说明格式化整列数值
+
+    Args:
+        values: 数值列
+        spec: 格式说明（同 format()，如 ',.2f'、'+.2f'）
+        prefix: 前缀（如 '$'）
+        suffix: 后缀（如 '%'）
+        missing: 缺失值占位符
+
+    Returns:
+        字符串数组
+    """
+    array = numeric(values)
+    valid = np.isfinite(array)
+    cells = np.full(array.shape, missing, dtype=object)
+    if valid.any():
+        template = f"{prefix}{{:{spec}}}{suffix}".format
+        cells[valid] = list(map(template, array[valid].tolist()))
+    return cells.astype(str)
+
+
+def text_cells(values, missing: str = MISSING, upper: bool = False) -> np.ndarray:
+    """
+    格式化整列文本
+
+    Args:
+        values: 文本列
+        missing: 缺失值占位符
+        upper: 是否转为大写
+
+    Returns:
+        字符串数组
+    """
+    series = pd.Series(values, dtype=object)
+    cells = series.where(series.notna(), missing).astype(str)
+    if upper:
+        cells = cells.str.upper()
+    return cells.to_numpy(dtype=str)
+
+
+def icon_cells(values, up: str = UP_ICON, down: str = DOWN_ICON, flat: str = FLAT_ICON) -> np.ndarray:
+    """
+    整列涨跌指示（缺失值为持平）
+
+    Args:
+        values: 数值列
+
+    Returns:
+        指示符数组
+    """
+    array = numeric(values)
+    with np.errstate(invalid='ignore'):
+        return np.select([array > 0, array < 0], [up, down], flat)
+
+
+def display_width(text: str) -> int:
+    """终端显示宽度（中文等全角字符占两列）"""
+    return sum(2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1 for char in text)
+
+
+def join_cells(*parts, sep: str = ' ') -> np.ndarray:
+    """
+    逐元素拼接多列（如 指示符 + 变化值）
+
+    Args:
+        parts: 字符串数组
+        sep: 分隔符
+
+    Returns:
+        拼接后的字符串数组
+    """
+    result = np.asarray(parts[0], dtype=str)
+    for part in parts[1:]:
+        result = np.char.add(np.char.add(result, sep), np.asarray(part, dtype=str))
+    return result
+
+
+class TerminalTable:
+    """按列构建、一次渲染的终端表格"""
+
+    def __init__(self, rule_width: int = 80, header: bool = True):
+        """
+        Args:
+            rule_width: 表头下分隔线宽度
+            header: 是否输出表头和分隔线
+        """
+        self.rule_width = rule_width
+        self.header = header
+        self.columns: List[Tuple[str, np.ndarray, int, str]] = []
+
+    def add_column(self, title: str, cells, width: int, align: str = '<') -> 'TerminalTable':
+        """
+        添加一列
+
+        Args:
+            title: 列标题
+            cells: 该列的字符串数组（见 number_cells / text_cells）
+            width: 列宽（内容超出时不截断）
+            align: '<' 左对齐，'>' 右对齐
+
+        Returns:
+            表格本身（便于链式调用）
+        """
+        self.columns.append((title, np.asarray(cells, dtype=str), width, align))
+        return self
+
+    def render(self) -> str:
+        """
+        渲染为字符串
+
+        Returns:
+            表头、分隔线和所有行，以换行分隔
+        """
+        lines = []
+        if self.header:
+            titles = []
+            for title, _, width, align in self.columns:
+                padding = ' ' * max(width - display_width(title), 0)
+                titles.append(padding + title if align == '>' else title + padding)
+            lines.append(' '.join(titles).rstrip())
+            lines.append('-' * self.rule_width)
+
+        if self.columns and len(self.columns[0][1]):
+            padded = [np.char.rjust(cells, width) if align == '>' else np.char.ljust(cells, width)
+                      for _, cells, width, align in self.columns]
+            lines.extend(np.char.rstrip(join_cells(*padded)).tolist())
+        return '\n'.join(lines)
+
+
+def write_block(lines, stream=None) -> None:
+    """
+    一次写出多行文本（整块写入后刷新，避免逐行输出造成的闪烁）
+
+    Args:
+        lines: 字符串或字符串列表
+        stream: 输出流，默认为 sys.stdout
+    """
+    stream = stream or sys.stdout
+    text = lines if isinstance(lines, str) else '\n'.join(lines)
+    stream.write(text + '\n')
+    stream.flush()
+
+
+def banner(title: str, width: int = 80, subtitle: Optional[str] = None) -> List[str]:
+    """
+    标题块（空行、等号线、标题、等号线）
+
+    Args:
+        title: 标题
+        width: 等号线宽度
+        subtitle: 标题下的附加行（如更新时间），之后追加一条横线
+
+    Returns:
+        行列表
+    """
+    lines = ['', '=' * width, title, '=' * width]
+    if subtitle:
+        lines.extend([subtitle, '-' * width])
+    return lines
@@ -0,0 +1 @@
+# Web展示模块
@@ -0,0 +1,222 @@
+"""
+服务端分页代币表格
+基于 dash_table.DataTable，分页、排序、筛选都在服务端内存快照上完成，
+每次回调只序列化当前页
+"""
+import math
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from dash import dash_table
+from dash.dash_table.Format import Format, Scheme, Sign, Group
+
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 默认每页行数
+DEFAULT_PAGE_SIZE = 50
+
+# 表格列定义
+COLUMNS = [
+    {'name': '排名', 'id': 'rank', 'type': 'numeric'},
+    {'name': '代币', 'id': 'name', 'type': 'text'},
+    {'name': '符号', 'id': 'symbol', 'type': 'text'},
+    {'name': '价格', 'id': 'price', 'type': 'numeric',
+     'format': Format(precision=4, scheme=Scheme.fixed, group=Group.yes).symbol_prefix('$')},
+    {'name': '1h变化(%)', 'id': 'change_1h', 'type': 'numeric',
+     'format': Format(precision=2, scheme=Scheme.fixed, sign=Sign.positive)},
+    {'name': '24h变化(%)', 'id': 'change_24h', 'type': 'numeric',
+     'format': Format(precision=2, scheme=Scheme.fixed, sign=Sign.positive)},
+    {'name': '7d变化(%)', 'id': 'change_7d', 'type': 'numeric',
+     'format': Format(precision=2, scheme=Scheme.fixed, sign=Sign.positive)},
+    {'name': '24h成交量', 'id': 'volume_24h', 'type': 'numeric',
+     'format': Format(precision=0, scheme=Scheme.fixed, group=Group.yes).symbol_prefix('$')},
+    {'name': '市值', 'id': 'market_cap', 'type': 'numeric',
+     'format': Format(precision=0, scheme=Scheme.fixed, group=Group.yes).symbol_prefix('$')}
+]
+
+COLUMN_IDS = [column['id'] for column in COLUMNS]
+
+# 涨跌颜色（客户端按值着色，不需要服务端计算）
+STYLE_DATA_CONDITIONAL = [
+    style
+    for column_id in ('change_1h', 'change_24h', 'change_7d')
+    for style in (
+        {'if': {'filter_query': f'{{{column_id}}} > 0', 'column_id': column_id}, 'color': '#27ae60'},
+        {'if': {'filter_query': f'{{{column_id}}} < 0', 'column_id': column_id}, 'color': '#e74c3c'}
+    )
+]
+
+# 筛选表达式运算符（与DataTable的filter_query语法一致）
+FILTER_OPERATORS = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith ']
+]
+
+
+def create_data_table(table_id: str = 'token-datatable', page_size: int = DEFAULT_PAGE_SIZE) -> dash_table.DataTable:
+    """
+    创建服务端分页的DataTable组件
+
+    Args:
+        table_id: 组件ID
+        page_size: 每页行数
+
+    Returns:
+        DataTable组件
+    """
+    return dash_table.DataTable(
+        id=table_id,
+        columns=COLUMNS,
+        data=[],
+        page_current=0,
+        page_size=page_size,
+        page_count=1,
+        page_action='custom',
+        sort_action='custom',
+        sort_mode='multi',
+        sort_by=[],
+        filter_action='custom',
+        filter_query='',
+        style_table={'overflowX': 'auto'},
+        style_header={'backgroundColor': '#34495e', 'color': 'white', 'fontWeight': 'bold'},
+        style_cell={'padding': '6px', 'fontFamily': 'Arial, sans-serif'},
+        style_cell_conditional=[{'if': {'column_id': column_id}, 'textAlign': 'left'} for column_id in ('name', 'symbol')],
+        style_data_conditional=STYLE_DATA_CONDITIONAL
+    )
+
+
+def split_filter_part(filter_part: str) -> Tuple[Optional[str], Optional[str], Optional[object]]:
+    """
+    解析单个筛选条件，如 "{price} ge 100"
+
+    Args:
+        filter_part: 筛选条件字符串
+
+    Returns:
+        (列名, 运算符, 值)，无法解析时返回 (None, None, None)
+    """
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator not in filter_part:
+                continue
+
+            name_part, value_part = filter_part.split(operator, 1)
+            name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+
+            value_part = value_part.strip()
+            v0 = value_part[0] if value_part else ''
+            if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                value = value_part[1: -1].replace('\\' + v0, v0)
+            else:
+                try:
+                    value = float(value_part)
+                except ValueError:
+                    value = value_part
+
+            # 返回标准运算符（第一个别名）
+            return name, operator_type[0].strip(), value
+
+    return None, None, None
+
+
+def apply_filter(df: pd.DataFrame, filter_query: str) -> pd.DataFrame:
+    """
+    按filter_query筛选数据
+
+    Args:
+        df: 市场数据DataFrame
+        filter_query: DataTable筛选表达式
+
+    Returns:
+        筛选后的DataFrame
+    """
+    if not filter_query:
+        return df
+
+    mask = pd.Series(True, index=df.index)
+    for filter_part in filter_query.split(' && '):
+        column, operator, value = split_filter_part(filter_part)
+        if column not in df.columns:
+            continue
+
+        series = df[column]
+        try:
+            if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+                if isinstance(value, str) and not pd.api.types.is_numeric_dtype(series):
+                    series = series.astype(str).str.lower()
+                    value = value.lower()
+                comparison = getattr(series, operator)(value)
+                mask &= comparison.fillna(False).astype(bool)
+            elif operator == 'contains':
+                mask &= series.astype(str).str.contains(str(value), case=False, regex=False)
+            elif operator == 'datestartswith':
+                mask &= series.astype(str).str.startswith(str(value))
+        except Exception as e:
+            logger.warning(f"筛选条件无效 {filter_part}: {e}")
+
+    return df[mask]
+
+
+def apply_sort(df: pd.DataFrame, sort_by: List[Dict]) -> pd.DataFrame:
+    """
+    按sort_by排序数据
+
+    Args:
+        df: 市场数据DataFrame
+        sort_by: DataTable排序设置
+
+    Returns:
+        排序后的DataFrame
+    """
+    sort_by = [item for item in (sort_by or []) if item.get('column_id') in df.columns]
+    if not sort_by:
+        return df
+
+    return df.sort_values(
+        [item['column_id'] for item in sort_by],
+        ascending=[item['direction'] == 'asc' for item in sort_by],
+        na_position='last',
+        kind='mergesort'
+    )
+
+
+@metrics.timed('datatable_query')
+def query_page(df: pd.DataFrame, page_current: int, page_size: int,
+               sort_by: List[Dict] = None, filter_query: str = '') -> Tuple[List[Dict], int]:
+    """
+    在内存快照上筛选、排序并取出当前页
+
+    Args:
+        df: 市场数据DataFrame
+        page_current: 当前页（从0开始）
+        page_size: 每页行数
+        sort_by: 排序设置
+        filter_query: 筛选表达式
+
+    Returns:
+        (当前页记录, 总页数)
+    """
+    if df is None or df.empty:
+        return [], 1
+
+    columns = [column for column in COLUMN_IDS if column in df.columns]
+    view = apply_sort(apply_filter(df[columns], filter_query), sort_by)
+
+    page_size = page_size or DEFAULT_PAGE_SIZE
+    page_count = max(math.ceil(len(view) / page_size), 1)
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+
+    page = view.iloc[page_current * page_size: (page_current + 1) * page_size]
+
+    # 只转换当前页；缺失值转为None以便JSON序列化
+    page = page.astype(object).where(page.notna(), None)
+    return page.to_dict('records'), page_count
@@ -0,0 +1,30 @@
+"""
+运行指标接口
+以Prometheus文本格式提供本进程的上游请求和阶段耗时指标
+"""
+import logging
+
+from flask import Response
+
+from ..utils.metrics import MetricsRegistry, metrics
+
+logger = logging.getLogger(__name__)
+
+# Prometheus文本格式的Content-Type
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def register_metrics_route(server, path: str = '/metrics', registry: MetricsRegistry = metrics) -> None:
+    """
+    在Flask服务上注册指标接口
+
+    Args:
+        server: Flask应用（Dash的app.server）
+        path: 路由路径
+        registry: 指标注册表
+    """
+    def handle():
+        return Response(registry.render_prometheus(), mimetype=None, content_type=CONTENT_TYPE,
+                        headers={'Cache-Control': 'no-store'})
+
+    server.add_url_rule(path, 'metrics', handle)
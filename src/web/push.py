@@ -0,0 +1,236 @@
+"""
+增量推送通道
+通过SSE（Server-Sent Events）向浏览器广播按coin_id计算的行级差异，
+每个连接只接收其显示范围（前limit行）内的差异。
+浏览器端只原地更新已有单元格，行的增删和顺序变化由Dash回调重新渲染表格
+
+每个SSE连接在线程模型的服务器（gunicorn gthread、waitress）中独占一个线程，
+因此每个进程的连接数有上限（TOKENDATA_PUSH_MAX_CONNECTIONS），超出时返回503，
+浏览器端退回到定时刷新并稍后重试
+"""
+import json
+import queue
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from flask import Response, request, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+# 心跳间隔（秒），防止代理断开空闲连接
+HEARTBEAT_SECONDS = 15
+
+# 每个进程的最大SSE连接数（环境变量，0为不限制）
+MAX_CONNECTIONS_ENV = 'TOKENDATA_PUSH_MAX_CONNECTIONS'
+
+# 连接数已满时建议客户端重试的间隔（秒）
+RETRY_AFTER_SECONDS = 60
+
+# publish() 的默认目标：全部连接
+_ALL = object()
+
+
+class PushCapacityError(Exception):
+    """SSE连接数已达上限"""
+
+
+def compute_row_diff(old_rows: Dict[str, Dict], new_rows: Dict[str, Dict]) -> Dict:
+    """
+    计算两次快照之间的行级差异
+
+    Args:
+        old_rows: 上次的行数据（coin_id -> 行）
+        new_rows: 本次的行数据（coin_id -> 行）
+
+    Returns:
+        {'changed': {coin_id: {字段: 新值}}, 'added': [coin_id], 'removed': [coin_id]}
+    """
+    changed = {}
+    for coin_id, row in new_rows.items():
+        old = old_rows.get(coin_id)
+        if old is None:
+            continue
+
+        fields = {key: value for key, value in row.items() if old.get(key) != value}
+        if fields:
+            changed[coin_id] = fields
+
+    return {
+        'changed': changed,
+        'added': [coin_id for coin_id in new_rows if coin_id not in old_rows],
+        'removed': [coin_id for coin_id in old_rows if coin_id not in new_rows]
+    }
+
+
+class PushBroadcaster:
+    """SSE广播器，每个连接一个队列，按连接的显示行数分组计算差异"""
+
+    def __init__(self, max_queue: int = 100, max_connections: int = 0):
+        """
+        Args:
+            max_queue: 每个连接的消息队列长度
+            max_connections: 最大连接数（0为不限制）
+        """
+        self.max_queue = max_queue
+        self.max_connections = max_connections
+        # 连接队列 -> 显示行数（None为全部）
+        self._subscribers: Dict[queue.Queue, Optional[int]] = {}
+        self._lock = threading.Lock()
+        self._last_rows: List[Dict] = []
+
+    @property
+    def subscriber_count(self) -> int:
+        """当前连接数"""
+        return len(self._subscribers)
+
+    @property
+    def row_limit(self) -> Optional[int]:
+        """发布差异需要的行数：连接中最大的显示行数（有连接显示全部时为None，没有连接时为0）"""
+        with self._lock:
+            limits = list(self._subscribers.values())
+        if None in limits:
+            return None
+        return max(limits, default=0)
+
+    def publish(self, event: str, data: Dict, limit=_ALL) -> None:
+        """
+        向连接广播事件
+
+        Args:
+            event: 事件名
+            data: 事件数据
+            limit: 只发给该显示行数的连接（默认发给全部连接）
+        """
+        message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+        with self._lock:
+            subscribers = [subscriber for subscriber, subscriber_limit in self._subscribers.items()
+                           if limit is _ALL or subscriber_limit == limit]
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # 客户端消费太慢，断开后由浏览器自动重连
+                logger.warning("推送队列已满，断开慢速客户端")
+                self.unsubscribe(subscriber)
+
+    def publish_rows(self, rows: List[Dict], extra: Optional[Dict] = None) -> Dict[Optional[int], Dict]:
+        """
+        与上次发布的行数据比较，每组连接只广播其显示范围内的差异
+
+        Args:
+            rows: 按显示顺序排列的行数据列表（需包含coin_id）
+            extra: 附加数据（如最后更新时间）
+
+        Returns:
+            显示行数 -> 广播的差异（无变化的分组不包含）
+        """
+        with self._lock:
+            old_rows = self._last_rows
+            self._last_rows = list(rows)
+            limits = set(self._subscribers.values())
+
+        if not old_rows:
+            return {}
+
+        published = {}
+        for limit in limits:
+            diff = self.visible_diff(old_rows, rows, limit)
+            if diff is None:
+                continue
+            if extra:
+                diff.update(extra)
+            self.publish('diff', diff, limit)
+            published[limit] = diff
+        return published
+
+    @staticmethod
+    def visible_diff(old_rows: List[Dict], new_rows: List[Dict], limit: Optional[int] = None) -> Optional[Dict]:
+        """
+        显示范围（前limit行）内的差异，并给出显示顺序（客户端据此判断是否需要重新渲染表格）
+
+        Args:
+            old_rows: 上次的行数据列表
+            new_rows: 本次的行数据列表
+            limit: 显示行数（None为全部）
+
+        Returns:
+            差异（changed、added、removed、order），无变化时返回None
+        """
+        old_visible = {row['coin_id']: row for row in old_rows[:limit]}
+        new_visible = {row['coin_id']: row for row in new_rows[:limit]}
+        diff = compute_row_diff(old_visible, new_visible)
+        order = list(new_visible)
+        if not (diff['changed'] or diff['added'] or diff['removed']) and order == list(old_visible):
+            return None
+
+        diff['order'] = order
+        return diff
+
+    def subscribe(self, limit: Optional[int] = None) -> queue.Queue:
+        """
+        注册一个连接
+
+        Args:
+            limit: 连接显示的行数（None为全部）
+
+        Returns:
+            连接的消息队列
+
+        Raises:
+            PushCapacityError: 连接数已达上限
+        """
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_connections and len(self._subscribers) >= self.max_connections:
+                raise PushCapacityError(f"推送连接数已达上限 {self.max_connections}")
+            self._subscribers[subscriber] = limit
+        return subscriber
+
+    def stream(self, subscriber: queue.Queue) -> Iterator[str]:
+        """单个SSE连接的消息流（结束时注销连接）"""
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    yield subscriber.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ": ping\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """注销连接（可重复调用）"""
+        with self._lock:
+            self._subscribers.pop(subscriber, None)
+
+
+def register_sse_route(server, broadcaster: PushBroadcaster, path: str = '/stream') -> None:
+    """
+    在Flask服务上注册SSE路由
+
+    Args:
+        server: Flask应用（Dash的app.server）
+        broadcaster: 推送广播器
+        path: 路由路径
+    """
+    def stream():
+        limit = request.args.get('limit', type=int)
+        try:
+            subscriber = broadcaster.subscribe(limit if limit and limit > 0 else None)
+        except PushCapacityError as e:
+            logger.warning(str(e))
+            return Response(str(e), status=503, headers={'Retry-After': str(RETRY_AFTER_SECONDS)})
+
+        response = Response(
+            stream_with_context(broadcaster.stream(subscriber)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+        # 消息流未开始就断开时生成器的finally不会执行，由响应关闭回调注销
+        response.call_on_close(lambda: broadcaster.unsubscribe(subscriber))
+        return response
+
+    server.add_url_rule(path, 'push_stream', stream)
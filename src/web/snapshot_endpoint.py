@@ -0,0 +1,320 @@
+"""
+列式快照接口
+把当前市场快照编码为紧凑的列式二进制（打包类型数组，可选Arrow IPC），
+按快照哈希缓存压缩结果并支持ETag/304，浏览器端自行渲染表格。
+每次快照只编码、压缩一次，之后每个访问者的开销接近静态文件
+"""
+import gzip
+import json
+import hashlib
+import struct
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from flask import Response, request
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+except ImportError:
+    pa = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 打包格式：魔数 + 头部长度(uint32 LE) + JSON头部 + 按8字节对齐的列缓冲区
+PACKED_MAGIC = b'TDS1'
+PACKED_MIMETYPE = 'application/x-tokendata-snapshot'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# 导出的列及其二进制类型，字符串列以字典编码（int32编号，-1为缺失）
+SNAPSHOT_COLUMNS = {
+    'coin_id': 'dict',
+    'symbol': 'dict',
+    'name': 'dict',
+    'rank': 'int32',
+    'price': 'float64',
+    'change_1h': 'float32',
+    'change_24h': 'float32',
+    'change_7d': 'float32',
+    'volume_24h': 'float64',
+    'market_cap': 'float64'
+}
+
+# 客户端缓存时间（秒），到期后携带ETag重新验证
+DEFAULT_MAX_AGE = 30
+
+
+def _align(size: int, alignment: int = 8) -> int:
+    """向上对齐到alignment字节"""
+    return (size + alignment - 1) // alignment * alignment
+
+
+def _json_default(value):
+    """JSON序列化numpy/时间类型"""
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_column(series: pd.Series, kind: str) -> Tuple[bytes, Dict]:
+    """
+    把单列编码为小端字节缓冲区
+
+    Args:
+        series: 列数据
+        kind: 二进制类型（dict/int32/float32/float64）
+
+    Returns:
+        (缓冲区, 列描述)
+    """
+    if kind == 'dict':
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            values = [str(value) for value in series.cat.categories]
+        else:
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            values = [str(value) for value in uniques]
+        return codes.astype('<i4').tobytes(), {'dtype': 'dict', 'values': values}
+
+    if kind == 'int32':
+        # 缺失排名记为0
+        array = pd.to_numeric(series, errors='coerce').fillna(0).to_numpy(dtype='<i4')
+        return array.tobytes(), {'dtype': 'int32'}
+
+    array = pd.to_numeric(series, errors='coerce').astype('float64').to_numpy(dtype=f'<f{4 if kind == "float32" else 8}', na_value=np.nan)
+    return array.tobytes(), {'dtype': kind}
+
+
+def encode_packed(df: pd.DataFrame, meta: Optional[Dict] = None) -> bytes:
+    """
+    编码为打包类型数组格式
+
+    每列缓冲区相对数据区起点按8字节对齐，且数据区起点本身对齐，
+    浏览器可直接用 Float64Array/Float32Array/Int32Array 零拷贝读取
+
+    Args:
+        df: 市场数据DataFrame
+        meta: 附加到头部的元数据（全球数据、更新时间等）
+
+    Returns:
+        二进制负载
+    """
+    columns = []
+    buffers = []
+    offset = 0
+    for name, kind in SNAPSHOT_COLUMNS.items():
+        if name not in df.columns:
+            continue
+
+        buffer, column = _encode_column(df[name], kind)
+        column.update({'name': name, 'offset': offset, 'length': len(buffer)})
+        columns.append(column)
+        buffers.append(buffer + b'\0' * (_align(len(buffer)) - len(buffer)))
+        offset += _align(len(buffer))
+
+    header = dict(meta or {}, rows=len(df), columns=columns)
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
+    # 头部用空格补齐，使数据区起点8字节对齐
+    header_bytes += b' ' * (_align(8 + len(header_bytes)) - 8 - len(header_bytes))
+
+    return PACKED_MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes + b''.join(buffers)
+
+
+def decode_packed(payload: bytes) -> Tuple[Dict, pd.DataFrame]:
+    """
+    解码打包格式（用于测试和Python客户端）
+
+    Args:
+        payload: 二进制负载
+
+    Returns:
+        (头部, DataFrame)
+    """
+    if payload[:4] != PACKED_MAGIC:
+        raise ValueError("不是有效的快照负载")
+
+    header_length = struct.unpack('<I', payload[4:8])[0]
+    header = json.loads(payload[8: 8 + header_length].decode('utf-8'))
+    data_start = 8 + header_length
+    rows = header['rows']
+
+    data = {}
+    for column in header['columns']:
+        start = data_start + column['offset']
+        if column['dtype'] == 'dict':
+            codes = np.frombuffer(payload, dtype='<i4', count=rows, offset=start)
+            data[column['name']] = pd.Categorical.from_codes(codes, column['values'])
+        else:
+            dtype = {'int32': '<i4', 'float32': '<f4', 'float64': '<f8'}[column['dtype']]
+            data[column['name']] = np.frombuffer(payload, dtype=dtype, count=rows, offset=start)
+
+    return header, pd.DataFrame(data)
+
+
+def encode_arrow(df: pd.DataFrame, meta: Optional[Dict] = None) -> bytes:
+    """
+    编码为Arrow IPC流（需要pyarrow）
+
+    Args:
+        df: 市场数据DataFrame
+        meta: 写入schema元数据的附加信息
+
+    Returns:
+        二进制负载
+    """
+    columns = [name for name in SNAPSHOT_COLUMNS if name in df.columns]
+    table = pa.Table.from_pandas(df[columns], preserve_index=False)
+    table = table.replace_schema_metadata({
+        'tokendata': json.dumps(meta or {}, ensure_ascii=False, default=_json_default)
+    })
+
+    sink = pa.BufferOutputStream()
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class SnapshotEndpoint:
+    """按快照哈希缓存编码和压缩结果的快照接口"""
+
+    def __init__(self, get_snapshot: Callable[[], Dict], max_age: int = DEFAULT_MAX_AGE):
+        self.get_snapshot = get_snapshot
+        self.max_age = max_age
+        self._etag = None
+        self._cache: Dict[Tuple[str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def snapshot_meta(snapshot: Dict) -> Dict:
+        """快照头部的元数据"""
+        last_update = snapshot.get('last_update')
+        return {
+            'etag': snapshot.get('etag'),
+            'last_update': last_update.strftime('%Y-%m-%d %H:%M:%S') if last_update else None,
+            'global': snapshot.get('global_summary') or {}
+        }
+
+    @classmethod
+    def snapshot_etag(cls, snapshot: Dict) -> Optional[str]:
+        """
+        快照负载的版本号：市场数据哈希 + 元数据（全球数据、更新时间）哈希
+
+        市场数据未变化但元数据变化时（如全球数据单独刷新），负载内容也不同
+
+        Args:
+            snapshot: 快照数据
+
+        Returns:
+            版本号，没有市场数据哈希时返回None
+        """
+        etag = snapshot.get('etag')
+        if etag is None:
+            return None
+        meta = cls.snapshot_meta(snapshot)
+        meta_json = json.dumps(meta, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=_json_default)
+        return f"{etag}-{hashlib.md5(meta_json.encode('utf-8')).hexdigest()[:12]}"
+
+    def get_payload(self, snapshot: Dict, fmt: str, encoding: str) -> bytes:
+        """
+        获取指定格式和压缩方式的负载（同一快照数据和元数据只编码一次）
+
+        Args:
+            snapshot: 快照数据
+            fmt: packed 或 arrow
+            encoding: gzip、br 或 identity
+
+        Returns:
+            负载字节
+        """
+        etag = self.snapshot_etag(snapshot)
+        with self._lock:
+            if etag is None or etag != self._etag:
+                self._cache = {}
+                self._etag = etag
+
+            key = (fmt, encoding)
+            if key not in self._cache:
+                raw_key = (fmt, 'identity')
+                if raw_key not in self._cache:
+                    df = snapshot.get('market_data')
+                    if df is None:
+                        df = pd.DataFrame()
+                    meta = self.snapshot_meta(snapshot)
+                    self._cache[raw_key] = encode_arrow(df, meta) if fmt == 'arrow' else encode_packed(df, meta)
+
+                raw = self._cache[raw_key]
+                if encoding == 'br':
+                    self._cache[key] = brotli.compress(raw, quality=5)
+                elif encoding == 'gzip':
+                    self._cache[key] = gzip.compress(raw, compresslevel=6)
+
+            return self._cache[key]
+
+    def handle(self) -> Response:
+        """处理一次快照请求"""
+        try:
+            snapshot = self.get_snapshot()
+        except Exception as e:
+            logger.error(f"读取快照失败: {e}")
+            return Response(status=503)
+
+        etag = self.snapshot_etag(snapshot) if snapshot else None
+        if etag is None:
+            return Response(status=503)
+
+        wants_arrow = request.args.get('format') == 'arrow' or ARROW_MIMETYPE in request.headers.get('Accept', '')
+        fmt = 'arrow' if wants_arrow and pa is not None else 'packed'
+
+        # 每种格式的ETag不同，避免缓存混用
+        response_etag = f"{etag}-{fmt}"
+        headers = {
+            'ETag': f'"{response_etag}"',
+            'Cache-Control': f'public, max-age={self.max_age}',
+            'Vary': 'Accept, Accept-Encoding'
+        }
+        if request.if_none_match.contains(response_etag):
+            return Response(status=304, headers=headers)
+
+        accept_encoding = request.headers.get('Accept-Encoding', '')
+        if brotli is not None and 'br' in accept_encoding:
+            encoding = 'br'
+        elif 'gzip' in accept_encoding:
+            encoding = 'gzip'
+        else:
+            encoding = 'identity'
+
+        payload = self.get_payload(snapshot, fmt, encoding)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+
+        return Response(payload, mimetype=ARROW_MIMETYPE if fmt == 'arrow' else PACKED_MIMETYPE, headers=headers)
+
+
+def register_snapshot_route(server, get_snapshot: Callable[[], Dict], path: str = '/api/snapshot',
+                            max_age: int = DEFAULT_MAX_AGE) -> SnapshotEndpoint:
+    """
+    在Flask服务上注册快照接口
+
+    Args:
+        server: Flask应用（Dash的app.server）
+        get_snapshot: 返回当前快照的函数（含 market_data、global_summary、last_update、etag）
+        path: 路由路径
+        max_age: 客户端缓存时间（秒）
+
+    Returns:
+        快照接口实例
+    """
+    endpoint = SnapshotEndpoint(get_snapshot, max_age)
+    server.add_url_rule(path, 'snapshot_api', endpoint.handle)
+    return endpoint
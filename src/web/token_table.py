@@ -0,0 +1,247 @@
+"""
+代币表格渲染缓存
+每次数据刷新只格式化显示到的行（按需扩展），按显示数量缓存表格组件
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from dash import html
+
+from ..analysis.flow_analyzer import FlowAnalyzer
+from ..analysis.rolling import RollingAnalytics
+from ..utils.formatter import format_currency_array, format_percentage_array
+from ..data_sources.market_schema import market_data_etag
+from ..utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+NEUTRAL_COLOR = '#95a5a6'
+
+# 资金流向周期
+FLOW_PERIODS = ('1h', '24h', '7d')
+
+
+def change_colors(changes) -> List[str]:
+    """整列涨跌颜色（缺失值为中性色）"""
+    values = pd.to_numeric(pd.Series(changes, dtype=object), errors='coerce').to_numpy(dtype=float)
+    with np.errstate(invalid='ignore'):
+        return np.select([values > 0, values < 0], ['#27ae60', '#e74c3c'], NEUTRAL_COLOR).tolist()
+
+
+class TokenTableCache:
+    """代币表格渲染缓存"""
+
+    def __init__(self, flow_analyzer: Optional[FlowAnalyzer] = None, push_url: Optional[str] = None,
+                 analytics: Optional[RollingAnalytics] = None):
+        self.flow_analyzer = flow_analyzer or FlowAnalyzer()
+        # 滚动分析（提供各周期波动率作为流向置信度的基准）
+        self.analytics = analytics
+        # 推送通道地址，客户端脚本据此订阅增量更新
+        self.push_url = push_url
+        self.etag = None
+        # 当前数据和已格式化的前N行（全量数据可能有上万行，只格式化显示到的部分）
+        self._df: Optional[pd.DataFrame] = None
+        self._rows: List[Dict] = []
+        self._tables: Dict[int, html.Table] = {}
+        self._lock = threading.Lock()
+
+    @metrics.timed('table_build_rows')
+    def build_rows(self, df: pd.DataFrame) -> List[Dict]:
+        """
+        计算表格每行的显示字符串和颜色
+
+        Args:
+            df: 市场数据DataFrame
+
+        Returns:
+            行数据列表
+        """
+        missing = pd.Series(None, index=df.index, dtype=object)
+        change_1h = df.get('change_1h', missing)
+        change_24h = df.get('change_24h', missing)
+        change_7d = df.get('change_7d', missing)
+
+        # 计算交易量
+        volume_24h = df['volume_24h'].to_numpy(dtype=float, na_value=np.nan)
+        volume_1h = volume_24h / 24  # 估算1小时交易量
+        volume_7d = volume_24h * 7   # 估算7天交易量
+
+        # 各周期波动率（没有滚动分析或历史不足时为空）
+        volatility = {period: [None] * len(df) for period in FLOW_PERIODS}
+        if self.analytics is not None:
+            stats = self.analytics.volatility(df['coin_id'].astype(str).tolist())
+            for period in FLOW_PERIODS:
+                column = f'volatility_{period}'
+                if column in stats:
+                    volatility[period] = stats[column].tolist()
+
+        # 使用资金流向分析器
+        flows = {period: [] for period in FLOW_PERIODS}
+        flow_colors = {period: [] for period in FLOW_PERIODS}
+        for c1h, c24h, c7d, volume, vol_1h, vol_24h, vol_7d in zip(
+                change_1h.tolist(), change_24h.tolist(), change_7d.tolist(), volume_24h.tolist(),
+                volatility['1h'], volatility['24h'], volatility['7d']):
+            flow_analysis = self.flow_analyzer.get_comprehensive_flow({
+                'change_1h': c1h,
+                'change_24h': c24h,
+                'change_7d': c7d,
+                'volume_24h': volume,
+                'volatility_1h': vol_1h,
+                'volatility_24h': vol_24h,
+                'volatility_7d': vol_7d
+            })
+            for period in FLOW_PERIODS:
+                flows[period].append(flow_analysis.get(period, {}).get('flow', 0))
+                flow_colors[period].append(flow_analysis.get(period, {}).get('color', NEUTRAL_COLOR))
+
+        # 整列格式化
+        columns = {
+            'coin_id': df['coin_id'].tolist(),
+            # 紧凑模式下排名为可空的Int32，缺失时显示 "-"
+            'rank': ['-' if pd.isna(rank) else f"#{rank}" for rank in df['rank'].tolist()],
+            'name': df['name'].tolist(),
+            'symbol': df['symbol'].astype(str).str.upper().tolist(),
+            'price': format_currency_array(df['price'], 2).tolist(),
+            'change_1h': format_percentage_array(change_1h, 2).tolist(),
+            'change_1h_color': change_colors(change_1h),
+            'change_24h': format_percentage_array(change_24h, 2).tolist(),
+            'change_24h_color': change_colors(change_24h),
+            'change_7d': format_percentage_array(change_7d, 2).tolist(),
+            'change_7d_color': change_colors(change_7d),
+            'volume_1h': format_currency_array(volume_1h, 2).tolist(),
+            'volume_24h': format_currency_array(volume_24h, 2).tolist(),
+            'volume_7d': format_currency_array(volume_7d, 2).tolist()
+        }
+        for period in FLOW_PERIODS:
+            columns[f'flow_{period}'] = format_currency_array(flows[period], 2).tolist()
+            columns[f'flow_{period}_color'] = flow_colors[period]
+
+        keys = list(columns)
+        rows = [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+        return rows
+
+    def refresh(self, df: pd.DataFrame, etag: Optional[str] = None) -> str:
+        """
+        数据变化时清空已格式化的行和表格缓存
+
+        Args:
+            df: 市场数据DataFrame
+            etag: 数据哈希（为空时根据数据计算）
+
+        Returns:
+            当前数据哈希
+        """
+        etag = etag or market_data_etag(df)
+        with self._lock:
+            if etag is None or etag != self.etag:
+                self._df = df if df is not None and not df.empty else None
+                self._rows = []
+                self._tables = {}
+                self.etag = etag
+            return self.etag
+
+    def get_rows(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        获取前limit行的行数据（只格式化尚未格式化的部分）
+
+        Args:
+            limit: 行数（None为全部）
+
+        Returns:
+            行数据列表
+        """
+        with self._lock:
+            return self._format_rows(limit)
+
+    def _format_rows(self, limit: Optional[int]) -> List[Dict]:
+        # 调用方需持有锁
+        df = self._df
+        if df is None:
+            return []
+        limit = len(df) if limit is None else min(limit, len(df))
+        if len(self._rows) < limit:
+            self._rows = self._rows + self.build_rows(df.iloc[len(self._rows):limit])
+        return self._rows[:limit]
+
+    def get_table(self, limit: int) -> html.Table:
+        """
+        获取指定显示数量的表格组件（按limit缓存）
+
+        Args:
+            limit: 显示数量
+
+        Returns:
+            表格组件
+        """
+        return self.get_table_with_etag(limit)[1]
+
+    def get_table_with_etag(self, limit: int) -> Tuple[Optional[str], html.Table]:
+        """
+        获取表格组件及其对应的数据哈希（在锁内一起读取，并发刷新时两者始终属于同一份数据）
+
+        Args:
+            limit: 显示数量
+
+        Returns:
+            (数据哈希, 表格组件)
+        """
+        with self._lock:
+            table = self._tables.get(limit)
+            if table is None:
+                table = self._tables[limit] = self._render(self._format_rows(limit), limit)
+            return self.etag, table
+
+    @metrics.timed('table_render')
+    def _render(self, rows: List[Dict], limit: Optional[int] = None) -> html.Table:
+        """根据预计算的行数据生成表格组件（data-limit 为推送订阅的显示范围）"""
+        body = [
+            html.Tr([
+                self._cell(row, 'rank', {'textAlign': 'center', 'fontWeight': 'bold'}),
+                html.Td([
+                    html.Div(row['name'], style={'fontWeight': 'bold'}, **{'data-field': 'name'}),
+                    html.Div(row['symbol'], style={'fontSize': '12px', 'color': '#7f8c8d'}, **{'data-field': 'symbol'})
+                ]),
+                self._cell(row, 'price', {'textAlign': 'right', 'fontWeight': 'bold'}),
+                self._cell(row, 'change_1h', {'textAlign': 'right', 'fontWeight': 'bold'}),
+                self._cell(row, 'change_24h', {'textAlign': 'right'}),
+                self._cell(row, 'change_7d', {'textAlign': 'right'}),
+                self._cell(row, 'volume_1h', {'textAlign': 'right', 'fontSize': '12px'}),
+                self._cell(row, 'volume_24h', {'textAlign': 'right'}),
+                self._cell(row, 'volume_7d', {'textAlign': 'right', 'fontSize': '12px'}),
+                self._cell(row, 'flow_1h', {'textAlign': 'center', 'fontWeight': 'bold'}),
+                self._cell(row, 'flow_24h', {'textAlign': 'center'}),
+                self._cell(row, 'flow_7d', {'textAlign': 'center', 'fontSize': '12px'})
+            ], **{'data-coin': row['coin_id']})
+            for row in rows
+        ]
+
+        return html.Table([
+            html.Thead(html.Tr([
+                html.Th("排名", style={'textAlign': 'center'}),
+                html.Th("代币", style={'textAlign': 'left'}),
+                html.Th("价格", style={'textAlign': 'right'}),
+                html.Th("1h变化", style={'textAlign': 'right'}),
+                html.Th("24h变化", style={'textAlign': 'right'}),
+                html.Th("7d变化", style={'textAlign': 'right'}),
+                html.Th("1h成交量", style={'textAlign': 'right'}),
+                html.Th("24h成交量", style={'textAlign': 'right'}),
+                html.Th("7d成交量", style={'textAlign': 'right'}),
+                html.Th("1h流向", style={'textAlign': 'center'}),
+                html.Th("24h流向", style={'textAlign': 'center'}),
+                html.Th("7d流向", style={'textAlign': 'center'})
+            ], style={'backgroundColor': '#34495e', 'color': 'white'})),
+            html.Tbody(body)
+        ], style={'width': '100%', 'borderCollapse': 'collapse', 'backgroundColor': 'white', 'borderRadius': '8px', 'overflow': 'hidden'},
+           **({'data-push': self.push_url, 'data-limit': str(limit or len(rows))} if self.push_url else {}))
+
+    @staticmethod
+    def _cell(row: Dict, field: str, style: Dict) -> html.Td:
+        """生成带字段标记的单元格，推送更新时按 data-field 定位"""
+        color = row.get(f'{field}_color')
+        if color:
+            style = dict(style, color=color)
+        return html.Td(row[field], style=style, **{'data-field': field})
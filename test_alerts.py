@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+告警规则引擎测试（离线）
+"""
+import sys
+import os
+import io
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.alerts import AlertEngine, AlertRule, StdoutSink, FileSink, WebhookSink
+from src.analysis.rolling import RollingAnalytics
+
+
+def make_market_data(change_1h, volumes=None, minute: int = 0) -> pd.DataFrame:
+    """构造市场数据"""
+    count = len(change_1h)
+    return pd.DataFrame({
+        'coin_id': [f'coin-{i}' for i in range(count)],
+        'symbol': [f'c{i}' for i in range(count)],
+        'price': [10.0] * count,
+        'change_1h': pd.array(change_1h, dtype='Float32'),
+        'change_24h': [1.0] * count,
+        'volume_24h': volumes if volumes is not None else [1e6] * count,
+        'last_updated': pd.Timestamp('2024-01-01', tz='UTC') + pd.Timedelta(minutes=minute)
+    })
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """记录收到的Webhook请求"""
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        RecordingHandler.received.append(json.loads(body))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class BrokenSink:
+    """总是失败的输出"""
+
+    def send(self, alerts):
+        raise RuntimeError("sink down")
+
+
+def test_rules_compile_to_vectorized_predicates():
+    """规则文本解析为向量化判断，缺失值不触发，flips 比较上一快照"""
+    print("🧪 测试规则解析")
+
+    rule = AlertRule.parse('change_1h > 5')
+    assert (rule.field, rule.op, rule.threshold, rule.name) == ('change_1h', '>', 5.0, 'change_1h > 5')
+    assert AlertRule.parse(' Volume_Zscore >= 2.5 ').name == 'volume_zscore >= 2.5'
+    for text in ('change_1h', 'change_1h == 5', 'change_1h >'):
+        try:
+            AlertRule.parse(text)
+            assert False, f"应拒绝: {text}"
+        except ValueError:
+            pass
+
+    values = {'change_1h': np.array([6.0, np.nan, -7.0, 1.0])}
+    previous = {'change_1h': np.array([-1.0, 2.0, -1.0, np.nan])}
+    assert rule.compile()(values, previous).tolist() == [True, False, False, False]
+    assert AlertRule.parse('change_1h <= -7').compile()(values, previous).tolist() == [False, False, True, False]
+    assert AlertRule.parse('change_1h flips').compile()(values, previous).tolist() == [True, False, False, False]
+    print("✅ 规则解析正确")
+
+
+def test_cooldown_and_derived_fields():
+    """冷却时间内不重复告警，资金流向和成交量标准分由引擎计算"""
+    print("🧪 测试冷却去重和派生字段")
+
+    analytics = RollingAnalytics(windows={'1h': (12, 1), '24h': (288, 24)})
+    stream = io.StringIO()
+    engine = AlertEngine([AlertRule.parse('change_1h > 5', cooldown=600), AlertRule.parse('flow_1h flips'),
+                          AlertRule.parse('volume_zscore > 3')], [StdoutSink(stream)], analytics=analytics)
+
+    for step in range(10):
+        df = make_market_data([1.0, -2.0, 0.5], [1e6 + step, 2e6, 3e6], minute=5 * step)
+        analytics.update(df)
+        assert engine.evaluate(df, now=300 * step) == []
+
+    df = make_market_data([6.0, 2.0, 0.5], [1e6, 2e6, 9e6], minute=50)
+    analytics.update(df)
+    alerts = engine.evaluate(df, now=3000)
+    assert [(alert['rule'], alert['coin_id']) for alert in alerts] == [
+        ('change_1h > 5', 'coin-0'), ('flow_1h flips', 'coin-1'), ('volume_zscore > 3', 'coin-2')]
+    assert alerts[0]['message'] == '[change_1h > 5] C0 change_1h = +6.00%（> 5）'
+    assert alerts[1]['message'].startswith('[flow_1h flips] C1 flow_1h $-1.67K → $1.67K')
+    assert stream.getvalue().count('🔔') == 3
+
+    # 冷却时间内不再告警，过后再次告警
+    assert engine.evaluate(make_market_data([7.0, 2.0, 0.5]), now=3300) == []
+    assert [alert['coin_id'] for alert in engine.evaluate(make_market_data([7.0, 2.0, 0.5]), now=3600)] == ['coin-0']
+    print("✅ 冷却去重和派生字段正确")
+
+
+def test_sinks_and_bulk_evaluation():
+    """文件和Webhook输出，失败的输出不影响其他输出；5000个代币一次评估"""
+    print("🧪 测试告警输出")
+
+    server = HTTPServer(('127.0.0.1', 0), RecordingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    RecordingHandler.received = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'alerts.jsonl')
+        url = f'http://127.0.0.1:{server.server_port}/hook'
+        engine = AlertEngine([AlertRule.parse('change_1h > 5'), AlertRule.parse('change_1h < -5')],
+                             [BrokenSink(), FileSink(path), WebhookSink(url)])
+
+        changes = np.random.default_rng(8).normal(0, 4, 5000)
+        started = time.perf_counter()
+        alerts = engine.evaluate(make_market_data(changes), now=0)
+        elapsed = time.perf_counter() - started
+
+        expected = int((changes > 5).sum() + (changes < -5).sum())
+        assert len(alerts) == expected
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == expected and lines[0]['rule'] == 'change_1h > 5'
+
+    server.shutdown()
+    server.server_close()
+    assert len(RecordingHandler.received) == 1
+    assert len(RecordingHandler.received[0]['alerts']) == expected
+    assert elapsed < 0.5
+    print(f"✅ 5000个代币评估耗时 {elapsed * 1000:.1f}ms，{expected} 条告警")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 告警规则引擎测试")
+    print("=" * 50)
+
+    test_rules_compile_to_vectorized_predicates()
+    test_cooldown_and_derived_fields()
+    test_sinks_and_bulk_evaluation()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+离线基准模拟服务测试
+数据源通过 COINGECKO_BASE_URL / BINANCE_BASE_URL 指向本地模拟服务
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.benchmark.mock_api import MarketFixtures, MockMarketServer
+from src.benchmark.suite import compare_results
+from src.data_sources.free_data_aggregator import FreeDataAggregator
+from src.data_sources.transport import registry
+
+
+def with_mock_env(server):
+    """
+    设置指向模拟服务的环境变量，返回恢复函数。
+    设置前后都重置共享Session和熔断器，测试结果不受同一进程中先前请求的影响
+    """
+    previous = {key: os.environ.get(key) for key in server.env()}
+    registry.reset()
+    os.environ.update(server.env())
+
+    def restore():
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        registry.reset()
+    return restore
+
+
+def test_paged_universe_from_mock():
+    """分页获取模拟的代币宇宙，数据版本推进后价格变化"""
+    print("🧪 测试模拟服务分页数据")
+
+    with MockMarketServer(MarketFixtures(600)) as server:
+        restore = with_mock_env(server)
+        try:
+            aggregator = FreeDataAggregator()
+            df = aggregator.get_market_universe(600)
+            assert len(df) == 600
+            assert df['coin_id'].is_unique
+            assert server.stats()['paths']['/api/v3/coins/markets'] == 3
+            # 各页合并后只记录一次快照
+            assert len(aggregator.snapshot_history) == 1 and len(aggregator.snapshot_history[0]) == 600
+            assert aggregator.analytics.updates == 1 and len(aggregator.analytics) == 600
+
+            server.fixtures.advance()
+            moved = aggregator.get_hourly_market_data(limit=5)
+            assert (moved['price'].values != df['price'].head(5).values).all()
+            assert len(aggregator.snapshot_history) == 2
+
+            assert aggregator.get_global_market_data()['total_market_cap'] > 0
+            assert len(aggregator.get_trending_coins()) == 7
+        finally:
+            restore()
+    print("✅ 分页数据正确")
+
+
+def test_rate_limit_injection():
+    """注入的429按Retry-After等待后重试成功"""
+    print("🧪 测试429注入")
+
+    with MockMarketServer(MarketFixtures(50), rate_limit_every=2, retry_after=1) as server:
+        restore = with_mock_env(server)
+        try:
+            aggregator = FreeDataAggregator()
+            aggregator.get_global_market_data()  # 第1个请求
+
+            started = time.monotonic()
+            df = aggregator.get_hourly_market_data(limit=50)  # 第2个请求被限流
+            assert len(df) == 50
+            assert time.monotonic() - started < 3
+            assert server.stats()['rate_limited'] == 1
+        finally:
+            restore()
+    print("✅ 429注入正确")
+
+
+def test_compare_results():
+    """耗时变大、吞吐量变小超过阈值时报告退化"""
+    print("🧪 测试基线比较")
+
+    baseline = {'50': {'refresh_p50_ms': 100.0, 'render_callbacks_per_sec': 50.0, 'rows': 50}}
+    assert compare_results({'50': {'refresh_p50_ms': 110.0, 'render_callbacks_per_sec': 45.0, 'rows': 50}}, baseline) == []
+
+    regressions = compare_results({'50': {'refresh_p50_ms': 150.0, 'render_callbacks_per_sec': 30.0, 'rows': 50}}, baseline)
+    assert len(regressions) == 2
+    print("✅ 基线比较正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 离线基准模拟服务测试")
+    print("=" * 50)
+
+    test_paged_universe_from_mock()
+    test_rate_limit_injection()
+    test_compare_results()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
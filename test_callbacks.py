@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Dash回调刷新次数回归基准（离线）
+统计一次点击刷新按钮触发的上游请求数，防止多个回调重复拉取数据
+"""
+import sys
+import os
+import json
+import subprocess
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+# 每个应用一次刷新应发出的上游请求数
+EXPECTED_CALLS_PER_REFRESH = {
+    'web_app': 3,  # /coins/markets + /global + /search/trending
+    'app': 2       # /coins/markets + /global
+}
+
+
+def _fake_payload(url):
+    """模拟CoinGecko响应"""
+    if url.endswith('/coins/markets'):
+        return [{
+            'id': f'coin{i}', 'symbol': f'c{i}', 'name': f'Coin {i}',
+            'current_price': 100.0 + i, 'market_cap': 1e9, 'market_cap_rank': i + 1,
+            'total_volume': 1e7, 'ath': 200.0,
+            'price_change_percentage_1h_in_currency': 0.5,
+            'price_change_percentage_24h_in_currency': -1.0,
+            'price_change_percentage_7d_in_currency': 2.0,
+            'last_updated': '2024-01-01T00:00:00.000Z'
+        } for i in range(50)]
+    if url.endswith('/global'):
+        return {'data': {'total_market_cap': {'usd': 1e12}, 'total_volume': {'usd': 1e11},
+                         'market_cap_percentage': {'btc': 50.0, 'eth': 20.0},
+                         'market_cap_change_percentage_24h_usd': 1.0}}
+    if url.endswith('/search/trending'):
+        return {'coins': []}
+    return {}
+
+
+def measure(app_module):
+    """在当前进程中加载应用并统计一次点击的上游请求数"""
+    import requests
+
+    calls = []
+
+    class FakeResponse:
+        def __init__(self, url):
+            self.status_code = 200
+            self._url = url
+
+        def json(self):
+            return _fake_payload(self._url)
+
+        def raise_for_status(self):
+            pass
+
+    def fake_get(self, url, *args, **kwargs):
+        calls.append(url)
+        return FakeResponse(url)
+
+    requests.Session.get = fake_get
+    os.environ['TOKENDATA_PUSH_INTERVAL'] = '0'
+
+    module = __import__(app_module)
+    client = module.app.server.test_client()
+    client.get('/')
+
+    callback_id = next(key for key in module.app.callback_map if 'last-update.children' in key)
+    spec = module.app.callback_map[callback_id]
+
+    def prop(dep, value=None):
+        component_id, prop_name = dep.rsplit('.', 1)
+        return {'id': component_id, 'property': prop_name, 'value': value}
+
+    values = {'refresh-btn.n_clicks': 1, 'interval-component.n_intervals': 0, 'limit-dropdown.value': 20}
+    payload = {
+        'output': callback_id,
+        'outputs': [{'id': dep.rsplit('.', 1)[0], 'property': dep.rsplit('.', 1)[1]}
+                    for dep in callback_id.strip('.').split('...')],
+        'inputs': [prop(f"{i['id']}.{i['property']}", values.get(f"{i['id']}.{i['property']}")) for i in spec['inputs']],
+        'state': [prop(f"{s['id']}.{s['property']}") for s in spec['state']],
+        'changedPropIds': ['refresh-btn.n_clicks']
+    }
+
+    before = len(calls)
+    response = client.post('/_dash-update-component', json=payload)
+    assert response.status_code == 200, response.data
+    result = {'calls': len(calls) - before, 'outputs': len(response.json['response'])}
+
+    # 推送触发的重新渲染只使用已有数据
+    if any(i['id'] == 'push-sync' for i in spec['inputs']):
+        values['push-sync.n_clicks'] = 1
+        payload['inputs'] = [prop(f"{i['id']}.{i['property']}", values.get(f"{i['id']}.{i['property']}")) for i in spec['inputs']]
+        payload['changedPropIds'] = ['push-sync.n_clicks']
+        before = len(calls)
+        response = client.post('/_dash-update-component', json=payload)
+        assert response.status_code == 200, response.data
+        result['sync_calls'] = len(calls) - before
+
+    return result
+
+
+def measure_concurrent(app_module):
+    """两个线程同时刷新数据（推送线程与回调），统计上游请求数"""
+    import time
+    import threading
+    import requests
+
+    calls = []
+
+    class FakeResponse:
+        def __init__(self, url):
+            self.status_code = 200
+            self._url = url
+
+        def json(self):
+            return _fake_payload(self._url)
+
+        def raise_for_status(self):
+            pass
+
+    def fake_get(self, url, *args, **kwargs):
+        calls.append(url)
+        time.sleep(0.2)
+        return FakeResponse(url)
+
+    requests.Session.get = fake_get
+    os.environ['TOKENDATA_PUSH_INTERVAL'] = '0'
+
+    module = __import__(app_module)
+    threads = [threading.Thread(target=module.update_data) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {'calls': len(calls), 'rows': len(module.global_data['market_data'])}
+
+
+def run_measure(app_module, mode='--measure'):
+    """在独立进程中测量（两个Dash应用不能在同一进程中注册回调）"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), mode, app_module],
+        capture_output=True, text=True, timeout=120, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+    assert lines, output.stderr
+    return json.loads(lines[-1])
+
+
+def test_web_app_single_refresh_per_click():
+    """web_app 一次点击只刷新一次"""
+    print("🧪 测试 web_app 刷新次数")
+
+    result = run_measure('web_app')
+    print(f"   上游请求: {result['calls']}, 更新面板: {result['outputs']}")
+    assert result['calls'] == EXPECTED_CALLS_PER_REFRESH['web_app']
+    assert result['sync_calls'] == 0
+    print("✅ web_app 每次点击刷新一次，推送触发的重新渲染不请求上游")
+
+
+def test_app_single_refresh_per_click():
+    """app 一次点击只刷新一次"""
+    print("🧪 测试 app 刷新次数")
+
+    result = run_measure('app')
+    print(f"   上游请求: {result['calls']}, 更新面板: {result['outputs']}")
+    assert result['calls'] == EXPECTED_CALLS_PER_REFRESH['app']
+    print("✅ app 每次点击刷新一次")
+
+
+def test_web_app_concurrent_refresh():
+    """web_app 推送线程与回调同时刷新时只请求一次上游"""
+    print("🧪 测试并发刷新")
+
+    result = run_measure('web_app', '--measure-concurrent')
+    assert result['calls'] == EXPECTED_CALLS_PER_REFRESH['web_app']
+    assert result['rows'] == 50
+    print("✅ 并发刷新只请求一次上游")
+
+
+def main():
+    """主测试函数"""
+    if len(sys.argv) == 3 and sys.argv[1] == '--measure':
+        print(json.dumps(measure(sys.argv[2])))
+        return
+    if len(sys.argv) == 3 and sys.argv[1] == '--measure-concurrent':
+        print(json.dumps(measure_concurrent(sys.argv[2])))
+        return
+
+    print("🚀 Dash回调刷新次数基准")
+    print("=" * 50)
+
+    test_web_app_single_refresh_per_click()
+    test_app_single_refresh_per_click()
+    test_web_app_concurrent_refresh()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
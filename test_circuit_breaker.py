@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+数据源熔断与降级测试（离线）
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import requests
+
+from src.data_sources.circuit_breaker import (CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN,
+                                              get_breaker, reset_breakers)
+from src.data_sources.deadline import Deadline
+from src.data_sources.transport import SessionRegistry, create_session
+from src.data_sources.free_data_aggregator import FreeDataAggregator
+from test_hourly_changes import FakeResponse, make_coin
+
+
+def test_breaker_states():
+    """closed -> open -> half-open -> closed，探测失败时冷却加倍"""
+    print("🧪 测试熔断状态")
+
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=0.05, jitter=0)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    # 冷却结束后只放行一个探测请求
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert 0.09 <= breaker.retry_after() <= 0.1
+
+    time.sleep(0.11)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
+    print("✅ 状态转换正确")
+
+
+def test_session_short_circuits():
+    """熔断期间请求不发往上游"""
+    print("🧪 测试请求短路")
+
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=60)
+    session = create_session(breaker=breaker)
+    sent = []
+
+    class Response:
+        status_code = 503
+        headers = {}
+
+    def fake_send(request, **kwargs):
+        sent.append(request.url)
+        return Response()
+
+    session.send = fake_send
+
+    for _ in range(2):
+        session.get('https://example.com/api')
+    assert breaker.state == OPEN
+
+    try:
+        session.get('https://example.com/api')
+        assert False, "熔断期间应直接失败"
+    except CircuitOpenError:
+        pass
+    assert len(sent) == 2
+    print("✅ 熔断期间请求被短路")
+
+
+def test_deadline_timeout_not_counted():
+    """截止时间截短的超时到期不计入熔断失败，上游自身的超时仍计入"""
+    print("🧪 测试截止时间超时")
+
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=60)
+    session = create_session(timeout=(5, 20), breaker=breaker)
+
+    def fake_send(request, **kwargs):
+        raise requests.exceptions.ReadTimeout('timeout')
+
+    session.get_adapter('https://example.com/api').send = fake_send
+
+    with Deadline(1.0):
+        for _ in range(3):
+            try:
+                session.get('https://example.com/api')
+            except requests.exceptions.Timeout:
+                pass
+    assert breaker.state == CLOSED and breaker.failures == 0
+
+    # 探测请求被截止时间打断时释放名额，下一个请求仍可探测
+    breaker.record_failure()
+    breaker._open_until = 0.0
+    with Deadline(1.0):
+        try:
+            session.get('https://example.com/api')
+        except requests.exceptions.Timeout:
+            pass
+    assert breaker.allow_request()
+    breaker.record_success()
+
+    # 未被截短的超时是上游故障
+    try:
+        session.get('https://example.com/api')
+    except requests.exceptions.Timeout:
+        pass
+    assert breaker.state == OPEN
+    print("✅ 截止时间超时不触发熔断")
+
+
+def test_breakers_keyed_by_url():
+    """不同API地址的同名数据源不共享熔断状态，reset_breakers 恢复所有熔断器"""
+    print("🧪 测试熔断器隔离")
+
+    real = get_breaker('coingecko', 'https://api.coingecko.com/api/v3')
+    mock = get_breaker('coingecko', 'http://127.0.0.1:8000/api/v3')
+    assert real is not mock
+    assert get_breaker('coingecko', 'https://api.coingecko.com/api/v3') is real
+
+    for _ in range(real.failure_threshold):
+        real.record_failure()
+    assert real.state == OPEN and mock.state == CLOSED
+
+    previous = os.environ.get('COINGECKO_BASE_URL')
+    os.environ['COINGECKO_BASE_URL'] = 'http://127.0.0.1:8000/api/v3'
+    try:
+        registry = SessionRegistry()
+        assert registry.get('coingecko').breaker is mock
+    finally:
+        if previous is None:
+            os.environ.pop('COINGECKO_BASE_URL', None)
+        else:
+            os.environ['COINGECKO_BASE_URL'] = previous
+
+    reset_breakers()
+    assert real.state == CLOSED and real.failures == 0 and real.allow_request()
+    print("✅ 熔断器按地址隔离")
+
+
+def test_last_good_fallback():
+    """上游失败时返回最近一次成功的数据及其获取时间"""
+    print("🧪 测试降级数据")
+
+    class FlakySession:
+        def __init__(self):
+            self.fail = False
+
+        def get(self, url, params=None, **kwargs):
+            if self.fail:
+                raise CircuitOpenError("熔断中")
+            return FakeResponse([make_coin('bitcoin', 110.0, 1.0)])
+
+    aggregator = FreeDataAggregator()
+    aggregator.session = FlakySession()
+
+    fresh = aggregator.get_hourly_market_data(limit=1)
+    assert not fresh.attrs.get('stale')
+
+    aggregator.session.fail = True
+    started = time.monotonic()
+    stale = aggregator.get_hourly_market_data(limit=1)
+    assert time.monotonic() - started < 1.0  # 熔断时不等待重试
+    assert stale.attrs['stale'] and stale.attrs['fetched_at'] is not None
+    assert stale['price'].iloc[0] == 110.0
+
+    # 没有成功记录的请求仍返回空数据
+    assert aggregator.get_hourly_market_data(limit=5).empty
+    print("✅ 降级数据正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 数据源熔断测试")
+    print("=" * 50)
+
+    test_breaker_states()
+    test_session_short_circuits()
+    test_deadline_timeout_not_counted()
+    test_breakers_keyed_by_url()
+    test_last_good_fallback()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
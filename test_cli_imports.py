@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+命令行入口导入测试（离线）
+导入入口脚本和 --help 不应加载 numpy/pandas
+"""
+import sys
+import os
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+ENTRY_POINTS = ['token_monitor', 'free_monitor', 'main']
+
+HEAVY_MODULES = ['numpy', 'pandas']
+
+
+def loaded_modules(code: str) -> list:
+    """在新的解释器中执行代码，返回已加载的重量级模块"""
+    check = f"{code}\nimport sys\nprint('loaded:' + ','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))"
+    result = subprocess.run([sys.executable, '-c', check], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    loaded = result.stdout.strip().splitlines()[-1]
+    assert loaded.startswith('loaded:'), result.stdout
+    return [name for name in loaded[len('loaded:'):].split(',') if name]
+
+
+def test_entry_points_import_lazily():
+    """导入入口脚本后 numpy/pandas 不在 sys.modules 中"""
+    print("🧪 测试入口脚本导入")
+
+    for module in ENTRY_POINTS:
+        assert loaded_modules(f"import {module}") == [], f"{module} 导入时加载了 numpy/pandas"
+    print("✅ 入口脚本导入时未加载 numpy/pandas")
+
+
+def test_help_does_not_load_pandas():
+    """--help 在解析参数时退出，不加载 numpy/pandas"""
+    print("🧪 测试 --help")
+
+    for module in ENTRY_POINTS:
+        code = (f"import sys\nsys.argv = ['{module}.py', '--help']\nimport {module}\n"
+                f"try:\n    {module}.main()\nexcept SystemExit:\n    pass")
+        assert loaded_modules(code) == [], f"{module} --help 加载了 numpy/pandas"
+    print("✅ --help 未加载 numpy/pandas")
+
+
+def test_alert_cooldown_default_matches():
+    """未指定 --alert-cooldown 时使用告警引擎的默认冷却时间"""
+    print("🧪 测试告警冷却默认值")
+
+    sys.path.append(os.path.join(ROOT, 'src'))
+    import token_monitor
+    from src.analysis.alerts import DEFAULT_COOLDOWN
+
+    monitor = token_monitor.TokenMonitor()
+    monitor.configure_alerts(['change_1h > 5'])
+    assert monitor.alerts.rules[0].cooldown == DEFAULT_COOLDOWN
+
+    monitor.configure_alerts(['change_1h > 5'], 60)
+    assert monitor.alerts.rules[0].cooldown == 60
+    print("✅ 告警冷却默认值一致")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 命令行入口导入测试")
+    print("=" * 50)
+
+    test_entry_points_import_lazily()
+    test_help_does_not_load_pandas()
+    test_alert_cooldown_default_matches()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+服务端分页表格测试（离线）
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.data_sources.market_schema import apply_market_schema
+from src.web.data_table import query_page, split_filter_part
+
+
+def make_market_frame(count=10000):
+    """构造全量代币快照"""
+    return apply_market_schema(pd.DataFrame({
+        'coin_id': [f'coin-{i}' for i in range(count)],
+        'symbol': [f'c{i}' for i in range(count)],
+        'name': [f'Coin {i}' for i in range(count)],
+        'rank': range(1, count + 1),
+        'price': [float(i) for i in range(count)],
+        'change_1h': [None if i % 5 == 0 else (i % 11) - 5.0 for i in range(count)],
+        'volume_24h': [1e6 + i for i in range(count)],
+        'market_cap': [1e9 - i for i in range(count)]
+    }))
+
+
+def test_split_filter_part():
+    """筛选条件解析"""
+    print("🧪 测试筛选条件解析")
+
+    assert split_filter_part('{price} ge 100') == ('price', 'ge', 100.0)
+    assert split_filter_part('{price} >= 100') == ('price', 'ge', 100.0)
+    assert split_filter_part('{name} contains "Coin 1"') == ('name', 'contains', 'Coin 1')
+    print("✅ 解析正确")
+
+
+def test_query_page():
+    """分页、排序、筛选只返回当前页"""
+    print("🧪 测试分页查询")
+
+    df = make_market_frame()
+
+    records, page_count = query_page(df, 0, 50)
+    assert len(records) == 50
+    assert page_count == 200
+
+    records, page_count = query_page(df, 2, 50, [{'column_id': 'price', 'direction': 'desc'}], '{price} lt 1000')
+    assert page_count == 20
+    assert records[0]['price'] == 899.0
+
+    # 缺失值排在最后并序列化为None
+    records, _ = query_page(df, 199, 50, [{'column_id': 'change_1h', 'direction': 'desc'}])
+    assert records[-1]['change_1h'] is None
+    print("✅ 分页查询正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 服务端分页表格测试")
+    print("=" * 50)
+
+    test_split_filter_part()
+    test_query_page()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
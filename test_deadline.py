@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+刷新周期时间预算测试（离线）
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.data_sources.deadline import Deadline, DeadlineExceeded, deadline_sleep, fetch_sections
+from src.data_sources.transport import create_session
+
+
+def test_deadline_caps_timeouts():
+    """请求超时不超过剩余预算，预算用完后不再发起请求"""
+    print("🧪 测试超时约束")
+
+    with Deadline(1.0) as deadline:
+        connect, read = deadline.timeout((5, 20))
+        assert connect <= 1.0 and read <= 1.0
+        assert not deadline_sleep(2.0)
+
+        # 嵌套预算不超过外层
+        with Deadline(10.0) as inner:
+            assert inner.remaining() <= 1.0
+
+    session = create_session()
+    captured = {}
+
+    def fake_send(request, **kwargs):
+        captured.update(kwargs)
+        raise RuntimeError('stop')
+
+    session.get_adapter('https://example.com').send = fake_send
+    with Deadline(0.5):
+        try:
+            session.get('https://example.com')
+        except RuntimeError:
+            pass
+    assert max(captured['timeout']) <= 0.5
+
+    with Deadline(0.0):
+        try:
+            session.get('https://example.com')
+            assert False, "预算用完时应直接放弃请求"
+        except DeadlineExceeded:
+            pass
+    print("✅ 超时约束正确")
+
+
+def test_fetch_sections_partial():
+    """超出预算的部分沿用上一次的数据并标记过期"""
+    print("🧪 测试部分结果")
+
+    previous = {'market_data': pd.DataFrame({'price': [1.0]}), 'global_summary': {'total_market_cap': 1}}
+
+    def slow_market():
+        time.sleep(0.3)
+        return pd.DataFrame({'price': [2.0]})
+
+    def never_called():
+        raise AssertionError("预算用完后不应继续获取")
+
+    started = time.monotonic()
+    snapshot = fetch_sections({
+        'market_data': slow_market,
+        'global_summary': never_called,
+        'trending_coins': never_called
+    }, 0.2, previous)
+
+    assert time.monotonic() - started < 1.0
+    assert snapshot['market_data']['price'][0] == 2.0
+    assert snapshot['stale'] == {'market_data': False, 'global_summary': True, 'trending_coins': True}
+    assert snapshot['global_summary'] == previous['global_summary']
+    assert 'trending_coins' not in snapshot
+    print("✅ 部分结果正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 刷新周期时间预算测试")
+    print("=" * 50)
+
+    test_deadline_caps_timeouts()
+    test_fetch_sections_partial()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
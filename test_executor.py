@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+多进程分析执行器测试（离线）
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.executor import AnalysisExecutor, SharedArrays, history_stats, pack_series
+from src.analysis.rolling import RollingAnalytics
+from src.data_sources.free_data_aggregator import FreeDataAggregator
+
+HISTORY_OUTPUTS = ['current_volume', 'avg_volume', 'volume_change', 'volatility', 'return', 'max_drawdown']
+
+
+def make_histories(size: int, seed: int = 0):
+    """构造长度不同（含空序列）的价格和交易量历史"""
+    rng = np.random.default_rng(seed)
+    prices = [100 * np.exp(np.cumsum(rng.normal(0, 0.02, rng.integers(0, 60)))) for _ in range(size)]
+    volumes = [rng.uniform(1e6, 2e6, len(values)) for values in prices]
+    return prices, volumes
+
+
+def square_kernel(rows, series):
+    """测试用内核：每行平方加上序列长度"""
+    values, offsets = series['history']
+    return {'result': rows['value'] ** 2 + np.diff(offsets)}
+
+
+class StubResponse:
+    """固定的market_chart响应"""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class StubSession:
+    """返回固定K线的会话"""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url, params=None):
+        self.urls.append(url)
+        return StubResponse({'prices': [[0, 10.0], [1, 12.0], [2, 9.0]],
+                             'total_volumes': [[0, 100.0], [1, 200.0], [2, 300.0]]})
+
+
+def test_shared_arrays_roundtrip():
+    """共享内存按布局连接后数据一致，创建方关闭时删除"""
+    print("🧪 测试共享内存数组")
+
+    values, offsets = pack_series([[1, 2], [], [3]])
+    assert values.tolist() == [1.0, 2.0, 3.0] and offsets.tolist() == [0, 2, 2, 3]
+
+    shared = SharedArrays.create({'a': np.arange(5, dtype=np.int64), 'b': np.array([0.5, 1.5])})
+    attached = SharedArrays.attach(shared.spec)
+    assert attached.arrays['a'].tolist() == [0, 1, 2, 3, 4]
+    attached.arrays['b'][1] = 9.0
+    assert shared.arrays['b'].tolist() == [0.5, 9.0]
+    attached.close()
+
+    name = shared.spec[0]
+    shared.close()
+    try:
+        SharedArrays.attach((name, {}))
+        assert False, "共享内存未删除"
+    except FileNotFoundError:
+        pass
+    print("✅ 共享内存数组正确")
+
+
+def test_pool_matches_inline():
+    """进程池分批计算与当前进程计算结果一致"""
+    print("🧪 测试进程池计算")
+
+    prices, volumes = make_histories(700)
+    inline = AnalysisExecutor(workers=0).map(history_stats, HISTORY_OUTPUTS, series={'prices': prices, 'volumes': volumes})
+
+    executor = AnalysisExecutor(workers=2, chunk_size=128, min_parallel=1)
+    try:
+        pooled = executor.map(history_stats, HISTORY_OUTPUTS, series={'prices': prices, 'volumes': volumes})
+        for name in HISTORY_OUTPUTS:
+            assert np.allclose(inline[name], pooled[name], equal_nan=True)
+
+        result = executor.map(square_kernel, ['result'], rows={'value': np.arange(300.0)},
+                              series={'history': [[0.0] * (i % 3) for i in range(300)]})
+        assert result['result'].tolist() == [i ** 2 + i % 3 for i in range(300)]
+    finally:
+        executor.shutdown()
+
+    # 只请求部分输出（交易量分析只用3个），超过并行阈值时走进程池
+    subset = ['current_volume', 'avg_volume', 'volume_change']
+    executor = AnalysisExecutor(workers=2, chunk_size=128)
+    try:
+        assert len(prices) > executor.min_parallel
+        pooled = executor.map(history_stats, subset, series={'prices': prices, 'volumes': volumes})
+        assert sorted(pooled) == sorted(subset)
+        for name in subset:
+            assert np.allclose(inline[name], pooled[name], equal_nan=True)
+    finally:
+        executor.shutdown()
+
+    # 与pandas逐个代币计算一致
+    index = next(i for i, values in enumerate(prices) if len(values) > 10)
+    series = pd.Series(prices[index])
+    assert np.isclose(inline['volatility'][index], np.log(series).diff().std() * 100)
+    assert np.isclose(inline['return'][index], (series.iloc[-1] / series.iloc[0] - 1) * 100)
+    assert np.isclose(inline['max_drawdown'][index], -(series / series.cummax() - 1).min() * 100)
+    assert np.isclose(inline['avg_volume'][index], volumes[index].mean())
+    empty = next(i for i, values in enumerate(prices) if len(values) == 0)
+    assert all(np.isnan(inline[name][empty]) for name in HISTORY_OUTPUTS)
+    print("✅ 进程池计算正确")
+
+
+def test_volume_analysis_uses_executor():
+    """没有滚动历史的代币由K线整批计算交易量统计"""
+    print("🧪 测试交易量分析")
+
+    aggregator = FreeDataAggregator(executor=AnalysisExecutor(workers=0))
+    aggregator.session = StubSession()
+    df = aggregator.get_volume_analysis(['bitcoin', 'ethereum'])
+
+    assert len(aggregator.session.urls) == 2
+    assert df['coin_id'].tolist() == ['bitcoin', 'ethereum']
+    row = df.iloc[0]
+    assert row['current_volume'] == 300.0 and row['avg_volume_7d'] == 200.0
+    assert row['volume_change_24h'] == 50.0 and row['volume_trend'] == 'increasing'
+    print("✅ 交易量分析正确")
+
+
+def test_volume_analysis_requires_full_windows():
+    """滚动状态覆盖完整的7d和24h窗口前仍使用K线"""
+    print("🧪 测试滚动状态覆盖要求")
+
+    aggregator = FreeDataAggregator(executor=AnalysisExecutor(workers=0))
+    aggregator.analytics = RollingAnalytics(windows={'1h': (12, 1), '24h': (24, 2), '7d': (48, 4)})
+
+    def feed(steps):
+        for step in steps:
+            aggregator.analytics.update(pd.DataFrame({
+                'coin_id': ['bitcoin'], 'price': [100.0], 'volume_24h': [1e6 + step],
+                'last_updated': [pd.Timestamp('2024-01-01', tz='UTC') + pd.Timedelta(minutes=5 * step)]
+            }))
+
+    feed(range(30))
+    aggregator.session = StubSession()
+    df = aggregator.get_volume_analysis(['bitcoin', 'ethereum'])
+    assert len(aggregator.session.urls) == 2
+    assert df.set_index('coin_id').loc['bitcoin', 'avg_volume_7d'] == 200.0
+
+    feed(range(30, 48))
+    aggregator.session = StubSession()
+    df = aggregator.get_volume_analysis(['bitcoin', 'ethereum']).set_index('coin_id')
+    assert aggregator.session.urls == [f'{aggregator.base_url}/coins/ethereum/market_chart']
+    assert df.loc['bitcoin', 'current_volume'] == 1e6 + 47
+    assert df.loc['bitcoin', 'avg_volume_7d'] == 1e6 + 23.5
+    print("✅ 滚动状态覆盖要求正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 多进程分析执行器测试")
+    print("=" * 50)
+
+    test_shared_arrays_roundtrip()
+    test_pool_matches_inline()
+    test_volume_analysis_uses_executor()
+    test_volume_analysis_requires_full_windows()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
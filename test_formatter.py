@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+数值格式化测试
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.utils.formatter import (format_number, format_currency, format_percentage, format_flow_value,
+                                 format_number_array, format_currency_array, format_percentage_array,
+                                 format_flow_value_array)
+
+SAMPLE_VALUES = [0, None, np.nan, 1, -1, 999.999, 1000, -1234.5, 1e6, 2.5e9, -3e12, 0.004, -0.004, np.float32(12.3)]
+
+
+def test_array_formatters():
+    """数组版本按阈值选择B/M/K，缺失值显示占位符"""
+    print("🧪 测试数组格式化")
+
+    values = pd.Series([1234.5, None, 2.5e9, -3e6, 0.5], dtype='Float64')
+    assert format_number_array(values).tolist() == ['1.23K', '0', '2.50B', '-3.00M', '0.50']
+    assert format_currency_array(values, 1).tolist() == ['$1.2K', '$0', '$2.5B', '$-3.0M', '$0.5']
+    assert format_percentage_array(values).tolist() == ['+1234.50%', 'N/A', '+2500000000.00%', '-3000000.00%', '+0.50%']
+    assert format_flow_value_array([0.004, -5, None]).tolist() == ['0.00', '-5.00', 'N/A']
+    assert format_currency_array([]).tolist() == []
+    print("✅ 数组格式化正确")
+
+
+def test_scalar_wrappers_match_arrays():
+    """标量版本与数组版本结果一致"""
+    print("🧪 测试标量包装")
+
+    pairs = [(format_number, format_number_array), (format_currency, format_currency_array),
+             (format_percentage, format_percentage_array), (format_flow_value, format_flow_value_array)]
+    for scalar, array in pairs:
+        for decimals in (0, 2):
+            expected = array(np.array(SAMPLE_VALUES, dtype=float), decimals).tolist()
+            assert [scalar(value, decimals) for value in SAMPLE_VALUES] == expected
+
+    assert format_currency(1_500_000) == '$1.50M'
+    assert format_percentage(None) == 'N/A'
+    assert format_number('abc') == 'abc'
+    print("✅ 标量包装正确")
+
+
+def test_bulk_speed():
+    """10000行格式化在毫秒级完成"""
+    print("🧪 测试批量格式化耗时")
+
+    values = np.random.default_rng(1).lognormal(10, 5, 10000)
+    started = time.perf_counter()
+    formatted = format_currency_array(values)
+    elapsed = time.perf_counter() - started
+
+    assert len(formatted) == 10000
+    assert elapsed < 0.2
+    print(f"✅ 10000行耗时 {elapsed * 1000:.1f}ms")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 数值格式化测试")
+    print("=" * 50)
+
+    test_array_formatters()
+    test_scalar_wrappers_match_arrays()
+    test_bulk_speed()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
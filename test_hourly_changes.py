@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+小时级价格变化测试（离线）
+验证批量快照计算与逐个回退逻辑
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data_sources.free_data_aggregator import FreeDataAggregator
+
+
+class FakeResponse:
+    """模拟HTTP响应"""
+
+    def __init__(self, data, status_code=200):
+        self._data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self._data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """记录请求的模拟Session"""
+
+    def __init__(self, markets):
+        self.markets = markets
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        self.calls.append(url)
+        if url.endswith('/coins/markets'):
+            ids = (params or {}).get('ids', '').split(',')
+            return FakeResponse([coin for coin in self.markets if coin['id'] in ids])
+        if url.endswith('/market_chart'):
+            return FakeResponse({'prices': [[1700000000000, 100.0], [1700003600000, 110.0]]})
+        return FakeResponse({}, 404)
+
+
+def make_coin(coin_id, price, change_1h):
+    return {
+        'id': coin_id, 'symbol': coin_id[:3], 'name': coin_id.title(),
+        'current_price': price, 'market_cap': price * 1000, 'market_cap_rank': 1,
+        'total_volume': price * 100, 'ath': price * 2,
+        'price_change_percentage_1h_in_currency': change_1h,
+        'price_change_percentage_24h_in_currency': 1.0,
+        'price_change_percentage_7d_in_currency': 2.0,
+        'last_updated': '2024-01-01T00:00:00.000Z'
+    }
+
+
+def test_hourly_changes_single_request():
+    """所有代币都在快照中时只发出一次请求"""
+    print("🧪 测试批量小时变化计算")
+
+    aggregator = FreeDataAggregator()
+    aggregator.session = FakeSession([make_coin('bitcoin', 110.0, 10.0), make_coin('ethereum', 90.0, -10.0)])
+
+    df = aggregator.get_hourly_price_changes(['bitcoin', 'ethereum'])
+
+    assert len(aggregator.session.calls) == 1
+    assert set(df['coin_id']) == {'bitcoin', 'ethereum'}
+    btc = df[df['coin_id'] == 'bitcoin'].iloc[0]
+    assert abs(btc['hour_ago_price'] - 100.0) < 1e-6
+    assert abs(btc['hour_change_percent'] - 10.0) < 1e-6
+    print("✅ 批量计算正确")
+
+
+def test_hourly_changes_fallback():
+    """快照中缺失的代币回退到 market_chart"""
+    print("🧪 测试缺失代币回退")
+
+    aggregator = FreeDataAggregator()
+    aggregator.session = FakeSession([make_coin('bitcoin', 110.0, 10.0)])
+
+    df = aggregator.get_hourly_price_changes(['bitcoin', 'solana'])
+
+    assert len(aggregator.session.calls) == 2
+    assert aggregator.session.calls[1].endswith('/coins/solana/market_chart')
+    sol = df[df['coin_id'] == 'solana'].iloc[0]
+    assert abs(sol['hour_change_percent'] - 10.0) < 1e-6
+    print("✅ 回退逻辑正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 小时级价格变化测试")
+    print("=" * 50)
+
+    test_hourly_changes_single_request()
+    test_hourly_changes_fallback()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+实时终端看板测试（离线）
+"""
+import sys
+import os
+import io
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.utils.live_view import LiveBoard, AnsiScreen, LiveDashboard, format_age, GREEN, RED
+
+
+def make_market_data(prices, changes=None) -> pd.DataFrame:
+    """构造市场数据"""
+    count = len(prices)
+    return pd.DataFrame({
+        'coin_id': [f'coin-{i}' for i in range(count)],
+        'rank': list(range(1, count + 1)),
+        'name': [f'Coin {i}' for i in range(count)],
+        'symbol': [f'c{i}' for i in range(count)],
+        'price': prices,
+        'change_1h': changes if changes is not None else [0.5] * count,
+        'change_24h': [None] * count,
+        'change_7d': [1.0] * count,
+        'volume_24h': [1e9] * count,
+        'market_cap': [1e10] * count
+    })
+
+
+def test_board_tracks_row_updates():
+    """只有显示值变化的行刷新更新时间，切换排序不需要新数据"""
+    print("🧪 测试行更新时间和排序")
+
+    board = LiveBoard()
+    assert board.update(make_market_data([10.0, 20.0, 30.0]), now=100) == 3
+    # 第2个代币价格变化，第1个的变化小于显示精度
+    assert board.update(make_market_data([10.001, 25.0, 30.0]), now=130) == 1
+
+    rows = board.rows(now=160)
+    assert [row[1][0] for row in rows] == ['Coin 0', 'Coin 1', 'Coin 2']
+    assert [row[-1][0] for row in rows] == ['1m00s', '30s', '1m00s']
+    assert rows[0][4] == ('+0.50%', GREEN) and rows[0][5] == ('N/A', '')
+
+    board.set_sort('p')
+    assert [row[1][0] for row in board.rows(now=160)] == ['Coin 2', 'Coin 1', 'Coin 0']
+    board.set_sort('p')
+    assert [row[1][0] for row in board.rows(now=160)] == ['Coin 0', 'Coin 1', 'Coin 2']
+    board.set_sort('a')
+    assert board.rows(now=160)[0][1][0] == 'Coin 1'
+    assert format_age(7260) == '2h01m'
+    print("✅ 行更新时间和排序正确")
+
+
+def test_screen_redraws_changed_cells_only():
+    """第二帧只输出变化的单元格"""
+    print("🧪 测试差分重绘")
+
+    stream = io.StringIO()
+    screen = AnsiScreen(stream, widths=[4, 8], aligns=['>', '<'])
+    assert screen.draw({0: [('标题', '')], 1: [('1', ''), ('BTC', GREEN)], 2: [('2', ''), ('ETH', '')]}) == 5
+
+    stream.seek(0)
+    stream.truncate()
+    assert screen.draw({0: [('标题', '')], 1: [('1', ''), ('BTC', RED)], 2: [('2', ''), ('ETH', '')]}) == 1
+    assert stream.getvalue() == '\x1b[2;6H\x1b[31mBTC     \x1b[0m'
+
+    # 消失的行整行清除
+    stream.seek(0)
+    stream.truncate()
+    assert screen.draw({0: [('标题', '')], 1: [('1', ''), ('BTC', RED)]}) == 0
+    assert stream.getvalue() == '\x1b[3;1H\x1b[2K'
+    print("✅ 差分重绘正确")
+
+
+def test_dashboard_frame_and_keys():
+    """看板画面包含表头、分页行和状态行，按键切换排序"""
+    print("🧪 测试看板画面")
+
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return make_market_data([float(i) for i in range(1, 11)], changes=[float(i) for i in range(10)])
+
+    dashboard = LiveDashboard(fetch, interval=5, screen=AnsiScreen(io.StringIO()))
+    assert dashboard.frame(page_size=4)[7][0][0].startswith('⏳')
+
+    assert dashboard._refresh()
+    frame = dashboard.frame(page_size=4)
+    assert frame[1][0][0] == '排名▲'
+    assert [frame[line][1][0] for line in range(3, 7)] == ['Coin 0', 'Coin 1', 'Coin 2', 'Coin 3']
+    assert frame[7][0][0].startswith('第 1-4/10 行')
+
+    assert dashboard.handle_key('h')
+    frame = dashboard.frame(page_size=4)
+    assert frame[3][1][0] == 'Coin 9' and frame[1][4][0] == '1h▼'
+    assert not dashboard.handle_key('q')
+    assert len(fetches) == 1
+    print("✅ 看板画面正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 实时终端看板测试")
+    print("=" * 50)
+
+    test_board_tracks_row_updates()
+    test_screen_redraws_changed_cells_only()
+    test_dashboard_frame_and_keys()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+市场数据表结构测试（离线）
+验证紧凑数据类型与内存占用
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.data_sources.market_schema import MARKET_SCHEMA, apply_market_schema, memory_usage
+
+
+def make_raw_frame(count=500):
+    """构造与CoinGecko /coins/markets 结构相同的原始数据"""
+    rows = []
+    for i in range(count):
+        rows.append({
+            'coin_id': f'coin-{i}',
+            'symbol': f'c{i % 50}',
+            'name': f'Coin {i % 50}',
+            'image': f'https://assets.coingecko.com/coins/images/{i}/large/coin.png?1696501400',
+            'price': 100.0 + i,
+            'market_cap': 1e9 + i,
+            'rank': i + 1 if i % 10 else None,
+            'fully_diluted_valuation': 2e9,
+            'volume_24h': 1e7 + i,
+            'high_24h': 101.0 + i,
+            'low_24h': 99.0 + i,
+            'price_change_24h': 1.0,
+            'change_1h': 0.5 if i % 7 else None,
+            'change_24h': -1.5,
+            'change_7d': 3.0,
+            'circulating_supply': 1e6,
+            'total_supply': 2e6,
+            'max_supply': None,
+            'ath': 200.0 + i,
+            'ath_change_percent': -50.0,
+            'ath_date': '2021-11-10T14:24:11.849Z',
+            'atl': 1.0,
+            'atl_date': '2015-10-20T00:00:00.000Z',
+            'roi': {'times': 10.5, 'currency': 'usd', 'percentage': 1050.0} if i % 3 else None,
+            'last_updated': '2024-01-01T00:00:00.000Z',
+            'timestamp': pd.Timestamp('2024-01-01 08:00:00'),
+            'volume_market_cap_ratio': 0.01,
+            'price_ath_ratio': 0.5
+        })
+    return pd.DataFrame(rows)
+
+
+def test_schema_dtypes():
+    """列裁剪与类型转换"""
+    print("🧪 测试表结构类型")
+
+    df = apply_market_schema(make_raw_frame())
+
+    assert 'image' not in df.columns
+    assert 'roi' not in df.columns
+    for column in df.columns:
+        assert column in MARKET_SCHEMA
+    assert str(df['symbol'].dtype) == 'category'
+    assert str(df['rank'].dtype) == 'Int32'
+    assert str(df['change_1h'].dtype) == 'Float32'
+    assert str(df['circulating_supply'].dtype) == 'float32'
+    assert df['change_1h'].isna().sum() > 0
+    assert df['rank'].isna().sum() > 0
+    print("✅ 类型转换正确")
+
+
+def test_schema_memory():
+    """紧凑表结构内存占用明显减少"""
+    print("🧪 测试内存占用")
+
+    raw = make_raw_frame()
+    compact = apply_market_schema(raw)
+
+    ratio = memory_usage(raw) / memory_usage(compact)
+    print(f"   原始: {memory_usage(raw):,} 字节, 紧凑: {memory_usage(compact):,} 字节, 缩减 {ratio:.1f} 倍")
+    assert ratio > 3
+    print("✅ 内存占用缩减")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 市场数据表结构测试")
+    print("=" * 50)
+
+    test_schema_dtypes()
+    test_schema_memory()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+运行指标测试（离线，上游请求发往本地模拟服务）
+"""
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import flask
+
+from src.utils.metrics import MetricsRegistry, Histogram, endpoint_label, metrics
+from src.web.metrics_endpoint import register_metrics_route
+from src.data_sources.transport import create_session
+from src.benchmark.mock_api import MarketFixtures, MockMarketServer
+
+
+def test_histogram_and_labels():
+    """直方图累计计数，接口路径中的代币ID替换为占位符"""
+    print("🧪 测试直方图和接口标签")
+
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.cumulative() == [('0.1', 1), ('1', 3), ('+Inf', 4)]
+    assert histogram.quantile(0.5) == 1.0 and histogram.quantile(1.0) == 3.0
+
+    assert endpoint_label('https://api.coingecko.com/api/v3/coins/bitcoin/market_chart?days=1') == '/api/v3/coins/{id}/market_chart'
+    assert endpoint_label('https://api.coingecko.com/api/v3/coins/markets') == '/api/v3/coins/markets'
+    print("✅ 直方图和接口标签正确")
+
+
+def test_session_records_requests():
+    """传输层记录每个上游请求的状态码、字节数和重试次数"""
+    print("🧪 测试上游请求指标")
+
+    metrics.reset()
+    with MockMarketServer(MarketFixtures(20), rate_limit_every=3) as server:
+        session = create_session(name='coingecko')
+        session.get(f"{server.coingecko_url}/coins/markets", params={'per_page': 20})
+        session.get(f"{server.coingecko_url}/coins/coin-1/market_chart", params={'days': 1})
+        # 第3个请求被限流，传输层按Retry-After重试
+        session.get(f"{server.coingecko_url}/global")
+        session.get(f"{server.coingecko_url}/coins/unknown/market_chart")
+
+    text = metrics.render_prometheus()
+    assert 'tokendata_upstream_requests_total{source="coingecko",endpoint="/api/v3/coins/markets",status="200"} 1' in text
+    assert 'tokendata_upstream_requests_total{source="coingecko",endpoint="/api/v3/coins/{id}/market_chart",status="200"} 1' in text
+    assert 'tokendata_upstream_requests_total{source="coingecko",endpoint="/api/v3/coins/{id}/market_chart",status="404"} 1' in text
+    assert 'tokendata_upstream_retries_total{source="coingecko",endpoint="/api/v3/global"} 1' in text
+    assert 'tokendata_upstream_request_duration_seconds_count{source="coingecko",endpoint="/api/v3/coins/markets"} 1' in text
+
+    bytes_line = next(line for line in text.splitlines()
+                      if line.startswith('tokendata_upstream_response_bytes_total{source="coingecko",endpoint="/api/v3/coins/markets"}'))
+    assert int(bytes_line.split()[-1]) > 0
+    print("✅ 上游请求指标正确")
+
+
+def test_stage_timing_and_route():
+    """阶段计时，并通过 /metrics 以Prometheus文本格式输出"""
+    print("🧪 测试阶段计时和指标接口")
+
+    registry = MetricsRegistry()
+
+    @registry.timed('slow_stage')
+    def slow():
+        time.sleep(0.02)
+
+    slow()
+    with registry.stage('table_render'):
+        pass
+
+    server = flask.Flask(__name__)
+    register_metrics_route(server, '/metrics', registry)
+    response = server.test_client().get('/metrics')
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'tokendata_stage_duration_seconds_count{stage="slow_stage"} 1' in text
+    assert 'tokendata_stage_duration_seconds_bucket{stage="slow_stage",le="0.01"} 0' in text
+    assert 'tokendata_stage_duration_seconds_bucket{stage="slow_stage",le="0.05"} 1' in text
+    assert 'table_render' in registry.format_stats()
+    print("✅ 阶段计时和指标接口正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 运行指标测试")
+    print("=" * 50)
+
+    test_histogram_and_labels()
+    test_session_records_requests()
+    test_stage_timing_and_route()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
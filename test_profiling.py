@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+刷新周期性能剖析测试（离线）
+"""
+import sys
+import os
+import time
+import pstats
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.profiling import CycleProfiler, profile_dir_from_argv, DEFAULT_PROFILE_DIR
+
+
+def busy_refresh():
+    """模拟一次刷新：计算、分配内存并等待"""
+    rows = [{'price': i * 1.5, 'name': f'coin-{i}'} for i in range(20000)]
+    time.sleep(0.05)
+    return len(rows)
+
+
+def test_cycle_outputs():
+    """每个周期写出 .prof / .collapsed / .txt"""
+    print("🧪 测试剖析输出")
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = CycleProfiler(directory, sample_interval=0.002)
+        refresh = profiler.wrap(busy_refresh, 'update_data')
+        assert refresh() == 20000
+        assert refresh() == 20000
+
+        files = sorted(os.listdir(directory))
+        assert len(files) == 6
+        assert all(name.startswith('update_data-') for name in files)
+
+        base = os.path.join(directory, files[0].rsplit('.', 1)[0])
+        stats = pstats.Stats(f"{base}.prof")
+        assert any(func[2] == 'busy_refresh' for func in stats.stats)
+
+        with open(f"{base}.collapsed", encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines and any('busy_refresh (test_profiling.py' in line for line in lines)
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+        with open(f"{base}.txt", encoding='utf-8') as f:
+            report = f.read()
+        assert '累计耗时最高' in report and '分配内存最多' in report
+        assert 'test_profiling.py' in report
+    print("✅ 剖析输出正确")
+
+
+def test_nested_cycle_not_profiled_twice():
+    """剖析期间的嵌套调用直接运行"""
+    print("🧪 测试嵌套周期")
+
+    with tempfile.TemporaryDirectory() as directory:
+        profiler = CycleProfiler(directory, memory=False)
+        inner = profiler.wrap(busy_refresh, 'fetch_snapshot')
+        outer = profiler.wrap(lambda: inner(), 'update_data')
+        outer()
+
+        assert profiler.cycles == 1
+        assert len(os.listdir(directory)) == 3
+    print("✅ 嵌套周期只剖析一次")
+
+
+def test_profile_dir_from_argv():
+    """--profile [DIR] / --profile=DIR"""
+    print("🧪 测试命令行参数")
+
+    assert profile_dir_from_argv(['web_app.py']) is None
+    assert profile_dir_from_argv(['web_app.py', '--profile']) == DEFAULT_PROFILE_DIR
+    assert profile_dir_from_argv(['web_app.py', '--profile', '--other']) == DEFAULT_PROFILE_DIR
+    assert profile_dir_from_argv(['web_app.py', '--profile', '/tmp/p']) == '/tmp/p'
+    assert profile_dir_from_argv(['web_app.py', '--profile=/tmp/q']) == '/tmp/q'
+    print("✅ 命令行参数正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 刷新周期性能剖析测试")
+    print("=" * 50)
+
+    test_cycle_outputs()
+    test_nested_cycle_not_profiled_twice()
+    test_profile_dir_from_argv()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
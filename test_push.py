@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+增量推送通道测试（离线）
+"""
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import flask
+
+from src.web.push import PushBroadcaster, PushCapacityError, compute_row_diff, register_sse_route
+
+
+def make_rows(coin_ids, price='$1.00'):
+    """构造按显示顺序排列的行数据"""
+    return [{'coin_id': coin_id, 'rank': f'#{i + 1}', 'price': price} for i, coin_id in enumerate(coin_ids)]
+
+
+def read_event(subscriber):
+    """取出连接队列中的一条消息并解析"""
+    message = subscriber.get_nowait()
+    event, data = message.strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_compute_row_diff():
+    """新增、删除和变化的行"""
+    print("🧪 测试行级差异")
+
+    old = {'bitcoin': {'price': '$1', 'rank': '#1'}, 'ethereum': {'price': '$2', 'rank': '#2'}}
+    new = {'bitcoin': {'price': '$3', 'rank': '#1'}, 'solana': {'price': '$4', 'rank': '#2'}}
+    diff = compute_row_diff(old, new)
+    assert diff == {'changed': {'bitcoin': {'price': '$3'}}, 'added': ['solana'], 'removed': ['ethereum']}
+
+    assert compute_row_diff(old, old) == {'changed': {}, 'added': [], 'removed': []}
+    assert compute_row_diff({}, new)['added'] == ['bitcoin', 'solana']
+    assert compute_row_diff(old, {})['removed'] == ['bitcoin', 'ethereum']
+    print("✅ 行级差异正确")
+
+
+def test_subscribe_publish_unsubscribe():
+    """连接注册、接收消息、关闭后注销，慢速客户端被断开"""
+    print("🧪 测试连接生命周期")
+
+    broadcaster = PushBroadcaster()
+    subscriber = broadcaster.subscribe()
+    stream = broadcaster.stream(subscriber)
+    assert broadcaster.subscriber_count == 1
+    assert next(stream) == "retry: 5000\n\n"
+
+    broadcaster.publish('diff', {'changed': {}})
+    assert next(stream) == 'event: diff\ndata: {"changed":{}}\n\n'
+
+    stream.close()
+    assert broadcaster.subscriber_count == 0
+
+    # 队列已满的连接被注销
+    broadcaster = PushBroadcaster(max_queue=1)
+    broadcaster.subscribe()
+    broadcaster.publish('diff', {})
+    assert broadcaster.subscriber_count == 1
+    broadcaster.publish('diff', {})
+    assert broadcaster.subscriber_count == 0
+    print("✅ 连接生命周期正确")
+
+
+def test_connection_cap():
+    """超过连接上限时拒绝订阅，SSE接口返回503"""
+    print("🧪 测试连接上限")
+
+    broadcaster = PushBroadcaster(max_connections=1)
+    subscriber = broadcaster.subscribe()
+    try:
+        broadcaster.subscribe()
+        assert False, "应拒绝超出上限的连接"
+    except PushCapacityError:
+        pass
+
+    server = flask.Flask(__name__)
+    register_sse_route(server, broadcaster, '/stream')
+    response = server.test_client().get('/stream?limit=20')
+    assert response.status_code == 503 and response.headers['Retry-After'] == '60'
+
+    # 连接关闭后可以重新订阅
+    stream = broadcaster.stream(subscriber)
+    next(stream)
+    stream.close()
+    broadcaster.subscribe(20)
+    assert broadcaster.subscriber_count == 1
+    print("✅ 连接上限正确")
+
+
+def test_diff_limited_to_visible_rows():
+    """每组连接只收到其显示范围内的差异和显示顺序"""
+    print("🧪 测试显示范围内的差异")
+
+    broadcaster = PushBroadcaster()
+    assert broadcaster.row_limit == 0
+    top2 = broadcaster.subscribe(2)
+    assert broadcaster.row_limit == 2
+    everything = broadcaster.subscribe()
+    assert broadcaster.row_limit is None
+
+    # 首次发布只记录基准
+    assert broadcaster.publish_rows(make_rows(['a', 'b', 'c', 'd'])) == {}
+    assert top2.empty() and everything.empty()
+
+    # c 上升到第2位，b 移出前2；d 的价格变化在前2之外
+    rows = make_rows(['a', 'c', 'b', 'd'])
+    rows[3]['price'] = '$9.00'
+    published = broadcaster.publish_rows(rows, {'last_update': '2024-01-01 00:00:00'})
+    assert set(published) == {2, None}
+
+    event, diff = read_event(top2)
+    assert event == 'diff' and top2.empty()
+    assert diff['added'] == ['c'] and diff['removed'] == ['b']
+    assert diff['changed'] == {}
+    assert diff['order'] == ['a', 'c'] and diff['last_update'] == '2024-01-01 00:00:00'
+
+    event, diff = read_event(everything)
+    assert diff['added'] == [] and diff['removed'] == []
+    assert diff['changed'] == {'c': {'rank': '#2'}, 'b': {'rank': '#3'}, 'd': {'price': '$9.00'}}
+    assert diff['order'] == ['a', 'c', 'b', 'd']
+
+    # 显示范围外的变化不推送给前2行的连接
+    rows = make_rows(['a', 'c', 'b', 'd'])
+    assert set(broadcaster.publish_rows(rows)) == {None}
+    assert top2.empty() and read_event(everything)[1]['changed'] == {'d': {'price': '$1.00'}}
+    print("✅ 显示范围内的差异正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 增量推送通道测试")
+    print("=" * 50)
+
+    test_compute_row_diff()
+    test_subscribe_publish_unsubscribe()
+    test_connection_cap()
+    test_diff_limited_to_visible_rows()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+滚动窗口分析测试（离线）
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.rolling import RollingStats, RollingAnalytics
+from src.analysis.flow_analyzer import FlowAnalyzer
+
+
+def make_snapshot(prices, volumes, minute: int) -> pd.DataFrame:
+    """构造一次市场快照"""
+    updated = pd.Timestamp('2024-01-01', tz='UTC') + pd.Timedelta(minutes=minute)
+    return pd.DataFrame({
+        'coin_id': [f'coin-{i}' for i in range(len(prices))],
+        'price': prices,
+        'volume_24h': volumes,
+        'last_updated': [updated] * len(prices)
+    })
+
+
+def test_window_stats_match_pandas():
+    """增量维护的窗口统计与pandas整体重算一致，缺失值不计入"""
+    print("🧪 测试滚动窗口统计")
+
+    rng = np.random.default_rng(3)
+    data = rng.normal(100, 10, (300, 4))
+    data[rng.random(data.shape) < 0.05] = np.nan
+
+    stats = RollingStats({'short': 12, 'long': 100}, ewma_spans=(10,), capacity=1)
+    stats.resize(4)
+    for row in data:
+        stats.push(np.arange(4), row)
+
+    frame = pd.DataFrame(data)
+    assert np.allclose(stats.means('short'), frame.tail(12).mean())
+    assert np.allclose(stats.sums('long'), frame.tail(100).sum())
+    assert np.allclose(stats.variances('long'), frame.tail(100).var())
+    assert np.array_equal(stats.counts('short'), frame.tail(12).count().to_numpy(dtype=float))
+    assert np.allclose(stats.ewmas(10)[0], frame.ewm(span=10, adjust=False, ignore_na=True).mean().iloc[-1])
+    assert np.allclose(stats.lag(5), data[-6], equal_nan=True)
+    print("✅ 滚动窗口统计正确")
+
+
+def test_analytics_volatility_and_dedupe():
+    """波动率来自维护的收益率状态，数据时间未变化的快照被忽略"""
+    print("🧪 测试波动率和去重")
+
+    rng = np.random.default_rng(5)
+    analytics = RollingAnalytics(windows={'1h': (12, 1), '24h': (288, 24)})
+    prices = np.array([100.0, 50.0])
+    returns = []
+    for step in range(40):
+        snapshot = make_snapshot(prices, [1e6 * (step + 1), 2e6], minute=5 * step)
+        assert analytics.update(snapshot) == 2
+        # 同一快照再次加入不计数
+        assert analytics.update(snapshot) == 0
+        step_returns = rng.normal(0, [0.001, 0.01])
+        returns.append(step_returns)
+        prices = prices * np.exp(step_returns)
+
+    volatility = analytics.volatility(['coin-0', 'coin-1', 'unknown'])
+    expected = np.std(np.array(returns[-13:-1]), axis=0, ddof=1) / np.sqrt(5 / 60) * 100
+    assert np.allclose(volatility['volatility_1h'].iloc[:2], expected)
+    assert volatility.loc['coin-1', 'volatility_24h'] > volatility.loc['coin-0', 'volatility_24h']
+    assert np.isnan(volatility.loc['unknown', 'volatility_1h'])
+
+    volume = analytics.volume_stats(['coin-0'])
+    assert volume.loc['coin-0', 'observations'] == 40
+    assert volume.loc['coin-0', 'current_volume'] == 4e7
+    assert volume.loc['coin-0', 'avg_volume_1h'] == np.mean(np.arange(29, 41)) * 1e6
+    assert np.isclose(volume.loc['coin-0', 'volume_change_1h'], (40 - 28) / 28 * 100)
+    print("✅ 波动率和去重正确")
+
+
+def test_windows_are_time_based():
+    """刷新快于时间步时同一时间步只计入一次，窗口填满才算覆盖完整时长"""
+    print("🧪 测试按时间划分的窗口")
+
+    analytics = RollingAnalytics(windows={'1h': (12, 1), '24h': (288, 24)})
+    assert analytics.step == 300
+
+    # 每5秒刷新一次（如实时看板），10分钟只计入2个时间步
+    for second in range(0, 600, 5):
+        snapshot = make_snapshot([100.0 + second], [1e6 + second], minute=0)
+        snapshot['last_updated'] += pd.Timedelta(seconds=second)
+        analytics.update(snapshot)
+    volume = analytics.volume_stats(['coin-0'])
+    assert volume.loc['coin-0', 'observations'] == 2
+    assert not volume.loc['coin-0', 'covered_1h'] and not volume.loc['coin-0', 'covered_24h']
+
+    # 按5分钟刷新满1小时后1h窗口覆盖完整，24h窗口仍未覆盖
+    for step in range(2, 12):
+        analytics.update(make_snapshot([100.0], [1e6], minute=5 * step))
+    volume = analytics.volume_stats(['coin-0', 'unknown'])
+    assert volume.loc['coin-0', 'covered_1h'] and not volume.loc['coin-0', 'covered_24h']
+    assert not volume.loc['unknown', 'covered_1h']
+
+    # 按代币总数一次分配，环形缓冲区为float32
+    analytics.reserve(1000)
+    assert analytics.volumes.ring.shape == (288, 1000) and analytics.volumes.ring.dtype == np.float32
+    assert analytics.nbytes < 2 * 288 * 1000 * 4 * 1.1
+    print("✅ 按时间划分的窗口正确")
+
+
+def test_volatility_scales_flow_confidence():
+    """流向置信度按波动率衡量变化幅度，缺失时沿用固定阈值"""
+    print("🧪 测试波动率置信度")
+
+    analyzer = FlowAnalyzer()
+    assert analyzer.analyze_volume_flow(2.0, 1e6)[2] == 0.2
+    assert analyzer.analyze_volume_flow(2.0, 1e6, price_volatility=2.0)[2] == 0.5
+    assert analyzer.analyze_volume_flow(-8.0, 1e6, price_volatility=2.0)[2] == 1.0
+    assert analyzer.analyze_volume_flow(2.0, 1e6, price_volatility=float('nan'))[2] == 0.2
+
+    flow = analyzer.get_comprehensive_flow({'change_1h': 1.0, 'change_24h': 3.0, 'volume_24h': 1e6,
+                                            'volatility_1h': 0.5, 'volatility_24h': np.nan})
+    assert flow['1h']['confidence'] == 1.0
+    assert np.isclose(flow['24h']['confidence'], 0.3)
+    print("✅ 波动率置信度正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 滚动窗口分析测试")
+    print("=" * 50)
+
+    test_window_stats_match_pandas()
+    test_analytics_volatility_and_dedupe()
+    test_windows_are_time_based()
+    test_volatility_scales_flow_confidence()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
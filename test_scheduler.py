@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+持续监控调度器测试（离线，使用模拟时钟）
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.scheduler import IntervalScheduler, OVERLAP_QUEUE
+
+
+class FakeClock:
+    """模拟墙钟，sleep直接推进时间"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_scheduler(clock, durations, interval=3600, **kwargs):
+    """每次运行按durations推进时钟的调度器，返回 (调度器, 开始时间列表)"""
+    starts = []
+    results = list(durations)
+
+    def job():
+        starts.append(clock.now)
+        duration, ok = results.pop(0)
+        clock.now += duration
+        return ok
+
+    scheduler = IntervalScheduler(job, interval, clock=clock.time, sleep=clock.sleep, jitter=0, **kwargs)
+    return scheduler, starts
+
+
+def test_aligned_ticks_without_drift():
+    """启动立即运行一次，之后落在整点，不随耗时漂移"""
+    print("🧪 测试整点对齐")
+
+    clock = FakeClock(10 * 3600 + 1234)
+    scheduler, starts = make_scheduler(clock, [(50, True), (120, True), (30, True)])
+    scheduler.run_forever(max_cycles=3)
+
+    assert starts == [10 * 3600 + 1234, 11 * 3600, 12 * 3600]
+    print("✅ 节拍对齐正确")
+
+
+def test_overlap_policies():
+    """超过间隔时：skip 等待下一个节拍，queue 立即补跑一次"""
+    print("🧪 测试重叠策略")
+
+    clock = FakeClock(0)
+    scheduler, starts = make_scheduler(clock, [(90, True), (10, True)], interval=60)
+    scheduler.run_forever(max_cycles=2)
+    assert starts == [0, 120]
+
+    clock = FakeClock(0)
+    scheduler, starts = make_scheduler(clock, [(90, True), (10, True), (10, True)], interval=60, overlap=OVERLAP_QUEUE)
+    reports = []
+    scheduler.on_cycle = reports.append
+    scheduler.run_forever(max_cycles=3)
+    assert starts == [0, 90, 120]
+    assert reports[0]['missed'] == 1
+    print("✅ 重叠策略正确")
+
+
+def test_failure_backoff():
+    """失败后指数退避，但不晚于下一个节拍"""
+    print("🧪 测试失败退避")
+
+    clock = FakeClock(0)
+    scheduler, starts = make_scheduler(clock, [(0, False), (0, False), (0, False), (0, True), (0, True)],
+                                       interval=300, backoff_base=30)
+    scheduler.run_forever(max_cycles=5)
+
+    assert starts == [0, 30, 90, 210, 300]
+    assert scheduler.failures == 0
+    print("✅ 失败退避正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 持续监控调度器测试")
+    print("=" * 50)
+
+    test_aligned_ticks_without_drift()
+    test_overlap_policies()
+    test_failure_backoff()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+列式快照接口测试（离线）
+"""
+import sys
+import os
+import gzip
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+from flask import Flask
+
+from src.data_sources.market_schema import apply_market_schema
+from src.web.snapshot_endpoint import encode_packed, decode_packed, register_snapshot_route
+
+
+def make_snapshot(count=500):
+    """构造市场快照"""
+    df = apply_market_schema(pd.DataFrame({
+        'coin_id': [f'coin-{i}' for i in range(count)],
+        'symbol': [f'c{i}' for i in range(count)],
+        'name': [f'Coin {i}' for i in range(count)],
+        'rank': range(1, count + 1),
+        'price': [100.0 + i for i in range(count)],
+        'change_1h': [None if i % 7 == 0 else 0.5 for i in range(count)],
+        'volume_24h': [1e6 + i for i in range(count)],
+        'market_cap': [1e9 - i for i in range(count)]
+    }))
+    return {
+        'market_data': df,
+        'global_summary': {'total_market_cap': 1e12, 'bitcoin_dominance': np.float64(50.0)},
+        'last_update': datetime(2024, 1, 1, 12, 0, 0),
+        'etag': 'abc123'
+    }
+
+
+def test_packed_roundtrip():
+    """打包格式编码后可无损解码"""
+    print("🧪 测试打包格式编解码")
+
+    snapshot = make_snapshot()
+    payload = encode_packed(snapshot['market_data'], {'global': snapshot['global_summary']})
+    header, df = decode_packed(payload)
+
+    assert header['rows'] == 500
+    assert header['global']['bitcoin_dominance'] == 50.0
+    assert all(column['offset'] % 8 == 0 for column in header['columns'])
+    assert df['coin_id'][3] == 'coin-3'
+    assert df['price'][10] == 110.0
+    assert np.isnan(df['change_1h'][7])
+    assert df['rank'][499] == 500
+    print(f"   负载大小: {len(payload)} 字节, gzip后 {len(gzip.compress(payload))} 字节")
+    print("✅ 编解码正确")
+
+
+def test_route_etag_and_gzip():
+    """接口支持gzip、ETag和304，同一快照只编码一次"""
+    print("🧪 测试快照接口")
+
+    snapshot = make_snapshot()
+    server = Flask(__name__)
+    endpoint = register_snapshot_route(server, lambda: snapshot)
+    client = server.test_client()
+
+    response = client.get('/api/snapshot', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    header, df = decode_packed(gzip.decompress(response.data))
+    assert header['etag'] == 'abc123' and len(df) == 500
+
+    etag = response.headers['ETag']
+    response = client.get('/api/snapshot', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert not response.data
+
+    cached = endpoint.get_payload(snapshot, 'packed', 'gzip')
+    assert endpoint.get_payload(snapshot, 'packed', 'gzip') is cached
+
+    # 市场数据未变化、元数据变化时ETag和负载也更新
+    snapshot['global_summary'] = {'total_market_cap': 2e12}
+    response = client.get('/api/snapshot', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+    assert decode_packed(gzip.decompress(response.data))[0]['global'] == {'total_market_cap': 2e12}
+    assert endpoint.get_payload(snapshot, 'packed', 'gzip') is not cached
+
+    etag = response.headers['ETag']
+    snapshot['last_update'] = datetime(2024, 1, 1, 12, 5, 0)
+    response = client.get('/api/snapshot', headers={'If-None-Match': etag})
+    assert response.status_code == 200 and decode_packed(response.data)[0]['last_update'] == '2024-01-01 12:05:00'
+
+    # 快照变化后重新编码
+    etag = response.headers['ETag']
+    snapshot['etag'] = 'def456'
+    response = client.get('/api/snapshot', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    print("✅ 接口行为正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 列式快照接口测试")
+    print("=" * 50)
+
+    test_packed_roundtrip()
+    test_route_etag_and_gzip()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
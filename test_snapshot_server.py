@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+本地快照服务测试（离线）
+"""
+import sys
+import os
+import json
+import socket
+import tempfile
+import http.client
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.data_sources.market_schema import apply_market_schema, market_data_etag
+from src.storage.snapshot_store import SnapshotStore
+from src.storage.snapshot_server import SnapshotServer
+
+
+def make_store(directory):
+    """写入一份快照"""
+    df = apply_market_schema(pd.DataFrame({
+        'coin_id': ['bitcoin', 'ethereum'],
+        'symbol': ['btc', 'eth'],
+        'name': ['Bitcoin', 'Ethereum'],
+        'rank': [1, 2],
+        'price': [60000.0, 3000.0],
+        'change_1h': [0.5, None]
+    }))
+    store = SnapshotStore(os.path.join(directory, 'snapshot.pkl'))
+    store.save({
+        'market_data': df,
+        'global_summary': {'total_market_cap': 2e12},
+        'stale': {'market_data': False},
+        'last_update': datetime.now(),
+        'etag': market_data_etag(df)
+    })
+    return store
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """通过Unix套接字发送HTTP请求"""
+
+    def __init__(self, path):
+        super().__init__('localhost')
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def test_http_snapshot():
+    """HTTP端口返回最新快照，支持ETag"""
+    print("🧪 测试HTTP快照服务")
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = SnapshotServer(make_store(directory), port=0).start()
+        try:
+            host, port = server.httpd.server_address[:2]
+            connection = http.client.HTTPConnection(host, port)
+            connection.request('GET', '/snapshot')
+            response = connection.getresponse()
+            data = json.loads(response.read())
+            assert response.status == 200
+            assert data['market_data'][0]['coin_id'] == 'bitcoin'
+            assert data['market_data'][1]['change_1h'] is None
+            assert data['global_summary']['total_market_cap'] == 2e12
+
+            connection.request('GET', '/snapshot', headers={'If-None-Match': response.getheader('ETag')})
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 304
+
+            connection.request('GET', '/healthz')
+            health = json.loads(connection.getresponse().read())
+            assert health['status'] == 'ok' and health['rows'] == 2
+        finally:
+            server.stop()
+    print("✅ HTTP快照服务正确")
+
+
+def test_unix_socket_snapshot():
+    """Unix套接字返回最新快照"""
+    print("🧪 测试Unix套接字快照服务")
+
+    if not hasattr(socket, 'AF_UNIX'):
+        print("⚠️ 当前系统不支持Unix套接字，跳过")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'snapshot.sock')
+        server = SnapshotServer(make_store(directory), socket_path=socket_path).start()
+        try:
+            connection = UnixHTTPConnection(socket_path)
+            connection.request('GET', '/snapshot')
+            data = json.loads(connection.getresponse().read())
+            assert [row['coin_id'] for row in data['market_data']] == ['bitcoin', 'ethereum']
+        finally:
+            server.stop()
+        assert not os.path.exists(socket_path)
+    print("✅ Unix套接字快照服务正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 本地快照服务测试")
+    print("=" * 50)
+
+    test_http_snapshot()
+    test_unix_socket_snapshot()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+共享快照存储测试（离线）
+"""
+import sys
+import os
+import tempfile
+import subprocess
+import multiprocessing
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.storage.snapshot_store import SnapshotStore, SNAPSHOT_PATH_ENV
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 在新的解释器中导入 web_app（与刷新进程相同），统计上游请求和推送线程
+IMPORT_CHECK = """
+import threading
+import requests
+calls = []
+requests.Session.request = lambda self, method, url, *args, **kwargs: calls.append(url)
+import web_app
+assert callable(web_app.fetch_snapshot)
+threads = [thread.name for thread in threading.enumerate() if thread.name == 'tokendata-push']
+print('result:', len(calls), len(threads))
+"""
+
+
+def _try_lock(path, queue):
+    """在子进程中尝试获取刷新进程锁"""
+    queue.put(SnapshotStore(path).acquire_refresher_lock())
+
+
+def test_save_and_load():
+    """快照写入与读取"""
+    print("🧪 测试快照读写")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(os.path.join(tmp, 'snapshot.pkl'))
+        assert store.load() is None
+
+        snapshot = {'market_data': pd.DataFrame({'coin_id': ['bitcoin'], 'price': [100.0]}), 'global_summary': {'total_market_cap': 1e12}}
+        store.save(snapshot)
+
+        reader = SnapshotStore(store.path)
+        loaded = reader.load()
+        assert loaded['global_summary']['total_market_cap'] == 1e12
+        assert loaded['market_data']['price'].iloc[0] == 100.0
+
+        # 文件未变化时返回同一对象
+        assert reader.load() is loaded
+    print("✅ 快照读写正确")
+
+
+def test_single_refresher_lock():
+    """同一快照只能有一个刷新进程"""
+    print("🧪 测试刷新进程锁")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'snapshot.pkl')
+        store = SnapshotStore(path)
+        assert store.acquire_refresher_lock()
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_try_lock, args=(path, queue))
+        process.start()
+        process.join(10)
+        assert queue.get(timeout=5) is False
+
+        store.release_refresher_lock()
+    print("✅ 刷新进程锁正确")
+
+
+def test_refresher_import_has_no_side_effects():
+    """刷新进程导入 web_app 时不获取数据、不启动推送线程"""
+    print("🧪 测试导入应用模块")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, **{SNAPSHOT_PATH_ENV: os.path.join(tmp, 'snapshot.pkl'),
+                                  'TOKENDATA_PUSH_INTERVAL': '60'})
+        result = subprocess.run([sys.executable, '-c', IMPORT_CHECK], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        lines = [line for line in result.stdout.splitlines() if line.startswith('result:')]
+        assert lines == ['result: 0 0'], result.stdout
+    print("✅ 导入应用模块没有副作用")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 共享快照存储测试")
+    print("=" * 50)
+
+    test_save_and_load()
+    test_single_refresher_lock()
+    test_refresher_import_has_no_side_effects()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+终端表格渲染测试（离线）
+"""
+import sys
+import os
+import io
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+import pandas as pd
+
+from src.utils.terminal_table import (TerminalTable, display_width, icon_cells, join_cells, number_cells,
+                                      text_cells, write_block)
+from token_monitor import TokenMonitor
+
+
+class StubAggregator:
+    """返回固定市场数据的聚合器"""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+
+    def get_hourly_market_data(self, limit: int = 20) -> pd.DataFrame:
+        return self.df.head(limit)
+
+
+class CountingStream(io.StringIO):
+    """统计写入次数的输出流"""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def make_market_data(size: int) -> pd.DataFrame:
+    """构造带缺失值的市场数据"""
+    rng = np.random.default_rng(7)
+    change_1h = rng.normal(0, 1, size)
+    change_1h[::5] = np.nan
+    return pd.DataFrame({
+        'rank': np.arange(1, size + 1),
+        'coin_id': [f'coin-{i}' for i in range(size)],
+        'name': [f'Coin {i}' for i in range(size)],
+        'symbol': [f'c{i}' for i in range(size)],
+        'price': rng.uniform(0.01, 50000, size),
+        'change_1h': pd.array(change_1h, dtype='Float32'),
+        'change_24h': pd.array([None if i % 7 == 0 else 1.5 for i in range(size)], dtype='Float32'),
+        'change_7d': [None] * size,
+        'volume_24h': rng.uniform(1e6, 1e10, size),
+        'market_cap': rng.uniform(1e7, 1e12, size)
+    })
+
+
+def test_cells_handle_missing():
+    """None/NaN显示为占位符，涨跌指示按符号选择"""
+    print("🧪 测试缺失值处理")
+
+    values = pd.Series([1234.5, None, np.nan, -2.0], dtype=object)
+    assert number_cells(values, prefix='$').tolist() == ['$1,234.50', 'N/A', 'N/A', '$-2.00']
+    assert number_cells(values, '+.1f', suffix='%').tolist() == ['+1234.5%', 'N/A', 'N/A', '-2.0%']
+    assert icon_cells(values).tolist() == ['🟢', '⚪', '⚪', '🔴']
+    assert text_cells(['btc', None], upper=True).tolist() == ['BTC', 'N/A']
+    assert join_cells(['a', 'b'], ['1', '2']).tolist() == ['a 1', 'b 2']
+    print("✅ 缺失值处理正确")
+
+
+def test_table_layout_and_single_write():
+    """列对齐，整张表一次写出"""
+    print("🧪 测试表格布局")
+
+    table = TerminalTable(20)
+    table.add_column('代币', text_cells(['BTC', 'ETH']), 6)
+    table.add_column('价格', number_cells([65000, 3500.5]), 10, '>')
+    lines = table.render().split('\n')
+
+    assert lines[0] == '代币' + ' ' * 9 + '价格'
+    assert display_width(lines[0]) == 17
+    assert lines[1] == '-' * 20
+    assert lines[2] == 'BTC     65,000.00'
+    assert lines[3] == 'ETH      3,500.50'
+
+    stream = CountingStream()
+    write_block(['标题', table.render()], stream)
+    assert stream.writes == 1
+    assert stream.getvalue().count('\n') == 5
+    print("✅ 表格布局正确")
+
+
+def test_token_changes_with_missing_values():
+    """print_token_changes 在变化值缺失时不再报错，1000行一次写出"""
+    print("🧪 测试主流代币变化表")
+
+    monitor = TokenMonitor()
+    monitor.aggregator = StubAggregator(make_market_data(1000))
+
+    stream = CountingStream()
+    stdout = sys.stdout
+    sys.stdout = stream
+    try:
+        started = time.perf_counter()
+        monitor.print_token_changes(limit=1000)
+        elapsed = time.perf_counter() - started
+    finally:
+        sys.stdout = stdout
+
+    output = stream.getvalue()
+    assert stream.writes == 1
+    assert output.count('Coin ') == 1000
+    assert 'N/A' in output
+    # 1小时变化缺失时显示24小时变化
+    assert '🟢 1.50%' in output
+    assert elapsed < 1.0
+    print(f"✅ 1000行渲染耗时 {elapsed * 1000:.1f}ms")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 终端表格渲染测试")
+    print("=" * 50)
+
+    test_cells_handle_missing()
+    test_table_layout_and_single_write()
+    test_token_changes_with_missing_values()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+代币表格渲染缓存测试（离线）
+"""
+import sys
+import os
+import threading
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import pandas as pd
+
+from src.data_sources.market_schema import apply_market_schema
+from src.web.token_table import TokenTableCache
+
+
+def make_market_frame(count=1000, price=100.0):
+    """构造全量代币快照"""
+    return apply_market_schema(pd.DataFrame({
+        'coin_id': [f'coin-{i}' for i in range(count)],
+        'symbol': [f'c{i}' for i in range(count)],
+        'name': [f'Coin {i}' for i in range(count)],
+        'rank': range(1, count + 1),
+        'price': [price + i for i in range(count)],
+        'change_1h': [0.5] * count,
+        'change_24h': [-1.0] * count,
+        'change_7d': [2.0] * count,
+        'volume_24h': [1e6 + i for i in range(count)],
+        'market_cap': [1e9 - i for i in range(count)]
+    }))
+
+
+class CountingTableCache(TokenTableCache):
+    """记录格式化行数的表格缓存"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.built = []
+
+    def build_rows(self, df):
+        self.built.append(len(df))
+        return super().build_rows(df)
+
+
+def test_formats_only_visible_rows():
+    """只格式化显示到的行，显示数量增加时只格式化新增的部分"""
+    print("🧪 测试按显示数量格式化")
+
+    cache = CountingTableCache(push_url='/stream')
+    cache.refresh(make_market_frame(), 'v1')
+    assert cache.built == []
+
+    table = cache.get_table(20)
+    assert cache.built == [20]
+    body = table.children[1].children
+    assert len(body) == 20
+    assert table.to_plotly_json()['props']['data-limit'] == '20'
+
+    rows = cache.get_rows(50)
+    assert cache.built == [20, 30] and len(rows) == 50
+    assert [row['coin_id'] for row in rows[18:22]] == ['coin-18', 'coin-19', 'coin-20', 'coin-21']
+    assert cache.get_rows(10) == rows[:10] and cache.built == [20, 30]
+    assert len(cache.get_rows()) == 1000 and cache.built == [20, 30, 950]
+    print("✅ 按显示数量格式化正确")
+
+
+def first_price(table) -> str:
+    """表格第一行的价格单元格"""
+    return table.children[1].children[0].children[2].children
+
+
+def test_table_reused_until_etag_changes():
+    """数据哈希不变时复用表格，变化时重新生成"""
+    print("🧪 测试表格缓存")
+
+    cache = CountingTableCache()
+    df = make_market_frame(100)
+    assert cache.refresh(df, 'v1') == 'v1'
+    etag, table = cache.get_table_with_etag(10)
+    assert etag == 'v1' and cache.get_table(10) is table
+
+    # 同一哈希再次刷新不重新格式化
+    assert cache.refresh(make_market_frame(100, price=500.0), 'v1') == 'v1'
+    assert cache.get_table(10) is table and cache.built == [10]
+
+    assert cache.refresh(make_market_frame(100, price=500.0), 'v2') == 'v2'
+    etag, rebuilt = cache.get_table_with_etag(10)
+    assert etag == 'v2' and rebuilt is not table
+    assert first_price(table) != first_price(rebuilt) and cache.built == [10, 10]
+    print("✅ 表格缓存正确")
+
+
+def test_concurrent_refresh_and_get():
+    """并发刷新和读取时，返回的数据哈希和表格始终属于同一份数据"""
+    print("🧪 测试并发刷新")
+
+    frames = {'cheap': make_market_frame(50, price=1.0), 'dear': make_market_frame(50, price=900.0)}
+    prices = {}
+    for etag, df in frames.items():
+        standalone = TokenTableCache()
+        standalone.refresh(df, etag)
+        prices[etag] = first_price(standalone.get_table(5))
+    assert prices['cheap'] != prices['dear']
+
+    cache = TokenTableCache()
+    cache.refresh(frames['cheap'], 'cheap')
+    stop = threading.Event()
+    mismatches = []
+
+    def refresher():
+        while not stop.is_set():
+            for etag, df in frames.items():
+                cache.refresh(df, etag)
+
+    def reader():
+        for i in range(300):
+            etag, table = cache.get_table_with_etag(5 + i % 3)
+            if first_price(table) != prices[etag]:
+                mismatches.append(etag)
+
+    threads = [threading.Thread(target=refresher) for _ in range(2)]
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads + readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert mismatches == []
+    print("✅ 并发刷新正确")
+
+
+def test_missing_rank():
+    """缺失的排名显示为 '-' 而不是 '#<NA>'"""
+    print("🧪 测试缺失排名")
+
+    df = make_market_frame(3)
+    df['rank'] = pd.array([1, None, 3], dtype='Int32')
+    rows = TokenTableCache().build_rows(df)
+    assert [row['rank'] for row in rows] == ['#1', '-', '#3']
+    print("✅ 缺失排名显示正确")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 代币表格渲染缓存测试")
+    print("=" * 50)
+
+    test_formats_only_visible_rows()
+    test_table_reused_until_etag_changes()
+    test_concurrent_refresh_and_get()
+    test_missing_rank()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+共享连接池与数据源延迟创建测试（离线）
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data_sources.circuit_breaker import CircuitBreaker
+from src.data_sources.transport import SessionRegistry, create_session, get_session, DEFAULT_TIMEOUT
+from src.data_sources.coingecko import CoinGeckoAPI
+from src.analysis.market_analyzer import MarketAnalyzer
+
+
+def test_session_registry():
+    """相同数据源和请求头共享Session"""
+    print("🧪 测试连接池注册表")
+
+    registry = SessionRegistry()
+    session = registry.get('coingecko')
+    assert registry.get('coingecko') is session
+    assert registry.get('coingecko', {'X-CG-API-KEY': 'k'}) is not session
+    assert registry.get('coingecko', {'X-CG-API-KEY': 'k'}).headers['X-CG-API-KEY'] == 'k'
+
+    registry.close('coingecko')
+    assert len(registry) == 0
+    assert registry.get('coingecko') is not session
+
+    assert CoinGeckoAPI().session is CoinGeckoAPI().session is get_session('coingecko')
+    print("✅ 连接池共享正确")
+
+
+def test_session_transport_config():
+    """Session挂载连接池、重试、默认超时和压缩请求头"""
+    print("🧪 测试传输层配置")
+
+    session = SessionRegistry().get('coingecko')
+    adapter = session.get_adapter('https://api.coingecko.com/api/v3/ping')
+    assert adapter._pool_maxsize == 16
+    assert adapter.max_retries.total == 2
+    assert 429 not in adapter.max_retries.status_forcelist
+    assert 'gzip' in session.headers['Accept-Encoding']
+    assert session.timeout == DEFAULT_TIMEOUT
+
+    # 未传timeout的请求使用默认超时（使用独立的熔断器，不影响进程共享的数据源熔断状态）
+    session = create_session(breaker=CircuitBreaker('test'))
+    adapter = session.get_adapter('https://api.coingecko.com/api/v3/ping')
+    captured = {}
+
+    def fake_send(request, **kwargs):
+        captured.update(kwargs)
+        raise RuntimeError('stop')
+
+    adapter.send = fake_send
+    try:
+        session.get('https://api.coingecko.com/api/v3/ping')
+    except RuntimeError:
+        pass
+    assert captured['timeout'] == DEFAULT_TIMEOUT
+    print("✅ 传输层配置正确")
+
+
+def test_analyzer_lazy_sources():
+    """MarketAnalyzer 只在首次访问时创建数据源"""
+    print("🧪 测试数据源延迟创建")
+
+    with MarketAnalyzer() as analyzer:
+        assert analyzer._coingecko is None and analyzer._binance is None
+        assert analyzer.glassnode is None
+
+        coingecko = analyzer.coingecko
+        assert analyzer.coingecko is coingecko
+        assert analyzer._binance is None
+        # Binance客户端创建后，ccxt交易所对象仍延迟到首次请求
+        assert analyzer.binance._exchange is None
+
+    assert analyzer._coingecko is None and analyzer._binance is None
+    print("✅ 数据源按需创建并在退出时释放")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 共享连接池测试")
+    print("=" * 50)
+
+    test_session_registry()
+    test_session_transport_config()
+    test_analyzer_lazy_sources()
+
+    print("\n" + "=" * 50)
+    print("✅ 测试完成！")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,28 @@
 """
 import sys
 import os
-import time
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import argparse
+from typing import TYPE_CHECKING
 
 # 添加src目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.data_sources.free_data_aggregator import FreeDataAggregator
+# 导入耗时统计需在其他模块导入前启用
+from src.utils.import_profile import ImportProfiler
+import_profiler = ImportProfiler.from_argv()
+
+# numpy/pandas（约0.4秒）及依赖它们的模块在用到的方法内导入，
+# 导入本模块、--help 和参数错误时不加载
+from src.storage.snapshot_store import SnapshotStore
+from src.storage.snapshot_server import SnapshotServer, DEFAULT_PORT
+from src.utils.scheduler import IntervalScheduler, OVERLAP_POLICIES, OVERLAP_SKIP, format_cycle_report
+from src.utils.metrics import metrics
+from src.utils.profiling import CycleProfiler, DEFAULT_PROFILE_DIR, PROFILE_DIR_ENV
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # 配置日志
 logging.basicConfig(
@@ -26,8 +39,16 @@ class TokenMonitor:
     """主流代币监控器"""
     
     def __init__(self):
+        from src.data_sources.free_data_aggregator import FreeDataAggregator
+        
         self.aggregator = FreeDataAggregator()
         
+        # 上一次获取的快照（后台模式下预算内未获取到的部分从这里沿用）
+        self.last_snapshot = {}
+        
+        # 告警引擎（通过 configure_alerts 启用）
+        self.alerts = None
+        
         # 定义主流代币（市值前20）
         self.major_tokens = [
             'bitcoin', 'ethereum', 'binancecoin', 'cardano', 'solana',
@@ -36,135 +57,152 @@ class TokenMonitor:
             'stellar', 'monero', 'algorand', 'vechain', 'filecoin'
         ]
     
+    def configure_alerts(self, rules, cooldown: float = None, path: str = None,
+                         webhook: str = None, live: bool = False):
+        """
+        启用告警：每次获取新快照后评估规则
+        
+        Args:
+            rules: 规则文本列表，如 "change_1h > 5"、"volume_zscore > 3"、"flow_24h flips"
+            cooldown: 同一规则同一代币的告警间隔（秒），None时使用告警引擎的默认值
+            path: 告警记录文件（JSON Lines）
+            webhook: 告警Webhook地址
+            live: 实时看板模式（告警写入日志显示在状态行，不直接打印）
+        """
+        from src.analysis.alerts import AlertEngine, AlertRule, StdoutSink, LogSink, FileSink, WebhookSink
+        
+        sinks = [LogSink() if live else StdoutSink()]
+        if path:
+            sinks.append(FileSink(path))
+        if webhook:
+            sinks.append(WebhookSink(webhook))
+        options = {} if cooldown is None else {'cooldown': cooldown}
+        self.alerts = AlertEngine([AlertRule.parse(rule, **options) for rule in rules], sinks,
+                                  analytics=self.aggregator.analytics)
+    
+    def check_alerts(self, df: 'pd.DataFrame') -> list:
+        """评估告警规则（未启用告警时不做任何事），返回本次告警"""
+        if self.alerts is None or df is None:
+            return []
+        return self.alerts.evaluate(df)
+    
+    @metrics.timed('print_token_changes')
     def print_token_changes(self, limit: int = 20, show_volume: bool = True):
-        """打印主流代币变化"""
-        print("\n" + "="*120)
-        print("📊 主流代币变化监控")
-        print("="*120)
-        print(f"⏰ 更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("-" * 120)
+        """打印主流代币变化，返回获取的市场数据（获取失败时返回False）"""
+        import numpy as np
+        from src.utils.terminal_table import (TerminalTable, banner, icon_cells, join_cells, number_cells, numeric,
+                                              text_cells, write_block)
+        
+        width = 120 if show_volume else 80
         
         # 获取市场数据
         df = self.aggregator.get_hourly_market_data(limit)
         
         if df.empty:
             print("❌ 无法获取市场数据")
-            return
-        
-        # 显示表头
+            return False
+        
+        df = df.head(limit)
+        change_1h = numeric(df['change_1h'])
+        change_24h = numeric(df['change_24h'])
+        
+        # 选择主要变化指标（优先显示1小时变化）
+        display_change = np.where(np.isnan(change_1h), change_24h, change_1h)
+        
+        table = TerminalTable(width)
+        table.add_column('排名', text_cells(df['rank']), 4)
+        table.add_column('代币', text_cells(df['name']), 15)
+        table.add_column('价格', number_cells(df['price'], prefix='$'), 12)
+        table.add_column('1h变化', join_cells(icon_cells(display_change), number_cells(display_change, '.2f', suffix='%')), 10)
+        table.add_column('24h变化', number_cells(change_24h, '.2f', suffix='%'), 10)
+        table.add_column('7d变化', number_cells(df['change_7d'], '.2f', suffix='%'), 10)
         if show_volume:
-            print(f"{'排名':<4} {'代币':<15} {'价格':<12} {'1h变化':<10} {'24h变化':<10} {'7d变化':<10} {'成交量':<15} {'市值':<15}")
-            print("-" * 120)
-        else:
-            print(f"{'排名':<4} {'代币':<15} {'价格':<12} {'1h变化':<10} {'24h变化':<10} {'7d变化':<10}")
-            print("-" * 80)
-        
-        # 显示数据
-        for _, row in df.head(limit).iterrows():
-            # 格式化价格变化
-            change_1h = row.get('change_1h', 0)
-            change_24h = row.get('change_24h', 0)
-            change_7d = row.get('change_7d', 0)
-            
-            # 选择主要变化指标（优先显示1小时变化）
-            display_change = change_1h if change_1h is not None else change_24h
-            
-            # 颜色指示器
-            if display_change is not None:
-                if display_change > 0:
-                    change_icon = "🟢"
-                elif display_change < 0:
-                    change_icon = "🔴"
-                else:
-                    change_icon = "⚪"
-            else:
-                change_icon = "⚪"
-                display_change = 0
-            
-            # 格式化输出
-            if show_volume:
-                print(f"{row['rank']:<4} {row['name']:<15} ${row['price']:<11,.2f} "
-                      f"{change_icon} {display_change:<8.2f}% "
-                      f"{change_24h:<8.2f}% {change_7d:<8.2f}% "
-                      f"${row['volume_24h']:<14,.0f} ${row['market_cap']:<14,.0f}")
-            else:
-                print(f"{row['rank']:<4} {row['name']:<15} ${row['price']:<11,.2f} "
-                      f"{change_icon} {display_change:<8.2f}% "
-                      f"{change_24h:<8.2f}% {change_7d:<8.2f}%")
+            table.add_column('成交量', number_cells(df['volume_24h'], ',.0f', prefix='$'), 15)
+            table.add_column('市值', number_cells(df['market_cap'], ',.0f', prefix='$'), 15)
+        
+        write_block(banner("📊 主流代币变化监控", 120, f"⏰ 更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                    + [table.render()])
+        return df
+    
+    def _print_ranking(self, title: str, df: 'pd.DataFrame', columns) -> None:
+        """
+        打印排行榜
+
+        Args:
+            title: 标题
+            df: 已排序、已截取的数据
+            columns: (列标题, 字符串数组, 列宽) 列表，排名列自动添加
+        """
+        import numpy as np
+        from src.utils.terminal_table import TerminalTable, banner, write_block
+        
+        table = TerminalTable(80)
+        table.add_column('排名', np.arange(1, len(df) + 1).astype(str), 4)
+        for column_title, cells, width in columns:
+            table.add_column(column_title, cells, width)
+        write_block(banner(title) + [table.render()])
     
     def print_top_gainers(self, limit: int = 10):
         """打印涨幅最大的代币"""
-        print("\n" + "="*80)
-        print("🚀 涨幅榜 - 过去1小时")
-        print("="*80)
+        from src.utils.terminal_table import banner, icon_cells, join_cells, number_cells, numeric, text_cells, write_block
         
         df = self.aggregator.get_hourly_market_data(50)  # 获取前50个代币
         
         if df.empty:
-            print("❌ 无法获取数据")
+            write_block(banner("🚀 涨幅榜 - 过去1小时") + ["❌ 无法获取数据"])
             return
         
-        # 按1小时涨幅排序
-        df_sorted = df.sort_values('change_1h', ascending=False)
-        
-        print(f"{'排名':<4} {'代币':<15} {'价格':<12} {'1h涨幅':<10} {'24h涨幅':<10}")
-        print("-" * 80)
+        # 按1小时涨幅排序，只显示上涨的代币
+        top = df.sort_values('change_1h', ascending=False).head(limit)
+        top = top[numeric(top['change_1h']) > 0]
         
-        for i, (_, row) in enumerate(df_sorted.head(limit).iterrows(), 1):
-            change_1h = row.get('change_1h', 0)
-            change_24h = row.get('change_24h', 0)
-            
-            if change_1h and change_1h > 0:
-                print(f"{i:<4} {row['name']:<15} ${row['price']:<11,.2f} "
-                      f"🟢 +{change_1h:<7.2f}% +{change_24h:<7.2f}%")
+        self._print_ranking("🚀 涨幅榜 - 过去1小时", top, [
+            ('代币', text_cells(top['name']), 15),
+            ('价格', number_cells(top['price'], prefix='$'), 12),
+            ('1h涨幅', join_cells(icon_cells(top['change_1h']), number_cells(top['change_1h'], '+.2f', suffix='%')), 10),
+            ('24h涨幅', number_cells(top['change_24h'], '+.2f', suffix='%'), 10)
+        ])
     
     def print_top_losers(self, limit: int = 10):
         """打印跌幅最大的代币"""
-        print("\n" + "="*80)
-        print("📉 跌幅榜 - 过去1小时")
-        print("="*80)
+        from src.utils.terminal_table import banner, icon_cells, join_cells, number_cells, numeric, text_cells, write_block
         
         df = self.aggregator.get_hourly_market_data(50)
         
         if df.empty:
-            print("❌ 无法获取数据")
+            write_block(banner("📉 跌幅榜 - 过去1小时") + ["❌ 无法获取数据"])
             return
         
-        # 按1小时跌幅排序
-        df_sorted = df.sort_values('change_1h', ascending=True)
+        # 按1小时跌幅排序，只显示下跌的代币
+        top = df.sort_values('change_1h', ascending=True).head(limit)
+        top = top[numeric(top['change_1h']) < 0]
         
-        print(f"{'排名':<4} {'代币':<15} {'价格':<12} {'1h跌幅':<10} {'24h跌幅':<10}")
-        print("-" * 80)
-        
-        for i, (_, row) in enumerate(df_sorted.head(limit).iterrows(), 1):
-            change_1h = row.get('change_1h', 0)
-            change_24h = row.get('change_24h', 0)
-            
-            if change_1h and change_1h < 0:
-                print(f"{i:<4} {row['name']:<15} ${row['price']:<11,.2f} "
-                      f"🔴 {change_1h:<7.2f}% {change_24h:<7.2f}%")
+        self._print_ranking("📉 跌幅榜 - 过去1小时", top, [
+            ('代币', text_cells(top['name']), 15),
+            ('价格', number_cells(top['price'], prefix='$'), 12),
+            ('1h跌幅', join_cells(icon_cells(top['change_1h']), number_cells(top['change_1h'], '.2f', suffix='%')), 10),
+            ('24h跌幅', number_cells(top['change_24h'], '.2f', suffix='%'), 10)
+        ])
     
     def print_volume_leaders(self, limit: int = 10):
         """打印成交量最大的代币"""
-        print("\n" + "="*80)
-        print("📊 成交量榜 - 24小时")
-        print("="*80)
+        from src.utils.terminal_table import banner, number_cells, text_cells, write_block
         
         df = self.aggregator.get_hourly_market_data(50)
         
         if df.empty:
-            print("❌ 无法获取数据")
+            write_block(banner("📊 成交量榜 - 24小时") + ["❌ 无法获取数据"])
             return
         
         # 按成交量排序
-        df_sorted = df.sort_values('volume_24h', ascending=False)
-        
-        print(f"{'排名':<4} {'代币':<15} {'价格':<12} {'成交量':<15} {'市值':<15}")
-        print("-" * 80)
-        
-        for i, (_, row) in enumerate(df_sorted.head(limit).iterrows(), 1):
-            print(f"{i:<4} {row['name']:<15} ${row['price']:<11,.2f} "
-                  f"${row['volume_24h']:<14,.0f} ${row['market_cap']:<14,.0f}")
+        top = df.sort_values('volume_24h', ascending=False).head(limit)
+        
+        self._print_ranking("📊 成交量榜 - 24小时", top, [
+            ('代币', text_cells(top['name']), 15),
+            ('价格', number_cells(top['price'], prefix='$'), 12),
+            ('成交量', number_cells(top['volume_24h'], ',.0f', prefix='$'), 15),
+            ('市值', number_cells(top['market_cap'], ',.0f', prefix='$'), 15)
+        ])
     
     def print_market_summary(self):
         """打印市场概况"""
@@ -188,6 +226,9 @@ class TokenMonitor:
     
     def print_specific_token(self, token_name: str):
         """打印特定代币的详细信息"""
+        import numpy as np
+        from src.utils.terminal_table import icon_cells, number_cells
+        
         print(f"\n" + "="*80)
         print(f"🔍 {token_name.upper()} 详细信息")
         print("="*80)
@@ -199,14 +240,12 @@ class TokenMonitor:
             print("❌ 无法获取数据")
             return
         
-        # 查找目标代币
-        token_data = None
-        for _, row in df.iterrows():
-            if (token_name.lower() in row['name'].lower() or 
-                token_name.lower() in row['symbol'].lower() or
-                token_name.lower() in row['coin_id'].lower()):
-                token_data = row
-                break
+        # 查找目标代币（名称、符号或ID包含关键字）
+        matches = np.zeros(len(df), dtype=bool)
+        for column in ('name', 'symbol', 'coin_id'):
+            matches |= df[column].astype(str).str.contains(token_name, case=False, regex=False).to_numpy()
+        
+        token_data = df[matches].iloc[0] if matches.any() else None
         
         if token_data is None:
             print(f"❌ 未找到代币: {token_name}")
@@ -217,11 +256,10 @@ class TokenMonitor:
         change_24h = token_data.get('change_24h', 0)
         change_7d = token_data.get('change_7d', 0)
         
-        # 变化指示器
-        def get_change_icon(change):
-            if change is None:
-                return "⚪"
-            return "🟢" if change > 0 else "🔴" if change < 0 else "⚪"
+        # 变化指示器和变化值（缺失时显示 N/A）
+        changes = [change_1h, change_24h, change_7d]
+        icons = icon_cells(changes)
+        change_texts = number_cells(changes, '+.2f', suffix='%')
         
         print(f"📊 基本信息:")
         print(f"  名称: {token_data['name']}")
@@ -232,9 +270,9 @@ class TokenMonitor:
         print(f"  24小时成交量: ${token_data['volume_24h']:,.0f}")
         
         print(f"\n📈 价格变化:")
-        print(f"  1小时变化: {get_change_icon(change_1h)} {change_1h:+.2f}%")
-        print(f"  24小时变化: {get_change_icon(change_24h)} {change_24h:+.2f}%")
-        print(f"  7天变化: {get_change_icon(change_7d)} {change_7d:+.2f}%")
+        print(f"  1小时变化: {icons[0]} {change_texts[0]}")
+        print(f"  24小时变化: {icons[1]} {change_texts[1]}")
+        print(f"  7天变化: {icons[2]} {change_texts[2]}")
         
         print(f"\n📊 其他指标:")
         print(f"  流通供应量: {token_data.get('circulating_supply', 0):,.0f}")
@@ -242,8 +280,9 @@ class TokenMonitor:
         print(f"  历史最高: ${token_data.get('ath', 0):,.2f}")
         print(f"  距离历史最高: {token_data.get('ath_change_percent', 0):.2f}%")
     
-    def run_full_monitor(self, limit: int = 20):
-        """运行完整监控"""
+    @metrics.timed('full_monitor')
+    def run_full_monitor(self, limit: int = 20) -> bool:
+        """运行完整监控，返回本轮是否成功获取市场数据"""
         print("🚀 主流代币变化监控器")
         print("="*120)
         
@@ -251,8 +290,9 @@ class TokenMonitor:
             # 市场概况
             self.print_market_summary()
             
-            # 主流代币变化
-            self.print_token_changes(limit)
+            # 主流代币变化（获取不到市场数据时本轮视为失败）
+            df = self.print_token_changes(limit)
+            ok = df is not False
             
             # 涨幅榜
             self.print_top_gainers(10)
@@ -263,31 +303,144 @@ class TokenMonitor:
             # 成交量榜
             self.print_volume_leaders(10)
             
+            # 告警
+            if ok:
+                self.check_alerts(df)
+            
             print("\n" + "="*120)
-            print("✅ 监控完成！")
+            print("✅ 监控完成！" if ok else "⚠️ 监控完成（市场数据获取失败）")
             print("="*120)
+            return ok
             
         except Exception as e:
             logger.error(f"监控过程中出现错误: {e}")
             print(f"❌ 监控失败: {e}")
+            return False
+    
+    def run_continuous_monitor(self, interval: int = 300, limit: int = 20, overlap: str = OVERLAP_SKIP):
+        """
+        运行持续监控
+        
+        按墙钟对齐的节拍运行（如间隔3600秒时落在整点），失败后按指数退避重试
+        
+        Args:
+            interval: 监控间隔（秒）
+            limit: 显示代币数量
+            overlap: 单轮超过间隔时的策略（skip跳过错过的节拍，queue结束后立即补跑）
+        """
+        from src.data_sources.deadline import Deadline
+        
+        print(f"🔄 启动持续监控 (间隔: {interval}秒, 重叠策略: {overlap})")
+        
+        def job():
+            # 每轮监控不超过监控间隔，上游挂起时放弃未完成的请求
+            with Deadline(interval):
+                return self.run_full_monitor(limit)
+        
+        scheduler = IntervalScheduler(job, interval, overlap=overlap,
+                                      on_cycle=lambda report: print("\n" + format_cycle_report(report)))
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            summary = scheduler.latency_summary()
+            if summary:
+                print(f"\n📈 共 {summary['cycles']} 轮，耗时 p50 {summary['p50']:.1f}s / p95 {summary['p95']:.1f}s / 最大 {summary['max']:.1f}s")
+            print("\n🛑 监控已停止")
+    
+    def run_live_monitor(self, interval: int = 5, limit: int = 200, overlap: str = OVERLAP_SKIP):
+        """
+        实时看板模式：原地刷新表格，只重绘变化的单元格，按键切换排序
+        
+        Args:
+            interval: 数据刷新间隔（秒）
+            limit: 代币数量
+            overlap: 单轮超过间隔时的策略
+        """
+        from src.data_sources.deadline import Deadline
+        from src.utils.live_view import LiveDashboard
+        
+        def fetch():
+            # 每轮请求不超过刷新间隔
+            with Deadline(interval):
+                df = self.aggregator.get_market_universe(limit)
+            self.check_alerts(df)
+            return df
+        
+        LiveDashboard(fetch, interval, title=f"📊 主流代币实时监控（前{limit}，每{interval}秒刷新）",
+                      overlap=overlap).run()
+        print("🛑 实时监控已停止")
     
-    def run_continuous_monitor(self, interval: int = 300, limit: int = 20):
-        """运行持续监控"""
-        print(f"🔄 启动持续监控 (间隔: {interval}秒)")
-        
-        while True:
-            try:
-                self.run_full_monitor(limit)
-                print(f"\n⏰ 下次更新: {datetime.now() + timedelta(seconds=interval)}")
-                time.sleep(interval)
-                
-            except KeyboardInterrupt:
-                print("\n🛑 监控已停止")
-                break
-            except Exception as e:
-                logger.error(f"持续监控错误: {e}")
-                print(f"❌ 监控错误: {e}")
-                time.sleep(60)  # 错误后等待1分钟再重试
+    def fetch_snapshot(self, limit: int = 250, budget: float = 30) -> dict:
+        """
+        获取一次完整快照（与Web应用的快照格式一致）
+        
+        Args:
+            limit: 代币数量
+            budget: 时间预算（秒）
+            
+        Returns:
+            快照数据
+        """
+        from src.data_sources.deadline import fetch_sections
+        from src.data_sources.market_schema import market_data_etag
+        
+        snapshot = fetch_sections({
+            'market_data': lambda: self.aggregator.get_market_universe(limit),
+            'global_summary': self.aggregator.get_global_market_data,
+            'trending_coins': self.aggregator.get_trending_coins
+        }, budget, previous=self.last_snapshot)
+        self.last_snapshot.update(snapshot)
+        
+        snapshot['last_update'] = datetime.now()
+        snapshot['etag'] = market_data_etag(snapshot.get('market_data'))
+        return snapshot
+    
+    def run_daemon(self, interval: int = 300, limit: int = 250, snapshot_path: str = None,
+                   host: str = '127.0.0.1', port: int = DEFAULT_PORT, socket_path: str = None,
+                   overlap: str = OVERLAP_SKIP):
+        """
+        后台模式：按节拍刷新快照写入共享存储，并通过本地HTTP/Unix套接字提供最新快照
+        
+        Args:
+            interval: 刷新间隔（秒）
+            limit: 代币数量
+            snapshot_path: 快照文件路径
+            host: HTTP监听地址
+            port: HTTP端口（0表示不启动HTTP服务）
+            socket_path: Unix套接字路径（设置后替代HTTP端口）
+            overlap: 单轮超过间隔时的策略
+        """
+        store = SnapshotStore(snapshot_path)
+        if not store.acquire_refresher_lock():
+            logger.error(f"已有进程在刷新 {store.path}，退出")
+            return
+        
+        server = None
+        if socket_path or port:
+            server = SnapshotServer(store, host, port, socket_path).start()
+        
+        def job():
+            snapshot = self.fetch_snapshot(limit, budget=interval)
+            store.save(snapshot)
+            fresh = not snapshot['stale'].get('market_data', True)
+            if fresh:
+                self.check_alerts(snapshot['market_data'])
+            return fresh
+        
+        def report(cycle):
+            logger.info(format_cycle_report(cycle).replace('\n', ' '))
+        
+        logger.info(f"后台模式启动: 每 {interval} 秒刷新 {limit} 个代币，写入 {store.path}")
+        scheduler = IntervalScheduler(job, interval, overlap=overlap, on_cycle=report)
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            logger.info("后台模式已停止")
+        finally:
+            if server is not None:
+                server.stop()
+            store.release_refresher_lock()
+
 
 def main():
     """主函数"""
@@ -299,16 +452,50 @@ def main():
     parser.add_argument('--summary', action='store_true', help='显示市场概况')
     parser.add_argument('--token', type=str, help='显示特定代币信息')
     parser.add_argument('--continuous', action='store_true', help='持续监控模式')
-    parser.add_argument('--interval', type=int, default=300, help='监控间隔(秒)')
+    parser.add_argument('--live', action='store_true', help='实时看板模式（原地刷新，按键切换排序）')
+    parser.add_argument('--interval', type=int, default=None, help='监控间隔(秒)，默认300，实时看板默认5')
     parser.add_argument('--simple', action='store_true', help='简化显示（不显示成交量）')
+    parser.add_argument('--overlap', choices=OVERLAP_POLICIES, default=OVERLAP_SKIP, help='持续监控时单轮超过间隔的处理策略')
+    parser.add_argument('--daemon', action='store_true', help='后台模式：刷新快照写入共享存储并提供本地快照服务（不打印表格）')
+    parser.add_argument('--snapshot-path', type=str, default=None, help='后台模式的快照文件路径')
+    parser.add_argument('--http-host', type=str, default='127.0.0.1', help='后台模式的快照服务地址')
+    parser.add_argument('--http-port', type=int, default=DEFAULT_PORT, help='后台模式的快照服务端口（0为关闭）')
+    parser.add_argument('--socket', type=str, default=None, help='后台模式改用Unix套接字提供快照服务')
+    parser.add_argument('--alert', action='append', default=[], metavar='RULE',
+                        help='告警规则（可重复），如 "change_1h > 5"、"volume_zscore > 3"、"flow_24h flips"')
+    parser.add_argument('--alert-cooldown', type=float, default=None, help='同一规则同一代币的告警间隔(秒，默认使用告警引擎的冷却时间)')
+    parser.add_argument('--alert-file', type=str, default=None, help='告警记录文件（JSON Lines）')
+    parser.add_argument('--alert-webhook', type=str, default=None, help='告警Webhook地址（POST JSON）')
+    parser.add_argument('--import-profile', action='store_true', help='打印模块导入耗时统计')
+    parser.add_argument('--stats', action='store_true', help='结束时打印上游请求和各阶段耗时统计')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_PROFILE_DIR, default=None, metavar='DIR',
+                        help=f'剖析每个刷新周期并写入目录（默认 {DEFAULT_PROFILE_DIR}，也可设置 {PROFILE_DIR_ENV}）')
     
     args = parser.parse_args()
+    if args.interval is None:
+        args.interval = 5 if args.live else 300
     
     monitor = TokenMonitor()
+    if args.alert:
+        try:
+            monitor.configure_alerts(args.alert, args.alert_cooldown, args.alert_file, args.alert_webhook, live=args.live)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    # 剖析每个刷新周期（完整监控 / 后台模式的快照获取）
+    profiler = CycleProfiler.from_config(args.profile)
+    if profiler is not None:
+        monitor.run_full_monitor = profiler.wrap(monitor.run_full_monitor, 'full_monitor')
+        monitor.fetch_snapshot = profiler.wrap(monitor.fetch_snapshot, 'fetch_snapshot')
     
     try:
-        if args.continuous:
-            monitor.run_continuous_monitor(args.interval, args.limit)
+        if args.daemon:
+            monitor.run_daemon(args.interval, args.limit, args.snapshot_path,
+                               args.http_host, args.http_port, args.socket, args.overlap)
+        elif args.live:
+            monitor.run_live_monitor(args.interval, args.limit, args.overlap)
+        elif args.continuous:
+            monitor.run_continuous_monitor(args.interval, args.limit, args.overlap)
         elif args.gainers:
             monitor.print_top_gainers(args.limit)
         elif args.losers:
@@ -326,6 +513,12 @@ def main():
     except Exception as e:
         logger.error(f"执行过程中出现错误: {e}")
         print(f"❌ 执行失败: {e}")
+    
+    if args.stats:
+        print("\n" + metrics.format_stats())
 
 if __name__ == "__main__":
     main()
+    
+    if import_profiler is not None:
+        print(import_profiler.report())
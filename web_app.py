@@ -6,59 +6,197 @@ TokenData Web应用
 import sys
 import os
 import dash
-from dash import dcc, html, Input, Output, callback
-import plotly.graph_objs as go
-import plotly.express as px
+import flask
+from dash import dcc, html, Input, Output, State, callback
 import pandas as pd
 from datetime import datetime
 import threading
+import logging
 import time
 
 # 添加src目录到Python路径
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.data_sources.free_data_aggregator import FreeDataAggregator
+from src.data_sources.deadline import fetch_sections
 from src.analysis.flow_analyzer import FlowAnalyzer
 from src.utils.formatter import format_currency, format_percentage, format_flow_value
+from src.storage.snapshot_store import SnapshotStore, SNAPSHOT_PATH_ENV
+from src.web.token_table import TokenTableCache, market_data_etag
+from src.web.data_table import create_data_table, query_page
+from src.web.push import MAX_CONNECTIONS_ENV, PushBroadcaster, register_sse_route
+from src.web.snapshot_endpoint import register_snapshot_route
+from src.web.metrics_endpoint import register_metrics_route
+from src.utils.metrics import metrics
+from src.utils.profiling import CycleProfiler, profile_dir_from_argv
+
+logger = logging.getLogger(__name__)
 
 # 初始化Dash应用
 app = dash.Dash(__name__, title="TokenData - 主流代币监控")
 app.config.suppress_callback_exceptions = True
 
+# WSGI入口（供gunicorn/waitress使用）
+server = app.server
+
 # 全局数据存储
 global_data = {
     'market_data': pd.DataFrame(),
     'global_summary': {},
     'trending_coins': [],
-    'last_update': None
+    'last_update': None,
+    'etag': None,
+    'stale': {}
 }
 
 # 数据聚合器
 aggregator = FreeDataAggregator()
 flow_analyzer = FlowAnalyzer()
 
-def update_data():
-    """更新数据"""
-    try:
+# 代币表格渲染缓存（每次数据刷新只格式化一次）
+table_cache = TokenTableCache(flow_analyzer, push_url='/stream', analytics=aggregator.analytics)
+
+# 增量推送通道（SSE），数据变化时只广播显示范围内变化的单元格；
+# 每个连接占用一个服务线程，超过连接上限（TOKENDATA_PUSH_MAX_CONNECTIONS，0为不限制）时返回503
+push_broadcaster = PushBroadcaster(max_connections=int(os.getenv(MAX_CONNECTIONS_ENV, '0')))
+register_sse_route(server, push_broadcaster, '/stream')
+
+# 共享快照存储（生产模式下由独立刷新进程写入，worker只读取）
+snapshot_store = SnapshotStore() if os.getenv(SNAPSHOT_PATH_ENV) else None
+
+# 获取的代币总数（全量分页表格可浏览的范围）
+universe_size = int(os.getenv('TOKENDATA_UNIVERSE_SIZE', '50'))
+# 滚动分析状态按代币总数一次分配（每个worker各一份，用于表格的波动率）
+aggregator.analytics.reserve(universe_size)
+
+# 推送刷新间隔（秒），0表示关闭
+push_interval = int(os.getenv('TOKENDATA_PUSH_INTERVAL', '60'))
+
+# 每次刷新的总时间预算（秒），超时的部分沿用上一次的数据并标记为过期
+refresh_budget = float(os.getenv('TOKENDATA_REFRESH_BUDGET', '30'))
+
+# 上一次获取的快照（预算内未获取到的部分从这里沿用）
+last_snapshot = {}
+
+def fetch_snapshot():
+    """获取一次完整的数据快照"""
+    snapshot = fetch_sections({
         # 获取市场数据
-        market_data = aggregator.get_hourly_market_data(limit=50)
-        global_data['market_data'] = market_data
-        
+        'market_data': lambda: aggregator.get_market_universe(universe_size),
         # 获取全球市场数据
-        global_summary = aggregator.get_global_market_data()
-        global_data['global_summary'] = global_summary
-        
+        'global_summary': aggregator.get_global_market_data,
         # 获取趋势代币
-        trending = aggregator.get_trending_coins()
-        global_data['trending_coins'] = trending
+        'trending_coins': aggregator.get_trending_coins
+    }, refresh_budget, previous=last_snapshot)
+    last_snapshot.update(snapshot)
+    
+    snapshot['last_update'] = datetime.now()
+    # 数据哈希，未变化的数据不重新渲染
+    snapshot['etag'] = market_data_etag(snapshot.get('market_data'))
+    return snapshot
+
+# 数据刷新锁：推送线程和Dash回调可能同时触发刷新，同一时间只有一个线程获取数据并更新
+# global_data 和聚合器状态（快照历史、滚动分析）
+update_lock = threading.Lock()
+
+@metrics.timed('refresh')
+def update_data():
+    """更新数据（其他线程正在刷新时等待其完成并使用其结果，不重复请求上游）"""
+    if not update_lock.acquire(blocking=False):
+        with update_lock:
+            return
+    try:
+        if snapshot_store is not None:
+            # 生产模式：读取刷新进程写入的共享快照
+            snapshot = snapshot_store.load()
+            if snapshot:
+                global_data.update(snapshot)
+                # 滚动分析按数据时间去重，重复读取同一快照不会重复计数
+                aggregator.analytics.update(snapshot.get('market_data'))
+            return
         
-        global_data['last_update'] = datetime.now()
+        global_data.update(fetch_snapshot())
         
     except Exception as e:
         print(f"数据更新失败: {e}")
+    finally:
+        update_lock.release()
 
-# 初始化数据
-update_data()
+# 性能剖析（--profile [DIR] 或 TOKENDATA_PROFILE_DIR）：每次刷新写出一个周期的剖析，
+# 生产模式下刷新进程剖析 fetch_snapshot，worker剖析 update_data
+profiler = CycleProfiler.from_config(profile_dir_from_argv())
+if profiler is not None:
+    fetch_snapshot = profiler.wrap(fetch_snapshot, 'fetch_snapshot')
+    update_data = profiler.wrap(update_data, 'update_data')
+
+def publish_updates():
+    """刷新数据并向推送通道广播行级差异"""
+    update_data()
+    
+    df = global_data['market_data']
+    if df.empty:
+        return
+    
+    table_cache.refresh(df, global_data.get('etag'))
+    last_update = global_data['last_update']
+    # 只格式化连接显示到的行
+    push_broadcaster.publish_rows(table_cache.get_rows(push_broadcaster.row_limit), {
+        'last_update': last_update.strftime('%Y-%m-%d %H:%M:%S') if last_update else None
+    })
+
+def start_push_thread(interval: int):
+    """启动后台推送线程"""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                publish_updates()
+            except Exception as e:
+                logger.error(f"推送更新失败: {e}")
+    
+    thread = threading.Thread(target=run, name='tokendata-push', daemon=True)
+    thread.start()
+    return thread
+
+def current_snapshot():
+    """当前快照（生产模式下先检查共享快照是否更新）"""
+    if snapshot_store is not None:
+        update_data()
+    return global_data
+
+# 列式快照接口，浏览器端渲染（index.html），每个快照只编码一次
+register_snapshot_route(server, current_snapshot, '/api/snapshot')
+
+# 运行指标（Prometheus文本格式）：上游接口请求/延迟/字节/状态码/重试和各阶段耗时
+register_metrics_route(server, '/metrics')
+
+@server.route('/lite')
+def lite_page():
+    """客户端渲染的静态页面"""
+    return flask.send_from_directory(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+
+# 进程是否已完成初始化（导入模块本身不获取数据、不启动线程，刷新进程只导入 fetch_snapshot）
+_initialized = False
+_init_lock = threading.Lock()
+
+def init():
+    """
+    初始化服务进程：获取首次数据，生产模式下启动推送线程（可重复调用，只执行一次）。
+    开发模式由 __main__ 调用，gunicorn/waitress 的worker在处理首个请求前调用
+    """
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        update_data()
+        # 生产模式下每个worker只需检查共享快照是否变化，开销很小
+        if snapshot_store is not None and push_interval > 0:
+            start_push_thread(min(push_interval, 2))
+        _initialized = True
+
+server.before_request(init)
 
 # 应用布局
 app.layout = html.Div([
@@ -88,23 +226,47 @@ app.layout = html.Div([
         html.Div([
             html.H3("📊 主流代币变化", style={'textAlign': 'center', 'color': '#2c3e50', 'marginBottom': '20px'}),
             html.Div([
-                html.Label("显示数量: ", style={'marginRight': '10px'}),
-                dcc.Dropdown(
-                    id='limit-dropdown',
+                dcc.RadioItems(
+                    id='table-mode',
                     options=[
-                        {'label': '前10个', 'value': 10},
-                        {'label': '前20个', 'value': 20},
-                        {'label': '前30个', 'value': 30},
-                        {'label': '前50个', 'value': 50}
+                        {'label': '精简表格', 'value': 'table'},
+                        {'label': '全量分页', 'value': 'datatable'}
                     ],
-                    value=20,
-                    style={'width': '120px', 'display': 'inline-block'}
+                    value='table',
+                    inline=True,
+                    inputStyle={'marginLeft': '10px', 'marginRight': '4px'}
                 )
-            ], style={'textAlign': 'center', 'marginBottom': '20px'}),
-            html.Div(id='token-table', style={'overflowX': 'auto'})
+            ], style={'textAlign': 'center', 'marginBottom': '10px'}),
+            html.Div([
+                html.Div([
+                    html.Label("显示数量: ", style={'marginRight': '10px'}),
+                    dcc.Dropdown(
+                        id='limit-dropdown',
+                        options=[
+                            {'label': '前10个', 'value': 10},
+                            {'label': '前20个', 'value': 20},
+                            {'label': '前30个', 'value': 30},
+                            {'label': '前50个', 'value': 50}
+                        ],
+                        value=20,
+                        style={'width': '120px', 'display': 'inline-block'}
+                    )
+                ], style={'textAlign': 'center', 'marginBottom': '20px'}),
+                html.Div(id='token-table', style={'overflowX': 'auto'}),
+                dcc.Store(id='token-table-etag'),
+                # 推送的行增删或顺序变化时由客户端脚本点击，按当前数据重新渲染表格（不请求上游）
+                html.Button(id='push-sync', n_clicks=0, style={'display': 'none'})
+            ], id='token-table-container'),
+            # 全量分页表格（服务端分页、排序、筛选，只传输当前页）
+            html.Div([
+                create_data_table('token-datatable')
+            ], id='token-datatable-container', style={'display': 'none'})
         ])
     ]),
     
+    # 当前快照版本（统一刷新入口写入，其他回调据此更新）
+    dcc.Store(id='snapshot-version'),
+    
     # 自动刷新间隔
     dcc.Interval(
         id='interval-component',
@@ -113,29 +275,35 @@ app.layout = html.Div([
     )
 ], style={'backgroundColor': '#f8f9fa', 'minHeight': '100vh', 'padding': '20px'})
 
-# 回调函数：更新最后更新时间
-@callback(
-    Output('last-update', 'children'),
-    [Input('refresh-btn', 'n_clicks'),
-     Input('interval-component', 'n_intervals')]
-)
-def update_last_update(n_clicks, n_intervals):
-    if n_clicks > 0 or n_intervals > 0:
-        update_data()
-    if global_data['last_update']:
-        return global_data['last_update'].strftime('%Y-%m-%d %H:%M:%S')
-    return "未更新"
+# 快照各部分的显示名称（用于提示哪些部分未及时更新）
+SECTION_LABELS = {
+    'market_data': '代币数据',
+    'global_summary': '市场概况',
+    'trending_coins': '趋势代币'
+}
 
-# 回调函数：更新市场概况
-@callback(
-    Output('market-summary', 'children'),
-    [Input('refresh-btn', 'n_clicks'),
-     Input('interval-component', 'n_intervals')]
-)
-def update_market_summary(n_clicks, n_intervals):
-    if n_clicks > 0 or n_intervals > 0:
-        update_data()
+def render_last_update():
+    """渲染最后更新时间"""
+    if not global_data['last_update']:
+        return "未更新"
     
+    text = global_data['last_update'].strftime('%Y-%m-%d %H:%M:%S')
+    fetched_at = global_data.get('fetched_at') or {}
+    stale = []
+    for name, is_stale in (global_data.get('stale') or {}).items():
+        if not is_stale:
+            continue
+        label = SECTION_LABELS.get(name, name)
+        if fetched_at.get(name):
+            minutes = int((datetime.now() - fetched_at[name]).total_seconds() // 60)
+            label += f"（{minutes}分钟前）"
+        stale.append(label)
+    if stale:
+        text += f" · 未及时更新，显示上次数据: {'、'.join(stale)}"
+    return text
+
+def render_market_summary():
+    """渲染市场概况"""
     summary = global_data['global_summary']
     if not summary:
         return html.Div("无法获取市场数据", style={'textAlign': 'center', 'color': '#e74c3c'})
@@ -190,106 +358,98 @@ def update_market_summary(n_clicks, n_intervals):
     
     return market_summary + [data_info]
 
-# 回调函数：更新代币表格
+def render_token_table(limit, client_etag):
+    """渲染代币表格，返回 (表格, 表格哈希)"""
+    df = global_data['market_data']
+    if df.empty:
+        return html.Div("无法获取代币数据", style={'textAlign': 'center', 'color': '#e74c3c'}), None
+    
+    # 数据和显示数量都未变化时，客户端已有的表格无需重新传输
+    etag = table_cache.refresh(df, global_data.get('etag'))
+    if etag and f"{etag}:{limit}" == client_etag:
+        return dash.no_update, dash.no_update
+    
+    # 表格和哈希一起读取，期间其他线程刷新时两者仍然对应
+    etag, table = table_cache.get_table_with_etag(limit)
+    return table, f"{etag}:{limit}" if etag else None
+
+def snapshot_version():
+    """当前快照版本，供依赖快照的回调判断是否需要更新"""
+    last_update = global_data['last_update']
+    return global_data.get('etag') or (last_update.isoformat() if last_update else None)
+
+# 回调函数：统一刷新入口
+# 每次触发最多刷新一次数据，再把结果分发到所有面板
 @callback(
-    Output('token-table', 'children'),
-    [Input('limit-dropdown', 'value'),
-     Input('refresh-btn', 'n_clicks'),
-     Input('interval-component', 'n_intervals')]
+    [Output('last-update', 'children'),
+     Output('market-summary', 'children'),
+     Output('token-table', 'children'),
+     Output('token-table-etag', 'data'),
+     Output('snapshot-version', 'data')],
+    [Input('refresh-btn', 'n_clicks'),
+     Input('interval-component', 'n_intervals'),
+     Input('limit-dropdown', 'value'),
+     Input('push-sync', 'n_clicks')],
+    [State('token-table-etag', 'data'),
+     State('snapshot-version', 'data')]
 )
-def update_token_table(limit, n_clicks, n_intervals):
-    if n_clicks > 0 or n_intervals > 0:
+def refresh_dashboard(n_clicks, n_intervals, limit, sync_clicks, client_etag, client_version):
+    triggered = {item['prop_id'].split('.')[0] for item in dash.callback_context.triggered}
+    
+    if snapshot_store is not None or (triggered & {'refresh-btn', 'interval-component'} and (n_clicks or n_intervals)):
         update_data()
     
-    df = global_data['market_data']
-    if df.empty:
-        return html.Div("无法获取代币数据", style={'textAlign': 'center', 'color': '#e74c3c'})
+    table, table_etag = render_token_table(limit, client_etag)
     
-    # 限制显示数量
-    df_display = df.head(limit)
+    # 只切换显示数量时，其他面板保持不变
+    if triggered == {'limit-dropdown'}:
+        return dash.no_update, dash.no_update, table, table_etag, dash.no_update
     
-    # 创建表格行
-    rows = []
-    for _, row in df_display.iterrows():
-        change_1h = row.get('change_1h', 0)
-        change_24h = row.get('change_24h', 0)
-        change_7d = row.get('change_7d', 0)
-        
-        # 变化颜色
-        def get_change_color(change):
-            if change is None:
-                return '#95a5a6'
-            return '#27ae60' if change > 0 else '#e74c3c' if change < 0 else '#95a5a6'
-        
-        # 计算交易量
-        volume_24h = row.get('volume_24h', 0)
-        volume_1h = volume_24h / 24  # 估算1小时交易量
-        volume_7d = volume_24h * 7   # 估算7天交易量
-        
-        # 使用资金流向分析器
-        token_data = {
-            'change_1h': change_1h,
-            'change_24h': change_24h,
-            'change_7d': change_7d,
-            'volume_24h': volume_24h
-        }
-        
-        flow_analysis = flow_analyzer.get_comprehensive_flow(token_data)
-        
-        # 获取流向数据
-        flow_1h_amount = flow_analysis.get('1h', {}).get('flow', 0)
-        flow_1h_color = flow_analysis.get('1h', {}).get('color', '#95a5a6')
-        flow_24h_amount = flow_analysis.get('24h', {}).get('flow', 0)
-        flow_24h_color = flow_analysis.get('24h', {}).get('color', '#95a5a6')
-        flow_7d_amount = flow_analysis.get('7d', {}).get('flow', 0)
-        flow_7d_color = flow_analysis.get('7d', {}).get('color', '#95a5a6')
-        
-        rows.append(html.Tr([
-            html.Td(f"#{row['rank']}", style={'textAlign': 'center', 'fontWeight': 'bold'}),
-            html.Td([
-                html.Div(row['name'], style={'fontWeight': 'bold'}),
-                html.Div(row['symbol'].upper(), style={'fontSize': '12px', 'color': '#7f8c8d'})
-            ]),
-            html.Td(format_currency(row['price'], 2), style={'textAlign': 'right', 'fontWeight': 'bold'}),
-            html.Td(format_percentage(change_1h, 2), 
-                   style={'textAlign': 'right', 'color': get_change_color(change_1h), 'fontWeight': 'bold'}),
-            html.Td(format_percentage(change_24h, 2), 
-                   style={'textAlign': 'right', 'color': get_change_color(change_24h)}),
-            html.Td(format_percentage(change_7d, 2), 
-                   style={'textAlign': 'right', 'color': get_change_color(change_7d)}),
-            html.Td(format_currency(volume_1h, 2), style={'textAlign': 'right', 'fontSize': '12px'}),
-            html.Td(format_currency(volume_24h, 2), style={'textAlign': 'right'}),
-            html.Td(format_currency(volume_7d, 2), style={'textAlign': 'right', 'fontSize': '12px'}),
-            html.Td(format_currency(flow_1h_amount, 2), style={'textAlign': 'center', 'color': flow_1h_color, 'fontWeight': 'bold'}),
-            html.Td(format_currency(flow_24h_amount, 2), style={'textAlign': 'center', 'color': flow_24h_color}),
-            html.Td(format_currency(flow_7d_amount, 2), style={'textAlign': 'center', 'color': flow_7d_color, 'fontSize': '12px'})
-        ]))
-    
-    return html.Table([
-        html.Thead(html.Tr([
-            html.Th("排名", style={'textAlign': 'center'}),
-            html.Th("代币", style={'textAlign': 'left'}),
-            html.Th("价格", style={'textAlign': 'right'}),
-            html.Th("1h变化", style={'textAlign': 'right'}),
-            html.Th("24h变化", style={'textAlign': 'right'}),
-            html.Th("7d变化", style={'textAlign': 'right'}),
-            html.Th("1h成交量", style={'textAlign': 'right'}),
-            html.Th("24h成交量", style={'textAlign': 'right'}),
-            html.Th("7d成交量", style={'textAlign': 'right'}),
-            html.Th("1h流向", style={'textAlign': 'center'}),
-            html.Th("24h流向", style={'textAlign': 'center'}),
-            html.Th("7d流向", style={'textAlign': 'center'})
-        ], style={'backgroundColor': '#34495e', 'color': 'white'})),
-        html.Tbody(rows)
-    ], style={'width': '100%', 'borderCollapse': 'collapse', 'backgroundColor': 'white', 'borderRadius': '8px', 'overflow': 'hidden'})
+    version = snapshot_version()
+    return (render_last_update(), render_market_summary(), table, table_etag,
+            version if version != client_version else dash.no_update)
 
+# 回调函数：切换表格模式
+@callback(
+    [Output('token-table-container', 'style'),
+     Output('token-datatable-container', 'style')],
+    [Input('table-mode', 'value')]
+)
+def switch_table_mode(mode):
+    if mode == 'datatable':
+        return {'display': 'none'}, {'display': 'block'}
+    return {'display': 'block'}, {'display': 'none'}
 
+# 回调函数：全量分页表格（快照版本变化时随统一刷新入口一起触发）
+@callback(
+    [Output('token-datatable', 'data'),
+     Output('token-datatable', 'page_count')],
+    [Input('token-datatable', 'page_current'),
+     Input('token-datatable', 'page_size'),
+     Input('token-datatable', 'sort_by'),
+     Input('token-datatable', 'filter_query'),
+     Input('snapshot-version', 'data')]
+)
+def update_token_datatable(page_current, page_size, sort_by, filter_query, version):
+    if snapshot_store is not None:
+        update_data()
+    
+    return query_page(global_data['market_data'], page_current, page_size, sort_by, filter_query)
 
 if __name__ == '__main__':
     print("🚀 启动TokenData Web应用...")
     print("📱 访问地址: http://127.0.0.1:8050")
     print("🔄 数据每5分钟自动更新")
+    print("💡 多worker生产部署请使用: python serve.py --workers 4")
+    print("⚡ 客户端渲染页面: http://127.0.0.1:8050/lite")
     print("=" * 50)
     
+    # 调试模式下重载器的父进程只负责监视文件，数据和推送线程只在实际服务的子进程中初始化，避免重复请求上游
+    debug = True
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init()
+        if push_interval > 0:
+            start_push_thread(push_interval)
+    
     # 启动应用
-    app.run_server(debug=True, host='127.0.0.1', port=8050)
+    app.run_server(debug=debug, host='127.0.0.1', port=8050)